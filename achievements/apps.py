@@ -8,3 +8,16 @@ class AchievementsConfig(AppConfig):
     
     def ready(self):
         import achievements.signals
+        from django.db.models.signals import post_migrate
+
+        post_migrate.connect(_rebuild_leaderboards_after_migrate, sender=self)
+
+
+def _rebuild_leaderboards_after_migrate(sender, **kwargs):
+    # Every deploy migrates: rebuild the Redis boards rather than wait for
+    # the nightly run (a no-op without USE_REDIS_CACHE).
+    from django.conf import settings
+
+    if getattr(settings, 'USE_REDIS_CACHE', False):
+        from achievements.services.leaderboards import queue_rebuild
+        queue_rebuild()
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from achievements.services.award_rules import RULES, run_rules
+
+
+class Command(BaseCommand):
+    help = 'Apply the declarative achievement award rules (achievements.services.award_rules)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rule',
+            action='append',
+            dest='rules',
+            help='Rule slug to apply (can be repeated; default: every rule)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the newly eligible users per rule without awarding'
+        )
+
+    def handle(self, *args, **options):
+        known = {rule.slug: rule for rule in RULES}
+        unknown = set(options['rules'] or ()) - set(known)
+        if unknown:
+            raise CommandError(f"Unknown rule(s): {', '.join(sorted(unknown))}")
+
+        results = run_rules(options['rules'], dry_run=options['dry_run'])
+        for slug, result in results.items():
+            if 'skipped' in result:
+                self.stdout.write(self.style.WARNING(f"{slug}: skipped ({result['skipped']})"))
+            elif options['dry_run']:
+                self.stdout.write(f"{slug}: {result['eligible']} eligible — {known[slug].description}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{slug}: {result['awarded']} awarded"))
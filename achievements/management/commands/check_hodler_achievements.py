@@ -3,69 +3,38 @@ Management command to check and award Hodler achievements
 Should be run daily via cron job
 """
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import timedelta
-from users.models import User
-from achievements.models import AchievementType, UserAchievement
-from django.db.models import Q, F
+
+from achievements.services.award_rules import run_rules
 
 
 class Command(BaseCommand):
     help = 'Check and award Hodler achievements for users who have held CONFIO for 30 days'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the newly eligible users'
+        )
+
     def handle(self, *args, **options):
-        try:
-            # Get the hodler achievement type
-            hodler_achievement = AchievementType.objects.get(slug='hodler_30_dias')
-            
-            # Find users who:
-            # 1. Signed up at least 30 days ago
-            # 2. Don't have the hodler achievement yet
-            # 3. Have a CONFIO balance > 0
-            cutoff_date = timezone.now() - timedelta(days=30)
-            
-            eligible_users = User.objects.filter(
-                date_joined__lte=cutoff_date,
-                is_active=True
-            ).exclude(
-                achievements__achievement_type=hodler_achievement
-            )
-            
-            awarded_count = 0
-            
-            for user in eligible_users:
-                # Check if user has maintained CONFIO balance for 30 days
-                # For now, we'll check if they have any CONFIO rewards earned
-                if UserAchievement.objects.filter(
-                    user=user,
-                    status__in=['earned', 'claimed'],
-                    earned_at__lte=cutoff_date
-                ).exists():
-                    # Award the hodler achievement
-                    UserAchievement.objects.create(
-                        user=user,
-                        achievement_type=hodler_achievement,
-                        status='earned',
-                        earned_at=timezone.now()
-                    )
-                    awarded_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Awarded Hodler achievement to {user.username}'
-                        )
-                    )
-            
+        # Set-based: one eligibility query, bulk inserts per chunk
+        # (achievements.services.award_rules).
+        result = run_rules(['hodler_30_dias'], dry_run=options['dry_run'])['hodler_30_dias']
+
+        if result.get('skipped') == 'missing_type':
             self.stdout.write(
-                self.style.SUCCESS(
-                    f'Successfully awarded {awarded_count} Hodler achievements'
-                )
+                self.style.ERROR('Hodler achievement type not found')
             )
-            
-        except AchievementType.DoesNotExist:
+        elif result.get('skipped'):
             self.stdout.write(
-                self.style.ERROR('Hodler achievement type not found')
+                self.style.WARNING(f"Hodler achievements skipped: {result['skipped']}")
             )
-        except Exception as e:
+        elif options['dry_run']:
+            self.stdout.write(f"{result['eligible']} user(s) eligible for the Hodler achievement")
+        else:
             self.stdout.write(
-                self.style.ERROR(f'Error processing hodler achievements: {str(e)}')
-            )
\ No newline at end of file
+                self.style.SUCCESS(
+                    f"Successfully awarded {result['awarded']} Hodler achievements"
+                )
+            )
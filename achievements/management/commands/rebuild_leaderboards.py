@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from achievements.services.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Redis achievement and ambassador leaderboards from the database'
+
+    def handle(self, *args, **options):
+        result = rebuild_leaderboards()
+        if not result:
+            self.stdout.write('USE_REDIS_CACHE is off: leaderboards are read from the database')
+            return
+        for board, members in result.items():
+            self.stdout.write(f'{board}: {members}')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(result)} leaderboard(s)'))
@@ -744,6 +744,31 @@ class ReferralRewardEvent(models.Model):
         return trigger_names.get(self.trigger, self.trigger)
 
 
+class ReferralRewardOutbox(models.Model):
+    """
+    One qualifying event waiting for the referral reward pipeline
+    (achievements.services.referral_pipeline). Written inside the source
+    save's transaction; deleted once evaluated.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    event = models.CharField(max_length=40)
+    amount = models.DecimalField(max_digits=19, decimal_places=6, null=True, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'referral_reward_outbox'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.event}"
+
+
 # Backwards compatibility alias for legacy imports
 InfluencerReferral = UserReferral
 
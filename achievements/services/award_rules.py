@@ -0,0 +1,233 @@
+"""
+Set-based achievement awarding.
+
+The periodic award jobs walked every candidate user in Python: an .exists()
+per user, then an individual UserAchievement.objects.create — and with it a
+post_save round (activity touch, notification) per row. The daily hodler
+pass grew linearly with the user base.
+
+Each award is now declared as an AwardRule: the achievement slug plus a
+function that returns the queryset of users eligible at `now`. run_rules()
+turns every rule into ONE set-based selection — the rule's queryset with
+everyone already holding the achievement removed by a NOT EXISTS — and
+awards it in keyset chunks of CHUNK users:
+
+  - UserAchievement rows inserted with bulk_create(ignore_conflicts=True);
+  - the activity touch the achievement_activity receiver would have done,
+    as one UPDATE per chunk, and the leaderboard entries;
+  - the ACHIEVEMENT_EARNED notifications (only while ACHIEVEMENTS_ENABLED,
+    like the receiver) bulk-inserted per chunk, then pushed to the whole
+    chunk's devices in one send_templated_notifications batch.
+
+dry_run=True only counts each rule's newly eligible users. A cache lock keeps
+two runs from awarding the same chunk: the (user, type, deleted_at) unique
+key does not stop duplicates while deleted_at is NULL, so ignore_conflicts
+alone would not.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 1000
+LOCK_KEY = 'achievements_award_rules_lock'
+LOCK_TTL = 30 * 60
+
+
+@dataclass(frozen=True)
+class AwardRule:
+    slug: str
+    description: str
+    eligible: Callable[[datetime], QuerySet]
+
+
+def _hodler_30_dias(now: datetime) -> QuerySet:
+    # "Held CONFIO for 30 days" is approximated, as it always was, by an
+    # account at least 30 days old with a reward earned at least 30 days ago.
+    from achievements.models import UserAchievement
+    from users.models import User
+
+    cutoff = now - timedelta(days=30)
+    return User.objects.filter(date_joined__lte=cutoff, is_active=True).filter(
+        Exists(UserAchievement.objects.filter(
+            user=OuterRef('pk'),
+            status__in=['earned', 'claimed'],
+            earned_at__lte=cutoff,
+        ))
+    )
+
+
+RULES = (
+    AwardRule(
+        slug='hodler_30_dias',
+        description='Account 30+ days old holding a reward earned 30+ days ago',
+        eligible=_hodler_30_dias,
+    ),
+)
+
+
+def newly_eligible(rule: AwardRule, achievement_type, now: datetime) -> QuerySet:
+    """Users the rule selects who do not hold the achievement yet. A
+    soft-deleted award still counts as held, as in the per-user loop."""
+    from achievements.models import UserAchievement
+
+    return rule.eligible(now).exclude(
+        Exists(UserAchievement.all_objects.filter(
+            user=OuterRef('pk'), achievement_type=achievement_type,
+        ))
+    )
+
+
+def run_rules(slugs: Optional[Iterable[str]] = None, *, dry_run: bool = False,
+              now: Optional[datetime] = None) -> Dict[str, dict]:
+    """Apply every rule (or those in `slugs`). Returns per-slug counts:
+    {'eligible': n} on a dry run, {'awarded': n} otherwise, {'skipped': why}
+    for a rule whose achievement type is missing or inactive."""
+    from achievements.models import AchievementType
+
+    now = now or timezone.now()
+    rules = [r for r in RULES if slugs is None or r.slug in set(slugs)]
+    if not dry_run and not cache.add(LOCK_KEY, 1, LOCK_TTL):
+        logger.info('achievement award run skipped: another run holds the lock')
+        return {rule.slug: {'skipped': 'locked'} for rule in rules}
+    try:
+        out = {}
+        for rule in rules:
+            achievement_type = AchievementType.objects.filter(slug=rule.slug).first()
+            if not achievement_type:
+                out[rule.slug] = {'skipped': 'missing_type'}
+                continue
+            eligible = newly_eligible(rule, achievement_type, now)
+            if dry_run:
+                out[rule.slug] = {'eligible': eligible.count()}
+            else:
+                out[rule.slug] = {'awarded': _award(achievement_type, eligible, now)}
+        return out
+    finally:
+        if not dry_run:
+            cache.delete(LOCK_KEY)
+
+
+def _award(achievement_type, eligible: QuerySet, now: datetime) -> int:
+    from achievements.models import UserAchievement
+    from achievements.services.leaderboards import record_achievements
+    from users.models import User
+
+    awarded = 0
+    last_id = 0
+    while True:
+        user_ids = list(eligible.filter(id__gt=last_id).order_by('id')
+                        .values_list('id', flat=True)[:CHUNK])
+        if not user_ids:
+            break
+        last_id = user_ids[-1]
+        with transaction.atomic():
+            UserAchievement.objects.bulk_create([
+                UserAchievement(user_id=user_id, achievement_type=achievement_type,
+                                status='earned', earned_at=now)
+                for user_id in user_ids
+            ], ignore_conflicts=True)
+            # bulk_create skips post_save: the achievement_activity touch.
+            User.objects.filter(id__in=user_ids).update(last_activity_at=now)
+        # ...and the leaderboard update.
+        record_achievements(UserAchievement.objects.filter(
+            achievement_type=achievement_type, user_id__in=user_ids, deleted_at__isnull=True,
+        ).select_related('achievement_type'))
+        awarded += len(user_ids)
+        _notify(achievement_type, user_ids)
+    if awarded:
+        logger.info('achievement %s awarded to %s user(s)', achievement_type.slug, awarded)
+    return awarded
+
+
+def _notify(achievement_type, user_ids) -> None:
+    """The ACHIEVEMENT_EARNED notification send_achievement_notification
+    writes per row, for a whole chunk: one bulk insert, then one batched
+    push to every device of the users whose preferences allow it."""
+    from achievements.models import UserAchievement
+    from achievements.signals import ACHIEVEMENTS_ENABLED
+    from notifications.models import Notification, NotificationType as NotificationTypeChoices
+    from notifications.unread import count_new_notification
+
+    if not ACHIEVEMENTS_ENABLED:
+        # Achievement program is deprecated; skip legacy notifications
+        return
+    awards = UserAchievement.objects.filter(
+        achievement_type=achievement_type, user_id__in=user_ids, deleted_at__isnull=True,
+    ).values_list('user_id', 'id')
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            notification_type=NotificationTypeChoices.ACHIEVEMENT_EARNED,
+            title=f"¡Logro Desbloqueado! {achievement_type.icon_emoji}",
+            message=f"Has ganado el logro: {achievement_type.name}",
+            data={
+                'achievement_id': str(award_id),
+                'achievement_slug': achievement_type.slug,
+                'achievement_name': achievement_type.name,
+                'confio_reward': str(achievement_type.confio_reward),
+                'icon_emoji': achievement_type.icon_emoji or '',
+            },
+            related_object_type='UserAchievement',
+            related_object_id=str(award_id),
+            action_url=f'confio://achievements/{achievement_type.slug}',
+        )
+        for user_id, award_id in awards
+    ])
+    for notification in notifications:
+        # bulk_create skips post_save: the unread badge counter bump.
+        count_new_notification(notification)
+    try:
+        _push(notifications)
+    except Exception:  # noqa: BLE001 — the notification rows are already written
+        logger.exception('achievement pushes failed for %s notification(s)', len(notifications))
+
+
+def _push(notifications) -> None:
+    """send_user_push for many users at once: the same preference checks,
+    one send_templated_notifications call for every device in the chunk."""
+    from notifications import fcm_service
+    from notifications.models import FCMDeviceToken, Notification, NotificationPreference
+
+    if not notifications or not fcm_service.FIREBASE_INITIALIZED:
+        return
+    notification_type = notifications[0].notification_type
+    by_user = {notification.user_id: notification for notification in notifications}
+    muted = {
+        prefs.user_id
+        for prefs in NotificationPreference.objects.filter(user_id__in=by_user)
+        if not fcm_service.should_send_push(prefs, notification_type)
+    }
+    recipients = [
+        (token, token_id, fcm_service.prepare_push_data(by_user[user_id]))
+        for user_id, token, token_id in FCMDeviceToken.objects.filter(
+            user_id__in=by_user.keys() - muted, is_active=True,
+        ).values_list('user_id', 'token', 'id')
+    ]
+    if not recipients:
+        return
+    started_at = timezone.now()
+    result = fcm_service.send_templated_notifications(
+        recipients=recipients,
+        title=notifications[0].title,
+        body=notifications[0].message,
+        badge_count=None,
+        notification=None,
+    )
+    if result['sent']:
+        # A successful delivery stamps the token's last_used.
+        delivered = FCMDeviceToken.objects.filter(
+            user_id__in=by_user, last_used__gte=started_at,
+        ).values('user_id')
+        Notification.objects.filter(
+            id__in=[notification.id for notification in notifications], user_id__in=delivered,
+        ).update(push_sent=True, push_sent_at=timezone.now())
@@ -0,0 +1,321 @@
+"""
+Precomputed achievement and ambassador leaderboards.
+
+The leaderboard queries sorted UserAchievement / InfluencerAmbassador on
+every request, and the ambassador board applied its tier filter after
+slicing the top 100 — a tier board could come back short or empty.
+
+With USE_REDIS_CACHE the boards are Redis sorted sets, kept current as
+rows change:
+
+  leaderboard:achievements:all / :<slug>   UserAchievement id -> earned_at
+  leaderboard:ambassadors:all / :<tier>    ambassador id -> total_viral_views
+
+record_achievement / record_achievements (for bulk-created awards) and
+record_ambassador add, move or drop one member with O(log n) writes; the
+top of a board is a ZREVRANGE and "my position" a ZREVRANK. Only earned
+awards and active ambassadors are on a board, as before.
+
+rebuild_leaderboards (daily, after every migrate, and `manage.py
+rebuild_leaderboards`) rewrites every board from the database into a
+temporary key and swaps it in, which repairs anything an update missed. It
+then records each board's size in BUILT_KEY. A board is only read from
+Redis while BUILT_KEY exists and the board either exists or was built
+empty. Otherwise (first deploy, a flush, an evicted key) the database
+answers and a rebuild is queued.
+
+Without Redis the same functions answer from the database (tier filter
+applied before the limit).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ACHIEVEMENT_LIMIT = 50
+AMBASSADOR_LIMIT = 100
+REBUILD_CHUNK = 5000
+# Hash of board -> members at the last full rebuild.
+BUILT_KEY = 'leaderboard:built'
+REBUILD_QUEUED_KEY = 'leaderboard_rebuild_queued'
+REBUILD_QUEUED_TTL = 10 * 60
+
+ALL = 'all'
+
+
+def _redis():
+    if not getattr(settings, 'USE_REDIS_CACHE', False):
+        return None
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception as e:  # noqa: BLE001 — the database answers instead
+        logger.warning(f"Leaderboard Redis unavailable: {e}")
+        return None
+
+
+def achievement_board(slug: Optional[str] = None) -> str:
+    return f'leaderboard:achievements:{slug or ALL}'
+
+
+def ambassador_board(tier: Optional[str] = None) -> str:
+    return f'leaderboard:ambassadors:{tier or ALL}'
+
+
+def _on_achievement_board(user_achievement) -> bool:
+    return (
+        user_achievement.status == 'earned'
+        and user_achievement.earned_at is not None
+        and not user_achievement.is_deleted
+    )
+
+
+def _on_ambassador_board(ambassador) -> bool:
+    return ambassador.status == 'active' and not ambassador.is_deleted
+
+
+# Incremental updates
+
+def record_achievements(user_achievements: Iterable) -> None:
+    """Put each award on (or take it off) the all-achievements board and
+    its achievement's board."""
+    redis_conn = _redis()
+    if redis_conn is None:
+        return
+    try:
+        pipe = redis_conn.pipeline(transaction=False)
+        for user_achievement in user_achievements:
+            boards = (achievement_board(), achievement_board(user_achievement.achievement_type.slug))
+            for board in boards:
+                if _on_achievement_board(user_achievement):
+                    pipe.zadd(board, {user_achievement.id: user_achievement.earned_at.timestamp()})
+                else:
+                    pipe.zrem(board, user_achievement.id)
+        pipe.execute()
+    except Exception as e:  # noqa: BLE001 — the nightly rebuild repairs the board
+        logger.warning(f"Achievement leaderboard update failed: {e}")
+
+
+def record_achievement(user_achievement) -> None:
+    record_achievements([user_achievement])
+
+
+def record_ambassador(ambassador) -> None:
+    """Move the ambassador to its current score and tier board, or off the
+    boards once it is no longer active."""
+    redis_conn = _redis()
+    if redis_conn is None:
+        return
+    try:
+        pipe = redis_conn.pipeline(transaction=False)
+        for tier, _ in ambassador.TIER_CHOICES:
+            if tier != ambassador.tier or not _on_ambassador_board(ambassador):
+                pipe.zrem(ambassador_board(tier), ambassador.id)
+        if _on_ambassador_board(ambassador):
+            score = ambassador.total_viral_views
+            pipe.zadd(ambassador_board(), {ambassador.id: score})
+            pipe.zadd(ambassador_board(ambassador.tier), {ambassador.id: score})
+        else:
+            pipe.zrem(ambassador_board(), ambassador.id)
+        pipe.execute()
+    except Exception as e:  # noqa: BLE001 — the nightly rebuild repairs the board
+        logger.warning(f"Ambassador leaderboard update failed: {e}")
+
+
+# Reads
+
+def queue_rebuild() -> None:
+    """Enqueue rebuild_leaderboards, at most once per REBUILD_QUEUED_TTL."""
+    from django.core.cache import cache
+
+    try:
+        if cache.add(REBUILD_QUEUED_KEY, 1, REBUILD_QUEUED_TTL):
+            from achievements.tasks import rebuild_leaderboards_task
+            rebuild_leaderboards_task.apply_async(retry=False)
+    except Exception as e:  # noqa: BLE001 — the nightly rebuild still runs
+        logger.warning(f"Leaderboard rebuild could not be queued: {e}")
+
+
+def _board_ready(redis_conn, board: str) -> bool:
+    """Whether `board` holds the whole board rather than only the updates
+    since it was lost; queues a rebuild when it does not."""
+    try:
+        pipe = redis_conn.pipeline(transaction=False)
+        pipe.exists(BUILT_KEY)
+        pipe.exists(board)
+        pipe.hget(BUILT_KEY, board)
+        built, exists, size = pipe.execute()
+    except Exception as e:  # noqa: BLE001 — the database answers instead
+        logger.warning(f"Leaderboard read failed for {board}: {e}")
+        return False
+    if built and (exists or size in (b'0', '0')):
+        return True
+    queue_rebuild()
+    return False
+
+
+def _top_ids(redis_conn, board: str, limit: int) -> Optional[List[int]]:
+    if not _board_ready(redis_conn, board):
+        return None
+    try:
+        return [int(member) for member in redis_conn.zrevrange(board, 0, limit - 1)]
+    except Exception as e:  # noqa: BLE001 — the database answers instead
+        logger.warning(f"Leaderboard read failed for {board}: {e}")
+        return None
+
+
+def _in_order(queryset, ids: List[int]) -> list:
+    by_id = queryset.in_bulk(ids)
+    return [by_id[member] for member in ids if member in by_id]
+
+
+def achievement_leaderboard(slug: Optional[str] = None, limit: int = ACHIEVEMENT_LIMIT) -> list:
+    """The most recently earned awards, overall or for one achievement."""
+    from achievements.models import AchievementType, UserAchievement
+
+    if slug and not AchievementType.objects.filter(slug=slug, is_active=True).exists():
+        return []
+    queryset = UserAchievement.objects.filter(status='earned').select_related('user', 'achievement_type')
+    if slug:
+        queryset = queryset.filter(achievement_type__slug=slug)
+
+    redis_conn = _redis()
+    if redis_conn is not None:
+        ids = _top_ids(redis_conn, achievement_board(slug), limit)
+        if ids is not None:
+            return _in_order(queryset, ids)
+    return list(queryset.order_by('-earned_at', '-id')[:limit])
+
+
+def ambassador_leaderboard(tier: Optional[str] = None, limit: int = AMBASSADOR_LIMIT) -> list:
+    """Active ambassadors by total viral views, overall or within a tier."""
+    from achievements.models import InfluencerAmbassador
+
+    queryset = InfluencerAmbassador.objects.filter(status='active')
+    if tier:
+        queryset = queryset.filter(tier=tier)
+
+    redis_conn = _redis()
+    if redis_conn is not None:
+        ids = _top_ids(redis_conn, ambassador_board(tier), limit)
+        if ids is not None:
+            return _in_order(queryset, ids)
+    return list(queryset.order_by('-total_viral_views', '-id')[:limit])
+
+
+_UNAVAILABLE = object()
+
+
+def _rank(redis_conn, board: str, member):
+    if not _board_ready(redis_conn, board):
+        return _UNAVAILABLE
+    try:
+        rank = redis_conn.zrevrank(board, member)
+    except Exception as e:  # noqa: BLE001 — the database answers instead
+        logger.warning(f"Leaderboard rank failed for {board}: {e}")
+        return _UNAVAILABLE
+    return rank + 1 if rank is not None else None
+
+
+def achievement_rank(user, slug: str) -> Optional[int]:
+    """1-based position of the user's award on an achievement's board."""
+    from achievements.models import UserAchievement
+
+    award = UserAchievement.objects.filter(
+        user=user, achievement_type__slug=slug, status='earned', earned_at__isnull=False,
+    ).first()
+    if award is None:
+        return None
+    redis_conn = _redis()
+    if redis_conn is not None:
+        rank = _rank(redis_conn, achievement_board(slug), award.id)
+        if rank is not _UNAVAILABLE:
+            return rank
+    ahead = UserAchievement.objects.filter(
+        achievement_type__slug=slug, status='earned', earned_at__gt=award.earned_at,
+    ).count()
+    return ahead + 1
+
+
+def ambassador_rank(user, tier: Optional[str] = None) -> Optional[int]:
+    """1-based position of the user's ambassador profile, overall or within
+    `tier`."""
+    from achievements.models import InfluencerAmbassador
+
+    ambassador = InfluencerAmbassador.objects.filter(user=user, status='active').first()
+    if ambassador is None or (tier and ambassador.tier != tier):
+        return None
+    redis_conn = _redis()
+    if redis_conn is not None:
+        rank = _rank(redis_conn, ambassador_board(tier), ambassador.id)
+        if rank is not _UNAVAILABLE:
+            return rank
+    ahead = InfluencerAmbassador.objects.filter(
+        status='active', total_viral_views__gt=ambassador.total_viral_views,
+    )
+    if tier:
+        ahead = ahead.filter(tier=tier)
+    return ahead.count() + 1
+
+
+# Full rebuild
+
+def _swap_in(redis_conn, board: str, rows: Iterable) -> int:
+    """Write (member, score) rows into a scratch key, then RENAME it over
+    the live board so readers never see a half-built one."""
+    scratch = f'{board}:rebuild'
+    redis_conn.delete(scratch)
+    written = 0
+    batch = {}
+    for member, score in rows:
+        batch[member] = score
+        if len(batch) >= REBUILD_CHUNK:
+            redis_conn.zadd(scratch, batch)
+            written += len(batch)
+            batch = {}
+    if batch:
+        redis_conn.zadd(scratch, batch)
+        written += len(batch)
+    if written:
+        redis_conn.rename(scratch, board)
+    else:
+        redis_conn.delete(board)
+    return written
+
+
+def rebuild_leaderboards() -> dict:
+    """Rewrite every board from the database. Returns members per board."""
+    from achievements.models import AchievementType, InfluencerAmbassador, UserAchievement
+
+    redis_conn = _redis()
+    if redis_conn is None:
+        return {}
+
+    def achievement_rows(queryset):
+        for member, earned_at in queryset.values_list('id', 'earned_at').iterator(chunk_size=REBUILD_CHUNK):
+            yield member, earned_at.timestamp()
+
+    earned = UserAchievement.objects.filter(status='earned', earned_at__isnull=False)
+    result = {achievement_board(): _swap_in(redis_conn, achievement_board(), achievement_rows(earned))}
+    for slug in AchievementType.objects.values_list('slug', flat=True):
+        board = achievement_board(slug)
+        result[board] = _swap_in(
+            redis_conn, board, achievement_rows(earned.filter(achievement_type__slug=slug)))
+
+    active = InfluencerAmbassador.objects.filter(status='active')
+    result[ambassador_board()] = _swap_in(
+        redis_conn, ambassador_board(), active.values_list('id', 'total_viral_views').iterator())
+    for tier, _ in InfluencerAmbassador.TIER_CHOICES:
+        board = ambassador_board(tier)
+        result[board] = _swap_in(
+            redis_conn, board, active.filter(tier=tier).values_list('id', 'total_viral_views').iterator())
+
+    scratch = f'{BUILT_KEY}:rebuild'
+    redis_conn.delete(scratch)
+    redis_conn.hset(scratch, mapping=result)
+    redis_conn.rename(scratch, BUILT_KEY)
+    return result
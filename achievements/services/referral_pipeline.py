@@ -0,0 +1,224 @@
+"""
+Referral reward evaluation — qualifying events queued, evaluated in batches.
+
+Deposit, conversion and cUSD+ saves called sync_referral_reward_for_event
+from their own receivers: the referral lookup, the ReferralRewardEvent
+get_or_create, the checkpoint writes and the notifications all ran inside
+the money flow's request, for bookkeeping nobody there is waiting on.
+
+While the pipeline runs, submit_referral_event() instead appends ONE
+ReferralRewardOutbox row inside the source save's transaction, and
+process_pending(), run every few seconds by the
+achievements.process_referral_rewards beat task, evaluates them:
+
+  - claims up to BATCH records with SKIP LOCKED, so overlapping runs split
+    the queue;
+  - drops, without a write, what the evaluator would have ignored: unknown
+    triggers, amounts under the trigger's threshold, and users whose
+    referral is already eligible (one query loads every claimed user's
+    referral);
+  - coalesces per user and trigger: the first qualifying event is
+    evaluated once, with the metadata of its repeats merged in, and a
+    user's triggers keep their arrival order (top_up before the conversion
+    that needs its checkpoint);
+  - users without a referral only get their pending ReferralRewardEvent
+    rows, which the referral-created receiver picks up later: existing rows
+    are loaded in one query, new ones bulk-created and merged ones
+    bulk-updated;
+  - everyone else goes through sync_referral_reward_for_event with the
+    preloaded referral, each user under its own savepoint.
+
+A user whose evaluation raises keeps their records queued with attempts + 1,
+up to MAX_ATTEMPTS. If the pipeline stops heartbeating, submit_referral_event
+evaluates inline again, and whatever was queued is processed when it comes
+back.
+"""
+import logging
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .referral_rewards import (
+    DEFAULT_EVENT_REWARD_CONFIG,
+    EventContext,
+    sync_referral_reward_for_event,
+)
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_KEY = 'referral_reward_pipeline_alive'
+# Comfortably above the beat interval, so one slow pass does not flip the
+# receivers back to inline evaluation.
+HEARTBEAT_TTL = 60
+BATCH = int(getattr(settings, 'REFERRAL_REWARD_BATCH', 500))
+MAX_ATTEMPTS = 10
+
+
+def pipeline_alive() -> bool:
+    return bool(cache.get(HEARTBEAT_KEY))
+
+
+def deferred() -> bool:
+    """True when a qualifying event should only be queued."""
+    return bool(getattr(settings, 'REFERRAL_REWARDS_ASYNC', True)) and pipeline_alive()
+
+
+def submit_referral_event(user, event_ctx: EventContext) -> None:
+    """Queue the event for the pipeline, or evaluate it inline when the
+    pipeline is not running."""
+    if not deferred():
+        sync_referral_reward_for_event(user, event_ctx)
+        return
+    from achievements.models import ReferralRewardOutbox
+
+    ReferralRewardOutbox.objects.create(
+        user_id=user.id,
+        event=event_ctx.event,
+        amount=event_ctx.amount,
+        metadata=event_ctx.metadata or {},
+    )
+
+
+def _qualifies(record) -> bool:
+    config = DEFAULT_EVENT_REWARD_CONFIG.get(record.event)
+    if not config:
+        return False
+    threshold = config.get('threshold')
+    return threshold is None or (record.amount is not None and record.amount >= threshold)
+
+
+def _coalesce(records) -> 'OrderedDict':
+    """{user_id: {trigger: (EventContext, [record ids])}}, in arrival order."""
+    by_user = OrderedDict()
+    for record in records:
+        triggers = by_user.setdefault(record.user_id, OrderedDict())
+        if record.event in triggers:
+            event_ctx, ids = triggers[record.event]
+            event_ctx.metadata.update(record.metadata or {})
+            ids.append(record.id)
+        else:
+            triggers[record.event] = (
+                EventContext(event=record.event, amount=record.amount,
+                             metadata=dict(record.metadata or {})),
+                [record.id],
+            )
+    return by_user
+
+
+def _referrals_by_user(user_ids) -> dict:
+    """{referred user id: their newest live referral}, in one query."""
+    from achievements.models import UserReferral
+
+    referrals = {}
+    rows = (
+        UserReferral.objects.filter(referred_user_id__in=user_ids, deleted_at__isnull=True)
+        .select_related('referred_user', 'referrer_user')
+        .order_by('referred_user_id', '-created_at')
+    )
+    for referral in rows:
+        referrals.setdefault(referral.referred_user_id, referral)
+    return referrals
+
+
+def _record_orphan_events(by_user) -> None:
+    """The pending event rows sync_referral_reward_for_event leaves for a
+    user without a referral, written in bulk."""
+    from achievements.models import ReferralRewardEvent
+
+    if not by_user:
+        return
+    now = timezone.now()
+    triggers = {trigger for triggers in by_user.values() for trigger in triggers}
+
+    def load():
+        existing = {}
+        for event in ReferralRewardEvent.objects.filter(user_id__in=list(by_user), trigger__in=triggers).order_by('id'):
+            existing.setdefault((event.user_id, event.trigger), event)
+        return existing
+
+    existing = load()
+    new = [
+        ReferralRewardEvent(
+            user_id=user_id,
+            trigger=trigger,
+            actor_role='referee',
+            amount=event_ctx.amount or 0,
+            transaction_reference=event_ctx.metadata.get('transaction_hash', ''),
+            occurred_at=now,
+            metadata=event_ctx.metadata,
+        )
+        for user_id, triggers in by_user.items()
+        for trigger, (event_ctx, _) in triggers.items()
+        if (user_id, trigger) not in existing
+    ]
+    if new:
+        # An inline fallback can write the same row after the read above; a
+        # conflict here would roll back the whole claimed batch, so it is
+        # skipped and the row it lost to is merged below instead.
+        ReferralRewardEvent.objects.bulk_create(new, ignore_conflicts=True)
+        existing = load()
+
+    changed = []
+    for user_id, triggers in by_user.items():
+        for trigger, (event_ctx, _) in triggers.items():
+            event = existing.get((user_id, trigger))
+            if event is not None and event.metadata != event_ctx.metadata:
+                event.metadata = {**(event.metadata or {}), **event_ctx.metadata}
+                # bulk_update skips auto_now.
+                event.updated_at = now
+                changed.append(event)
+    if changed:
+        ReferralRewardEvent.objects.bulk_update(changed, ['metadata', 'updated_at'])
+
+
+def process_pending(limit: int = BATCH) -> dict:
+    """One pass over the outbox; returns counts for the log."""
+    from achievements.models import ReferralRewardOutbox
+
+    out = {'claimed': 0, 'evaluated': 0, 'dropped': 0, 'failed': 0}
+    with transaction.atomic():
+        claimed = list(
+            ReferralRewardOutbox.objects.select_for_update(skip_locked=True)
+            .filter(attempts__lt=MAX_ATTEMPTS)
+            .order_by('id')[:limit]
+        )
+        out['claimed'] = len(claimed)
+        records = [record for record in claimed if _qualifies(record)]
+        out['dropped'] = len(claimed) - len(records)
+
+        referrals = _referrals_by_user({record.user_id for record in records})
+        settled = {user_id for user_id, referral in referrals.items() if referral.reward_status == 'eligible'}
+        by_user = _coalesce(record for record in records if record.user_id not in settled)
+        out['dropped'] += sum(1 for record in records if record.user_id in settled)
+
+        _record_orphan_events(OrderedDict(
+            (user_id, triggers) for user_id, triggers in by_user.items() if user_id not in referrals
+        ))
+
+        retry = []
+        for user_id, triggers in by_user.items():
+            referral = referrals.get(user_id)
+            if referral is None:
+                out['evaluated'] += len(triggers)
+                continue
+            try:
+                with transaction.atomic():
+                    for event_ctx, _ in triggers.values():
+                        sync_referral_reward_for_event(
+                            referral.referred_user, event_ctx, located=(referral, 'referee'))
+                        out['evaluated'] += 1
+            except Exception:  # noqa: BLE001 — one bad referral must not stall the batch
+                logger.exception('referral reward evaluation failed for user %s', user_id)
+                out['failed'] += 1
+                retry.extend(record_id for _, ids in triggers.values() for record_id in ids)
+
+        ReferralRewardOutbox.objects.filter(id__in=[r.id for r in claimed]).exclude(id__in=retry).delete()
+        if retry:
+            ReferralRewardOutbox.objects.filter(id__in=retry).update(attempts=F('attempts') + 1)
+
+    cache.set(HEARTBEAT_KEY, 1, HEARTBEAT_TTL)
+    return out
@@ -379,13 +379,16 @@ def _locate_referral_for_user(user):
     return None, None
 
 
-def sync_referral_reward_for_event(user, event_ctx: EventContext) -> Optional[UserReferral]:
+def sync_referral_reward_for_event(user, event_ctx: EventContext, *, located=None) -> Optional[UserReferral]:
     """
     Attempt to sync referral reward eligibility for a given user/event.
 
+    `located` is a (referral, actor_role) pair already loaded by the caller
+    (the batched pipeline), saving the per-event lookup.
+
     Returns the updated referral when eligibility was triggered, otherwise None.
     """
-    referral, actor_role = _locate_referral_for_user(user)
+    referral, actor_role = located if located is not None else _locate_referral_for_user(user)
 
     config = DEFAULT_EVENT_REWARD_CONFIG.get(event_ctx.event)
     if not config:
@@ -8,11 +8,15 @@ from django.db.models import Count, Q
 
 from .models import (
     AchievementType,
+    AmbassadorActivity,
+    InfluencerAmbassador,
+    TikTokViralShare,
     UserAchievement,
     UserReferral,
     PioneroBetaTracker,
     ReferralRewardEvent,
 )
+from achievements.services import leaderboards
 from achievements.services.referral_rewards import (
     EventContext,
     sync_referral_reward_for_event,
@@ -74,6 +78,29 @@ def handle_achievement_earned(sender, instance, created, **kwargs):
         send_achievement_notification(instance)
 
 
+@receiver(post_save, sender=UserAchievement)
+def update_achievement_leaderboards(sender, instance, **kwargs):
+    leaderboards.record_achievement(instance)
+
+
+@receiver(post_save, sender=InfluencerAmbassador)
+def update_ambassador_leaderboards(sender, instance, **kwargs):
+    leaderboards.record_ambassador(instance)
+
+
+@receiver(post_save, sender=AmbassadorActivity)
+@receiver(post_save, sender=TikTokViralShare)
+def refresh_ambassador_leaderboard_entry(sender, instance, **kwargs):
+    """Viral activity can move an ambassador's view totals through queryset
+    updates that skip the ambassador's post_save; re-read its entry."""
+    if isinstance(instance, AmbassadorActivity):
+        ambassador = InfluencerAmbassador.objects.filter(id=instance.ambassador_id).first()
+    else:
+        ambassador = InfluencerAmbassador.objects.filter(user_id=instance.user_id).first()
+    if ambassador is not None:
+        leaderboards.record_ambassador(ambassador)
+
+
 @receiver(post_save, sender=User)
 def create_welcome_achievement(sender, instance, created, **kwargs):
     """
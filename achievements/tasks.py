@@ -0,0 +1,28 @@
+from celery import shared_task
+
+
+@shared_task(name='achievements.rebuild_leaderboards')
+def rebuild_leaderboards_task():
+    # Rewrites the Redis boards from the database; repairs missed updates.
+    from .services.leaderboards import rebuild_leaderboards
+
+    return rebuild_leaderboards()
+
+
+@shared_task(name='achievements.process_referral_rewards')
+def process_referral_rewards_task(max_batches=10):
+    """Drain the referral reward outbox (achievements.services.referral_pipeline).
+
+    A full batch means more is queued, so keep going — up to max_batches, the
+    rest is left to the next beat.
+    """
+    from .services.referral_pipeline import BATCH, process_pending
+
+    totals = {'claimed': 0, 'evaluated': 0, 'dropped': 0, 'failed': 0}
+    for _ in range(max_batches):
+        out = process_pending()
+        for key in totals:
+            totals[key] += out[key]
+        if out['claimed'] < BATCH:
+            break
+    return totals
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from achievements.models import AchievementType, UserAchievement
+from notifications.models import FCMDeviceToken, Notification, NotificationPreference
+from achievements.services.award_rules import run_rules
+
+
+class AwardRulesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.now = timezone.now()
+        self.hodler = AchievementType.objects.create(
+            slug='hodler_30_dias', name='Hodler', description='30 días', category='trading')
+        self.welcome = AchievementType.objects.create(
+            slug='bienvenida', name='Bienvenida', description='Hola', category='onboarding')
+
+    def _user(self, name, joined_days_ago, earned_days_ago=None):
+        user = get_user_model().objects.create(
+            username=name, firebase_uid=f'{name}-uid',
+            date_joined=self.now - timedelta(days=joined_days_ago))
+        if earned_days_ago is not None:
+            UserAchievement.objects.create(
+                user=user, achievement_type=self.welcome, status='earned',
+                earned_at=self.now - timedelta(days=earned_days_ago))
+        return user
+
+    def test_rule_awards_the_newly_eligible_set_once(self):
+        eligible = self._user('veteran', 60, earned_days_ago=40)
+        self._user('newcomer', 10, earned_days_ago=5)
+        self._user('idle', 60)
+        holder = self._user('holder', 60, earned_days_ago=40)
+        UserAchievement.objects.create(user=holder, achievement_type=self.hodler, status='earned')
+
+        self.assertEqual(run_rules(['hodler_30_dias'], dry_run=True, now=self.now),
+                         {'hodler_30_dias': {'eligible': 1}})
+        self.assertFalse(UserAchievement.objects.filter(user=eligible, achievement_type=self.hodler).exists())
+
+        self.assertEqual(run_rules(['hodler_30_dias'], now=self.now), {'hodler_30_dias': {'awarded': 1}})
+        award = UserAchievement.objects.get(user=eligible, achievement_type=self.hodler)
+        self.assertEqual(award.status, 'earned')
+
+        self.assertEqual(run_rules(['hodler_30_dias'], now=self.now), {'hodler_30_dias': {'awarded': 0}})
+
+    def test_missing_type_and_concurrent_run_are_skipped(self):
+        self.assertEqual(run_rules(['hodler_30_dias'], dry_run=False, now=self.now),
+                         {'hodler_30_dias': {'awarded': 0}})
+        cache.add('achievements_award_rules_lock', 1, 60)
+        self.assertEqual(run_rules(['hodler_30_dias'], now=self.now),
+                         {'hodler_30_dias': {'skipped': 'locked'}})
+        cache.clear()
+        AchievementType.objects.filter(id=self.hodler.id).delete()
+        self.assertEqual(run_rules(['hodler_30_dias'], now=self.now),
+                         {'hodler_30_dias': {'skipped': 'missing_type'}})
+
+    def test_chunk_pushes_go_out_in_one_batch(self):
+        first = self._user('first', 60, earned_days_ago=40)
+        second = self._user('second', 60, earned_days_ago=40)
+        muted = self._user('muted', 60, earned_days_ago=40)
+        NotificationPreference.objects.update_or_create(user=muted, defaults={'push_promotions': False})
+        tokens = {
+            user.username: FCMDeviceToken.objects.create(
+                user=user, token=f'{user.username}-token', device_type='android',
+                last_used=self.now - timedelta(days=1))
+            for user in (first, second, muted)
+        }
+
+        def deliver_to_first(recipients, **kwargs):
+            FCMDeviceToken.objects.filter(id=tokens['first'].id).update(last_used=timezone.now())
+            return {'sent': 1, 'failed': 1}
+
+        with mock.patch('achievements.signals.ACHIEVEMENTS_ENABLED', True), \
+                mock.patch('notifications.fcm_service.FIREBASE_INITIALIZED', True), \
+                mock.patch('notifications.fcm_service.send_templated_notifications',
+                           side_effect=deliver_to_first) as send, \
+                mock.patch('notifications.fcm_service.send_push_notification') as single:
+            self.assertEqual(run_rules(['hodler_30_dias'], now=self.now), {'hodler_30_dias': {'awarded': 3}})
+
+        single.assert_not_called()
+        send.assert_called_once()
+        recipients = send.call_args.kwargs['recipients']
+        self.assertEqual(sorted(token for token, _, _ in recipients), ['first-token', 'second-token'])
+        self.assertEqual({data['data_achievement_slug'] for _, _, data in recipients}, {'hodler_30_dias'})
+        self.assertEqual(Notification.objects.filter(notification_type='ACHIEVEMENT_EARNED').count(), 3)
+        self.assertEqual(list(Notification.objects.filter(push_sent=True).values_list('user_id', flat=True)),
+                         [first.id])
@@ -0,0 +1,139 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from achievements.models import AchievementType, InfluencerAmbassador, UserAchievement
+from achievements.services import leaderboards
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakeSortedSets:
+    """The handful of Redis commands the leaderboards use."""
+
+    def __init__(self):
+        self.sets = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    def exists(self, key):
+        return int(key in self.sets)
+
+    def hset(self, key, mapping):
+        self.sets.setdefault(key, {}).update({k: str(v).encode() for k, v in mapping.items()})
+
+    def hget(self, key, field):
+        return self.sets.get(key, {}).get(field)
+
+    def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update({str(member): score for member, score in mapping.items()})
+
+    def zrem(self, key, member):
+        self.sets.get(key, {}).pop(str(member), None)
+        if key in self.sets and not self.sets[key]:
+            del self.sets[key]
+
+    def _ordered(self, key):
+        return sorted(self.sets.get(key, {}).items(), key=lambda item: (-item[1], item[0]))
+
+    def zrevrange(self, key, start, stop):
+        return [member for member, _ in self._ordered(key)[start:stop + 1]]
+
+    def zrevrank(self, key, member):
+        members = [m for m, _ in self._ordered(key)]
+        return members.index(str(member)) if str(member) in members else None
+
+    def delete(self, key):
+        self.sets.pop(key, None)
+
+    def rename(self, key, new_key):
+        self.sets[new_key] = self.sets.pop(key)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.redis = FakeSortedSets()
+        patcher = patch('achievements.services.leaderboards._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        leaderboards.rebuild_leaderboards()
+
+    def _ambassador(self, name, views, tier='bronze'):
+        user = get_user_model().objects.create(username=name, firebase_uid=f'{name}-uid')
+        return InfluencerAmbassador.objects.create(user=user, tier=tier, total_viral_views=views)
+
+    def test_ambassador_boards_follow_saves_and_rank_within_tier(self):
+        top = self._ambassador('top', 900, tier='gold')
+        middle = self._ambassador('middle', 500)
+        bottom = self._ambassador('bottom', 100)
+
+        self.assertEqual(leaderboards.ambassador_leaderboard(), [top, middle, bottom])
+        self.assertEqual(leaderboards.ambassador_leaderboard('bronze'), [middle, bottom])
+        self.assertEqual(leaderboards.ambassador_rank(bottom.user), 3)
+        self.assertEqual(leaderboards.ambassador_rank(bottom.user, 'bronze'), 2)
+
+        bottom.total_viral_views = 1000
+        bottom.tier = 'gold'
+        bottom.save()
+        self.assertEqual(leaderboards.ambassador_leaderboard('gold'), [bottom, top])
+        self.assertEqual(leaderboards.ambassador_leaderboard('bronze'), [middle])
+        self.assertEqual(leaderboards.ambassador_rank(bottom.user), 1)
+
+        middle.status = 'paused'
+        middle.save()
+        self.assertEqual(leaderboards.ambassador_leaderboard('bronze'), [])
+        self.assertIsNone(leaderboards.ambassador_rank(middle.user))
+
+    def test_rebuild_matches_the_database_fallback(self):
+        achievement_type = AchievementType.objects.create(
+            slug='bienvenida', name='Bienvenida', description='Hola', category='onboarding')
+        now = timezone.now()
+        awards = []
+        for index in range(3):
+            user = get_user_model().objects.create(username=f'earner{index}', firebase_uid=f'earner{index}-uid')
+            awards.append(UserAchievement.objects.create(
+                user=user, achievement_type=achievement_type, status='earned',
+                earned_at=now - timezone.timedelta(minutes=index)))
+        self.redis.sets.clear()
+
+        leaderboards.rebuild_leaderboards()
+        from_redis = leaderboards.achievement_leaderboard('bienvenida')
+        with patch('achievements.services.leaderboards._redis', return_value=None):
+            from_db = leaderboards.achievement_leaderboard('bienvenida')
+            db_rank = leaderboards.achievement_rank(awards[2].user, 'bienvenida')
+
+        self.assertEqual(from_redis, awards)
+        self.assertEqual(from_db, awards)
+        self.assertEqual(leaderboards.achievement_rank(awards[2].user, 'bienvenida'), 3)
+        self.assertEqual(db_rank, 3)
+
+    def test_a_lost_board_is_answered_from_the_database_and_rebuilt(self):
+        top = self._ambassador('top', 900)
+        bottom = self._ambassador('bottom', 100)
+        self.redis.sets.clear()  # a flush: only updates from now on land
+        bottom.total_viral_views = 200
+        bottom.save()
+
+        with patch.object(leaderboards, 'queue_rebuild') as queue_rebuild:
+            self.assertEqual(leaderboards.ambassador_leaderboard(), [top, bottom])
+            self.assertEqual(leaderboards.ambassador_rank(top.user), 1)
+        queue_rebuild.assert_called()
+
+        leaderboards.rebuild_leaderboards()
+        del self.redis.sets[leaderboards.ambassador_board()]  # evicted
+        with patch.object(leaderboards, 'queue_rebuild') as queue_rebuild:
+            self.assertEqual(leaderboards.ambassador_rank(bottom.user), 2)
+        queue_rebuild.assert_called_once()
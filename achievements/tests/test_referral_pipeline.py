@@ -0,0 +1,167 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from algosdk import account
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from achievements.models import ReferralRewardEvent, ReferralRewardOutbox, UserReferral
+from achievements.services.referral_pipeline import (
+    HEARTBEAT_KEY,
+    process_pending,
+    submit_referral_event,
+)
+from achievements.services.referral_rewards import EventContext
+from blockchain.rewards_service import RewardSyncResult
+from users.models import Account
+
+
+@override_settings(BSC_REWARD_ENABLED=False)
+class ReferralRewardPipelineTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.referrer = user_model.objects.create_user(
+            username="referrer", email="referrer@example.com", password="password",
+            firebase_uid="referrer-uid",
+        )
+        self.referred = user_model.objects.create_user(
+            username="referred", email="referred@example.com", password="password",
+            firebase_uid="referred-uid",
+        )
+        for user in (self.referrer, self.referred):
+            Account.objects.create(
+                user=user, account_type="personal", account_index=0,
+                algorand_address=account.generate_account()[1],
+            )
+        self.referral = UserReferral.objects.create(
+            referred_user=self.referred,
+            referrer_identifier="@referrer",
+            referrer_user=self.referrer,
+        )
+        self.push_patch = patch('notifications.utils.send_push_notification', return_value={'success': True})
+        self.push_patch.start()
+        cache.delete(HEARTBEAT_KEY)
+
+    def tearDown(self):
+        self.push_patch.stop()
+        cache.delete(HEARTBEAT_KEY)
+
+    def _configure(self, mock_service):
+        mock_instance = mock_service.return_value
+        mock_instance.convert_cusd_to_confio.return_value = Decimal("20")
+        mock_instance.mark_eligibility.return_value = RewardSyncResult(
+            tx_id="TEST-TX",
+            confirmed_round=1,
+            referee_confio_micro=20_000_000,
+            referrer_confio_micro=20_000_000,
+            box_name="box",
+        )
+        return mock_instance
+
+    @patch("achievements.services.referral_rewards.ConfioRewardsService")
+    def test_evaluates_inline_without_pipeline(self, mock_service):
+        self._configure(mock_service)
+
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("25")))
+
+        self.assertFalse(ReferralRewardOutbox.objects.exists())
+        self.assertTrue(ReferralRewardEvent.objects.filter(user=self.referred, trigger="top_up").exists())
+
+    @patch("achievements.services.referral_rewards.ConfioRewardsService")
+    def test_queued_events_coalesce_per_referral(self, mock_service):
+        mock_instance = self._configure(mock_service)
+        cache.set(HEARTBEAT_KEY, 1)
+
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("25"),
+                                                          metadata={"deposit_id": "a"}))
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("30"),
+                                                          metadata={"deposit_id": "b"}))
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("5")))
+        self.assertEqual(ReferralRewardOutbox.objects.count(), 3)
+        self.assertFalse(ReferralRewardEvent.objects.filter(user=self.referred, trigger="top_up").exists())
+
+        out = process_pending()
+
+        self.assertEqual(out, {'claimed': 3, 'evaluated': 1, 'dropped': 1, 'failed': 0})
+        self.assertFalse(ReferralRewardOutbox.objects.exists())
+        mock_instance.mark_eligibility.assert_called_once()
+        event = ReferralRewardEvent.objects.get(user=self.referred, trigger="top_up")
+        self.assertEqual(event.amount, Decimal("25"))
+        self.assertEqual(event.metadata["deposit_id"], "b")
+        self.referral.refresh_from_db()
+        self.assertEqual(self.referral.reward_status, "eligible")
+
+    @patch("achievements.services.referral_rewards.ConfioRewardsService")
+    def test_settled_referral_is_dropped(self, mock_service):
+        UserReferral.objects.filter(id=self.referral.id).update(reward_status="eligible")
+        cache.set(HEARTBEAT_KEY, 1)
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("25")))
+
+        out = process_pending()
+
+        self.assertEqual(out['dropped'], 1)
+        self.assertFalse(ReferralRewardEvent.objects.filter(user=self.referred, trigger="top_up").exists())
+        mock_service.assert_not_called()
+
+    @patch("achievements.services.referral_rewards.ConfioRewardsService")
+    def test_users_without_referral_get_pending_events_in_bulk(self, mock_service):
+        self.referral.delete()
+        ReferralRewardEvent.objects.create(
+            user=self.referrer, trigger="top_up", actor_role="referee", amount=Decimal("40"),
+            occurred_at=self.referral.created_at, metadata={"deposit_id": "old"},
+        )
+        cache.set(HEARTBEAT_KEY, 1)
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("25"),
+                                                          metadata={"deposit_id": "a"}))
+        submit_referral_event(self.referrer, EventContext(event="top_up", amount=Decimal("25"),
+                                                          metadata={"network": "bsc"}))
+
+        with self.assertNumQueries(9):
+            out = process_pending()
+
+        self.assertEqual(out['evaluated'], 2)
+        new = ReferralRewardEvent.objects.get(user=self.referred, trigger="top_up")
+        self.assertIsNone(new.referral)
+        self.assertEqual(new.reward_status, "pending")
+        self.assertEqual(new.metadata, {"deposit_id": "a"})
+        merged = ReferralRewardEvent.objects.get(user=self.referrer, trigger="top_up")
+        self.assertEqual(merged.metadata, {"deposit_id": "old", "network": "bsc"})
+        self.assertEqual(merged.amount, Decimal("40"))
+        mock_service.assert_not_called()
+
+    def test_failed_evaluation_stays_queued(self):
+        cache.set(HEARTBEAT_KEY, 1)
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("25")))
+
+        with patch("achievements.services.referral_pipeline.sync_referral_reward_for_event",
+                   side_effect=RuntimeError("boom")):
+            out = process_pending()
+
+        self.assertEqual(out['failed'], 1)
+        self.assertEqual(ReferralRewardOutbox.objects.get().attempts, 1)
+
+    def test_orphan_row_written_concurrently_does_not_sink_the_batch(self):
+        self.referral.delete()
+        cache.set(HEARTBEAT_KEY, 1)
+        submit_referral_event(self.referred, EventContext(event="top_up", amount=Decimal("25"),
+                                                          metadata={"deposit_id": "a"}))
+        manager = ReferralRewardEvent.objects
+        bulk_create = manager.bulk_create
+
+        def inline_fallback_first(objs, **kwargs):
+            # The inline path lands the same row between the read and the insert.
+            manager.create(
+                user=self.referred, trigger="top_up", actor_role="referee", amount=Decimal("25"),
+                occurred_at=self.referred.date_joined, metadata={"network": "bsc"},
+                internal_id=objs[0].internal_id,
+            )
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(manager, "bulk_create", side_effect=inline_fallback_first):
+            out = process_pending()
+
+        self.assertEqual(out, {'claimed': 1, 'evaluated': 1, 'dropped': 0, 'failed': 0})
+        self.assertFalse(ReferralRewardOutbox.objects.exists())
+        event = ReferralRewardEvent.objects.get(user=self.referred, trigger="top_up")
+        self.assertEqual(event.metadata, {"network": "bsc", "deposit_id": "a"})
@@ -6,7 +6,7 @@ from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.html import format_html
 from .models import (
-    Balance, IndexerAssetCursor, OndoStockTrade, PendingAutoSwap,
+    Balance, BscLogCursor, IndexerAssetCursor, OndoStockTrade, PendingAutoSwap,
     ProcessedIndexerTransaction, SponsoredBatch,
 )
 
@@ -45,6 +45,13 @@ class IndexerAssetCursorAdmin(admin.ModelAdmin):
     reset_cursors.short_description = "Reset selected cursors to round 0"
 
 
+@admin.register(BscLogCursor)
+class BscLogCursorAdmin(admin.ModelAdmin):
+    list_display = ['name', 'last_block', 'updated_at']
+    search_fields = ['name']
+    ordering = ['-updated_at']
+
+
 class PendingAutoSwapAdmin(admin.ModelAdmin):
     """Actionable auto-swap work waiting on the client signer.
 
@@ -0,0 +1,189 @@
+"""
+BSC ERC-20 balance cache — the EVM counterpart of BalanceService.
+
+Wallet balances on BSC (USDT, cUSD+ shares, any other ERC-20) were read
+through per-helper caches, each with its own keys, TTLs and idea of what
+happens when the node is down. This service is the one read-through cache
+for all of them:
+
+  - One schema, raw integer units per (token, holder):
+        bsc_bal:{holder}:{generation}:{token}   fresh, FRESH_TTL
+        bsc_bal_last:{holder}:{token}           last-known, LAST_KNOWN_TTL
+  - invalidate(holder) bumps the holder's generation, so every token's
+    fresh entry is bypassed at once, and a read that started before the
+    write that invalidated it cannot land afterwards and republish the old
+    number: a value is only stored under the generation it was read in.
+  - Single flight: concurrent misses on one entry make one RPC. The others
+    wait up to FLIGHT_WAIT for it, then fall back to last-known.
+  - get_balances() serves many entries with one get_many and reads every
+    miss in one Multicall3 round trip (cusd_plus.multicall).
+  - A failed read degrades to last-known, then to None (unknown) — never
+    to a false 0; callers choose what None renders as.
+
+The receipt tracker's settle step and the BSC log follower invalidate the
+wallets they see move, so a fresh entry is rarely older than the chain.
+"""
+import logging
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class BscBalanceService:
+    FRESH_TTL = 30
+    LAST_KNOWN_TTL = 7 * 24 * 3600
+    FLIGHT_TTL = 10
+    FLIGHT_WAIT = 0.5
+    FLIGHT_POLL = 0.05
+
+    # ── keys ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _gen_key(holder: str) -> str:
+        return f'bsc_bal_gen:{holder}'
+
+    @staticmethod
+    def _fresh_key(token: str, holder: str, gen: int) -> str:
+        return f'bsc_bal:{holder}:{gen}:{token}'
+
+    @staticmethod
+    def _last_key(token: str, holder: str) -> str:
+        return f'bsc_bal_last:{holder}:{token}'
+
+    @staticmethod
+    def _flight_key(token: str, holder: str, gen: int) -> str:
+        return f'bsc_bal_flight:{holder}:{gen}:{token}'
+
+    @classmethod
+    def _gens(cls, holders: Iterable[str]) -> Dict[str, int]:
+        holders = list(holders)
+        found = cache.get_many([cls._gen_key(h) for h in holders])
+        return {h: found.get(cls._gen_key(h)) or 0 for h in holders}
+
+    # ── reads ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _fetch(token: str, holder: str) -> int:
+        from cusd_plus import vault
+
+        return vault.erc20_balance_raw(token, holder)
+
+    @classmethod
+    def _store(cls, values: Dict[Tuple[str, str], int], gens: Dict[str, int]) -> None:
+        """Write back the values whose holder was not invalidated mid-read."""
+        current = cls._gens({holder for _, holder in values})
+        fresh, last = {}, {}
+        for (token, holder), raw in values.items():
+            if current[holder] != gens[holder]:
+                continue
+            fresh[cls._fresh_key(token, holder, gens[holder])] = raw
+            last[cls._last_key(token, holder)] = raw
+        if fresh:
+            cache.set_many(fresh, cls.FRESH_TTL)
+            cache.set_many(last, cls.LAST_KNOWN_TTL)
+
+    @classmethod
+    def get_raw(cls, token_address: str, holder: str, verify_critical: bool = False) -> Optional[int]:
+        """Raw balance of `holder`; None when unknown.
+
+        verify_critical reads the chain and raises on failure — for exact
+        sufficiency checks, never for display."""
+        token, holder = token_address.lower(), holder.lower()
+        gen = cls._gens([holder])[holder]
+        if verify_critical:
+            raw = cls._fetch(token, holder)
+            cls._store({(token, holder): raw}, {holder: gen})
+            return raw
+
+        fresh_key = cls._fresh_key(token, holder, gen)
+        cached = cache.get(fresh_key)
+        if cached is not None:
+            return cached
+        flight_key = cls._flight_key(token, holder, gen)
+        if not cache.add(flight_key, 1, cls.FLIGHT_TTL):
+            deadline = time.monotonic() + cls.FLIGHT_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(cls.FLIGHT_POLL)
+                cached = cache.get(fresh_key)
+                if cached is not None:
+                    return cached
+            last = cache.get(cls._last_key(token, holder))
+            if last is not None:
+                return last
+            # Nothing to wait for: the leader may have failed. Read anyway.
+        try:
+            raw = cls._fetch(token, holder)
+        except Exception:  # noqa: BLE001 — degrade to last-known, never to 0
+            logger.warning('BSC balance read failed for %s on %s', holder, token, exc_info=True)
+            return cache.get(cls._last_key(token, holder))
+        finally:
+            cache.delete(flight_key)
+        cls._store({(token, holder): raw}, {holder: gen})
+        return raw
+
+    @classmethod
+    def get_balances(cls, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[int]]:
+        """{(token, holder): raw or None} for many entries, lowercase keys.
+        Fresh entries come from one get_many; every stale one is refreshed
+        in one Multicall3 round trip."""
+        from cusd_plus import vault
+        from cusd_plus.multicall import as_uint, read_many
+
+        pairs = list(dict.fromkeys((t.lower(), h.lower()) for t, h in pairs if t and h))
+        if not pairs:
+            return {}
+        gens = cls._gens({holder for _, holder in pairs})
+        fresh = cache.get_many([cls._fresh_key(t, h, gens[h]) for t, h in pairs])
+        out = {}
+        misses = []
+        for token, holder in pairs:
+            value = fresh.get(cls._fresh_key(token, holder, gens[holder]))
+            if value is None:
+                misses.append((token, holder))
+            else:
+                out[(token, holder)] = value
+        if not misses:
+            return out
+
+        try:
+            results = read_many(
+                [(token, vault._balance_of_data(holder)) for token, holder in misses],
+                rpc=vault._rpc, urls=[vault._rpc_url()],
+            )
+        except Exception:  # noqa: BLE001 — degrade to last-known, never to 0
+            logger.warning('BSC bulk balance read failed for %d entries', len(misses), exc_info=True)
+            results = [None] * len(misses)
+        read, failed = {}, []
+        for pair, ret in zip(misses, results):
+            raw = as_uint(ret)
+            if raw is None:
+                failed.append(pair)
+            else:
+                read[pair] = raw
+        cls._store(read, gens)
+        out.update(read)
+        if failed:
+            last = cache.get_many([cls._last_key(t, h) for t, h in failed])
+            for token, holder in failed:
+                out[(token, holder)] = last.get(cls._last_key(token, holder))
+        return out
+
+    # ── invalidation ─────────────────────────────────────────────────────
+
+    @classmethod
+    def invalidate(cls, holder: str) -> None:
+        """Every fresh entry of `holder` is bypassed from now on."""
+        if holder:
+            key = cls._gen_key(holder.lower())
+            try:
+                cache.incr(key)
+            except ValueError:  # not set yet
+                cache.set(key, 1, None)
+
+    @classmethod
+    def invalidate_many(cls, holders: Iterable[str]) -> None:
+        for holder in {h.lower() for h in holders if h}:
+            cls.invalidate(holder)
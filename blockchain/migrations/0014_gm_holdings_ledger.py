@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-19 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0013_bsclogcursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GmHolder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42, unique=True)),
+                ('seeded_block', models.BigIntegerField()),
+                ('audited_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'gm_holders',
+            },
+        ),
+        migrations.CreateModel(
+            name='GmHolding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42)),
+                ('token_address', models.CharField(max_length=42)),
+                ('symbol', models.CharField(max_length=32)),
+                ('decimals', models.PositiveSmallIntegerField(default=18)),
+                ('raw_balance', models.DecimalField(decimal_places=0, default=0, max_digits=78)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'gm_holdings',
+                'indexes': [models.Index(fields=['symbol'], name='gm_holding_symbol_idx')],
+                'constraints': [models.UniqueConstraint(fields=('address', 'token_address'), name='gm_holding_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-19 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0014_gm_holdings_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GmPriceSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=32, unique=True)),
+                ('seeded_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'gm_price_series',
+            },
+        ),
+        migrations.CreateModel(
+            name='GmPriceChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=32)),
+                ('resolution', models.CharField(max_length=4)),
+                ('chunk_start', models.BigIntegerField()),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'gm_price_chunks',
+                'constraints': [models.UniqueConstraint(fields=('symbol', 'resolution', 'chunk_start'), name='gm_price_chunk_unique')],
+            },
+        ),
+    ]
@@ -192,6 +192,100 @@ class IndexerAssetCursor(models.Model):
         return f"asset:{self.asset_id} @ {self.last_scanned_round}"
 
 
+class BscLogCursor(models.Model):
+    """Durable block cursor for one BSC log filter (cusd_plus.log_follower).
+
+    `recent_hashes` remembers {block: hash} for the tips this filter has
+    processed inside the finality window, so a reorg is detected by hash and
+    rewound to the newest block still canonical — not by rescanning a fixed
+    margin every run."""
+    name = models.CharField(max_length=64, unique=True)
+    last_block = models.BigIntegerField(default=0)
+    recent_hashes = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"bsc:{self.name} @ {self.last_block}"
+
+
+class GmHolder(models.Model):
+    """A wallet the GM holdings ledger follows (cusd_plus.gm_ledger).
+
+    Its balances were read with balanceOf at `seeded_block`; every GM
+    Transfer after that block is applied to its GmHolding rows."""
+    address = models.CharField(max_length=42, unique=True)
+    seeded_block = models.BigIntegerField()
+    audited_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'gm_holders'
+
+    def __str__(self):
+        return f"gm holder {self.address} @ {self.seeded_block}"
+
+
+class GmHolding(models.Model):
+    """Ledger balance of one GM token at one followed wallet, in the token's
+    raw integer units as of the ledger cursor. Rows that reach zero are
+    kept; aggregates filter on raw_balance > 0."""
+    address = models.CharField(max_length=42)
+    token_address = models.CharField(max_length=42)
+    symbol = models.CharField(max_length=32)
+    decimals = models.PositiveSmallIntegerField(default=18)
+    # uint256 fits 78 digits.
+    raw_balance = models.DecimalField(max_digits=78, decimal_places=0, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'gm_holdings'
+        constraints = [
+            models.UniqueConstraint(fields=['address', 'token_address'], name='gm_holding_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['symbol'], name='gm_holding_symbol_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.address} {self.symbol} {self.raw_balance}"
+
+
+class GmPriceSeries(models.Model):
+    """A GM symbol the local price store (cusd_plus.gm_prices) keeps.
+    `seeded_at` is set once its history before ingestion began has been
+    loaded from the upstream OHLC endpoint."""
+    symbol = models.CharField(max_length=32, unique=True)
+    seeded_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'gm_price_series'
+
+    def __str__(self):
+        return f"gm prices {self.symbol}"
+
+
+class GmPriceChunk(models.Model):
+    """SLOTS consecutive candles of one symbol at one resolution, packed
+    column-wise as float64 open/high/low/close arrays (NaN = no candle).
+    Slot i covers chunk_start + i * step seconds."""
+    symbol = models.CharField(max_length=32)
+    resolution = models.CharField(max_length=4)
+    chunk_start = models.BigIntegerField()
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'gm_price_chunks'
+        constraints = [
+            models.UniqueConstraint(fields=['symbol', 'resolution', 'chunk_start'],
+                                    name='gm_price_chunk_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} {self.resolution} @ {self.chunk_start}"
+
+
 class PendingAutoSwap(models.Model):
     """Actionable auto-swap work that must be completed by the client signer."""
 
@@ -27,8 +27,7 @@ from .p2p_trade_transaction_builder import P2PTradeTransactionBuilder
 from users.jwt_context import get_jwt_business_context_with_validation
 from users.models import Account
 from p2p_exchange.models import P2PTrade, P2PEscrow
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from p2p_exchange.subscriptions import publish_trade_event
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -113,8 +112,6 @@ def accept_trade_for_trade_id(trade_id: str) -> tuple[bool, str | None]:
         try:
             from django.utils import timezone
             from datetime import timedelta
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
 
             trade = P2PTrade.objects.filter(id=trade_id).first()
             if trade:
@@ -126,10 +123,8 @@ def accept_trade_for_trade_id(trade_id: str) -> tuple[bool, str | None]:
 
                 # Broadcast to trade chat room
                 try:
-                    channel_layer = get_channel_layer()
-                    room_group_name = f'trade_chat_{trade.id}'
-                    async_to_sync(channel_layer.group_send)(
-                        room_group_name,
+                    publish_trade_event(
+                        trade.id,
                         {
                             'type': 'trade_status_update',
                             'status': 'PAYMENT_PENDING',
@@ -729,10 +724,8 @@ class AcceptP2PTrade(graphene.Mutation):
                         trade.save(update_fields=['status', 'expires_at', 'updated_at'])
 
                         # Broadcast status update to WebSocket trade room
-                        channel_layer = get_channel_layer()
-                        room_group_name = f'trade_chat_{trade.id}'
-                        async_to_sync(channel_layer.group_send)(
-                            room_group_name,
+                        publish_trade_event(
+                            trade.id,
                             {
                                 'type': 'trade_status_update',
                                 'status': 'PAYMENT_PENDING',
@@ -843,10 +836,8 @@ class MarkP2PTradePaid(graphene.Mutation):
                     trade.save(update_fields=['expires_at', 'updated_at'])
                     # Optionally broadcast updated expiry to chat room listeners
                     try:
-                        channel_layer = get_channel_layer()
-                        room_group_name = f'trade_chat_{trade.id}'
-                        async_to_sync(channel_layer.group_send)(
-                            room_group_name,
+                        publish_trade_event(
+                            trade.id,
                             {
                                 'type': 'trade_status_update',
                                 'status': getattr(trade, 'status', ''),
@@ -1084,10 +1075,8 @@ class SubmitP2pAcceptTrade(graphene.Mutation):
                 trade.save(update_fields=['status', 'expires_at', 'updated_at'])
 
                 try:
-                    channel_layer = get_channel_layer()
-                    room_group_name = f'trade_chat_{trade.id}'
-                    async_to_sync(channel_layer.group_send)(
-                        room_group_name,
+                    publish_trade_event(
+                        trade.id,
                         {
                             'type': 'trade_status_update',
                             'status': 'PAYMENT_PENDING',
@@ -2,6 +2,7 @@ from types import SimpleNamespace
 from decimal import Decimal
 from unittest.mock import AsyncMock, patch
 
+from django.core.cache import cache
 from django.test import SimpleTestCase, TestCase, override_settings
 
 from achievements.models import (
@@ -18,6 +19,7 @@ from blockchain.mutations import (
 )
 from blockchain.auto_swap_state import ensure_pending_usdc_auto_swap
 from blockchain.algorand_account_manager import AlgorandAccountManager
+from blockchain.bsc_balance_service import BscBalanceService
 from blockchain.models import PendingAutoSwap
 from conversion.models import Conversion
 from send.models import SendTransaction
@@ -551,3 +553,36 @@ class ReferralWithdrawalPolicyTest(TestCase):
         self.assertFalse(result.success)
         self.assertIn('retired', result.error.lower())
         sponsor_mock.assert_not_called()
+
+
+class BscBalanceServiceTest(SimpleTestCase):
+    TOKEN = '0x' + '11' * 20
+    HOLDER = '0x' + 'AB' * 20
+
+    def setUp(self):
+        cache.clear()
+
+    def test_read_through_with_last_known_fallback(self):
+        with patch('cusd_plus.vault.erc20_balance_raw', return_value=5) as read:
+            self.assertEqual(BscBalanceService.get_raw(self.TOKEN, self.HOLDER), 5)
+            self.assertEqual(BscBalanceService.get_raw(self.TOKEN, self.HOLDER.lower()), 5)
+        read.assert_called_once()
+
+        BscBalanceService.invalidate(self.HOLDER)
+        with patch('cusd_plus.vault.erc20_balance_raw', side_effect=RuntimeError('node down')):
+            self.assertEqual(BscBalanceService.get_raw(self.TOKEN, self.HOLDER), 5)
+            with self.assertRaises(RuntimeError):
+                BscBalanceService.get_raw(self.TOKEN, self.HOLDER, verify_critical=True)
+        with patch('cusd_plus.vault.erc20_balance_raw', side_effect=RuntimeError('node down')):
+            self.assertIsNone(BscBalanceService.get_raw(self.TOKEN, '0x' + 'cd' * 20))
+
+    def test_read_overtaken_by_invalidation_is_not_cached(self):
+        def read(token, holder):
+            BscBalanceService.invalidate(holder)   # a transfer lands mid-read
+            return 5
+
+        with patch('cusd_plus.vault.erc20_balance_raw', side_effect=read):
+            self.assertEqual(BscBalanceService.get_raw(self.TOKEN, self.HOLDER), 5)
+        with patch('cusd_plus.vault.erc20_balance_raw', return_value=8) as again:
+            self.assertEqual(BscBalanceService.get_raw(self.TOKEN, self.HOLDER), 8)
+        again.assert_called_once()
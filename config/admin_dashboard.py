@@ -68,6 +68,8 @@ class ConfioAdminSite(AdminSiteOTPRequired):
             path('blockchain-analytics/scan-now/', self.admin_view(self.blockchain_scan_now_view), name='blockchain_scan_now'),
             path('achievements/', self.admin_view(self.achievement_dashboard_view), name='achievement_dashboard'),
             path('icp-rating-analytics/', self.admin_view(self.icp_rating_analytics_view), name='icp_rating_analytics'),
+            path('graphql-profile/', self.admin_view(self.graphql_profile_view), name='graphql_profile'),
+            path('graphql-profile/export.json', self.admin_view(self.graphql_profile_export_view), name='graphql_profile_export'),
         ]
         return custom_urls + urls
     
@@ -1852,6 +1854,38 @@ class ConfioAdminSite(AdminSiteOTPRequired):
         )
         return render(request, 'admin/icp_rating_analytics.html', context)
 
+    @staticmethod
+    def _graphql_profile_hours(request):
+        try:
+            return min(max(int(request.GET.get('hours', 24)), 1), 48)
+        except ValueError:
+            return 24
+
+    def graphql_profile_view(self, request):
+        """Sampled GraphQL resolver / SQL / external-call profile
+        (config.graphql_profiler), slowest first."""
+        from config.graphql_profiler import aggregate
+
+        hours = self._graphql_profile_hours(request)
+        profile = aggregate(hours)
+        context = dict(
+            self.each_context(request),
+            title='GraphQL Profile',
+            hours=hours,
+            profile=profile,
+            operations=profile['operations'][:50],
+            resolvers=profile['resolvers'][:100],
+            n_plus_one=profile['n_plus_one'][:50],
+        )
+        return render(request, 'admin/graphql_profile.html', context)
+
+    def graphql_profile_export_view(self, request):
+        """The full aggregate behind graphql_profile_view, as JSON."""
+        from django.http import JsonResponse
+        from config.graphql_profiler import aggregate
+
+        return JsonResponse(aggregate(self._graphql_profile_hours(request)))
+
 
 # Create custom admin site instance
 confio_admin_site = ConfioAdminSite(name='confio_admin')
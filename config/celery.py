@@ -63,6 +63,88 @@ app.conf.beat_schedule.setdefault('payments-reconcile-stranded-bsc', {
     'schedule': crontab(minute='*/15'),
 })
 
+# And on the send side: a send stays SUBMITTED if its confirmer gave up
+# before its batch resolved.
+app.conf.beat_schedule.setdefault('send-reconcile-stranded-bsc', {
+    'task': 'send.reconcile_stranded_bsc_sends',
+    'schedule': crontab(minute='*/15'),
+})
+
+# The badge counters are maintained incrementally; clearing them daily makes
+# the next read recompute, so drift from deletes or races lasts a day at most.
+app.conf.beat_schedule.setdefault('inbox-reconcile-unread-counters', {
+    'task': 'inbox.reconcile_unread_counters',
+    'schedule': crontab(hour=4, minute=10),
+})
+app.conf.beat_schedule.setdefault('notifications-reconcile-unread-counters', {
+    'task': 'notifications.reconcile_unread_counters',
+    'schedule': crontab(hour=4, minute=20),
+})
+
+# The Redis leaderboards are updated as rows change; the nightly rewrite
+# repairs anything an update missed (achievements.services.leaderboards).
+app.conf.beat_schedule.setdefault('achievements-rebuild-leaderboards', {
+    'task': 'achievements.rebuild_leaderboards',
+    'schedule': crontab(hour=4, minute=30),
+})
+
+# Cheap when nothing is due: each open Koywe order carries its own next check
+# time (ramps.reconciliation), so a run only polls the orders that are due.
+app.conf.beat_schedule.setdefault('ramps-poll-koywe-ramp-transactions', {
+    'task': 'ramps.tasks.poll_koywe_ramp_transactions',
+    'schedule': 30.0,
+})
+
+# Deposit and conversion saves only queue their referral reward events while
+# this runs (achievements.services.referral_pipeline).
+app.conf.beat_schedule.setdefault('achievements-process-referral-rewards', {
+    'task': 'achievements.process_referral_rewards',
+    'schedule': 15.0,
+})
+
+# Source saves only append to the unified projection outbox while this runs
+# (users.unified_projector); its heartbeat outlives several missed beats.
+app.conf.beat_schedule.setdefault('users-project-unified-transactions', {
+    'task': 'users.project_unified_transactions',
+    'schedule': 10.0,
+})
+
+# Ondo Stocks TVL reads the holdings ledger (cusd_plus.gm_ledger), which
+# follows GM Transfer logs; the nightly audit is the only full balance scan.
+app.conf.beat_schedule.setdefault('cusd-plus-follow-gm-holdings', {
+    'task': 'cusd_plus.follow_gm_holdings',
+    'schedule': 30.0,
+})
+app.conf.beat_schedule.setdefault('cusd-plus-audit-gm-holdings', {
+    'task': 'cusd_plus.audit_gm_holdings',
+    'schedule': crontab(hour=5, minute=15),
+})
+
+# Stock charts read the local price store (cusd_plus.gm_prices): one market
+# snapshot a minute feeds it; new symbols are seeded from upstream hourly.
+app.conf.beat_schedule.setdefault('cusd-plus-ingest-gm-prices', {
+    'task': 'cusd_plus.ingest_gm_prices',
+    'schedule': 60.0,
+})
+app.conf.beat_schedule.setdefault('cusd-plus-maintain-gm-prices', {
+    'task': 'cusd_plus.maintain_gm_prices',
+    'schedule': crontab(minute=20),
+})
+
+# Presale stats are running counters (presale.live_stats); this resets them
+# from the purchases table so drift lasts minutes at most.
+app.conf.beat_schedule.setdefault('presale-rebuild-live-stats', {
+    'task': 'presale.rebuild_live_stats',
+    'schedule': crontab(minute='*/10'),
+})
+
+# Cached query embeddings (content_ingestion.memory_index) are only touched
+# on reuse; this drops the ones nobody has asked again in a month.
+app.conf.beat_schedule.setdefault('content-ingestion-purge-query-embeddings', {
+    'task': 'content_ingestion.purge_query_embeddings',
+    'schedule': crontab(hour=4, minute=50),
+})
+
 # Ensure DB connections are properly managed around every Celery task
 try:
     from celery import signals
@@ -0,0 +1,214 @@
+"""
+Operation-level hooks for the /graphql/ view.
+
+Graphene field middleware runs around EVERY resolved field: a list query
+returning a thousand rows of ten fields pays each middleware ten thousand
+times, and ActivityTrackingMiddleware re-checked the operation type — and
+on mutations touched last_activity_at — for every one of them. Work that is
+about the request rather than a field now runs here, once per operation:
+
+  - AccountContextHook: the JWT-derived account context on the request
+    (which GraphQL resolvers see as info.context).
+  - ActivityTrackingHook (users.graphql_middleware): last_activity_at on
+    authenticated mutations.
+  - QueryCostHook: selection count and depth of the executed operation,
+    counted on the parsed document.
+  - TimingHook: wall time of the operation, logged when slow.
+  - ProfilerHook (config.graphql_profiler): opt-in sampled resolver, SQL
+    and external-call profile.
+
+Each hook may define before(request, operation) and after(request,
+operation, result); a failing hook is logged and never fails the request.
+The list is settings.GRAPHQL_OPERATION_HOOKS (dotted paths), defaulting to
+DEFAULT_OPERATION_HOOKS.
+
+What stays field middleware only needs the root fields (JWT authentication
+sets context.user before any nested resolver runs), so the view executes
+with RootFieldExecutionContext: the middleware chain wraps top-level fields
+and nested fields call their resolvers directly.
+"""
+import functools
+import logging
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from graphql import (
+    ExecutionContext,
+    FieldNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    get_operation_ast,
+    parse,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPERATION_HOOKS = [
+    'config.graphql_pipeline.TimingHook',
+    'config.graphql_pipeline.AccountContextHook',
+    'config.graphql_pipeline.QueryCostHook',
+    'users.graphql_middleware.ActivityTrackingHook',
+    'config.graphql_profiler.ProfilerHook',
+]
+
+# Operations above either bound are logged with their name and caller.
+COST_WARN_SELECTIONS = 2000
+COST_WARN_DEPTH = 12
+SLOW_OPERATION_MS = 1000
+
+
+class GraphQLOperation:
+    """The operation a request executes, as the hooks see it."""
+
+    def __init__(self, query: str, operation_name: str | None):
+        self.query = query
+        self.document = None
+        self.ast = None
+        try:
+            self.document = _parse(query)
+            self.ast = get_operation_ast(self.document, operation_name)
+        except Exception:  # noqa: BLE001 — the view reports syntax errors itself
+            pass
+        self.type = self.ast.operation.value if self.ast is not None else None
+        self.name = (
+            self.ast.name.value if self.ast is not None and self.ast.name else operation_name
+        ) or ''
+        self.started_at = None
+        self.elapsed_ms = None
+        self.selections = None
+        self.depth = None
+
+
+@functools.lru_cache(maxsize=512)
+def _parse(query: str):
+    # The app sends the same few hundred query strings over and over.
+    return parse(query)
+
+
+def operation_hooks() -> list:
+    return [import_string(path)() for path in
+            getattr(settings, 'GRAPHQL_OPERATION_HOOKS', DEFAULT_OPERATION_HOOKS)]
+
+
+def run_hooks(hooks, stage: str, *args) -> None:
+    order = hooks if stage == 'before' else reversed(hooks)
+    for hook in order:
+        method = getattr(hook, stage, None)
+        if method is None:
+            continue
+        try:
+            method(*args)
+        except Exception:  # noqa: BLE001 — a hook never fails the request
+            logger.exception('GraphQL operation hook %s.%s failed', type(hook).__name__, stage)
+
+
+class RootFieldExecutionContext(ExecutionContext):
+    """Applies field middleware to top-level fields only."""
+
+    def execute_field(self, parent_type, source, field_nodes, path):
+        if path.prev is None or self.middleware_manager is None:
+            return super().execute_field(parent_type, source, field_nodes, path)
+        manager, self.middleware_manager = self.middleware_manager, None
+        try:
+            return super().execute_field(parent_type, source, field_nodes, path)
+        finally:
+            self.middleware_manager = manager
+
+
+# ── Hooks ──────────────────────────────────────────────────────────────
+
+class TimingHook:
+    def before(self, request, operation):
+        operation.started_at = time.perf_counter()
+
+    def after(self, request, operation, result):
+        operation.elapsed_ms = (time.perf_counter() - operation.started_at) * 1000
+        limit = getattr(settings, 'GRAPHQL_SLOW_OPERATION_MS', SLOW_OPERATION_MS)
+        if operation.elapsed_ms >= limit:
+            user = getattr(request, 'user', None)
+            logger.warning(
+                'Slow GraphQL %s %s: %.0f ms, %s selections (user %s)',
+                operation.type, operation.name or '<anonymous>', operation.elapsed_ms,
+                operation.selections, getattr(user, 'id', None),
+            )
+
+
+class AccountContextHook:
+    """Active account from the JWT, defaulting to the personal account."""
+
+    def before(self, request, operation):
+        account_type, account_index, business_id = 'personal', 0, None
+        try:
+            from users.jwt_context import get_jwt_business_context_with_validation
+
+            class FakeInfo:
+                def __init__(self, ctx):
+                    self.context = ctx
+
+            jwt_ctx = get_jwt_business_context_with_validation(FakeInfo(request), required_permission=None)
+            if jwt_ctx:
+                account_type = jwt_ctx.get('account_type', 'personal')
+                account_index = jwt_ctx.get('account_index', 0)
+                business_id = jwt_ctx.get('business_id')
+        except Exception:
+            # On any failure, keep safe defaults
+            pass
+        request.active_account_type = account_type
+        request.active_account_index = account_index
+        request.active_business_id = business_id
+
+        if settings.DEBUG:
+            logger.info(
+                "GraphQL Context - User: %s, Account Type: %s, Account Index: %s",
+                getattr(request, 'user', None), account_type, account_index,
+            )
+
+
+class QueryCostHook:
+    def before(self, request, operation):
+        if operation.ast is None:
+            return
+        fragments = {
+            definition.name.value: definition
+            for definition in operation.document.definitions
+            if not isinstance(definition, OperationDefinitionNode)
+        }
+        operation.selections, operation.depth = _cost(operation.ast.selection_set, fragments)
+        request.graphql_operation = operation
+        if (operation.selections > getattr(settings, 'GRAPHQL_COST_WARN_SELECTIONS', COST_WARN_SELECTIONS)
+                or operation.depth > COST_WARN_DEPTH):
+            user = getattr(request, 'user', None)
+            logger.warning(
+                'Expensive GraphQL %s %s: %s selections, depth %s (user %s)',
+                operation.type, operation.name or '<anonymous>', operation.selections,
+                operation.depth, getattr(user, 'id', None),
+            )
+
+
+def _cost(selection_set, fragments, depth=1, seen=frozenset()) -> tuple[int, int]:
+    """(field selections, deepest field level), fragments expanded."""
+    count, deepest = 0, 0
+    for node in (selection_set.selections if selection_set else ()):
+        if isinstance(node, FieldNode):
+            count += 1
+            deepest = max(deepest, depth)
+            if node.selection_set:
+                sub_count, sub_depth = _cost(node.selection_set, fragments, depth + 1, seen)
+                count += sub_count
+                deepest = max(deepest, sub_depth)
+            continue
+        if isinstance(node, FragmentSpreadNode):
+            name = node.name.value
+            if name in seen or name not in fragments:
+                continue
+            sub_set, seen_here = fragments[name].selection_set, seen | {name}
+        elif isinstance(node, InlineFragmentNode):
+            sub_set, seen_here = node.selection_set, seen
+        else:
+            continue
+        sub_count, sub_depth = _cost(sub_set, fragments, depth, seen_here)
+        count += sub_count
+        deepest = max(deepest, sub_depth)
+    return count, deepest
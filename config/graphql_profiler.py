@@ -0,0 +1,371 @@
+"""
+Sampling profiler for the /graphql/ view.
+
+Opt-in: settings.GRAPHQL_PROFILE_SAMPLE_RATE (0.0 - 1.0, default 0 = off)
+picks the operations to profile. An operation that is not sampled costs one
+random() call; a sampled one records:
+
+  - the operation's wall time, SQL and external calls;
+  - per resolver (ParentType.field): calls, own wall time — nested fields
+    resolve after their parent returns, so children are not included — and
+    the SQL and HTTP calls made while it ran;
+  - SQL through connection.execute_wrapper: count and time per resolver,
+    and N+1 signatures — the same statement shape repeated at least
+    N_PLUS_ONE_REPEATS times under one resolver path (the field path with
+    list indices dropped, e.g. rows.owner);
+  - HTTP/RPC calls through requests and urllib (RPC nodes, Ondo, Koywe,
+    algod…), by host.
+
+ProfilerHook is one of the operation hooks of config.graphql_pipeline;
+ProfilingExecutionContext adds the resolver timer to every field of a
+sampled operation. Samples are merged into hourly windows in the Django
+cache as fixed-bucket histograms (BUCKETS_MS) — if another process holds the
+window, the sample is dropped rather than waited for — and aggregate()
+sums the recent windows for the admin page and its JSON export.
+"""
+import contextlib
+import contextvars
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from graphql.execution.middleware import MiddlewareManager
+
+from .graphql_pipeline import RootFieldExecutionContext
+
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+N_PLUS_ONE_REPEATS = 5
+WINDOW_SECONDS = 3600
+WINDOW_TTL = 48 * 3600
+WINDOW_KEY = 'gql_profile:{}'
+LOCK_KEY = 'gql_profile_lock'
+# Bounds a window's size whatever the traffic looks like: operation names
+# come from the client, so names past MAX_OPERATIONS share OTHER_OPERATION.
+MAX_OPERATIONS = 200
+MAX_OPERATION_NAME = 100
+OTHER_OPERATION = '(other)'
+MAX_SIGNATURES = 500
+MAX_SQL_SHAPE = 300
+
+_active = contextvars.ContextVar('graphql_profile', default=None)
+
+
+def sample_rate() -> float:
+    return float(getattr(settings, 'GRAPHQL_PROFILE_SAMPLE_RATE', 0) or 0)
+
+
+# ── Recording ──────────────────────────────────────────────────────────
+
+_SQL_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SQL_SPACE = re.compile(r'\s+')
+
+
+def sql_shape(sql: str) -> str:
+    """The statement with its literals and IN-list lengths erased."""
+    shape = _SQL_IN_LIST.sub('IN (...)', sql)
+    shape = _SQL_LITERAL.sub('?', shape)
+    return _SQL_SPACE.sub(' ', shape).strip()[:MAX_SQL_SHAPE]
+
+
+def _stats() -> dict:
+    return {'count': 0, 'ms': 0.0, 'sql_count': 0, 'sql_ms': 0.0, 'http_count': 0, 'http_ms': 0.0}
+
+
+class OperationProfile:
+    def __init__(self, operation):
+        self.operation = operation
+        self.totals = _stats()
+        self.resolvers = defaultdict(_stats)
+        self.http_hosts = defaultdict(lambda: {'count': 0, 'ms': 0.0})
+        self.shapes = defaultdict(int)
+        self._stack = []
+
+    def _current(self):
+        return self._stack[-1] if self._stack else None
+
+    def enter(self, key: str, path: str):
+        self._stack.append((key, path))
+
+    def exit(self, elapsed_ms: float):
+        key, _ = self._stack.pop()
+        stats = self.resolvers[key]
+        stats['count'] += 1
+        stats['ms'] += elapsed_ms
+
+    def sql(self, sql: str, elapsed_ms: float):
+        self.totals['sql_count'] += 1
+        self.totals['sql_ms'] += elapsed_ms
+        current = self._current()
+        if current is None:
+            return
+        stats = self.resolvers[current[0]]
+        stats['sql_count'] += 1
+        stats['sql_ms'] += elapsed_ms
+        self.shapes[(current[1], sql_shape(sql))] += 1
+
+    def http(self, host: str, elapsed_ms: float):
+        self.totals['http_count'] += 1
+        self.totals['http_ms'] += elapsed_ms
+        self.http_hosts[host]['count'] += 1
+        self.http_hosts[host]['ms'] += elapsed_ms
+        current = self._current()
+        if current is not None:
+            stats = self.resolvers[current[0]]
+            stats['http_count'] += 1
+            stats['http_ms'] += elapsed_ms
+
+    def n_plus_one(self) -> list:
+        return [(path, shape, repeats) for (path, shape), repeats in self.shapes.items()
+                if repeats >= N_PLUS_ONE_REPEATS]
+
+
+class _SqlTimer:
+    def __init__(self, profile: OperationProfile):
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.profile.sql(sql, (time.perf_counter() - started) * 1000)
+
+
+class _ResolverTimer:
+    def __init__(self, profile: OperationProfile):
+        self.profile = profile
+
+    def resolve(self, next, root, info, **kwargs):
+        path = '.'.join(str(key) for key in info.path.as_list() if not isinstance(key, int))
+        self.profile.enter(f'{info.parent_type.name}.{info.field_name}', path)
+        started = time.perf_counter()
+        try:
+            return next(root, info, **kwargs)
+        finally:
+            self.profile.exit((time.perf_counter() - started) * 1000)
+
+
+class ProfilingExecutionContext(RootFieldExecutionContext):
+    """RootFieldExecutionContext that, for a sampled operation, also times
+    every field."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        profile = getattr(self.context_value, 'graphql_profile', None)
+        self._profiled = None
+        if profile is not None:
+            timer = _ResolverTimer(profile)
+            chain = list(self.middleware_manager.middlewares) if self.middleware_manager else []
+            self._profiled = (MiddlewareManager(*chain, timer), MiddlewareManager(timer))
+
+    def execute_field(self, parent_type, source, field_nodes, path):
+        if self._profiled is None:
+            return super().execute_field(parent_type, source, field_nodes, path)
+        manager = self.middleware_manager
+        self.middleware_manager = self._profiled[0] if path.prev is None else self._profiled[1]
+        try:
+            return super(RootFieldExecutionContext, self).execute_field(
+                parent_type, source, field_nodes, path)
+        finally:
+            self.middleware_manager = manager
+
+
+# ── External calls ─────────────────────────────────────────────────────
+
+_patch_lock = threading.Lock()
+_patched = False
+
+
+def _install_http_timers() -> None:
+    """Wrap requests and urllib once; unsampled calls pass straight through."""
+    global _patched
+    with _patch_lock:
+        if _patched:
+            return
+        import urllib.parse
+        import urllib.request
+
+        import requests
+
+        send = requests.Session.send
+
+        def timed_send(session, request, **kwargs):
+            profile = _active.get()
+            if profile is None:
+                return send(session, request, **kwargs)
+            started = time.perf_counter()
+            try:
+                return send(session, request, **kwargs)
+            finally:
+                profile.http(urllib.parse.urlsplit(request.url).netloc,
+                             (time.perf_counter() - started) * 1000)
+
+        urlopen = urllib.request.urlopen
+
+        def timed_urlopen(url, *args, **kwargs):
+            profile = _active.get()
+            if profile is None:
+                return urlopen(url, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return urlopen(url, *args, **kwargs)
+            finally:
+                target = url if isinstance(url, str) else url.full_url
+                profile.http(urllib.parse.urlsplit(target).netloc,
+                             (time.perf_counter() - started) * 1000)
+
+        requests.Session.send = timed_send
+        urllib.request.urlopen = timed_urlopen
+        _patched = True
+
+
+# ── Hook ───────────────────────────────────────────────────────────────
+
+class ProfilerHook:
+    def before(self, request, operation):
+        rate = sample_rate()
+        if rate <= 0 or random.random() >= rate:
+            return
+        _install_http_timers()
+        profile = OperationProfile(operation)
+        stack = contextlib.ExitStack()
+        stack.enter_context(connection.execute_wrapper(_SqlTimer(profile)))
+        token = _active.set(profile)
+        stack.callback(_active.reset, token)
+        profile.started_at = time.perf_counter()
+        profile.exit_stack = stack
+        request.graphql_profile = profile
+
+    def after(self, request, operation, result):
+        profile = getattr(request, 'graphql_profile', None)
+        if profile is None:
+            return
+        profile.exit_stack.close()
+        request.graphql_profile = None
+        profile.totals['count'] = 1
+        profile.totals['ms'] = (time.perf_counter() - profile.started_at) * 1000
+        record(profile)
+
+
+# ── Aggregation ────────────────────────────────────────────────────────
+
+def _histogram() -> dict:
+    return {'count': 0, 'ms': 0.0, 'max_ms': 0.0, 'buckets': [0] * (len(BUCKETS_MS) + 1),
+            'sql_count': 0, 'sql_ms': 0.0, 'http_count': 0, 'http_ms': 0.0}
+
+
+def _bucket(ms: float) -> int:
+    for index, bound in enumerate(BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return len(BUCKETS_MS)
+
+
+def _add(histogram: dict, stats: dict) -> None:
+    for field in ('count', 'ms', 'sql_count', 'sql_ms', 'http_count', 'http_ms'):
+        histogram[field] += stats[field]
+    histogram['max_ms'] = max(histogram['max_ms'], stats['ms'])
+    histogram['buckets'][_bucket(stats['ms'])] += 1
+
+
+def _empty_window() -> dict:
+    return {'samples': 0, 'operations': {}, 'resolvers': {}, 'http': {}, 'n_plus_one': {}}
+
+
+def record(profile: OperationProfile, now: float | None = None) -> bool:
+    """Merge one profile into the current window; False if it was dropped."""
+    if not cache.add(LOCK_KEY, 1, 5):
+        return False
+    try:
+        key = WINDOW_KEY.format(int((now or time.time()) // WINDOW_SECONDS))
+        window = cache.get(key) or _empty_window()
+        window['samples'] += 1
+        operation = profile.operation
+        name = f'{operation.type or "?"} {operation.name or "<anonymous>"}'[:MAX_OPERATION_NAME]
+        if name not in window['operations'] and len(window['operations']) >= MAX_OPERATIONS:
+            name = OTHER_OPERATION
+        _add(window['operations'].setdefault(name, _histogram()), profile.totals)
+        for resolver, stats in profile.resolvers.items():
+            # One histogram entry per operation: the resolver's time in it.
+            _add(window['resolvers'].setdefault(resolver, _histogram()), stats)
+        for host, stats in profile.http_hosts.items():
+            entry = window['http'].setdefault(host, {'count': 0, 'ms': 0.0})
+            entry['count'] += stats['count']
+            entry['ms'] += stats['ms']
+        for path, shape, repeats in profile.n_plus_one():
+            signature = f'{name} | {path} | {shape}'
+            entry = window['n_plus_one'].get(signature)
+            if entry is None:
+                if len(window['n_plus_one']) >= MAX_SIGNATURES:
+                    continue
+                entry = window['n_plus_one'][signature] = {
+                    'operation': name, 'path': path, 'sql': shape, 'occurrences': 0, 'max_repeats': 0}
+            entry['occurrences'] += 1
+            entry['max_repeats'] = max(entry['max_repeats'], repeats)
+        cache.set(key, window, WINDOW_TTL)
+        return True
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def percentile(histogram: dict, q: float) -> float | None:
+    """Upper bound (ms) of the bucket holding the q-th percentile."""
+    total = sum(histogram['buckets'])
+    if not total:
+        return None
+    target, seen = q * total, 0
+    for index, count in enumerate(histogram['buckets']):
+        seen += count
+        if seen >= target:
+            return BUCKETS_MS[index] if index < len(BUCKETS_MS) else histogram['max_ms']
+    return histogram['max_ms']
+
+
+def aggregate(hours: int = 24, now: float | None = None) -> dict:
+    """The last `hours` windows summed, sections sorted by total time."""
+    current = int((now or time.time()) // WINDOW_SECONDS)
+    keys = [WINDOW_KEY.format(current - offset) for offset in range(hours)]
+    out = _empty_window()
+    for window in cache.get_many(keys).values():
+        out['samples'] += window['samples']
+        for section in ('operations', 'resolvers'):
+            for name, histogram in window[section].items():
+                into = out[section].setdefault(name, _histogram())
+                for field in ('count', 'ms', 'sql_count', 'sql_ms', 'http_count', 'http_ms'):
+                    into[field] += histogram[field]
+                into['max_ms'] = max(into['max_ms'], histogram['max_ms'])
+                into['buckets'] = [a + b for a, b in zip(into['buckets'], histogram['buckets'])]
+        for host, stats in window['http'].items():
+            into = out['http'].setdefault(host, {'count': 0, 'ms': 0.0})
+            into['count'] += stats['count']
+            into['ms'] += stats['ms']
+        for signature, entry in window['n_plus_one'].items():
+            into = out['n_plus_one'].setdefault(signature, dict(entry, occurrences=0, max_repeats=0))
+            into['occurrences'] += entry['occurrences']
+            into['max_repeats'] = max(into['max_repeats'], entry['max_repeats'])
+
+    def rows(section):
+        return sorted(
+            ({'name': name, **histogram, 'p50_ms': percentile(histogram, 0.5),
+              'p95_ms': percentile(histogram, 0.95)}
+             for name, histogram in out[section].items()),
+            key=lambda row: row['ms'], reverse=True)
+
+    return {
+        'hours': hours,
+        'sample_rate': sample_rate(),
+        'samples': out['samples'],
+        'buckets_ms': BUCKETS_MS,
+        'operations': rows('operations'),
+        'resolvers': rows('resolvers'),
+        'http': sorted(({'host': host, **stats} for host, stats in out['http'].items()),
+                       key=lambda row: row['ms'], reverse=True),
+        'n_plus_one': sorted(out['n_plus_one'].values(),
+                             key=lambda row: row['occurrences'] * row['max_repeats'], reverse=True),
+    }
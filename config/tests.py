@@ -3,9 +3,21 @@ from types import SimpleNamespace
 from unittest.mock import Mock, patch
 from urllib.parse import parse_qs, urlparse
 
-from django.test import RequestFactory, SimpleTestCase, override_settings
+import graphene
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from graphql import execute, parse
 
+from config import graphql_profiler
+from config.graphql_pipeline import (
+    GraphQLOperation,
+    QueryCostHook,
+    RootFieldExecutionContext,
+    run_hooks,
+)
 from config.views import guardarian_transaction_proxy
+from users.graphql_middleware import ActivityTrackingHook
 
 
 class _FakeAccountQuerySet:
@@ -85,3 +97,125 @@ class GuardarianTransactionProxyTests(SimpleTestCase):
         self.assertEqual(provider_payload['customer']['contact_info']['email'], self.user.email)
         self.assertEqual(provider_payload['payout_info']['payout_address'], self.account.algorand_address)
         self.assertTrue(provider_payload['payout_info']['skip_choose_payout_address'])
+
+
+class QueryCostHookTests(SimpleTestCase):
+    def test_query_cost_counts_fragment_selections(self):
+        operation = GraphQLOperation(
+            'query Rows { rows { ...F } } fragment F on Row { a b }', None)
+        request = Mock()
+        QueryCostHook().before(request, operation)
+        self.assertEqual((operation.name, operation.type), ('Rows', 'query'))
+        self.assertEqual((operation.selections, operation.depth), (3, 2))
+
+
+class GraphQLOperationPipelineTests(SimpleTestCase):
+    def _schema(self):
+        class Row(graphene.ObjectType):
+            a = graphene.Int()
+            b = graphene.Int()
+
+        class Query(graphene.ObjectType):
+            rows = graphene.List(Row)
+
+            def resolve_rows(root, info):
+                return [{'a': 1, 'b': 2}] * 3
+
+        class Touch(graphene.Mutation):
+            rows = graphene.List(Row)
+
+            def mutate(root, info):
+                return Touch(rows=[{'a': 1, 'b': 2}] * 3)
+
+        class Mutation(graphene.ObjectType):
+            touch = Touch.Field()
+
+        return graphene.Schema(query=Query, mutation=Mutation).graphql_schema
+
+    def _run(self, query, middleware=()):
+        request = Mock(user=Mock(is_authenticated=True, id=7))
+        operation = GraphQLOperation(query, None)
+        hooks = [ActivityTrackingHook()]
+        run_hooks(hooks, 'before', request, operation)
+        result = execute(self._schema(), parse(query), context_value=request,
+                         middleware=list(middleware),
+                         execution_context_class=RootFieldExecutionContext)
+        run_hooks(hooks, 'after', request, operation, result)
+        self.assertIsNone(result.errors)
+        return result
+
+    def test_field_middleware_wraps_top_level_fields_only(self):
+        seen = []
+
+        class Recorder:
+            def resolve(self, next, root, info, **kwargs):
+                seen.append(info.field_name)
+                return next(root, info, **kwargs)
+
+        result = self._run('{ rows { a b } }', [Recorder()])
+        self.assertEqual(len(result.data['rows']), 3)
+        self.assertEqual(seen, ['rows'])
+
+    @patch('users.graphql_middleware.touch_last_activity')
+    def test_activity_is_touched_once_per_mutation(self, touch):
+        self._run('{ rows { a b } }')
+        touch.assert_not_called()
+        self._run('mutation { touch { rows { a b } } }')
+        touch.assert_called_once()
+
+
+@override_settings(GRAPHQL_PROFILE_SAMPLE_RATE=1.0)
+class GraphQLProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sampled_operation_records_resolvers_sql_and_n_plus_one(self):
+        class Row(graphene.ObjectType):
+            taken = graphene.Boolean()
+
+            def resolve_taken(root, info):
+                return get_user_model().objects.filter(username=f'row-{root}').exists()
+
+        class Query(graphene.ObjectType):
+            rows = graphene.List(Row)
+
+            def resolve_rows(root, info):
+                return list(range(6))
+
+        query = 'query Rows { rows { taken } }'
+        request = Mock(spec=['user'])
+        operation = GraphQLOperation(query, None)
+        hooks = [graphql_profiler.ProfilerHook()]
+        run_hooks(hooks, 'before', request, operation)
+        result = execute(graphene.Schema(query=Query).graphql_schema, parse(query),
+                         context_value=request,
+                         execution_context_class=graphql_profiler.ProfilingExecutionContext)
+        run_hooks(hooks, 'after', request, operation, result)
+        self.assertIsNone(result.errors)
+
+        profile = graphql_profiler.aggregate(1)
+        self.assertEqual(profile['samples'], 1)
+        self.assertEqual(profile['operations'][0]['name'], 'query Rows')
+        self.assertEqual(profile['operations'][0]['sql_count'], 6)
+        resolvers = {row['name']: row for row in profile['resolvers']}
+        self.assertEqual((resolvers['Row.taken']['count'], resolvers['Row.taken']['sql_count']), (6, 6))
+        self.assertEqual(resolvers['Query.rows']['sql_count'], 0)
+        [signature] = profile['n_plus_one']
+        self.assertEqual((signature['path'], signature['max_repeats']), ('rows.taken', 6))
+        self.assertIn('"username" = %s', signature['sql'])
+
+    def test_unsampled_operation_is_not_profiled(self):
+        request = Mock(spec=['user'])
+        with self.settings(GRAPHQL_PROFILE_SAMPLE_RATE=0):
+            graphql_profiler.ProfilerHook().before(request, GraphQLOperation('{ a }', None))
+        self.assertFalse(hasattr(request, 'graphql_profile'))
+
+    def test_client_operation_names_beyond_the_cap_share_one_bucket(self):
+        with patch.object(graphql_profiler, 'MAX_OPERATIONS', 2):
+            for name in ('A', 'B', 'C', 'D', 'A'):
+                profile = graphql_profiler.OperationProfile(GraphQLOperation(f'query {name} {{ a }}', None))
+                profile.totals['count'] = 1
+                self.assertTrue(graphql_profiler.record(profile, now=0))
+
+        names = {row['name']: row['count'] for row in graphql_profiler.aggregate(1, now=0)['operations']}
+        self.assertEqual(names, {'query A': 2, 'query B': 1, graphql_profiler.OTHER_OPERATION: 2})
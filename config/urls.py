@@ -8,6 +8,8 @@ from django.urls import path, include, re_path
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.admin.views.decorators import staff_member_required
 from graphene_django.views import GraphQLView
+from .graphql_pipeline import GraphQLOperation, operation_hooks, run_hooks
+from .graphql_profiler import ProfilingExecutionContext
 from .views import (
     terms_view,
     privacy_view,
@@ -41,48 +43,36 @@ def _should_log_graphql_request_details():
     return settings.DEBUG
 
 class LoggingGraphQLView(GraphQLView):
-    def get_context(self, request):
-        """Override to add account context to GraphQL context"""
-        context = super().get_context(request)
-
-        # Derive account context from JWT, not from legacy request attributes
+    """GraphQL endpoint with operation-level hooks (config.graphql_pipeline):
+    per-request work runs once per operation, and field middleware only
+    wraps top-level fields — except in operations the sampling profiler
+    (config.graphql_profiler) times field by field."""
+
+    execution_context_class = ProfilingExecutionContext
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from users.graphql_middleware import ActivityTrackingMiddleware
+
+        # Activity tracking is an operation hook now; as field middleware it
+        # would still run for every resolved field.
+        self.middleware = [
+            m for m in (self.middleware or []) if not isinstance(m, ActivityTrackingMiddleware)
+        ]
+        self.operation_hooks = operation_hooks()
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        operation = GraphQLOperation(query or '', operation_name)
+        run_hooks(self.operation_hooks, 'before', request, operation)
+        result = None
         try:
-            from users.jwt_context import get_jwt_business_context_with_validation
-
-            class FakeInfo:
-                def __init__(self, ctx):
-                    self.context = ctx
-
-            jwt_ctx = get_jwt_business_context_with_validation(FakeInfo(context), required_permission=None)
-            if jwt_ctx:
-                context.active_account_type = jwt_ctx.get('account_type', 'personal')
-                context.active_account_index = jwt_ctx.get('account_index', 0)
-                context.active_business_id = jwt_ctx.get('business_id')
-                # Mirror onto request for downstream logging that still reads request.*
-                setattr(request, 'active_account_type', context.active_account_type)
-                setattr(request, 'active_account_index', context.active_account_index)
-                setattr(request, 'active_business_id', context.active_business_id)
-            else:
-                # Default to personal if no JWT context
-                context.active_account_type = 'personal'
-                context.active_account_index = 0
-                context.active_business_id = None
-        except Exception:
-            # On any failure, keep safe defaults
-            context.active_account_type = 'personal'
-            context.active_account_index = 0
-            context.active_business_id = None
-
-        if _should_log_graphql_request_details():
-            logger.info(
-                "GraphQL Context - User: %s, Account Type: %s, Account Index: %s",
-                context.user,
-                context.active_account_type,
-                context.active_account_index,
-            )
-
-        return context
-    
+            result = super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql)
+        finally:
+            # Also on HttpError: hooks may hold per-request state to release.
+            run_hooks(self.operation_hooks, 'after', request, operation, result)
+        return result
+
     def dispatch(self, request, *args, **kwargs):
         if request.method == 'POST':
             try:
@@ -92,31 +82,6 @@ class LoggingGraphQLView(GraphQLView):
                     logger.info("GraphQL Query: %s", query)
                     logger.info("GraphQL Variables: %s", body.get('variables', {}))
 
-                # Derive and align request account context from JWT prior to logging
-                try:
-                    from users.jwt_context import get_jwt_business_context_with_validation
-
-                    class FakeInfo:
-                        def __init__(self, ctx):
-                            self.context = ctx
-
-                    jwt_ctx = get_jwt_business_context_with_validation(FakeInfo(request), required_permission=None)
-                    if jwt_ctx:
-                        setattr(request, 'active_account_type', jwt_ctx.get('account_type', 'personal'))
-                        setattr(request, 'active_account_index', jwt_ctx.get('account_index', 0))
-                        setattr(request, 'active_business_id', jwt_ctx.get('business_id'))
-                except Exception:
-                    # Keep existing attributes if derivation fails
-                    pass
-
-                # Log aligned account context
-                if _should_log_graphql_request_details():
-                    logger.info(
-                        "Request Account Context - Type: %s, Index: %s",
-                        getattr(request, 'active_account_type', 'not set'),
-                        getattr(request, 'active_account_index', 'not set'),
-                    )
-                
                 # Log balance queries specifically
                 if settings.DEBUG and 'accountBalance' in query:
                     logger.info(
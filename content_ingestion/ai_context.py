@@ -6,17 +6,20 @@ from __future__ import annotations
 import glob
 import os
 import re
-import unicodedata
+import time
 from dataclasses import dataclass
 
 from django.conf import settings
 
+from .lexical_index import LexicalIndex, default_index_path, load_index, normalize_text, save_index, tokenize
 from .memory_index import semantic_search
 
 # Cache the corpus keyed by the set of files and their mtimes, so we only re-read
 # the ConfioAI repo when something actually changed.
 _CACHE: dict = {'sig': None, 'corpus': ''}
-_INDEX_CACHE: dict = {'sig': None, 'chunks': []}
+# The lexical index of the memory chunks, for the docs dir it was built from.
+# The files are re-stat'ed at most every CONFIO_AI_INDEX_RECHECK_SECONDS.
+_INDEX_CACHE: dict = {'docs': None, 'checked_at': None, 'index': None}
 
 CANONICAL_CATEGORY_WEIGHTS = {
     'content-rules': 5.0,
@@ -95,15 +98,8 @@ def load_knowledge_corpus(max_chars: int | None = None) -> str:
     return corpus
 
 
-def _normalize_text(value: str) -> str:
-    value = unicodedata.normalize('NFKD', value or '')
-    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
-    return re.sub(r'\s+', ' ', value.lower()).strip()
-
-
 def _query_terms(query: str) -> list[str]:
-    normalized = _normalize_text(query)
-    terms = re.findall(r'[a-z0-9][a-z0-9_-]{2,}|[\uac00-\ud7a3]{2,}', normalized)
+    terms = tokenize(normalize_text(query))
     stop = {
         'the', 'and', 'for', 'con', 'que', 'una', 'uno', 'por', 'para', 'como',
         'this', 'that', 'from', 'what', 'when', 'write', 'please', 'quiero',
@@ -162,17 +158,25 @@ def _split_markdown_chunks(text: str, *, path: str, category: str) -> list[Memor
     return chunks
 
 
-def _memory_chunks() -> list[MemoryChunk]:
-    docs = _docs_dir()
-    if not docs or not os.path.isdir(docs):
-        return []
-    files = [
+def _memory_files(docs: str) -> list[str]:
+    return [
         path for path in glob.glob(os.path.join(docs, '**', '*.md'), recursive=True)
         if f'{os.sep}conversations{os.sep}' not in path and os.path.basename(path) != '.gitkeep'
     ]
-    sig = tuple(sorted((path, os.path.getmtime(path), os.path.getsize(path)) for path in files))
-    if _INDEX_CACHE['sig'] == sig:
-        return _INDEX_CACHE['chunks']
+
+
+def _build_memory_index(docs: str, files: list[str], sig, previous: LexicalIndex | None = None) -> LexicalIndex:
+    # Files whose mtime and size are unchanged keep their chunks from the
+    # previous index; only changed documents are read and re-chunked.
+    reusable: dict[str, list[MemoryChunk]] = {}
+    if previous is not None and previous.sig[0] == docs:
+        unchanged = {
+            os.path.relpath(path, docs)
+            for path, _, _ in set(previous.sig[1]) & set(sig[1])
+        }
+        for chunk in previous.chunks:
+            if chunk.path in unchanged:
+                reusable.setdefault(chunk.path, []).append(chunk)
 
     chunks = []
     for path in files:
@@ -180,14 +184,52 @@ def _memory_chunks() -> list[MemoryChunk]:
         parts = relative.split(os.sep)
         if not parts:
             continue
+        if relative in reusable:
+            chunks.extend(reusable[relative])
+            continue
         try:
             text = open(path, encoding='utf-8').read()
         except OSError:
             continue
         chunks.extend(_split_markdown_chunks(text, path=relative, category=parts[0]))
-    _INDEX_CACHE['sig'] = sig
-    _INDEX_CACHE['chunks'] = chunks
-    return chunks
+    return LexicalIndex(chunks, sig)
+
+
+def _memory_index() -> LexicalIndex | None:
+    docs = _docs_dir()
+    if not docs or not os.path.isdir(docs):
+        return None
+    recheck = getattr(settings, 'CONFIO_AI_INDEX_RECHECK_SECONDS', 30)
+    now = time.monotonic()
+    if (
+        _INDEX_CACHE['docs'] == docs
+        and _INDEX_CACHE['checked_at'] is not None
+        and now - _INDEX_CACHE['checked_at'] < recheck
+    ):
+        return _INDEX_CACHE['index']
+
+    files = _memory_files(docs)
+    sig = (docs, tuple(sorted((path, os.path.getmtime(path), os.path.getsize(path)) for path in files)))
+    previous = _INDEX_CACHE['index'] if _INDEX_CACHE['docs'] == docs else None
+    index = previous
+    if index is None or index.sig != sig:
+        index_path = getattr(settings, 'CONFIO_AI_INDEX_PATH', '') or default_index_path()
+        index = load_index(index_path, sig)
+        if index is None:
+            index = _build_memory_index(docs, files, sig, previous)
+            save_index(index_path, index)
+    _INDEX_CACHE.update({'docs': docs, 'checked_at': now, 'index': index})
+    return index
+
+
+def invalidate_memory_index() -> None:
+    """Re-check the memory files on the next retrieval (after a write)."""
+    _INDEX_CACHE['checked_at'] = None
+
+
+def _memory_chunks() -> list[MemoryChunk]:
+    index = _memory_index()
+    return index.chunks if index is not None else []
 
 
 def retrieve_knowledge(
@@ -201,36 +243,32 @@ def retrieve_knowledge(
     max_chunks = max_chunks or getattr(settings, 'CONFIO_AI_RETRIEVAL_MAX_CHUNKS', 8)
     max_chars = max_chars or getattr(settings, 'CONFIO_AI_RETRIEVAL_MAX_CHARS', 9000)
     terms = _query_terms(query)
-    phrase = _normalize_text(query)
+    phrase = normalize_text(query)
     ranked = []
 
-    for chunk in _memory_chunks():
+    index = _memory_index()
+    chunks = index.chunks if index is not None else []
+    lexical = index.score(terms) if index is not None and terms else {}
+    unique_terms = len(set(terms))
+    # Unmatched chunks of the always-relevant categories still compete on
+    # their category weight, as in the full scan.
+    candidates = set(lexical) | {
+        doc for doc, chunk in enumerate(chunks)
+        if chunk.category in {'preferences', 'facts', 'decisions', 'content-rules'}
+    }
+    for doc in candidates:
+        chunk = chunks[doc]
         if categories is not None and chunk.category not in categories:
             continue
-        haystack = _normalize_text(f'{chunk.title} {chunk.heading} {chunk.text}')
-        path_text = _normalize_text(chunk.path)
-        category_weight = CANONICAL_CATEGORY_WEIGHTS.get(chunk.category, 0.25)
-        score = category_weight
-        matches = 0
-        for term in set(terms):
-            count = haystack.count(term)
-            if count:
-                matches += 1
-                score += min(count, 4) * 1.5
-                if term in _normalize_text(chunk.title):
-                    score += 3.0
-                if term in _normalize_text(chunk.heading):
-                    score += 2.0
-                if term in path_text:
-                    score += 1.0
-        if terms:
-            score += (matches / len(set(terms))) * 8.0
-        if phrase and len(phrase) <= 160 and phrase in haystack:
+        bm25, matches = lexical.get(doc, (0.0, 0))
+        score = CANONICAL_CATEGORY_WEIGHTS.get(chunk.category, 0.25) + bm25
+        if unique_terms:
+            score += (matches / unique_terms) * 8.0
+        if phrase and len(phrase) <= 160 and phrase in index.haystacks[doc]:
             score += 10.0
-        if matches or chunk.category in {'preferences', 'facts', 'decisions', 'content-rules'}:
-            ranked.append(MemoryChunk(
-                chunk.path, chunk.category, chunk.title, chunk.heading, chunk.text, score
-            ))
+        ranked.append(MemoryChunk(
+            chunk.path, chunk.category, chunk.title, chunk.heading, chunk.text, score
+        ))
 
     ranked.sort(key=lambda item: (-item.score, item.path, item.heading))
     lexical_by_key = {
@@ -9,6 +9,7 @@ from django.conf import settings
 from django.utils import timezone
 from django.utils.text import slugify
 
+from .ai_context import invalidate_memory_index
 from .models import AIContextCommitStatus, AIContextDocument
 
 
@@ -310,6 +311,7 @@ def append_canonical_promotions(promotions: list[dict], *, push: bool = True) ->
             if not additions:
                 continue
             target.write_text(existing.rstrip() + '\n\n' + '\n'.join(additions).rstrip() + '\n', encoding='utf-8')
+            invalidate_memory_index()
             changed_paths.append(str(relative))
 
         if not changed_paths or not _has_any_changes(repo_root, changed_paths):
@@ -365,6 +367,7 @@ def _revise_context_documents_locked(edits: list[dict], *, message: str = '', pu
                 )
         target.parent.mkdir(parents=True, exist_ok=True)
         target.write_text(body.rstrip() + '\n', encoding='utf-8')
+        invalidate_memory_index()
         changed_paths.append(str(relative))
 
     if not changed_paths or not _has_any_changes(repo_root, changed_paths):
@@ -425,6 +428,7 @@ def _write_commit_and_push_context_locked(document: AIContextDocument, *, push:
 
     target.parent.mkdir(parents=True, exist_ok=True)
     target.write_text(render_markdown(document), encoding='utf-8')
+    invalidate_memory_index()
     document.relative_path = str(relative_path)
     document.save(update_fields=['slug', 'relative_path', 'updated_at'])
 
@@ -0,0 +1,163 @@
+"""BM25 inverted index over the ConfioAI memory chunks.
+
+retrieve_knowledge used to scan every chunk per query, re-normalizing its
+title, heading, text and path for every query term. The index does that
+work once per corpus change: each chunk's normalized tokens go into
+postings (token -> [(chunk, term frequency)]), along with the token sets of
+its title, heading and path for the boosts, and its normalized text for
+the exact-phrase bonus.
+
+A query term matches every indexed token that starts with it (capped at
+PREFIX_EXPANSIONS), keeping the old substring scan's habit of matching
+'feature' in 'features'. Scoring is BM25 over the combined title, heading
+and text, plus the title/heading/path boosts; the caller folds in category
+weights, term coverage and the phrase bonus.
+
+The built index is pickled to disk with the signature of the files it was
+built from, so a restarted listener loads it instead of re-reading the
+repo. The file lives in a per-user cache directory (mode 0700) and is only
+unpickled when it is owned by this user and writable by no one else.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import os
+import pickle
+import re
+import tempfile
+import unicodedata
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 1
+K1 = 1.2
+B = 0.75
+BM25_WEIGHT = 3.0
+TITLE_BOOST = 3.0
+HEADING_BOOST = 2.0
+PATH_BOOST = 1.0
+PREFIX_EXPANSIONS = 16
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9_-]{2,}|[\uac00-\ud7a3]{2,}')
+
+
+def normalize_text(value: str) -> str:
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', value.lower()).strip()
+
+
+def tokenize(normalized: str) -> list[str]:
+    return TOKEN_RE.findall(normalized)
+
+
+class LexicalIndex:
+    def __init__(self, chunks: list, sig) -> None:
+        self.chunks = chunks
+        self.sig = sig
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        self.lengths: list[int] = []
+        self.haystacks: list[str] = []
+        self.title_terms: list[frozenset] = []
+        self.heading_terms: list[frozenset] = []
+        self.path_terms: list[frozenset] = []
+        for doc, chunk in enumerate(chunks):
+            haystack = normalize_text(f'{chunk.title} {chunk.heading} {chunk.text}')
+            tokens = tokenize(haystack)
+            for token, tf in Counter(tokens).items():
+                self.postings.setdefault(token, []).append((doc, tf))
+            self.lengths.append(len(tokens))
+            self.haystacks.append(haystack)
+            self.title_terms.append(frozenset(tokenize(normalize_text(chunk.title))))
+            self.heading_terms.append(frozenset(tokenize(normalize_text(chunk.heading))))
+            self.path_terms.append(frozenset(tokenize(normalize_text(chunk.path))))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.vocabulary = sorted(self.postings)
+
+    def expand(self, term: str) -> list[str]:
+        """Indexed tokens the query term matches: itself and its extensions."""
+        start = bisect.bisect_left(self.vocabulary, term)
+        matches = []
+        for token in self.vocabulary[start:start + PREFIX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            matches.append(token)
+        return matches
+
+    def score(self, terms: list[str]) -> dict[int, tuple[float, int]]:
+        """{chunk: (BM25 score with boosts, number of query terms matched)}."""
+        scores: dict[int, float] = {}
+        matched: dict[int, int] = {}
+        total = len(self.chunks)
+        for term in dict.fromkeys(terms):
+            expansions = self.expand(term)
+            hits: dict[int, int] = {}
+            for token in expansions:
+                for doc, tf in self.postings[token]:
+                    hits[doc] = hits.get(doc, 0) + tf
+            if not hits:
+                continue
+            idf = math.log(1 + (total - len(hits) + 0.5) / (len(hits) + 0.5))
+            for doc, tf in hits.items():
+                length_norm = 1 - B + B * self.lengths[doc] / self.avg_length
+                value = BM25_WEIGHT * idf * tf * (K1 + 1) / (tf + K1 * length_norm)
+                if any(token in self.title_terms[doc] for token in expansions):
+                    value += TITLE_BOOST
+                if any(token in self.heading_terms[doc] for token in expansions):
+                    value += HEADING_BOOST
+                if any(token in self.path_terms[doc] for token in expansions):
+                    value += PATH_BOOST
+                scores[doc] = scores.get(doc, 0.0) + value
+                matched[doc] = matched.get(doc, 0) + 1
+        return {doc: (scores[doc], matched[doc]) for doc in scores}
+
+
+def private_cache_dir() -> str:
+    """Per-user directory for the ConfioAI index files; never the shared
+    system temp dir, where anyone could plant a pickle."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'confio_ai')
+
+
+def is_private_file(path: str) -> bool:
+    """True when `path` is owned by this user and writable by no one else,
+    so unpickling it cannot run code another user wrote."""
+    st = os.stat(path)
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def default_index_path() -> str:
+    return os.path.join(private_cache_dir(), 'lexical_index.pickle')
+
+
+def load_index(path: str, sig) -> LexicalIndex | None:
+    """The index stored at `path`, if it was built from exactly `sig`."""
+    try:
+        if not is_private_file(path):
+            logger.warning('Ignoring ConfioAI index at %s: not private to this user', path)
+            return None
+        with open(path, 'rb') as fh:
+            fmt, index = pickle.load(fh)
+    except FileNotFoundError:
+        return None
+    except Exception:  # noqa: BLE001 — a stale or corrupt file just means a rebuild
+        logger.warning('Ignoring unreadable ConfioAI index at %s', path, exc_info=True)
+        return None
+    if fmt != INDEX_FORMAT or index.sig != sig:
+        return None
+    return index
+
+
+def save_index(path: str, index: LexicalIndex) -> None:
+    try:
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump((INDEX_FORMAT, index), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception:  # noqa: BLE001 — persistence only speeds up the next start
+        logger.warning('Could not persist ConfioAI index to %s', path, exc_info=True)
@@ -7,14 +7,22 @@ from content_ingestion.memory_index import sync_chunks
 class Command(BaseCommand):
     help = 'Synchronize canonical ConfioAI Markdown chunks into the RDS pgvector index.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Compare every chunk against the index, not just documents changed since the last sync',
+        )
+
     def handle(self, *args, **options):
         try:
-            result = sync_chunks(_memory_chunks())
+            result = sync_chunks(_memory_chunks(), full=options['full'])
         except Exception as exc:
             raise CommandError(str(exc)) from exc
         self.stdout.write(
             self.style.SUCCESS(
                 'ConfioAI memory index synchronized: '
+                f'{result["documents_changed"]} document(s) changed, '
                 f'{result["total"]} total, {result["inserted"]} embedded, '
                 f'{result["deleted"]} deleted, {result["unchanged"]} unchanged.'
             )
@@ -1,18 +1,55 @@
+"""Semantic memory search over the pgvector table of ConfioAI chunks.
+
+Two layers keep a retrieval off the network:
+
+  - Query embeddings are cached by (model, dimensions, normalized query):
+    an in-process LRU in front of the QueryEmbedding table, so a repeated
+    question never calls the embedding API again.
+  - When NumPy is installed, a local snapshot of the table (chunk metadata
+    plus a row-normalized embedding matrix) answers top-k cosine searches
+    in memory. sync_chunks rebuilds it and writes it to disk; every process
+    reloads the file when it changes, and keeps serving the last synced
+    snapshot when Postgres is unreachable. Like the lexical index, the
+    snapshot lives in the private per-user cache directory and is only
+    loaded when no other user could have written it.
+
+Without a snapshot the search runs in Postgres as before.
+"""
 from __future__ import annotations
 
 import hashlib
 import logging
+import os
+import pickle
+import tempfile
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from datetime import timedelta
 
 import requests
 from django.conf import settings
 from django.db import connection
+from django.utils import timezone
+
+from .lexical_index import is_private_file, private_cache_dir
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - depends on runtime environment
+    np = None
 
 logger = logging.getLogger(__name__)
 
 TABLE = 'content_ingestion_memory_chunk'
 EMBEDDING_DIMENSIONS = 768
+SNAPSHOT_FORMAT = 1
+
+_QUERY_EMBEDDINGS: OrderedDict = OrderedDict()
+_QUERY_EMBEDDINGS_LOCK = threading.Lock()
+_LOCAL_INDEX: dict = {'path': None, 'mtime': None, 'snapshot': None}
 
 
 @dataclass(frozen=True)
@@ -94,6 +131,159 @@ def embed_texts(
     return embeddings
 
 
+def _query_cache_key(query: str) -> tuple[str, str]:
+    model = getattr(settings, 'CONFIO_AI_EMBEDDING_MODEL', 'gemini-embedding-2')
+    dimensions = getattr(settings, 'CONFIO_AI_EMBEDDING_DIMENSIONS', EMBEDDING_DIMENSIONS)
+    normalized = ' '.join(query.casefold().split())
+    key = hashlib.sha256(f'{model}\0{dimensions}\0{normalized}'.encode('utf-8')).hexdigest()
+    return key, normalized
+
+
+def _remember_query_embedding(key: str, embedding: list[float]) -> None:
+    size = getattr(settings, 'CONFIO_AI_QUERY_EMBEDDING_CACHE_SIZE', 512)
+    with _QUERY_EMBEDDINGS_LOCK:
+        _QUERY_EMBEDDINGS[key] = embedding
+        _QUERY_EMBEDDINGS.move_to_end(key)
+        while len(_QUERY_EMBEDDINGS) > size:
+            _QUERY_EMBEDDINGS.popitem(last=False)
+
+
+def embed_query(query: str) -> list[float]:
+    """The query's embedding: from the LRU, then the QueryEmbedding table,
+    then the embedding API (stored in both)."""
+    from .models import QueryEmbedding
+
+    key, normalized = _query_cache_key(query)
+    with _QUERY_EMBEDDINGS_LOCK:
+        embedding = _QUERY_EMBEDDINGS.get(key)
+        if embedding is not None:
+            _QUERY_EMBEDDINGS.move_to_end(key)
+            return embedding
+
+    try:
+        embedding = QueryEmbedding.objects.filter(cache_key=key).values_list('embedding', flat=True).first()
+        if embedding is not None:
+            QueryEmbedding.objects.filter(cache_key=key).update(last_used_at=timezone.now())
+    except Exception:  # noqa: BLE001 — the table is a cache; embed instead
+        logger.warning('Query embedding cache unavailable.', exc_info=True)
+        embedding = None
+    if embedding is None:
+        embedding = embed_texts([query])[0]
+        try:
+            QueryEmbedding.objects.update_or_create(
+                cache_key=key,
+                defaults={
+                    'model': getattr(settings, 'CONFIO_AI_EMBEDDING_MODEL', 'gemini-embedding-2'),
+                    'query': normalized,
+                    'embedding': embedding,
+                    'last_used_at': timezone.now(),
+                },
+            )
+        except Exception:  # noqa: BLE001 — the embedding is still good for this process
+            logger.warning('Could not store query embedding.', exc_info=True)
+    _remember_query_embedding(key, embedding)
+    return embedding
+
+
+def purge_query_embeddings(max_age_days: int | None = None) -> int:
+    """Delete cached query embeddings unused for `max_age_days` (default
+    CONFIO_AI_QUERY_EMBEDDING_RETENTION_DAYS). Returns the rows deleted."""
+    from .models import QueryEmbedding
+
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'CONFIO_AI_QUERY_EMBEDDING_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted, _ = QueryEmbedding.objects.filter(last_used_at__lt=cutoff).delete()
+    return deleted
+
+
+def _snapshot_path() -> str:
+    return (
+        getattr(settings, 'CONFIO_AI_VECTOR_SNAPSHOT_PATH', '')
+        or os.path.join(private_cache_dir(), 'vectors.pickle')
+    )
+
+
+def _local_index_enabled() -> bool:
+    return np is not None and getattr(settings, 'CONFIO_AI_LOCAL_VECTOR_INDEX', True)
+
+
+def refresh_local_index() -> int | None:
+    """Snapshot the pgvector table into the local index file. Returns the
+    number of chunks, or None when the local index is disabled."""
+    if not _local_index_enabled():
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT chunk_key, source_path, category, title, heading, content, embedding::real[] '
+            f'FROM {TABLE} ORDER BY chunk_key'
+        )
+        rows = cursor.fetchall()
+    dimensions = getattr(settings, 'CONFIO_AI_EMBEDDING_DIMENSIONS', EMBEDDING_DIMENSIONS)
+    matrix = (
+        np.array([row[6] for row in rows], dtype=np.float32)
+        if rows else np.zeros((0, dimensions), dtype=np.float32)
+    )
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    snapshot = {
+        'chunks': [row[:6] for row in rows],
+        'categories': np.array([row[2] for row in rows], dtype=object),
+        'matrix': matrix / np.where(norms == 0, 1, norms),
+    }
+    path = _snapshot_path()
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        pickle.dump((SNAPSHOT_FORMAT, snapshot), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    _LOCAL_INDEX.update({'path': path, 'mtime': os.path.getmtime(path), 'snapshot': snapshot})
+    return len(rows)
+
+
+def local_index() -> dict | None:
+    """The last synced snapshot, reloaded when another process rewrote it."""
+    if not _local_index_enabled():
+        return None
+    path = _snapshot_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _LOCAL_INDEX['path'] != path or _LOCAL_INDEX['mtime'] != mtime:
+        try:
+            if not is_private_file(path):
+                logger.warning('Ignoring memory vector snapshot at %s: not private to this user', path)
+                return None
+            with open(path, 'rb') as fh:
+                fmt, snapshot = pickle.load(fh)
+        except Exception:  # noqa: BLE001 — unreadable snapshot: search in Postgres
+            logger.warning('Ignoring unreadable memory vector snapshot at %s', path, exc_info=True)
+            return None
+        if fmt != SNAPSHOT_FORMAT:
+            return None
+        _LOCAL_INDEX.update({'path': path, 'mtime': mtime, 'snapshot': snapshot})
+    return _LOCAL_INDEX['snapshot']
+
+
+def _local_search(snapshot: dict, embedding: list[float], categories, limit: int) -> list[IndexedMemoryChunk]:
+    if not snapshot['chunks']:
+        return []
+    query = np.asarray(embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    similarities = snapshot['matrix'] @ (query / query_norm if query_norm else query)
+    if categories:
+        similarities = np.where(np.isin(snapshot['categories'], sorted(categories)), similarities, -np.inf)
+    limit = min(limit, len(similarities))
+    top = np.argpartition(-similarities, limit - 1)[:limit]
+    top = top[np.argsort(-similarities[top])]
+    return [
+        IndexedMemoryChunk(*snapshot['chunks'][row], similarity=float(similarities[row]))
+        for row in top
+        if np.isfinite(similarities[row])
+    ]
+
+
 def semantic_search(
     query: str,
     *,
@@ -103,6 +293,9 @@ def semantic_search(
     if not query.strip() or not getattr(settings, 'CONFIO_AI_SEMANTIC_RETRIEVAL_ENABLED', True):
         return []
     try:
+        snapshot = local_index()
+        if snapshot is not None:
+            return _local_search(snapshot, embed_query(query), categories, limit)
         with connection.cursor() as cursor:
             cursor.execute(
                 'SELECT to_regclass(%s)',
@@ -110,7 +303,7 @@ def semantic_search(
             )
             if cursor.fetchone()[0] is None:
                 return []
-        embedding = embed_texts([query])[0]
+        embedding = embed_query(query)
         vector = _vector_literal(embedding)
         where = ''
         params: list[object] = [vector]
@@ -147,55 +340,154 @@ def semantic_search(
         return []
 
 
-def sync_chunks(chunks, *, batch_size: int = 20) -> dict:
-    desired = {}
-    for chunk in chunks:
-        key = chunk_key(chunk.path, chunk.heading, chunk.text)
-        desired[key] = chunk
+class _RateLimiter:
+    """Spaces calls at least 60/per_minute seconds apart across threads."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _chunk_embedding_text(chunk) -> str:
+    return f'Title: {chunk.title}\nSection: {chunk.heading}\n{chunk.text}'
 
+
+def _upsert_rows(rows: list[tuple]) -> None:
+    """One INSERT ... ON CONFLICT for a whole embedded batch."""
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s::vector, NOW())'] * len(rows))
     with connection.cursor() as cursor:
-        cursor.execute(f'SELECT chunk_key FROM {TABLE}')
-        existing = {row[0] for row in cursor.fetchall()}
-
-    missing = [(key, desired[key]) for key in desired.keys() - existing]
-    inserted = 0
-    for start in range(0, len(missing), batch_size):
-        batch = missing[start:start + batch_size]
-        texts = [
-            f'Title: {chunk.title}\nSection: {chunk.heading}\n{chunk.text}'
-            for _, chunk in batch
-        ]
-        embeddings = embed_texts(texts, max_retries=5)
+        cursor.execute(
+            f'''
+            INSERT INTO {TABLE}
+                (chunk_key, source_path, category, title, heading, content, embedding, updated_at)
+            VALUES {placeholders}
+            ON CONFLICT (chunk_key) DO UPDATE SET
+                source_path = EXCLUDED.source_path,
+                category = EXCLUDED.category,
+                title = EXCLUDED.title,
+                heading = EXCLUDED.heading,
+                content = EXCLUDED.content,
+                embedding = EXCLUDED.embedding,
+                updated_at = NOW()
+            ''',
+            [value for row in rows for value in row],
+        )
+
+
+def _embed_and_upsert(missing: list[tuple], batch_size: int) -> tuple[set, Exception | None]:
+    """Embed `missing` [(key, chunk)] in concurrent batches and upsert each
+    batch as it lands. Returns the stored keys and the first error, if any:
+    batches that succeeded stay stored, so a rerun resumes from there."""
+    if not missing:
+        return set(), None
+    limiter = _RateLimiter(getattr(settings, 'CONFIO_AI_EMBEDDING_REQUESTS_PER_MINUTE', 60))
+    workers = getattr(settings, 'CONFIO_AI_EMBEDDING_WORKERS', 4)
+    batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+
+    def embed(batch):
+        limiter.wait()
+        return embed_texts([_chunk_embedding_text(chunk) for _, chunk in batch], max_retries=5)
+
+    stored: set = set()
+    error = None
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+        futures = {executor.submit(embed, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                embeddings = future.result()
+            except Exception as exc:  # noqa: BLE001 — reported after the other batches land
+                error = error or exc
+                continue
+            _upsert_rows([
+                (key, chunk.path, chunk.category, chunk.title, chunk.heading, chunk.text,
+                 _vector_literal(embedding))
+                for (key, chunk), embedding in zip(batch, embeddings)
+            ])
+            stored.update(key for key, _ in batch)
+    return stored, error
+
+
+def _document_digest(keys) -> str:
+    return hashlib.sha256('\n'.join(sorted(keys)).encode('utf-8')).hexdigest()
+
+
+def sync_chunks(chunks, *, batch_size: int = 20, full: bool = False) -> dict:
+    """Bring the pgvector table in line with `chunks`.
+
+    Only documents whose chunk keys changed since the last sync (per
+    MemorySyncState) are compared against the table; a full comparison runs
+    on the first sync or with full=True. A document is marked synced once
+    all its chunks are stored, so an interrupted sync resumes with what is
+    left.
+    """
+    from .models import MemorySyncState
+
+    by_path: dict[str, dict] = {}
+    for chunk in chunks:
+        by_path.setdefault(chunk.path, {})[chunk_key(chunk.path, chunk.heading, chunk.text)] = chunk
+    digests = {path: _document_digest(keys) for path, keys in by_path.items()}
+    synced = dict(MemorySyncState.objects.values_list('source_path', 'digest'))
+    full = full or not synced
+
+    changed = [path for path in by_path if full or synced.get(path) != digests[path]]
+    removed = [path for path in synced if path not in by_path]
+
+    desired = {key: chunk for path in changed for key, chunk in by_path[path].items()}
+    existing: set = set()
+    if full or changed or removed:
         with connection.cursor() as cursor:
-            for (key, chunk), embedding in zip(batch, embeddings):
+            if full:
+                cursor.execute(f'SELECT chunk_key FROM {TABLE}')
+            else:
                 cursor.execute(
-                    f'''
-                    INSERT INTO {TABLE}
-                        (chunk_key, source_path, category, title, heading, content, embedding, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s::vector, NOW())
-                    ON CONFLICT (chunk_key) DO UPDATE SET
-                        source_path = EXCLUDED.source_path,
-                        category = EXCLUDED.category,
-                        title = EXCLUDED.title,
-                        heading = EXCLUDED.heading,
-                        content = EXCLUDED.content,
-                        embedding = EXCLUDED.embedding,
-                        updated_at = NOW()
-                    ''',
-                    [
-                        key, chunk.path, chunk.category, chunk.title, chunk.heading,
-                        chunk.text, _vector_literal(embedding),
-                    ],
+                    f'SELECT chunk_key FROM {TABLE} WHERE source_path = ANY(%s)',
+                    [changed + removed],
                 )
-                inserted += 1
+            existing = {row[0] for row in cursor.fetchall()}
 
     stale = existing - desired.keys()
     if stale:
         with connection.cursor() as cursor:
             cursor.execute(f'DELETE FROM {TABLE} WHERE chunk_key = ANY(%s)', [list(stale)])
+    if removed:
+        MemorySyncState.objects.filter(source_path__in=removed).delete()
+
+    missing = [(key, chunk) for key, chunk in desired.items() if key not in existing]
+    stored, error = _embed_and_upsert(missing, batch_size)
+
+    pending_paths = {chunk.path for key, chunk in missing if key not in stored}
+    now = timezone.now()
+    for path in changed:
+        if path in pending_paths:
+            continue
+        MemorySyncState.objects.update_or_create(
+            source_path=path,
+            defaults={'digest': digests[path], 'chunk_count': len(by_path[path]), 'synced_at': now},
+        )
+
+    if stored or stale or local_index() is None:
+        try:
+            refresh_local_index()
+        except Exception:  # noqa: BLE001 — searches fall back to Postgres
+            logger.warning('Could not refresh the local memory vector index.', exc_info=True)
+    if error is not None:
+        raise error
+
+    total = sum(len(keys) for keys in by_path.values())
     return {
-        'total': len(desired),
-        'inserted': inserted,
+        'total': total,
+        'inserted': len(stored),
         'deleted': len(stale),
-        'unchanged': len(desired) - inserted,
+        'unchanged': total - len(stored),
+        'documents_changed': len(changed),
     }
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 07:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_ingestion', '0004_canonical_memory_promotion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('model', models.CharField(max_length=100)),
+                ('query', models.TextField()),
+                ('embedding', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['last_used_at'], name='query_embedding_used_idx')],
+            },
+        ),
+    ]
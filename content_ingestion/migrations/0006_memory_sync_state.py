@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-19 07:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_ingestion', '0005_query_embedding_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemorySyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_path', models.CharField(max_length=500, unique=True)),
+                ('digest', models.CharField(max_length=64)),
+                ('chunk_count', models.PositiveIntegerField(default=0)),
+                ('synced_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -214,3 +214,28 @@ class CanonicalMemoryPromotion(models.Model):
             models.Index(fields=['status', '-created_at'], name='canonical_promo_status_idx'),
             models.Index(fields=['category', '-created_at'], name='canonical_promo_category_idx'),
         ]
+
+
+class QueryEmbedding(models.Model):
+    """Embeddings of retrieval queries, so a repeated question skips the
+    embedding API (see memory_index.embed_query)."""
+    cache_key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    query = models.TextField()
+    embedding = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_used_at'], name='query_embedding_used_idx'),
+        ]
+
+
+class MemorySyncState(models.Model):
+    """What memory_index.sync_chunks last stored for each document: a digest
+    of its chunk keys. Documents whose digest still matches are skipped."""
+    source_path = models.CharField(max_length=500, unique=True)
+    digest = models.CharField(max_length=64)
+    chunk_count = models.PositiveIntegerField(default=0)
+    synced_at = models.DateTimeField(default=timezone.now)
@@ -40,3 +40,11 @@ def commit_ai_context_document_task(self, document_id: int, push: bool = True):
         'relative_path': document.relative_path,
         'commit_sha': document.commit_sha,
     }
+
+
+@shared_task(name='content_ingestion.purge_query_embeddings')
+@_close_connection
+def purge_query_embeddings_task():
+    from .memory_index import purge_query_embeddings
+
+    return purge_query_embeddings()
@@ -1,9 +1,11 @@
+import importlib.util
 import json
+from unittest import skipIf
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import date
 
 import requests
-from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
 
 from .models import AIContextCategory, AIContextDocument
 from .views import enqueue_ai_context_commit
@@ -214,6 +216,107 @@ class MemoryEmbeddingTests(SimpleTestCase):
         sleep.assert_not_called()
 
 
+class QueryEmbeddingCacheTests(TestCase):
+    def setUp(self):
+        from content_ingestion import memory_index
+
+        memory_index._QUERY_EMBEDDINGS.clear()
+
+    @patch('content_ingestion.memory_index.embed_texts', return_value=[[0.1, 0.2, 0.3]])
+    def test_repeated_query_is_embedded_once(self, embed_texts):
+        from content_ingestion import memory_index
+
+        self.assertEqual(memory_index.embed_query('¿Dónde opera  Confío?'), [0.1, 0.2, 0.3])
+        self.assertEqual(memory_index.embed_query('¿dónde opera Confío? '), [0.1, 0.2, 0.3])
+        # A fresh process still finds it in the table.
+        memory_index._QUERY_EMBEDDINGS.clear()
+        self.assertEqual(memory_index.embed_query('¿Dónde opera Confío?'), [0.1, 0.2, 0.3])
+
+        embed_texts.assert_called_once_with(['¿Dónde opera  Confío?'])
+
+    def test_purge_drops_only_long_unused_query_embeddings(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from content_ingestion import memory_index
+        from content_ingestion.models import QueryEmbedding
+
+        now = timezone.now()
+        for key, age in (('old', 31), ('recent', 2)):
+            QueryEmbedding.objects.create(cache_key=key, model='m', query=key, embedding=[0.1],
+                                          last_used_at=now - timedelta(days=age))
+
+        self.assertEqual(memory_index.purge_query_embeddings(30), 1)
+        self.assertEqual(list(QueryEmbedding.objects.values_list('cache_key', flat=True)), ['recent'])
+
+    @skipIf(importlib.util.find_spec('numpy') is None, 'numpy not installed')
+    def test_local_index_ranks_by_cosine_and_filters_categories(self):
+        import numpy as np
+        from content_ingestion import memory_index
+
+        snapshot = {
+            'chunks': [
+                ('k1', 'facts/a.md', 'facts', 'A', 'A', 'alpha'),
+                ('k2', 'videos/b.md', 'videos', 'B', 'B', 'beta'),
+                ('k3', 'facts/c.md', 'facts', 'C', 'C', 'gamma'),
+            ],
+            'categories': np.array(['facts', 'videos', 'facts'], dtype=object),
+            'matrix': np.array([[1, 0], [0.8, 0.6], [0, 1]], dtype=np.float32),
+        }
+
+        results = memory_index._local_search(snapshot, [2, 0], None, 2)
+        self.assertEqual([chunk.chunk_key for chunk in results], ['k1', 'k2'])
+        results = memory_index._local_search(snapshot, [2, 0], {'facts'}, 2)
+        self.assertEqual([chunk.chunk_key for chunk in results], ['k1', 'k3'])
+
+
+class MemorySyncTests(TestCase):
+    def _chunk(self, path, heading, text):
+        from content_ingestion.ai_context import MemoryChunk
+
+        return MemoryChunk(path, path.split('/')[0], heading, heading, text)
+
+    def _embed(self, texts, **kwargs):
+        return [[0.01] * 768 for _ in texts]
+
+    def test_only_changed_documents_are_compared_and_embedded(self):
+        from content_ingestion.memory_index import sync_chunks
+        from content_ingestion.models import MemorySyncState
+
+        facts = self._chunk('facts/a.md', 'Facts', 'Confío operates in Latin America.')
+        rules = self._chunk('content-rules/b.md', 'Rules', 'Introduce Confío late.')
+        with patch('content_ingestion.memory_index.embed_texts', side_effect=self._embed) as embed:
+            first = sync_chunks([facts, rules])
+        self.assertEqual((first['inserted'], first['documents_changed']), (2, 2))
+        self.assertEqual(embed.call_count, 1)
+
+        edited = self._chunk('content-rules/b.md', 'Rules', 'Introduce Confío late, in one phase.')
+        with patch('content_ingestion.memory_index.embed_texts', side_effect=self._embed) as embed:
+            second = sync_chunks([facts, edited])
+        self.assertEqual(
+            (second['inserted'], second['deleted'], second['documents_changed']), (1, 1, 1))
+        embed.assert_called_once()
+        self.assertEqual(len(embed.call_args.args[0]), 1)
+
+        with patch('content_ingestion.memory_index.embed_texts') as embed:
+            third = sync_chunks([facts, edited])
+        self.assertEqual((third['inserted'], third['documents_changed']), (0, 0))
+        embed.assert_not_called()
+        self.assertEqual(MemorySyncState.objects.count(), 2)
+
+    def test_failed_embedding_leaves_the_document_pending(self):
+        from content_ingestion.memory_index import sync_chunks
+        from content_ingestion.models import MemorySyncState
+
+        facts = self._chunk('facts/a.md', 'Facts', 'Confío operates in Latin America.')
+        with patch('content_ingestion.memory_index.embed_texts', side_effect=RuntimeError('quota')):
+            with self.assertRaisesRegex(RuntimeError, 'quota'):
+                sync_chunks([facts])
+        self.assertFalse(MemorySyncState.objects.exists())
+
+        with patch('content_ingestion.memory_index.embed_texts', side_effect=self._embed):
+            self.assertEqual(sync_chunks([facts])['inserted'], 1)
+
+
 class CanonicalPromotionValidationTests(SimpleTestCase):
     def _turn(self, *, pk, authority='owner', user_text='We decided to ship Telegram first.'):
         from content_ingestion.models import CanonicalMemoryTurn
@@ -1592,6 +1695,40 @@ class KnowledgeCorpusTests(SimpleTestCase):
         self.assertIn('Use one phase', prompt)
         self.assertNotIn('STALE_VIDEO_SCRIPT', prompt)
 
+    def test_retrieval_index_is_persisted_and_matches_word_extensions(self):
+        import os
+        import tempfile
+        from content_ingestion import ai_context
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'docs/strategy/launch.md')
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write('# Lanzamiento\nLanzar primero en Venezuela con comerciantes.')
+            with override_settings(
+                CONFIO_AI_REPO_PATH=d,
+                CONFIO_AI_CONTEXT_ROOT='docs',
+                CONFIO_AI_INDEX_PATH=os.path.join(d, 'index.pickle'),
+            ):
+                chunks = ai_context.retrieve_knowledge('comerciante lanzamiento')
+                self.assertTrue(os.path.exists(os.path.join(d, 'index.pickle')))
+
+                # A restarted process loads the stored index instead of re-reading the docs.
+                ai_context._INDEX_CACHE.update({'docs': None, 'checked_at': None, 'index': None})
+                with patch('content_ingestion.ai_context._build_memory_index') as build:
+                    reloaded = ai_context.retrieve_knowledge('comerciante lanzamiento')
+                build.assert_not_called()
+
+                # An index file others could have written is never unpickled.
+                os.chmod(os.path.join(d, 'index.pickle'), 0o666)
+                ai_context._INDEX_CACHE.update({'docs': None, 'checked_at': None, 'index': None})
+                with patch('content_ingestion.lexical_index.pickle.load') as load:
+                    ai_context.retrieve_knowledge('comerciante lanzamiento')
+                load.assert_not_called()
+
+        self.assertEqual([chunk.path for chunk in chunks], ['strategy/launch.md'])
+        self.assertEqual(chunks, reloaded)
+
 
 class ConversationLogTests(SimpleTestCase):
     def test_append_writes_turn_and_respects_guard(self):
@@ -139,9 +139,22 @@ def _cached(key: str, ttl: int, fetch):
     return data
 
 
+ALL_MARKET_KEY = 'gm_all_market_v1'
+
+
 def all_market() -> list:
-    """Full asset universe with prices and 24h stats. ~438 entries."""
-    return _cached('gm_all_market_v1', 60, lambda: _get('/assets/all/market'))
+    """Full asset universe with prices and 24h stats. ~438 entries.
+    Kept warm by the price-store ingestion (refresh_all_market), so screens
+    rarely reach upstream themselves."""
+    return _cached(ALL_MARKET_KEY, 60, refresh_all_market)
+
+
+def refresh_all_market() -> list:
+    """Fetch the market snapshot and publish it to all_market's cache. The
+    TTL outlasts the one-minute ingestion beat so readers never see a gap."""
+    data = _get('/assets/all/market')
+    cache.set(ALL_MARKET_KEY, data, 90)
+    return data
 
 
 def market_status() -> dict:
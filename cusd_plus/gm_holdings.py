@@ -14,6 +14,11 @@ last-known fallback so a dead node degrades to a stale portfolio, never a
 vanished one. USD values are never stored — the resolver computes them
 from the globally cached GM market payload (display only, chain-first).
 
+A user's own portfolio is still this live scan. Aggregates across all
+Confío traders (gm_tvl) read the Transfer-log ledger in gm_ledger instead,
+which uses _raw_balances only to seed new wallets and for its audit; the
+ledger is also the last resort here when a scan fails with nothing cached.
+
 The live registry comes from Ondo's `/assets/all/addresses` metadata endpoint
 and is cached server-side for one day. `gm_tokens.json` is only the deploy-time
 fallback snapshot, so an upstream outage never makes held positions vanish.
@@ -31,17 +36,12 @@ from eth_abi import decode, encode
 from eth_utils import keccak
 
 from . import vault
+from .multicall import CHUNK, MULTICALL3, SEL_TRY_AGGREGATE  # noqa: F401
 
 logger = logging.getLogger(__name__)
 
-# Canonical Multicall3 (same address on BSC as everywhere).
-MULTICALL3 = '0xcA11bde05977b3631167028862bE2a173976CA11'
-SEL_TRY_AGGREGATE = keccak(text='tryAggregate(bool,(address,bytes)[])')[:4]
 SEL_BALANCE_OF = keccak(text='balanceOf(address)')[:4]
 
-# Subcalls per eth_call — keeps calldata well under public-node limits.
-CHUNK = 250
-
 SCAN_TTL = 30
 SCAN_LAST_TTL = 7 * 24 * 3600
 REGISTRY_TTL = 24 * 3600
@@ -171,7 +171,7 @@ def audit_registry() -> dict:
     return combined
 
 
-def _scan(
+def _raw_balances(
     user_bsc_address: str,
     token_registry: dict,
     *,
@@ -179,7 +179,7 @@ def _scan(
     require_complete: bool = False,
 ) -> dict:
     """One Multicall3 pass over the whole registry; returns nonzero
-    balances as {symbol: units_float}. Raises on RPC failure."""
+    balances as {symbol: raw integer units}. Raises on RPC failure."""
     entries = list(token_registry.items())
     holder_arg = encode(['address'], [user_bsc_address])
     held = {}
@@ -202,10 +202,27 @@ def _scan(
                 continue
             raw = int.from_bytes(ret[:32], 'big')
             if raw:
-                held[symbol] = float(Decimal(raw) / Decimal(10) ** item.get('decimals', 18))
+                held[symbol] = raw
     return held
 
 
+def _scan(
+    user_bsc_address: str,
+    token_registry: dict,
+    *,
+    block_tag: str = 'latest',
+    require_complete: bool = False,
+) -> dict:
+    """_raw_balances as {symbol: units_float}."""
+    raw = _raw_balances(
+        user_bsc_address, token_registry, block_tag=block_tag, require_complete=require_complete,
+    )
+    return {
+        symbol: float(Decimal(units) / Decimal(10) ** token_registry[symbol].get('decimals', 18))
+        for symbol, units in raw.items()
+    }
+
+
 def holdings_units(user_bsc_address: str) -> dict | None:
     """{symbol: units} for everything the address holds; {} when it holds
     nothing (or the registry is empty). None means UNKNOWN — the scan
@@ -226,7 +243,16 @@ def holdings_units(user_bsc_address: str) -> dict | None:
         held = _scan(key, token_registry)
     except Exception:  # noqa: BLE001 — degrade to stale, never to vanished
         logger.warning('GM holdings scan failed for %s', user_bsc_address, exc_info=True)
-        return cache.get(f'gm_hold_last:{key}')
+        last = cache.get(f'gm_hold_last:{key}')
+        if last is None:
+            # The Transfer-log ledger follows every Confío trader; it lags
+            # the chain by a beat but is far better than UNKNOWN.
+            from .gm_ledger import positions
+            try:
+                last = positions(key)
+            except Exception:  # noqa: BLE001 — still UNKNOWN, not empty
+                logger.warning('GM ledger fallback failed for %s', user_bsc_address, exc_info=True)
+        return last
     cache.set(f'gm_hold:{key}', held, SCAN_TTL)
     cache.set(f'gm_hold_last:{key}', held, SCAN_LAST_TTL)
     return held
@@ -0,0 +1,388 @@
+"""
+Ondo Stocks holdings ledger — GM Transfer logs applied to per-wallet rows.
+
+gm_tvl.refresh used to call gm_holdings._scan for every confirmed trader:
+a Multicall over the whole token registry per wallet, so each refresh cost
+participants x tokens balanceOf reads, and one failed wallet threw the
+whole aggregate away.
+
+The ledger keeps blockchain.GmHolding rows — raw balance per (wallet,
+token) — for every wallet with a confirmed Confío stock trade, and moves
+them forward from ERC-20 Transfer logs of the registered GM tokens:
+
+  - Seeding: a wallet not yet in GmHolder gets one balanceOf scan at the
+    ledger cursor's block and joins the ledger there. SEED_BATCH per run.
+  - Following: follow() reads every GM Transfer between the cursor
+    (blockchain.BscLogCursor CURSOR_NAME) and the finalized head, matches
+    senders and recipients in memory against the followed wallets, and
+    applies the net deltas and the new cursor in one transaction. Only
+    finalized blocks are read, so there is no reorg to undo, and a crash
+    before the commit replays the span against untouched rows.
+  - Audit: audit() rescans every followed wallet at the cursor's block and
+    overwrites any row that disagrees — the one place the full scan still
+    runs, daily. A token added to the registry after a wallet was seeded is
+    picked up here. Each wallet is stored under a row lock on the cursor,
+    and only if the cursor has not moved since its scan, so follow() is
+    never held up for the length of an audit.
+
+TVL, holders per asset and per-wallet positions are then SQL aggregates
+over GmHolding (totals(), positions()).
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import gm_holdings
+
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = 'gm_holdings'
+LOCK_KEY = 'gm_ledger_lock'
+LOCK_TTL = 15 * 60
+# audit() runs beside follow(), under its own lock refreshed per wallet.
+AUDIT_LOCK_KEY = 'gm_ledger_audit_lock'
+AUDIT_LOCK_TTL = 5 * 60
+# Scans per wallet before the audit gives up chasing a moving cursor.
+AUDIT_ATTEMPTS = 3
+SEED_BATCH = 200
+# Blocks applied per transaction while catching up.
+CATCH_UP_SPAN = 2000
+# Token contracts per eth_getLogs address list.
+ADDRESS_CHUNK = 100
+# totals() refuses a ledger whose cursor has not moved for this long.
+STALE_AFTER_SECONDS = 15 * 60
+
+
+def participant_addresses() -> list[str]:
+    """Unique wallets whose Confío stock transaction reached finality."""
+    from blockchain.models import SponsoredBatch
+
+    return list(
+        SponsoredBatch.objects.filter(
+            kind__in=('stock_buy', 'stock_sell'),
+            status='confirmed',
+        )
+        .exclude(user_bsc_address='')
+        .values_list('user_bsc_address', flat=True)
+        .order_by()
+        .distinct()
+    )
+
+
+def _tokens(token_registry: dict) -> dict:
+    """{token address (lowercase): (symbol, decimals)}"""
+    return {
+        str(item['address']).lower(): (symbol, int(item.get('decimals', 18)))
+        for symbol, item in token_registry.items()
+    }
+
+
+def _safe_head() -> int:
+    from .tasks import _finality_depth, _finalized_block_number, _rpc
+
+    finalized = _finalized_block_number()
+    if finalized is not None:
+        return finalized
+    return int(_rpc('eth_blockNumber', []), 16) - _finality_depth()
+
+
+def _cursor(head: int):
+    from blockchain.models import BscLogCursor
+
+    cursor, created = BscLogCursor.objects.get_or_create(name=CURSOR_NAME)
+    if created or not cursor.last_block:
+        # Nothing is followed yet: every wallet is seeded from here.
+        cursor.last_block = head
+        cursor.save(update_fields=['last_block', 'updated_at'])
+    return cursor
+
+
+def _store(address: str, raw_by_symbol: dict, token_registry: dict) -> int:
+    """Replace the wallet's rows with a balanceOf scan result; returns the
+    number of rows that changed."""
+    from blockchain.models import GmHolding
+
+    held = {
+        str(token_registry[symbol]['address']).lower(): (symbol, raw)
+        for symbol, raw in raw_by_symbol.items()
+    }
+    existing = {
+        row.token_address: row
+        for row in GmHolding.objects.select_for_update().filter(address=address)
+    }
+    changed, created = [], []
+    for token_address, row in existing.items():
+        raw = Decimal(held.get(token_address, (row.symbol, 0))[1])
+        if row.raw_balance != raw:
+            row.raw_balance = raw
+            changed.append(row)
+    for token_address, (symbol, raw) in held.items():
+        if token_address not in existing:
+            created.append(GmHolding(
+                address=address,
+                token_address=token_address,
+                symbol=symbol,
+                decimals=int(token_registry[symbol].get('decimals', 18)),
+                raw_balance=Decimal(raw),
+            ))
+    if changed:
+        GmHolding.objects.bulk_update(changed, ['raw_balance', 'updated_at'])
+    if created:
+        GmHolding.objects.bulk_create(created)
+    return len(changed) + len(created)
+
+
+def _seed(cursor, token_registry: dict, limit: int) -> int:
+    from blockchain.models import GmHolder
+
+    followed = set(GmHolder.objects.values_list('address', flat=True))
+    pending = sorted({a.lower() for a in participant_addresses() if a} - followed)[:limit]
+    seeded = 0
+    for address in pending:
+        try:
+            raw = gm_holdings._raw_balances(
+                address, token_registry, block_tag=hex(cursor.last_block), require_complete=True,
+            )
+        except Exception:  # noqa: BLE001 — the wallet is retried next run
+            logger.warning('GM ledger seed scan failed for %s', address, exc_info=True)
+            continue
+        with transaction.atomic():
+            _store(address, raw, token_registry)
+            GmHolder.objects.create(address=address, seeded_block=cursor.last_block)
+        seeded += 1
+    return seeded
+
+
+def _transfer_logs(from_block: int, to_block: int, token_addresses: list) -> list:
+    from .tasks import TRANSFER_TOPIC, _get_logs_chunked
+
+    logs = []
+    for i in range(0, len(token_addresses), ADDRESS_CHUNK):
+        logs += _get_logs_chunked(
+            from_block, to_block, [TRANSFER_TOPIC], address=token_addresses[i:i + ADDRESS_CHUNK],
+        )
+    return [
+        log for log in logs
+        if not log.get('removed') and len(log.get('topics') or []) >= 3
+    ]
+
+
+def _deltas(logs: list, followed: set, tokens: dict) -> dict:
+    """{(wallet, token address): net raw change} for followed wallets."""
+    deltas = defaultdict(int)
+    for log in logs:
+        token_address = log['address'].lower()
+        if token_address not in tokens:
+            continue
+        sender = ('0x' + log['topics'][1][-40:]).lower()
+        recipient = ('0x' + log['topics'][2][-40:]).lower()
+        amount = int((log.get('data') or '0x')[2:] or '0', 16)
+        if sender in followed:
+            deltas[(sender, token_address)] -= amount
+        if recipient in followed:
+            deltas[(recipient, token_address)] += amount
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def _apply(deltas: dict, tokens: dict) -> None:
+    from blockchain.models import GmHolding
+
+    if not deltas:
+        return
+    wallets = {address for address, _ in deltas}
+    rows = {
+        (row.address, row.token_address): row
+        for row in GmHolding.objects.select_for_update().filter(address__in=wallets)
+    }
+    changed, created = [], []
+    for (address, token_address), delta in deltas.items():
+        row = rows.get((address, token_address))
+        if row is None:
+            symbol, decimals = tokens[token_address]
+            row = GmHolding(
+                address=address, token_address=token_address,
+                symbol=symbol, decimals=decimals, raw_balance=Decimal(0),
+            )
+            created.append(row)
+        else:
+            changed.append(row)
+        row.raw_balance += delta
+        if row.raw_balance < 0:
+            # Only a missed transfer can do this; the audit restores it.
+            logger.warning('GM ledger balance went negative for %s %s', address, row.symbol)
+    if changed:
+        GmHolding.objects.bulk_update(changed, ['raw_balance', 'updated_at'])
+    if created:
+        GmHolding.objects.bulk_create(created)
+
+
+def follow(seed_limit: int = SEED_BATCH) -> dict | None:
+    """Seed new wallets, then apply GM Transfers up to the finalized head.
+    None means another run holds the lock."""
+    from blockchain.models import GmHolder
+
+    if not cache.add(LOCK_KEY, 1, LOCK_TTL):
+        return None
+    out = {'seeded': 0, 'blocks': 0, 'transfers': 0, 'as_of_block': None}
+    try:
+        token_registry = gm_holdings.registry()
+        if not token_registry:
+            raise RuntimeError('GM token registry unavailable')
+        tokens = _tokens(token_registry)
+        head = _safe_head()
+        cursor = _cursor(head)
+        out['seeded'] = _seed(cursor, token_registry, seed_limit)
+
+        followed = set(GmHolder.objects.values_list('address', flat=True))
+        token_addresses = sorted(tokens)
+        while cursor.last_block < head:
+            from_block = cursor.last_block + 1
+            to_block = min(head, cursor.last_block + CATCH_UP_SPAN)
+            logs = _transfer_logs(from_block, to_block, token_addresses) if followed else []
+            deltas = _deltas(logs, followed, tokens)
+            with transaction.atomic():
+                _apply(deltas, tokens)
+                cursor.last_block = to_block
+                cursor.save(update_fields=['last_block', 'updated_at'])
+            out['blocks'] += to_block - from_block + 1
+            out['transfers'] += len(logs)
+        out['as_of_block'] = cursor.last_block
+        return out
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _hold_audit_lock(token: str) -> bool:
+    """Refresh the audit lock if this run still owns it. False means the TTL
+    lapsed and another audit took over."""
+    if cache.get(AUDIT_LOCK_KEY) != token:
+        return False
+    cache.set(AUDIT_LOCK_KEY, token, AUDIT_LOCK_TTL)
+    return True
+
+
+def _audit_wallet(address: str, token_registry: dict):
+    """Scan one wallet at the cursor's current block and store the result
+    only if the cursor is still there. Returns (changed rows, block), or
+    None when follow() kept moving the cursor past every scan."""
+    from blockchain.models import BscLogCursor
+
+    for _ in range(AUDIT_ATTEMPTS):
+        block = BscLogCursor.objects.get(name=CURSOR_NAME).last_block
+        raw = gm_holdings._raw_balances(
+            address, token_registry, block_tag=hex(block), require_complete=True,
+        )
+        with transaction.atomic():
+            # The row lock waits out a follow() commit in flight; once held,
+            # no delta past `block` can land until the rows are stored.
+            cursor = BscLogCursor.objects.select_for_update().get(name=CURSOR_NAME)
+            if cursor.last_block != block:
+                continue
+            return _store(address, raw, token_registry), block
+    return None
+
+
+def audit() -> dict | None:
+    """Rescan every followed wallet at the cursor's block and repair rows
+    that disagree. None means another audit holds the lock.
+
+    Each wallet is checked against the cursor as it stands when its scan
+    lands, so follow() keeps running throughout; a wallet whose scan the
+    cursor outran AUDIT_ATTEMPTS times is skipped until the next audit."""
+    import uuid
+
+    from blockchain.models import BscLogCursor, GmHolder
+
+    token = uuid.uuid4().hex
+    if not cache.add(AUDIT_LOCK_KEY, token, AUDIT_LOCK_TTL):
+        return None
+    out = {'holders': 0, 'repaired': 0, 'skipped': 0, 'failed': 0}
+    try:
+        token_registry = gm_holdings.registry()
+        if not BscLogCursor.objects.filter(name=CURSOR_NAME).exists() or not token_registry:
+            return out
+        for holder in GmHolder.objects.order_by('id'):
+            if not _hold_audit_lock(token):
+                logger.warning('GM ledger audit lost its lock after %s wallets', out['holders'])
+                break
+            out['holders'] += 1
+            try:
+                result = _audit_wallet(holder.address, token_registry)
+            except Exception:  # noqa: BLE001 — the next audit retries the wallet
+                out['failed'] += 1
+                logger.warning('GM ledger audit scan failed for %s', holder.address, exc_info=True)
+                continue
+            if result is None:
+                out['skipped'] += 1
+                continue
+            changed, block = result
+            if changed:
+                out['repaired'] += 1
+                logger.warning('GM ledger disagreed with the chain for %s at %s',
+                               holder.address, block)
+            holder.audited_at = timezone.now()
+            holder.save(update_fields=['audited_at'])
+        return out
+    finally:
+        # Compare-and-delete: never drop a lock a later audit acquired after
+        # this one's TTL lapsed.
+        if cache.get(AUDIT_LOCK_KEY) == token:
+            cache.delete(AUDIT_LOCK_KEY)
+
+
+def totals() -> dict:
+    """Ledger aggregates for gm_tvl:
+
+        {'as_of_block', 'holders', 'holder_wallets', 'positions',
+         'assets': {symbol: {'units': Decimal, 'holders': int}}}
+
+    Raises when the ledger cannot stand for every trader yet — not started,
+    stalled, or still seeding — since a partial total would look like money
+    vanished."""
+    from blockchain.models import BscLogCursor, GmHolder, GmHolding
+
+    cursor = BscLogCursor.objects.filter(name=CURSOR_NAME).first()
+    if cursor is None:
+        raise RuntimeError('GM holdings ledger has not started')
+    if (timezone.now() - cursor.updated_at).total_seconds() > STALE_AFTER_SECONDS:
+        raise RuntimeError(f'GM holdings ledger stalled at block {cursor.last_block}')
+    followed = set(GmHolder.objects.values_list('address', flat=True))
+    unseeded = {a.lower() for a in participant_addresses() if a} - followed
+    if unseeded:
+        raise RuntimeError(f'GM holdings ledger is still seeding {len(unseeded)} wallets')
+
+    held = GmHolding.objects.filter(raw_balance__gt=0)
+    assets = {}
+    for row in held.values('symbol', 'decimals').annotate(raw=Sum('raw_balance'), holders=Count('id')):
+        asset = assets.setdefault(row['symbol'], {'units': Decimal('0'), 'holders': 0})
+        asset['units'] += row['raw'] / Decimal(10) ** row['decimals']
+        asset['holders'] += row['holders']
+    summary = held.aggregate(
+        positions=Count('id'),
+        holder_wallets=Count('address', distinct=True),
+    )
+    return {
+        'as_of_block': cursor.last_block,
+        'holders': len(followed),
+        'holder_wallets': summary['holder_wallets'],
+        'positions': summary['positions'],
+        'assets': assets,
+    }
+
+
+def positions(address: str) -> dict | None:
+    """{symbol: units} from the ledger; None when the wallet is not followed."""
+    from blockchain.models import GmHolder, GmHolding
+
+    address = address.lower()
+    if not GmHolder.objects.filter(address=address).exists():
+        return None
+    return {
+        row.symbol: float(row.raw_balance / Decimal(10) ** row.decimals)
+        for row in GmHolding.objects.filter(address=address, raw_balance__gt=0)
+    }
@@ -0,0 +1,315 @@
+"""
+Local price history for Ondo GM stocks — the store behind the stock charts.
+
+gm_api.ohlc went upstream for every (symbol, range) a user opened, so chart
+traffic scaled Ondo calls with the number of distinct screens viewed and a
+slow or failing GM API blanked the chart. This module keeps the history
+here instead:
+
+  - Ingest: ingest() takes one /assets/all/market snapshot per run (beat,
+    every INGEST_SECONDS) and folds every asset's price into its candles at
+    each resolution of RESOLUTIONS — 1m, 5m, 1h, 1d. A sample only ever
+    extends the candle it falls in (first = open, max/min = high/low, last
+    = close), so each coarser series is the downsampling of the finer one,
+    kept up to date on write rather than computed per read. No candles are
+    recorded while the market session is closed.
+  - Storage: blockchain.GmPriceChunk rows of SLOTS candles each, packed
+    column-wise as float64 arrays — an ingest rewrites four small chunks per
+    symbol, a chart reads a handful. Fine series are pruned after RETENTION.
+  - Seeding: a symbol seen for the first time gets its earlier history from
+    the upstream OHLC endpoint once (seed_pending); seeded candles only fill
+    empty slots, never overwrite ingested ones. Upstream has no 5-minute
+    candles, so the 5m series (the 1D chart) is built by ingestion alone.
+    Seeds are fetched unlocked and written under the ingest lock.
+  - Reads: ohlc(symbol, range_key) serves each client range from the
+    resolution in RANGES. A symbol not seeded yet is still served upstream,
+    and so is a range whose unseeded series (5m) does not yet reach back
+    over the whole span.
+"""
+import logging
+import math
+import struct
+import time
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import gm_api
+
+logger = logging.getLogger(__name__)
+
+# Seconds per candle.
+RESOLUTIONS = {'1m': 60, '5m': 300, '1h': 3600, '1d': 86400}
+# How long each series is kept; the daily series is kept for good.
+RETENTION = {'1m': 2 * 86400, '5m': 8 * 86400, '1h': 40 * 86400, '1d': None}
+# Client range key -> (resolution, span in seconds; None = everything).
+RANGES = {
+    '1D': ('5m', 86400),
+    '1M': ('1h', 31 * 86400),
+    '3M': ('1d', 92 * 86400),
+    '6M': ('1d', 183 * 86400),
+    '1Y': ('1d', 366 * 86400),
+    'MAX': ('1d', None),
+}
+# Upstream range that seeds each resolution's history; only ranges whose
+# upstream interval matches the resolution (gm_api.OHLC_RANGES).
+SEED_RANGES = {'1d': 'MAX', '1h': '1M'}
+
+SLOTS = 60
+_PACK = struct.Struct(f'<{4 * SLOTS}d')
+_NAN = float('nan')
+
+INGEST_SECONDS = 60
+LOCK_KEY = 'gm_prices_lock'
+LOCK_TTL = 5 * 60
+# How long a seed waits for a running ingest to release the lock.
+LOCK_WAIT = 30
+SEED_BATCH = 20
+# Local chart reads; ingestion moves the newest candle once a minute.
+READ_TTL = 60
+
+
+def _chunk_start(ts: int, resolution: str) -> int:
+    width = RESOLUTIONS[resolution] * SLOTS
+    return ts - ts % width
+
+
+def _unpack(data) -> list:
+    return list(_PACK.unpack(bytes(data)))
+
+
+def _merge(values: list, slot: int, candle: tuple, overwrite: bool = True) -> bool:
+    """Fold (open, high, low, close) into a slot; False if nothing changed.
+    Columns: opens [0, SLOTS), highs, lows, closes."""
+    o, h, l, c = candle
+    if math.isnan(values[slot]):
+        values[slot], values[SLOTS + slot], values[2 * SLOTS + slot], values[3 * SLOTS + slot] = o, h, l, c
+        return True
+    if not overwrite:
+        return False
+    values[SLOTS + slot] = max(values[SLOTS + slot], h)
+    values[2 * SLOTS + slot] = min(values[2 * SLOTS + slot], l)
+    values[3 * SLOTS + slot] = c
+    return True
+
+
+def _write(symbol_candles: dict, resolution: str, overwrite: bool) -> int:
+    """Merge {symbol: [(ts, candle)]} into the chunks at `resolution`."""
+    from blockchain.models import GmPriceChunk
+
+    step = RESOLUTIONS[resolution]
+    wanted = {
+        (symbol, _chunk_start(int(ts), resolution))
+        for symbol, candles in symbol_candles.items() for ts, _ in candles
+    }
+    if not wanted:
+        return 0
+    by_start = {}
+    for symbol, start in wanted:
+        by_start.setdefault(start, []).append(symbol)
+    query = Q()
+    for start, symbols in by_start.items():
+        query |= Q(chunk_start=start, symbol__in=symbols)
+    existing = {
+        (chunk.symbol, chunk.chunk_start): chunk
+        for chunk in GmPriceChunk.objects.filter(query, resolution=resolution)
+    }
+    values = {key: _unpack(chunk.data) for key, chunk in existing.items()}
+
+    dirty = set()
+    for symbol, candles in symbol_candles.items():
+        for ts, candle in candles:
+            ts = int(ts)
+            key = (symbol, _chunk_start(ts, resolution))
+            slots = values.setdefault(key, [_NAN] * (4 * SLOTS))
+            if _merge(slots, (ts - key[1]) // step, candle, overwrite):
+                dirty.add(key)
+
+    now = timezone.now()
+    updates, creates = [], []
+    for key in dirty:
+        data = _PACK.pack(*values[key])
+        if key in existing:
+            chunk = existing[key]
+            chunk.data, chunk.updated_at = data, now
+            updates.append(chunk)
+        else:
+            creates.append(GmPriceChunk(symbol=key[0], resolution=resolution,
+                                        chunk_start=key[1], data=data))
+    if updates:
+        GmPriceChunk.objects.bulk_update(updates, ['data', 'updated_at'], batch_size=500)
+    if creates:
+        GmPriceChunk.objects.bulk_create(creates, batch_size=500)
+    return len(dirty)
+
+
+# ── Ingestion ──────────────────────────────────────────────────────────
+
+def _market_open() -> bool:
+    try:
+        return gm_api.session_from_status(gm_api.market_status()) != 'closed'
+    except Exception:  # noqa: BLE001 — an unknown session still records prices
+        logger.warning('gm_prices: market status unavailable', exc_info=True)
+        return True
+
+
+def ingest(now: int | None = None) -> dict:
+    """Fold one market snapshot into every series."""
+    from blockchain.models import GmPriceSeries
+
+    if not cache.add(LOCK_KEY, 1, LOCK_TTL):
+        return {'skipped': 'locked'}
+    try:
+        market = gm_api.refresh_all_market()
+        if not _market_open():
+            return {'skipped': 'market closed'}
+        ts = int(now if now is not None else time.time())
+        prices = {}
+        for item in market:
+            pm = item.get('primaryMarket') or {}
+            if pm.get('symbol') and pm.get('price') is not None:
+                price = float(pm['price'])
+                prices[pm['symbol']] = [(ts, (price, price, price, price))]
+        with transaction.atomic():
+            GmPriceSeries.objects.bulk_create(
+                [GmPriceSeries(symbol=symbol) for symbol in prices],
+                ignore_conflicts=True, batch_size=500)
+            for resolution in RESOLUTIONS:
+                _write(prices, resolution, overwrite=True)
+        return {'symbols': len(prices)}
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _seconds(value) -> int:
+    """Upstream candle timestamp (epoch s or ms, or ISO 8601) -> epoch s."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return int(datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp())
+    return int(number / 1000 if number > 1e11 else number)
+
+
+def seed(symbol: str) -> int:
+    """Load a symbol's upstream history into the empty slots."""
+    from blockchain.models import GmPriceSeries
+
+    upstream = {
+        resolution: [
+            (_seconds(c['timestamp']),
+             (float(c['open']), float(c['high']), float(c['low']), float(c['close'])))
+            for c in gm_api.ohlc(symbol, range_key)
+        ]
+        for resolution, range_key in SEED_RANGES.items()
+    }
+    # The same chunks are read-modify-written by ingest every minute.
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(LOCK_KEY, 1, LOCK_TTL):
+        if time.monotonic() >= deadline:
+            raise RuntimeError('gm_prices: ingest lock busy')
+        time.sleep(0.5)
+    try:
+        with transaction.atomic():
+            written = sum(
+                _write({symbol: candles}, resolution, overwrite=False)
+                for resolution, candles in upstream.items()
+            )
+            GmPriceSeries.objects.filter(symbol=symbol).update(seeded_at=timezone.now())
+    finally:
+        cache.delete(LOCK_KEY)
+    return written
+
+
+def seed_pending(limit: int = SEED_BATCH) -> dict:
+    from blockchain.models import GmPriceSeries
+
+    seeded = failed = 0
+    pending = GmPriceSeries.objects.filter(seeded_at__isnull=True).order_by('created_at')
+    for symbol in pending.values_list('symbol', flat=True)[:limit]:
+        try:
+            seed(symbol)
+            seeded += 1
+        except Exception:  # noqa: BLE001 — the next run retries this symbol
+            logger.warning('gm_prices: seeding %s failed', symbol, exc_info=True)
+            failed += 1
+    return {'seeded': seeded, 'failed': failed}
+
+
+def prune(now: int | None = None) -> int:
+    from blockchain.models import GmPriceChunk
+
+    ts = int(now if now is not None else time.time())
+    deleted = 0
+    for resolution, keep in RETENTION.items():
+        if keep is None:
+            continue
+        cutoff = _chunk_start(ts - keep, resolution)
+        deleted += GmPriceChunk.objects.filter(
+            resolution=resolution, chunk_start__lt=cutoff).delete()[0]
+    return deleted
+
+
+# ── Reads ──────────────────────────────────────────────────────────────
+
+def candles(symbol: str, resolution: str, since: int | None = None) -> list:
+    """Stored candles, oldest first, as the upstream OHLC payload shapes
+    them (timestamp in epoch milliseconds)."""
+    from blockchain.models import GmPriceChunk
+
+    step = RESOLUTIONS[resolution]
+    chunks = GmPriceChunk.objects.filter(symbol=symbol, resolution=resolution)
+    if since is not None:
+        chunks = chunks.filter(chunk_start__gte=_chunk_start(since, resolution))
+    out = []
+    for start, data in chunks.order_by('chunk_start').values_list('chunk_start', 'data'):
+        values = _unpack(data)
+        for slot in range(SLOTS):
+            ts = start + slot * step
+            if math.isnan(values[slot]) or (since is not None and ts < since):
+                continue
+            out.append({
+                'timestamp': ts * 1000,
+                'open': values[slot],
+                'high': values[SLOTS + slot],
+                'low': values[2 * SLOTS + slot],
+                'close': values[3 * SLOTS + slot],
+            })
+    return out
+
+
+def _covers(symbol: str, resolution: str, since: int) -> bool:
+    """Whether the stored series starts at or before `since`."""
+    from blockchain.models import GmPriceChunk
+
+    first = (GmPriceChunk.objects.filter(symbol=symbol, resolution=resolution)
+             .order_by('chunk_start').values_list('chunk_start', 'data').first())
+    if first is None:
+        return False
+    start, data = first
+    values = _unpack(data)
+    slot = next(slot for slot in range(SLOTS) if not math.isnan(values[slot]))
+    return start + slot * RESOLUTIONS[resolution] <= since
+
+
+def ohlc(symbol: str, range_key: str) -> list:
+    """Candles for one asset and client range; range_key must be in RANGES."""
+    from blockchain.models import GmPriceSeries
+
+    key = f'gm_ohlc_local:{symbol}:{range_key}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    if not GmPriceSeries.objects.filter(symbol=symbol, seeded_at__isnull=False).exists():
+        return gm_api.ohlc(symbol, range_key)
+    resolution, span = RANGES[range_key]
+    since = int(time.time()) - span if span is not None else None
+    if resolution not in SEED_RANGES and since is not None and not _covers(symbol, resolution, since):
+        # Ingestion alone builds this series; until it spans the range the
+        # chart would start part-way through it.
+        return gm_api.ohlc(symbol, range_key)
+    out = candles(symbol, resolution, since)
+    cache.set(key, out, READ_TTL)
+    return out
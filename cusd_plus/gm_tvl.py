@@ -1,15 +1,15 @@
 """Cached aggregate market value of Ondo Stocks held by Confío traders.
 
-The chain remains authoritative. A scheduled task finds addresses with a
-confirmed Confío stock trade, scans every BSC Ondo token balance for those
-addresses through Multicall3, and prices only the non-zero balances from the
-shared Ondo market cache. GraphQL reads the finished cache value; it never
-runs a portfolio-wide RPC scan in a request.
+A scheduled task reads the holdings ledger (gm_ledger) — per-wallet GM
+balances for every address with a confirmed Confío stock trade, followed
+from Transfer logs and audited against balanceOf — and prices the non-zero
+positions from the shared Ondo market cache. The aggregate is a handful of
+SQL queries, not a balanceOf scan per wallet. GraphQL reads the finished
+cache value; it never runs a portfolio-wide query in a request.
 
 Why confirmed participants instead of every Account.bsc_address: most Confío
 accounts have never touched a stock. Limiting the universe by the durable
-sponsored-batch audit ledger keeps the work proportional to actual adoption
-without making a database ledger the balance source of truth.
+sponsored-batch audit ledger keeps the work proportional to actual adoption.
 """
 import logging
 import secrets
@@ -18,7 +18,7 @@ from decimal import Decimal, InvalidOperation
 from django.core.cache import cache
 from django.utils import timezone
 
-from . import gm_api, gm_holdings, vault
+from . import gm_api, gm_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -32,22 +32,6 @@ TVL_LAST_TTL = 60 * 60
 TVL_LOCK_TTL = 30 * 60
 
 
-def _participant_addresses() -> list[str]:
-    """Unique wallets whose Confío stock transaction reached finality."""
-    from blockchain.models import SponsoredBatch
-
-    return list(
-        SponsoredBatch.objects.filter(
-            kind__in=('stock_buy', 'stock_sell'),
-            status='confirmed',
-        )
-        .exclude(user_bsc_address='')
-        .values_list('user_bsc_address', flat=True)
-        .order_by()
-        .distinct()
-    )
-
-
 def _market_by_symbol() -> dict[str, dict]:
     """Current display-price metadata keyed by the on-chain GM symbol."""
     assets = {}
@@ -117,90 +101,51 @@ def _publish(result: dict) -> dict:
 def refresh() -> dict | None:
     """Recompute and cache TVL. None means another refresh owns the lock.
 
-    Any participant scan failure aborts publication: a partial aggregate
-    would look like money vanished. The prior last-known snapshot remains
-    available to readers for one hour.
+    A ledger that cannot stand for every trader (gm_ledger.totals raises)
+    aborts publication: a partial aggregate would look like money vanished.
+    The prior last-known snapshot remains available to readers for one hour.
     """
     release_lock = _acquire_lock()
     if release_lock is None:
         return None
     try:
-        participants = sorted({a.lower() for a in _participant_addresses() if a})
-        if not participants:
-            return _publish({
-                'value_usd': 0.0,
-                'accounts_scanned': 0,
-                'holder_wallets': 0,
-                'positions': 0,
-                'assets': [],
-                'as_of_block': None,
-                'updated_at': timezone.now().isoformat(),
-            })
-
-        token_registry = gm_holdings.registry()
-        if token_registry is None:
-            raise RuntimeError('GM token registry unavailable')
-
-        market = _market_by_symbol()
-        if token_registry and not market:
+        ledger = gm_ledger.totals()
+        held = ledger['assets']
+        market = _market_by_symbol() if held else {}
+        if held and not market:
             raise RuntimeError('GM prices unavailable')
 
-        # All balanceOf calls in this refresh observe one canonical height,
-        # rather than drifting across blocks while participant scans run.
-        block_hex = vault._rpc('eth_blockNumber', [])
-        block_number = int(block_hex, 16)
-        block_tag = hex(block_number)
-
         total = Decimal('0')
-        positions = 0
-        holder_wallets = 0
-        units_by_asset: dict[str, Decimal] = {}
-        holders_by_asset: dict[str, int] = {}
-        for address in participants:
-            units_by_symbol = gm_holdings._scan(
-                address,
-                token_registry,
-                block_tag=block_tag,
-                require_complete=True,
-            )
-            if units_by_symbol:
-                holder_wallets += 1
-            for symbol, units in units_by_symbol.items():
-                asset = market.get(symbol)
-                if asset is None:
-                    # Do not publish a knowingly understated number. A held,
-                    # halted or newly-listed asset still needs a real price.
-                    raise RuntimeError(f'No live price for held GM asset {symbol}')
-                units_decimal = Decimal(str(units))
-                total += units_decimal * asset['price']
-                units_by_asset[symbol] = units_by_asset.get(symbol, Decimal('0')) + units_decimal
-                holders_by_asset[symbol] = holders_by_asset.get(symbol, 0) + 1
-                positions += 1
-
         assets = []
-        for symbol, units in units_by_asset.items():
-            market_asset = market[symbol]
-            value = units * market_asset['price']
+        for symbol, position in held.items():
+            market_asset = market.get(symbol)
+            if market_asset is None:
+                # Do not publish a knowingly understated number. A held,
+                # halted or newly-listed asset still needs a real price.
+                raise RuntimeError(f'No live price for held GM asset {symbol}')
+            value = position['units'] * market_asset['price']
+            total += value
             assets.append({
                 'symbol': symbol,
                 'ticker': market_asset['ticker'],
                 'name': market_asset['name'],
-                'units': float(units),
+                'units': float(position['units']),
                 'price_usd': float(market_asset['price']),
                 'value_usd': float(value),
-                'share_pct': float(value / total * 100) if total else 0.0,
-                'holders': holders_by_asset[symbol],
+                'holders': position['holders'],
                 'day_change_pct': market_asset['day_change_pct'],
             })
+        for asset in assets:
+            asset['share_pct'] = asset['value_usd'] / float(total) * 100 if total else 0.0
         assets.sort(key=lambda item: (-item['value_usd'], item['ticker']))
 
         result = {
             'value_usd': float(total),
-            'accounts_scanned': len(participants),
-            'holder_wallets': holder_wallets,
-            'positions': positions,
+            'accounts_scanned': ledger['holders'],
+            'holder_wallets': ledger['holder_wallets'],
+            'positions': ledger['positions'],
             'assets': assets,
-            'as_of_block': block_number,
+            'as_of_block': ledger['as_of_block'],
             'updated_at': timezone.now().isoformat(),
         }
         return _publish(result)
@@ -0,0 +1,301 @@
+"""
+BSC log follower — tails new heads and records arrivals as blocks land.
+
+monitor_bridge_arrivals is a beat poll: every run it rewinds its cursor
+CUSD_PLUS_BSC_SCAN_REWIND_BLOCKS and eth_getLogs the whole window again, in
+address-topic slices of 800 with 50-block micro-chunk fallbacks. Detection
+latency is the beat interval plus the scan, and most of the work is blocks
+it has already seen.
+
+The follower (manage.py follow_bsc_logs) inverts that:
+
+  - Heads: a `newHeads` subscription when a websocket endpoint is configured
+    (CUSD_PLUS_BSC_WS_URL) and the optional `websockets` package is
+    installed; otherwise — and whenever the socket drops — eth_blockNumber
+    polling every CUSD_PLUS_BSC_FOLLOW_POLL_S. Either way each new block is
+    fetched once.
+  - Matching: at the tip, ONE eth_getLogs for Transfer on the followed
+    token contracts, no recipient topics; recipients are matched in memory
+    against the registered-address set (refreshed every WATCH_REFRESH_S).
+    Only a catch-up span wider than TAIL_MAX_BLOCKS (a restart, an outage)
+    falls back to the topic-filtered chunked scan.
+  - Cursor: durable per filter (blockchain.BscLogCursor), with the hash of
+    every processed tip inside _finality_depth(). A tip whose hash changed
+    is a reorg: the cursor rewinds to the newest remembered block that is
+    still canonical (or the full finality depth) and that span is processed
+    again. Handlers are idempotent, exactly as for the beat's rescans.
+
+While the follower heartbeats, monitor_bridge_arrivals skips its scan and
+only judges STUCK conversions; if the follower dies the beat resumes the
+old poll on its own within HEARTBEAT_TTL.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from blockchain.bsc_balance_service import BscBalanceService
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_KEY = 'cusd_plus_bsc_follower_alive'
+HEARTBEAT_TTL = 60
+WATCH_REFRESH_S = 30
+# Widest span fetched unfiltered at the tip; wider spans use the
+# recipient-topic scan so a catch-up never pulls every USDT transfer on BSC.
+TAIL_MAX_BLOCKS = int(getattr(settings, 'CUSD_PLUS_BSC_FOLLOW_TAIL_BLOCKS', 20))
+# Catch-up spans are committed to the cursor one at a time.
+CATCH_UP_SPAN = 2000
+
+
+def follower_alive() -> bool:
+    return bool(cache.get(HEARTBEAT_KEY))
+
+
+def _block_hash(number: int) -> str | None:
+    from .tasks import _rpc
+
+    block = _rpc('eth_getBlockByNumber', [hex(number), False])
+    return (block or {}).get('hash')
+
+
+class LogFilter:
+    """One followed log stream: Transfer logs on `addresses`, matched by
+    recipient against `watched()` and handed to `handle(logs)`.
+
+    `watched` returns the in-memory match set (lowercase addresses);
+    `handle` must be idempotent — a reorg or a crash between handling and
+    committing the cursor replays logs it has seen."""
+
+    def __init__(self, name, addresses, watched, handle):
+        self.name = name
+        self.addresses = [a.lower() for a in addresses if a]
+        self.watched = watched
+        self.handle = handle
+
+
+class LogFollower:
+    def __init__(self, log_filter: LogFilter, *, poll_interval: float = None, on_head=()):
+        self.filter = log_filter
+        # Per-block work that rides the same head stream (receipt_tracker).
+        self.on_head = list(on_head)
+        self.poll_interval = poll_interval if poll_interval is not None else float(
+            getattr(settings, 'CUSD_PLUS_BSC_FOLLOW_POLL_S', 1.0))
+        self._watch = set()
+        self._watch_loaded_at = 0.0
+
+    # ── cursor ───────────────────────────────────────────────────────────
+
+    def _cursor(self, head: int):
+        from blockchain.models import BscLogCursor
+
+        cursor, created = BscLogCursor.objects.get_or_create(name=self.filter.name)
+        if created or not cursor.last_block:
+            # First start: continue where the beat scanner got to rather
+            # than from the tip, so nothing between them is skipped.
+            legacy = cache.get('cusd_plus_bsc_scan_cursor')
+            cursor.last_block = int(legacy) if legacy else max(head - 1, 0)
+            cursor.recent_hashes = {}
+            cursor.save(update_fields=['last_block', 'recent_hashes', 'updated_at'])
+        return cursor
+
+    def _rewind_on_reorg(self, cursor) -> None:
+        """Rewind `cursor` if its tip is no longer canonical."""
+        from .tasks import _finality_depth
+
+        remembered = {int(k): v for k, v in (cursor.recent_hashes or {}).items()}
+        expected = remembered.get(cursor.last_block)
+        if not expected or _block_hash(cursor.last_block) == expected:
+            return
+        floor = max(cursor.last_block - _finality_depth(), 0)
+        safe = floor
+        for number in sorted(remembered, reverse=True):
+            if number <= floor:
+                break
+            if number < cursor.last_block and _block_hash(number) == remembered[number]:
+                safe = number
+                break
+        logger.warning('BSC reorg under %s: tip %s replaced, rewinding to %s',
+                       self.filter.name, cursor.last_block, safe)
+        cursor.last_block = safe
+        cursor.recent_hashes = {str(n): h for n, h in remembered.items() if n <= safe}
+        cursor.save(update_fields=['last_block', 'recent_hashes', 'updated_at'])
+
+    def _commit(self, cursor, to_block: int, tip_hash: str | None) -> None:
+        from .tasks import _finality_depth
+
+        keep_from = to_block - _finality_depth()
+        hashes = {k: v for k, v in (cursor.recent_hashes or {}).items() if int(k) > keep_from}
+        if tip_hash:
+            hashes[str(to_block)] = tip_hash
+        cursor.last_block = to_block
+        cursor.recent_hashes = hashes
+        cursor.save(update_fields=['last_block', 'recent_hashes', 'updated_at'])
+        # The ops page reads scanner lag from the beat's cursor key.
+        cache.set('cusd_plus_bsc_scan_cursor', to_block, None)
+
+    # ── logs ─────────────────────────────────────────────────────────────
+
+    def _watched(self) -> set:
+        now = time.monotonic()
+        if now - self._watch_loaded_at >= WATCH_REFRESH_S or not self._watch_loaded_at:
+            self._watch = {a.lower() for a in self.filter.watched()}
+            self._watch_loaded_at = now
+        return self._watch
+
+    def _fetch(self, from_block: int, to_block: int, watch: set) -> list:
+        from .tasks import TRANSFER_TOPIC, _address_topic, _get_logs_chunked, _rpc
+
+        if to_block - from_block + 1 <= TAIL_MAX_BLOCKS:
+            logs = _rpc('eth_getLogs', [{
+                'fromBlock': hex(from_block), 'toBlock': hex(to_block),
+                'address': self.filter.addresses, 'topics': [TRANSFER_TOPIC],
+            }])
+        else:
+            logs = []
+            addrs = sorted(watch)
+            for address in self.filter.addresses:
+                for i in range(0, len(addrs), 800):
+                    logs += _get_logs_chunked(
+                        from_block, to_block,
+                        [TRANSFER_TOPIC, None,
+                         [_address_topic(a) for a in addrs[i:i + 800]]],
+                        address=address,
+                    )
+        return [
+            log for log in logs or []
+            if not log.get('removed') and len(log.get('topics') or []) >= 3
+            and ('0x' + log['topics'][2][-40:]).lower() in watch
+        ]
+
+    def step(self, head: int) -> int:
+        """Process everything between the cursor and `head`; returns the
+        number of matched logs handed to the filter."""
+        cursor = self._cursor(head)
+        self._rewind_on_reorg(cursor)
+        matched = 0
+        while cursor.last_block < head:
+            from_block = cursor.last_block + 1
+            to_block = min(head, cursor.last_block + CATCH_UP_SPAN)
+            # Hash BEFORE logs: if the tip is replaced in between, the next
+            # step sees the mismatch and replays the span, never the reverse.
+            tip_hash = _block_hash(to_block)
+            watch = self._watched()
+            logs = self._fetch(from_block, to_block, watch) if watch else []
+            if logs:
+                self.filter.handle(logs)
+                matched += len(logs)
+            self._commit(cursor, to_block, tip_hash)
+        return matched
+
+    # ── heads ────────────────────────────────────────────────────────────
+
+    def _poll_heads(self):
+        from .tasks import _rpc
+
+        last = None
+        while True:
+            try:
+                head = int(_rpc('eth_blockNumber', []), 16)
+            except Exception as exc:  # noqa: BLE001 — keep polling
+                logger.warning('BSC head poll failed: %s', exc)
+                time.sleep(self.poll_interval * 5)
+                continue
+            if head != last:
+                last = head
+                yield head
+            else:
+                cache.set(HEARTBEAT_KEY, head, HEARTBEAT_TTL)
+            time.sleep(self.poll_interval)
+
+    def _subscribed_heads(self, url):
+        import json
+
+        from websockets.sync.client import connect
+
+        with connect(url, open_timeout=10) as ws:
+            ws.send(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe',
+                                'params': ['newHeads']}))
+            while True:
+                message = json.loads(ws.recv(timeout=30))
+                head = ((message.get('params') or {}).get('result') or {}).get('number')
+                if head:
+                    yield int(head, 16)
+
+    def heads(self):
+        """Block numbers as they land — pushed when possible, polled when not."""
+        url = getattr(settings, 'CUSD_PLUS_BSC_WS_URL', '')
+        if url:
+            try:
+                import websockets.sync.client  # noqa: F401
+            except ImportError:
+                logger.warning('CUSD_PLUS_BSC_WS_URL set but websockets is not installed; polling')
+                url = ''
+        while url:
+            try:
+                yield from self._subscribed_heads(url)
+            except Exception as exc:  # noqa: BLE001 — degrade, then retry the socket
+                logger.warning('BSC newHeads subscription dropped (%s); polling', exc)
+                poll = self._poll_heads()
+                deadline = time.monotonic() + 60
+                for head in poll:
+                    yield head
+                    if time.monotonic() >= deadline:
+                        break
+        yield from self._poll_heads()
+
+    def run(self, max_steps: int = None) -> None:
+        steps = 0
+        for head in self.heads():
+            try:
+                self.step(head)
+                cache.set(HEARTBEAT_KEY, head, HEARTBEAT_TTL)
+            except Exception:  # noqa: BLE001 — the cursor is untouched; next head retries
+                logger.exception('BSC log follower step failed at head %s', head)
+            for hook in self.on_head:
+                try:
+                    hook(head)
+                except Exception:  # noqa: BLE001 — a hook never stalls the follower
+                    logger.exception('BSC head hook %s failed at head %s',
+                                     getattr(hook, '__name__', hook), head)
+            steps += 1
+            if max_steps is not None and steps >= max_steps:
+                return
+
+
+def bridge_arrivals_filter() -> LogFilter:
+    """USDT and cUSD+ share Transfers into any address the beat scanner
+    watches, handled by the same recorders monitor_bridge_arrivals uses."""
+    from django.utils import timezone
+
+    from . import tasks
+
+    vault_addr = (getattr(settings, 'CUSD_PLUS_VAULT_ADDRESS', '') or '').lower()
+
+    def watched():
+        conv_watch, registered, ramp_addrs = tasks._bridge_watch()
+        return set(conv_watch) | set(registered) | ramp_addrs
+
+    def handle(logs):
+        BscBalanceService.invalidate_many(
+            '0x' + log['topics'][2][-40:] for log in logs if len(log.get('topics') or []) > 2)
+        # Fresh rows, not the follower's cached set: a saga may have moved
+        # since the watch set was loaded.
+        conv_watch, registered, ramp_addrs = tasks._bridge_watch()
+        usdt = tasks.USDT_BSC.lower()
+        min_deposit = tasks._min_deposit()
+        now = timezone.now()
+        arrived = tasks._process_usdt_arrivals(
+            [log for log in logs if log['address'].lower() == usdt],
+            conv_watch, registered, ramp_addrs, now, min_deposit)
+        tasks._settle_conversions(conv_watch, arrived, now, None)
+        if vault_addr:
+            try:
+                tasks._process_cusd_plus_arrivals(
+                    [log for log in logs if log['address'].lower() == vault_addr],
+                    registered, min_deposit)
+            except Exception:  # noqa: BLE001
+                logger.exception('cUSD+ inbound follow failed (USDT pipeline unaffected)')
+
+    return LogFilter('bridge_arrivals', [tasks.USDT_BSC, vault_addr], watched, handle)
@@ -0,0 +1,40 @@
+"""Tail BSC heads and record bridge/deposit arrivals as blocks land.
+
+Long-running (run it under the process supervisor next to the celery
+workers). While it heartbeats, the monitor_bridge_arrivals beat skips its
+rewind scan; stop it and the beat takes over again on its own.
+
+Each head also drives the receipt tracker (cusd_plus.receipt_tracker), which
+settles every pending SponsoredBatch in one batched pass per block; pass
+--no-receipts to run the log follower alone. With a presale vault
+configured, heads also refresh the live presale price
+(presale.live_stats.track_presale_price).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cusd_plus.log_follower import LogFollower, bridge_arrivals_filter
+from cusd_plus.receipt_tracker import track_receipts
+
+
+class Command(BaseCommand):
+    help = 'Follow BSC Transfer logs for USDT/cUSD+ arrivals (newHeads or polling).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds between eth_blockNumber polls when not subscribed.')
+        parser.add_argument('--max-steps', type=int, default=None,
+                            help='Stop after this many heads (smoke runs).')
+        parser.add_argument('--no-receipts', action='store_true',
+                            help='Do not run the receipt tracker on each head.')
+
+    def handle(self, *args, **options):
+        on_head = [] if options['no_receipts'] else [track_receipts]
+        if getattr(settings, 'BSC_PRESALE_VAULT_ADDRESS', None):
+            from presale.live_stats import track_presale_price
+            on_head.append(track_presale_price)
+        follower = LogFollower(bridge_arrivals_filter(), poll_interval=options['poll_interval'],
+                               on_head=on_head)
+        self.stdout.write(f'Following BSC logs for {follower.filter.name}…')
+        follower.run(max_steps=options['max_steps'])
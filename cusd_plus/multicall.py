@@ -0,0 +1,147 @@
+"""
+Batched BSC view calls — many eth_calls, one round trip.
+
+Screens that fan a read out per row (payroll: isDelegate per employee, both
+escrow pools per business; the off-ramp: balance, shares and both prices)
+paid one sequential RPC per value, so the latency of a screen grew with the
+size of the business. `read_many` answers the whole list at once:
+
+  1. Multicall3 `tryAggregate(false, calls)` — one eth_call, every subcall
+     evaluated at the same block. Same contract and chunking as the GM
+     holdings scan (gm_holdings._scan).
+  2. If that round trip fails (node refuses the calldata size, Multicall3
+     answers empty, decoding breaks), a JSON-RPC batch: the same eth_calls
+     POSTed as one array to the endpoint pool. Still one HTTP round trip,
+     only no longer pinned to a single block.
+
+Failure isolation is per call, deliberately: a reverted or errored subcall
+comes back as None in its own slot and never discards its neighbours'
+answers. Only the round trip itself failing everywhere raises — callers keep
+their own last-known / degraded semantics on top of that.
+"""
+import logging
+
+from eth_abi import decode, encode
+from eth_utils import keccak
+
+logger = logging.getLogger(__name__)
+
+# Canonical Multicall3 (same address on BSC as everywhere).
+MULTICALL3 = '0xcA11bde05977b3631167028862bE2a173976CA11'
+SEL_TRY_AGGREGATE = keccak(text='tryAggregate(bool,(address,bytes)[])')[:4]
+
+# Subcalls per eth_call / per batch POST — well under public-node limits.
+CHUNK = 250
+
+
+def _calldata(data) -> bytes:
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    return bytes.fromhex(data[2:] if data.startswith('0x') else data)
+
+
+def _default_rpc(method, params):
+    from .tasks import _rpc
+    return _rpc(method, params)
+
+
+def try_aggregate(calls, *, block_tag: str = 'latest', rpc=None) -> list:
+    """Multicall3 pass over `calls` [(to, data), ...]; returns the return
+    data per call in order, None where that subcall reverted. Raises when
+    the aggregate call itself fails or answers a malformed result set."""
+    rpc = rpc or _default_rpc
+    out = []
+    for i in range(0, len(calls), CHUNK):
+        chunk = [(to, _calldata(data)) for to, data in calls[i:i + CHUNK]]
+        # requireSuccess=False: one reverting call must not hide the rest.
+        data = SEL_TRY_AGGREGATE + encode(['bool', '(address,bytes)[]'], [False, chunk])
+        res = rpc('eth_call', [{'to': MULTICALL3, 'data': '0x' + data.hex()}, block_tag])
+        if not res or res == '0x':
+            raise RuntimeError('Multicall3 returned no data')
+        results = decode(['(bool,bytes)[]'], bytes.fromhex(res[2:]))[0]
+        if len(results) != len(chunk):
+            raise RuntimeError('Multicall3 returned an incomplete result set')
+        out.extend(bytes(ret) if ok else None for ok, ret in results)
+    return out
+
+
+def batch_rpc(requests_, *, urls=None, timeout: int = 15, with_errors: bool = False) -> list:
+    """Any JSON-RPC reads [(method, params), ...] as one batch POST per
+    chunk; the result per request in order, None where that request errored.
+    with_errors=True pairs each result with the node's error message instead
+    — (result, message), message None on success — for callers that must
+    tell one refusal from another. An endpoint that fails the whole POST is
+    rotated past like tasks._rpc does. Raises when every endpoint fails."""
+    from .tasks import BSC_RPC_URLS, _rpc_session
+
+    ordered = list(urls or BSC_RPC_URLS)
+    out = []
+    for i in range(0, len(requests_), CHUNK):
+        chunk = requests_[i:i + CHUNK]
+        payload = [
+            {'jsonrpc': '2.0', 'id': n, 'method': method, 'params': params}
+            for n, (method, params) in enumerate(chunk)
+        ]
+        last_exc = None
+        for url in ordered:
+            try:
+                resp = _rpc_session(url).post(url, json=payload, timeout=timeout)
+                resp.raise_for_status()
+                body = resp.json()
+                if not isinstance(body, list):
+                    # Endpoints without batch support answer a single error.
+                    raise RuntimeError(f'batch not supported: {body}')
+                by_id = {item.get('id'): item for item in body if isinstance(item, dict)}
+                break
+            except Exception as exc:  # noqa: BLE001 — try the next endpoint
+                last_exc = exc
+                logger.info('bsc rpc batch failed on %s: %s', url, exc)
+        else:
+            raise RuntimeError(f'all {len(ordered)} BSC RPC endpoints failed a batch: {last_exc}')
+        for n in range(len(chunk)):
+            item = by_id.get(n) or {}
+            result = None if 'error' in item else item.get('result')
+            if with_errors:
+                error = item.get('error') if item else 'no answer'
+                if isinstance(error, dict):
+                    error = error.get('message') or error
+                out.append((result, None if error is None else str(error)))
+            else:
+                out.append(result)
+    return out
+
+
+def batch_eth_call(calls, *, block_tag: str = 'latest', urls=None, timeout: int = 15) -> list:
+    """The same reads as eth_calls in one JSON-RPC batch; return data per
+    call, None where that call errored."""
+    results = batch_rpc([
+        ('eth_call', [{'to': to, 'data': '0x' + _calldata(data).hex()}, block_tag])
+        for to, data in calls
+    ], urls=urls, timeout=timeout)
+    return [None if result is None else _calldata(result) for result in results]
+
+
+def read_many(calls, *, block_tag: str = 'latest', rpc=None, urls=None) -> list:
+    """One round trip for every (to, data) in `calls` — Multicall3 first,
+    JSON-RPC batch as the fallback. Return data per call, None where that
+    call failed on its own. Raises only when neither path could answer.
+
+    `rpc` / `urls` let a module keep its own endpoint choice (vault reads
+    stay on BSC_RPC_URL); by default both go through the rotation pool."""
+    calls = list(calls)
+    if not calls:
+        return []
+    try:
+        return try_aggregate(calls, block_tag=block_tag, rpc=rpc)
+    except Exception as exc:  # noqa: BLE001 — degrade to a plain batch
+        logger.info('Multicall3 read failed (%d calls), using JSON-RPC batch: %s',
+                    len(calls), exc)
+    return batch_eth_call(calls, block_tag=block_tag, urls=urls)
+
+
+def as_uint(ret) -> int | None:
+    """First return word as an int — the eth_call helpers' convention (no
+    return data reads as 0) — or None for a failed call."""
+    if ret is None:
+        return None
+    return int.from_bytes(ret[:32], 'big') if ret else 0
@@ -0,0 +1,129 @@
+"""
+Receipt tracker — every pending SponsoredBatch checked once per block.
+
+Each broadcast used to schedule its own check_sponsored_batch_receipt, which
+polls eth_getTransactionReceipt, then the finalized tag, then the block hash,
+and reschedules itself every 3s (15s on the tail) until the block is final;
+the domain confirm task (payroll payout, payment, send) is scheduled next to
+it and retries on its own 15s loop until the batch resolves. At a few dozen
+batches in flight that is hundreds of Celery retries and RPC round trips a
+minute spent asking the same question.
+
+track_receipts() answers it for all of them at once:
+
+  - ONE JSON-RPC batch of eth_getTransactionReceipt for every pending hash
+    (multicall.batch_rpc; chunked like the view-call batches).
+  - The finalized tag once per pass (tasks._finalized_block_number), the
+    head only on a node that won't serve it.
+  - ONE batch of eth_getBlockByNumber for the distinct blocks that are final,
+    for the canonical-hash check.
+  - tasks.settle_sponsored_batch per mined batch — the same verdict path
+    the per-batch task uses — and, once a batch is terminal, its domain
+    confirm task enqueued exactly once.
+
+It runs per head inside the BSC log follower (manage.py follow_bsc_logs).
+While it heartbeats, the per-batch receipt task (tasks.schedule_receipt_check)
+and the domain confirm tasks' retries are not dropped but pushed out to
+FALLBACK_COUNTDOWN (fallback_countdown): the tracker settles the batch and
+re-dispatches its confirm task first, and the slow loop is what still
+resolves the row if the follower dies, stalls, or the batch falls out of
+the tracker's CUSD_PLUS_RECOVERY_GIVE_UP_HOURS window.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_KEY = 'cusd_plus_receipt_tracker_alive'
+HEARTBEAT_TTL = 30
+# Per-batch receipt checks and confirm retries while the tracker runs.
+FALLBACK_COUNTDOWN = 120
+# Rows per pass; the oldest pending rows are checked first.
+MAX_PENDING = 1000
+
+
+def tracker_alive() -> bool:
+    return bool(cache.get(HEARTBEAT_KEY))
+
+
+def fallback_countdown(countdown: int) -> int:
+    """`countdown`, stretched to FALLBACK_COUNTDOWN while the tracker runs."""
+    return max(countdown, FALLBACK_COUNTDOWN) if tracker_alive() else countdown
+
+
+def _block_number(receipt: dict) -> int | None:
+    try:
+        return int(receipt.get('blockNumber'), 16)
+    except (TypeError, ValueError):
+        return None
+
+
+def track_receipts(head: int | None = None) -> dict:
+    """One pass over every pending batch; returns counts for the log.
+
+    `head` is the block the caller is following, used only when the node
+    won't serve the finalized tag."""
+    from celery import current_app
+    from django.utils import timezone
+
+    from blockchain.models import SponsoredBatch
+
+    from . import tasks
+    from .multicall import batch_rpc
+
+    give_up_h = int(getattr(settings, 'CUSD_PLUS_RECOVERY_GIVE_UP_HOURS', 6))
+    pending = list(SponsoredBatch.objects.filter(
+        status__in=('sent', 'signed'),
+        tx_hash__gt='',
+        created_at__gte=timezone.now() - timedelta(hours=give_up_h),
+    ).order_by('id')[:MAX_PENDING])
+    out = {'pending': len(pending), 'mined': 0, 'settled': 0}
+    if not pending:
+        cache.set(HEARTBEAT_KEY, head or 1, HEARTBEAT_TTL)
+        return out
+
+    receipts = batch_rpc([('eth_getTransactionReceipt', [b.tx_hash]) for b in pending])
+    mined = [(b, r) for b, r in zip(pending, receipts) if r]
+    out['mined'] = len(mined)
+
+    block_hashes = {}
+    if mined:
+        finalized = tasks._finalized_block_number()
+        if finalized is None and head is None:
+            head = int(tasks._rpc('eth_blockNumber', []), 16)
+        final_blocks = sorted({
+            n for n in (_block_number(r) for _, r in mined)
+            if n is not None and (n <= finalized if finalized is not None
+                                  else head - n >= tasks._finality_depth())
+        })
+        if final_blocks:
+            blocks = batch_rpc([('eth_getBlockByNumber', [hex(n), False]) for n in final_blocks])
+            # An unanswered block is left out; settle reads it on its own.
+            block_hashes = {n: b['hash'] for n, b in zip(final_blocks, blocks) if b and b.get('hash')}
+
+    for batch, receipt in mined:
+        try:
+            tasks.settle_sponsored_batch(batch, receipt, head=head, block_hashes=block_hashes)
+        except tasks.ReceiptNotFinal:
+            continue
+        except Exception:  # noqa: BLE001 — one bad row must not stall the rest
+            logger.exception('receipt tracker could not settle batch %s (%s)', batch.id, batch.tx_hash)
+            continue
+        if batch.status in ('sent', 'signed'):
+            continue
+        out['settled'] += 1
+        task_name = tasks._DOMAIN_CONFIRM_TASKS.get(batch.kind)
+        if task_name and batch.source_id is not None:
+            try:
+                current_app.send_task(task_name, args=[batch.source_id, batch.id])
+            except Exception:  # noqa: BLE001 — the confirm task's own retries still run
+                logger.exception('receipt tracker could not dispatch %s for batch %s',
+                                 task_name, batch.id)
+
+    cache.set(HEARTBEAT_KEY, head or 1, HEARTBEAT_TTL)
+    if out['settled']:
+        logger.info('receipt tracker: %(settled)s settled, %(mined)s mined of %(pending)s pending', out)
+    return out
@@ -624,8 +624,9 @@ class Query(graphene.ObjectType):
             return []
         # symbol comes from our own gmMarket payload, but sanitize anyway
         symbol = ''.join(c for c in symbol if c.isalnum())[:24]
+        from . import gm_prices
         try:
-            candles = gm_api.ohlc(symbol, range)
+            candles = gm_prices.ohlc(symbol, range)
         except Exception:
             import logging
             logging.getLogger(__name__).exception('gm_ohlc upstream failed')
@@ -661,12 +662,16 @@ class Query(graphene.ObjectType):
         # for the JWT account's bsc_address (0 until PP whitelisting + a
         # first mint; the ledger for earned_today/month lands with leg C).
         bsc_address = _active_bsc_address(info)
-        balance_usd = vault.position_usd(bsc_address) if bsc_address else 0.0
         # Raw wallet USDT: money that landed but hasn't minted (or never will,
         # for geo-ineligible users — their "Confío Dollar"). One cached read
         # serves both fields; the client re-reads balanceOf live before any
-        # exact-amount send, so 30s staleness here is display-only.
-        usdt_wei_int = vault.usdt_balance_raw(bsc_address) if bsc_address else 0
+        # exact-amount send, so 30s staleness here is display-only. Position
+        # and USDT misses share one round trip.
+        balance_usd, usdt_wei_int = 0.0, 0
+        if bsc_address:
+            balances = vault.savings_balances([bsc_address])
+            balance_usd = balances['position_usd'][bsc_address.lower()]
+            usdt_wei_int = balances['usdt_raw'][bsc_address.lower()]
         # BEP-20 CONFIO (token count) for the send screen. Never blocks the
         # summary: an RPC hiccup shows 0 here while the dollar fields keep
         # their own cache fallbacks.
@@ -48,10 +48,8 @@ def handle_savings_conversion_referral(sender, instance, created, **kwargs):
         ):
             return
 
-        from achievements.services.referral_rewards import (
-            EventContext,
-            sync_referral_reward_for_event,
-        )
+        from achievements.services.referral_pipeline import submit_referral_event
+        from achievements.services.referral_rewards import EventContext
 
         logger.info(
             'Referral savings activation: user=%s conversion=%s amount=%s',
@@ -69,11 +67,11 @@ def handle_savings_conversion_referral(sender, instance, created, **kwargs):
         # Checkpoint first, then the paying event — same order as the
         # deposit + conversion path. Duplicate guards in the service make
         # both calls no-ops if the user already activated another way.
-        sync_referral_reward_for_event(
+        submit_referral_event(
             instance.actor_user,
             EventContext(event='top_up', amount=amount, metadata=metadata),
         )
-        sync_referral_reward_for_event(
+        submit_referral_event(
             instance.actor_user,
             EventContext(event='conversion_usdc_to_cusd', amount=amount, metadata=metadata),
         )
@@ -883,10 +883,10 @@ def send_sponsored_batch(user, user_addr: str, calls: list, nonce: int, deadline
         release_sponsor_nonce_lock(lock)
 
     try:
-        from .tasks import check_sponsored_batch_receipt
+        from .tasks import schedule_receipt_check
         # 3s: mine (~0.5s) + BSC fast finality (~1s) with margin. The old 6s was
         # sized for the 15-block depth heuristic this no longer uses.
-        check_sponsored_batch_receipt.apply_async(args=[batch.id], countdown=3)
+        schedule_receipt_check(batch.id, countdown=3)
     except Exception:  # noqa: BLE001 — a broker outage must not fail a sent tx
         logger.exception('7702 receipt check could not be scheduled for %s', tx_hash)
     logger.info('7702 sponsored %s batch sent for user %s at %s: %s (gas=%s)',
@@ -34,6 +34,40 @@ def refresh_gm_tvl():
     return refresh()
 
 
+@shared_task(name='cusd_plus.follow_gm_holdings')
+def follow_gm_holdings():
+    """Move the GM holdings ledger up to the finalized head (gm_ledger)."""
+    from .gm_ledger import follow
+
+    return follow()
+
+
+@shared_task(name='cusd_plus.audit_gm_holdings')
+def audit_gm_holdings():
+    """Check every ledger wallet against balanceOf and repair drift."""
+    from .gm_ledger import audit
+
+    return audit()
+
+
+@shared_task(name='cusd_plus.ingest_gm_prices')
+def ingest_gm_prices():
+    """Fold one GM market snapshot into the local price store (gm_prices)."""
+    from .gm_prices import ingest
+
+    return ingest()
+
+
+@shared_task(name='cusd_plus.maintain_gm_prices')
+def maintain_gm_prices():
+    """Seed new symbols' history from upstream and prune old fine candles."""
+    from .gm_prices import prune, seed_pending
+
+    out = seed_pending()
+    out['pruned'] = prune()
+    return out
+
+
 # RPC POOL, not a single URL (2026-07-31 incident): the public dataseed
 # family stopped serving eth_getLogs entirely ('limit exceeded' on every
 # range), which silently killed this scanner for weeks — cursor never set,
@@ -226,35 +260,28 @@ def monitor_bridge_arrivals():
     rewind margin; idempotency comes from monotonic status transitions and
     the src_tx_id dedupe on deposit rows.
     STUCK is judged by chain silence only — never by a vendor API.
+
+    With the log follower running (cusd_plus.log_follower), arrivals are
+    recorded from new heads within seconds and this beat only judges STUCK.
     """
     from django.core.cache import cache
-    from conversion.models import Conversion
+    from .log_follower import follower_alive
 
     timeout = timedelta(minutes=getattr(settings, 'CUSD_PLUS_BRIDGE_TIMEOUT_MIN', 30))
-    conversions = list(Conversion.objects.filter(
-        conversion_type='to_savings',
-        status__in=('SRC_COMMITTED', 'STUCK'),
-        is_deleted=False,
-    ).exclude(user_bsc_address='')[:500])
-    conv_watch = {c.user_bsc_address.lower(): c for c in conversions}
-
-    registered = _registered_bsc_addresses()  # addr -> account_id
-
-    ramp_addrs: set[str] = set()
-    try:
-        from ramps.models import RampTransaction
-        ramp_addrs = {a.lower() for a in RampTransaction.objects.filter(
-            destination='cusd_plus',
-            direction='on_ramp',
-            status__in=('PENDING', 'PROCESSING'),
-        ).exclude(actor_address='').values_list('actor_address', flat=True)[:300]}
-    except Exception:  # noqa: BLE001
-        logger.exception('ramp watch-set union failed')
+    conv_watch, registered, ramp_addrs = _bridge_watch()
 
     watch_all = set(conv_watch) | set(registered) | ramp_addrs
     if not watch_all:
         return  # idle: zero RPC calls
 
+    if follower_alive():
+        # The log follower (manage.py follow_bsc_logs) is tailing heads and
+        # recording arrivals within seconds from its own durable cursor;
+        # rescanning the rewind window here would only replay its work. What
+        # it does not do is judge silence, so STUCK stays on the beat.
+        _settle_conversions(conv_watch, {}, timezone.now(), timeout)
+        return
+
     # Backoff: after SCAN_FAILURE_ALERT_THRESHOLD consecutive dead scans,
     # attempt only every 10th beat instead of hammering dead endpoints
     # twice a minute (which worsens per-IP rate limits).
@@ -303,7 +330,61 @@ def monitor_bridge_arrivals():
     cache.set(_FAILURE_KEY, 0, None)
 
     now = timezone.now()
-    min_deposit = Decimal(str(getattr(settings, 'CUSD_PLUS_MIN_EXTERNAL_DEPOSIT_USD', 1)))
+    min_deposit = _min_deposit()
+    arrived = _process_usdt_arrivals(logs, conv_watch, registered, ramp_addrs, now, min_deposit)
+    _settle_conversions(conv_watch, arrived, now, timeout)
+
+    # ── cUSD+ (vault share) inbound pass (Phase 2) ──────────────────────
+    # External cUSD+ receives (another wallet sends shares directly) get a
+    # ledger row + push. Internal sends are EXCLUDED here — the send
+    # confirm task records both sides — by skipping logs whose sender is
+    # also a registered address. Mints (from = 0x0) never match a
+    # registered `from`, and redeems burn (to = 0x0) so they never match a
+    # registered `to`. Failures here must never disturb the USDT pipeline.
+    try:
+        _scan_cusd_plus_arrivals(registered, from_block, latest_block, min_deposit)
+    except Exception:  # noqa: BLE001
+        logger.exception('cUSD+ inbound scan failed (USDT pipeline unaffected)')
+
+
+def _min_deposit() -> Decimal:
+    return Decimal(str(getattr(settings, 'CUSD_PLUS_MIN_EXTERNAL_DEPOSIT_USD', 1)))
+
+
+def _bridge_watch():
+    """(conv_watch, registered, ramp_addrs) — who an arriving USDT transfer
+    can matter to: in-flight to_savings conversions by address, every
+    registered savings address (addr -> account_id), and addresses with a
+    pending Koywe on-ramp into savings."""
+    from conversion.models import Conversion
+
+    conversions = list(Conversion.objects.filter(
+        conversion_type='to_savings',
+        status__in=('SRC_COMMITTED', 'STUCK'),
+        is_deleted=False,
+    ).exclude(user_bsc_address='')[:500])
+    conv_watch = {c.user_bsc_address.lower(): c for c in conversions}
+
+    registered = _registered_bsc_addresses()  # addr -> account_id
+
+    ramp_addrs: set[str] = set()
+    try:
+        from ramps.models import RampTransaction
+        ramp_addrs = {a.lower() for a in RampTransaction.objects.filter(
+            destination='cusd_plus',
+            direction='on_ramp',
+            status__in=('PENDING', 'PROCESSING'),
+        ).exclude(actor_address='').values_list('actor_address', flat=True)[:300]}
+    except Exception:  # noqa: BLE001
+        logger.exception('ramp watch-set union failed')
+    return conv_watch, registered, ramp_addrs
+
+
+def _process_usdt_arrivals(logs, conv_watch, registered, ramp_addrs, now, min_deposit) -> dict:
+    """Record every USDT Transfer in `logs` that is a deposit; returns
+    {address: log} for the ones that are a watched conversion's bridge
+    delivery (the caller advances those sagas). Idempotent: a replayed log
+    dedupes on its receipt key and on the conversions' monotonic status."""
     arrived: dict[str, dict] = {}
     system_addrs = _system_addresses()
     for log in logs:
@@ -375,6 +456,14 @@ def monitor_bridge_arrivals():
             now=now,
             from_addr='0x' + log['topics'][1][-40:],
         )
+    return arrived
+
+
+def _settle_conversions(conv_watch, arrived, now, timeout) -> None:
+    """Advance watched to_savings sagas: DEST_ARRIVED for the ones whose
+    delivery is in `arrived`; STUCK for SRC_COMMITTED ones silent longer
+    than `timeout` (None skips the silence judgement)."""
+    from conversion.models import Conversion
 
     for addr, conv in conv_watch.items():
         log = arrived.get(addr)
@@ -393,37 +482,26 @@ def monitor_bridge_arrivals():
             )
             # TODO(cusd+): websocket event + push nudge if the app is closed.
         elif (
-            conv.status == 'SRC_COMMITTED'
+            timeout is not None
+            and conv.status == 'SRC_COMMITTED'
             and conv.src_committed_at
             and now - conv.src_committed_at > timeout
         ):
+            # Conditional: the log follower may have recorded the delivery
+            # since this row was read, and STUCK must not overwrite it.
+            if not Conversion.objects.filter(pk=conv.pk, status='SRC_COMMITTED').update(
+                    status='STUCK', updated_at=now):
+                continue
             conv.status = 'STUCK'
-            conv.save(update_fields=['status', 'updated_at'])
             logger.error(
                 'conversion %s STUCK: no USDT arrival on BNB after %s (src tx %s). '
                 'Support diagnostic: allbridge_diagnose("%s")',
                 conv.internal_id, timeout, conv.from_transaction_hash, conv.internal_id,
             )
 
-    # ── cUSD+ (vault share) inbound pass (Phase 2) ──────────────────────
-    # External cUSD+ receives (another wallet sends shares directly) get a
-    # ledger row + push. Internal sends are EXCLUDED here — the send
-    # confirm task records both sides — by skipping logs whose sender is
-    # also a registered address. Mints (from = 0x0) never match a
-    # registered `from`, and redeems burn (to = 0x0) so they never match a
-    # registered `to`. Failures here must never disturb the USDT pipeline.
-    try:
-        _scan_cusd_plus_arrivals(registered, from_block, latest_block, min_deposit)
-    except Exception:  # noqa: BLE001
-        logger.exception('cUSD+ inbound scan failed (USDT pipeline unaffected)')
-
 
 def _scan_cusd_plus_arrivals(registered: dict, from_block: int, latest_block: int,
                              min_deposit) -> None:
-    from decimal import ROUND_DOWN as _RD
-
-    from . import vault as cp_vault
-
     vault_addr = (getattr(settings, 'CUSD_PLUS_VAULT_ADDRESS', '') or '').lower()
     if not vault_addr or not registered:
         return
@@ -437,6 +515,16 @@ def _scan_cusd_plus_arrivals(registered: dict, from_block: int, latest_block: in
              [_address_topic(a) for a in addrs[i:i + 800]]],
             address=vault_addr,
         )
+    _process_cusd_plus_arrivals(logs, registered, min_deposit)
+
+
+def _process_cusd_plus_arrivals(logs, registered: dict, min_deposit) -> None:
+    """Record externally-originated cUSD+ share Transfers in `logs` that
+    land at a registered address. Idempotent per log (see reference)."""
+    from decimal import ROUND_DOWN as _RD
+
+    from . import vault as cp_vault
+
     if not logs:
         return
 
@@ -1141,42 +1229,20 @@ def _retry_countdown(retries: int) -> int:
     return 3 if retries < 5 else 15
 
 
-@shared_task(name='cusd_plus.check_sponsored_batch_receipt', bind=True, max_retries=40)
-def check_sponsored_batch_receipt(self, batch_id: int):
-    """Resolve a SponsoredBatch to a FINAL outcome (audit 2026-07-31 P1-3).
-
-    Three failure modes this guards, that "status==1 + has logs" did not:
-      1. the 7702 silent no-op — a stale authorization nonce leaves a
-         codeless EOA, the tx mines status 0x1 executing NOTHING. A real
-         execute() emits BatchExecuted(nonce); its ABSENCE (or a wrong
-         nonce, e.g. a different delegate mined) => noop_failed.
-      2. no finality — settling on the first receipt lets a reorg orphan a
-         'confirmed' money row. We wait CUSD_PLUS_FINALITY_DEPTH blocks and
-         re-check the block is canonical before AND the receipt still
-         resolves.
-      3. non-durable broadcast — a 'signed' row (broadcast may have failed)
-         is resolved the same way: if it never mined, reconciliation will
-         re-broadcast; here we just read the chain by the deterministic hash.
-    """
-    from blockchain.models import SponsoredBatch
+class ReceiptNotFinal(Exception):
+    """The receipt cannot settle its batch YET — ask the chain again later."""
 
-    try:
-        batch = SponsoredBatch.objects.get(id=batch_id)
-    except SponsoredBatch.DoesNotExist:
-        return
-    if batch.status not in ('sent', 'signed'):
-        return  # already resolved
 
-    try:
-        receipt = _rpc('eth_getTransactionReceipt', [batch.tx_hash])
-    except Exception as exc:  # noqa: BLE001
-        logger.warning('7702 receipt check failed for %s: %s', batch.tx_hash, exc)
-        receipt = None
-    if not receipt:
-        # Not mined yet (or broadcast never landed) — back off and retry,
-        # then leave for the reconciler. Never guess an outcome.
-        raise self.retry(countdown=_retry_countdown(self.request.retries))
+def settle_sponsored_batch(batch, receipt: dict, *, head: int | None = None,
+                           block_hashes: dict | None = None) -> None:
+    """Settle a 'sent'/'signed' SponsoredBatch from its mined receipt, or
+    raise ReceiptNotFinal when it has to be asked again.
 
+    The one verdict path behind check_sponsored_batch_receipt and the
+    receipt tracker (receipt_tracker.track_receipts). `head` and
+    `block_hashes` ({block_number: canonical hash}) let a caller that read
+    them once for many batches pass them in; anything missing is read here.
+    """
     if receipt.get('status') != '0x1':
         batch.status = 'reverted'
         settle_savings_mint(batch.tx_hash, 'reverted')
@@ -1205,7 +1271,7 @@ def check_sponsored_batch_receipt(self, batch_id: int):
             # exhausted retry budget leaves the row 'sent' for the
             # reconciler, which is recoverable. noop_failed is not.
             logger.warning('7702 batch %s: receipt shows no usable proof, retrying', batch.tx_hash)
-            raise self.retry(countdown=_retry_countdown(self.request.retries))
+            raise ReceiptNotFinal('no usable proof')
         if verdict != 'executed':
             batch.status = 'noop_failed'
             settle_savings_mint(batch.tx_hash, 'noop_failed')
@@ -1231,26 +1297,30 @@ def check_sponsored_batch_receipt(self, batch_id: int):
         blk_hash = (receipt.get('blockHash') or '').lower()
     except Exception as exc:  # noqa: BLE001
         logger.warning('7702 finality read failed for %s: %s', batch.tx_hash, exc)
-        raise self.retry(countdown=_retry_countdown(self.request.retries))
+        raise ReceiptNotFinal('unreadable block') from exc
 
     finalized = _finalized_block_number()
     if finalized is not None:
         if blk_num > finalized:
-            raise self.retry(countdown=_retry_countdown(self.request.retries))
+            raise ReceiptNotFinal('not finalized')
     else:
         # No finalized tag from this endpoint — the old depth heuristic, kept
         # so a partial or pre-BEP-126 node degrades to the previous behavior
         # instead of stranding settlement entirely.
-        try:
-            head = int(_rpc('eth_blockNumber', []), 16)
-        except Exception as exc:  # noqa: BLE001
-            logger.warning('7702 head read failed for %s: %s', batch.tx_hash, exc)
-            raise self.retry(countdown=_retry_countdown(self.request.retries))
+        if head is None:
+            try:
+                head = int(_rpc('eth_blockNumber', []), 16)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning('7702 head read failed for %s: %s', batch.tx_hash, exc)
+                raise ReceiptNotFinal('unreadable head') from exc
         if head - blk_num < _finality_depth():
-            raise self.retry(countdown=_retry_countdown(self.request.retries))
+            raise ReceiptNotFinal('not deep enough')
     # The block that held the receipt must still be canonical at this height.
-    canonical = _rpc('eth_getBlockByNumber', [hex(blk_num), False])
-    if not canonical or (canonical.get('hash') or '').lower() != blk_hash:
+    if block_hashes is not None and blk_num in block_hashes:
+        canonical_hash = block_hashes[blk_num]
+    else:
+        canonical_hash = (_rpc('eth_getBlockByNumber', [hex(blk_num), False]) or {}).get('hash')
+    if (canonical_hash or '').lower() != blk_hash:
         # The tx was reorged out of that block. Re-check by hash: if it has
         # no receipt now, it's orphaned; otherwise re-run to settle the new
         # block.
@@ -1266,7 +1336,7 @@ def check_sponsored_batch_receipt(self, batch_id: int):
             logger.warning('7702 batch %s reorged out (block %s no longer canonical)',
                            batch.tx_hash, blk_num)
             return
-        raise self.retry(countdown=_retry_countdown(self.request.retries))
+        raise ReceiptNotFinal('moved to another block')
 
     if batch.kind in ('stock_buy', 'stock_sell'):
         # A confirmed trade without its account-history row is not a complete
@@ -1278,21 +1348,76 @@ def check_sponsored_batch_receipt(self, batch_id: int):
                 batch, receipt, require_event=True, strict=True)
         except Exception as exc:  # noqa: BLE001
             logger.warning('stock history sync failed for %s: %s', batch.tx_hash, exc)
-            raise self.retry(countdown=_retry_countdown(self.request.retries))
+            raise ReceiptNotFinal('stock history not written') from exc
 
     batch.block_number = blk_num
     batch.block_hash = blk_hash
     batch.status = 'confirmed'
     batch.save(update_fields=['status', 'block_number', 'block_hash', 'updated_at'])
     settle_savings_mint(batch.tx_hash, 'confirmed')
+    # Every sponsored batch moves the sender's tokens: drop their cached
+    # BSC balances so the next read sees this block.
+    from blockchain.bsc_balance_service import BscBalanceService
+    BscBalanceService.invalidate(batch.user_bsc_address)
     if batch.kind in ('stock_buy', 'stock_sell'):
         from django.core.cache import cache
-        from . import vault
-        vault.invalidate_position(batch.user_bsc_address)
         cache.delete(f'gm_hold:{batch.user_bsc_address.lower()}')
     logger.info('7702 batch %s CONFIRMED final at block %s', batch.tx_hash, blk_num)
 
 
+
+
+@shared_task(name='cusd_plus.check_sponsored_batch_receipt', bind=True, max_retries=40)
+def check_sponsored_batch_receipt(self, batch_id: int):
+    """Resolve a SponsoredBatch to a FINAL outcome (audit 2026-07-31 P1-3).
+
+    Three failure modes this guards, that "status==1 + has logs" did not:
+      1. the 7702 silent no-op — a stale authorization nonce leaves a
+         codeless EOA, the tx mines status 0x1 executing NOTHING. A real
+         execute() emits BatchExecuted(nonce); its ABSENCE (or a wrong
+         nonce, e.g. a different delegate mined) => noop_failed.
+      2. no finality — settling on the first receipt lets a reorg orphan a
+         'confirmed' money row. We wait CUSD_PLUS_FINALITY_DEPTH blocks and
+         re-check the block is canonical before AND the receipt still
+         resolves.
+      3. non-durable broadcast — a 'signed' row (broadcast may have failed)
+         is resolved the same way: if it never mined, reconciliation will
+         re-broadcast; here we just read the chain by the deterministic hash.
+    """
+    from blockchain.models import SponsoredBatch
+
+    try:
+        batch = SponsoredBatch.objects.get(id=batch_id)
+    except SponsoredBatch.DoesNotExist:
+        return
+    if batch.status not in ('sent', 'signed'):
+        return  # already resolved
+
+    try:
+        receipt = _rpc('eth_getTransactionReceipt', [batch.tx_hash])
+    except Exception as exc:  # noqa: BLE001
+        logger.warning('7702 receipt check failed for %s: %s', batch.tx_hash, exc)
+        receipt = None
+    if not receipt:
+        # Not mined yet (or broadcast never landed) — back off and retry,
+        # then leave for the reconciler. Never guess an outcome.
+        raise self.retry(countdown=_retry_countdown(self.request.retries))
+
+    try:
+        settle_sponsored_batch(batch, receipt)
+    except ReceiptNotFinal:
+        raise self.retry(countdown=_retry_countdown(self.request.retries))
+
+
+def schedule_receipt_check(batch_id: int, countdown: int = 3) -> None:
+    """Enqueue check_sponsored_batch_receipt for a just-broadcast batch.
+    While the receipt tracker runs it sees the row on its next block, so the
+    check is only a late fallback (receipt_tracker.fallback_countdown)."""
+    from .receipt_tracker import fallback_countdown
+
+    check_sponsored_batch_receipt.apply_async(args=[batch_id], countdown=fallback_countdown(countdown))
+
+
 # Kinds that own a SEPARATE domain confirm task keyed (source_id, batch_id).
 # Everything else (subscribe/redeem/payroll_fund) settles via the batch-level
 # receipt task alone, so promoting the batch is enough.
@@ -0,0 +1,135 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from blockchain.models import BscLogCursor, GmHolder, GmHolding
+from cusd_plus import gm_ledger
+from cusd_plus.tasks import TRANSFER_TOPIC
+
+TSLA = '0x' + '11' * 20
+AAPL = '0x' + '22' * 20
+REGISTRY = {
+    'TSLAon': {'address': TSLA, 'decimals': 18},
+    'AAPLon': {'address': AAPL, 'decimals': 6},
+}
+ALICE = '0x' + 'aa' * 20
+BOB = '0x' + 'bb' * 20
+STRANGER = '0x' + 'cc' * 20
+
+
+def _topic(address):
+    return '0x' + address[2:].rjust(64, '0')
+
+
+def _transfer(token, sender, recipient, amount):
+    return {
+        'address': token,
+        'topics': [TRANSFER_TOPIC, _topic(sender), _topic(recipient)],
+        'data': hex(amount),
+    }
+
+
+class GmLedgerTests(TestCase):
+    def setUp(self):
+        cache.delete(gm_ledger.LOCK_KEY)
+        cache.delete(gm_ledger.AUDIT_LOCK_KEY)
+        patcher = mock.patch('cusd_plus.gm_holdings.registry', return_value=REGISTRY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _follow(self, head, participants, balances=None, logs=()):
+        with mock.patch.object(gm_ledger, 'participant_addresses', return_value=participants), \
+             mock.patch.object(gm_ledger, '_safe_head', return_value=head), \
+             mock.patch('cusd_plus.gm_holdings._raw_balances',
+                        side_effect=lambda address, *a, **kw: (balances or {}).get(address, {})) as scan, \
+             mock.patch('cusd_plus.tasks._get_logs_chunked', return_value=list(logs)) as get_logs:
+            return gm_ledger.follow(), scan, get_logs
+
+    def _balance(self, address, token):
+        return GmHolding.objects.get(address=address, token_address=token).raw_balance
+
+    def test_seeds_new_wallets_then_applies_transfers(self):
+        out, scan, _ = self._follow(100, [ALICE], {ALICE: {'TSLAon': 5 * 10 ** 18}})
+        self.assertEqual(out['seeded'], 1)
+        self.assertEqual(scan.call_args.kwargs['block_tag'], hex(100))
+        self.assertEqual(GmHolder.objects.get(address=ALICE).seeded_block, 100)
+
+        logs = [
+            _transfer(TSLA, ALICE, BOB, 2 * 10 ** 18),
+            _transfer(AAPL, STRANGER, BOB, 3 * 10 ** 6),
+            _transfer(AAPL, STRANGER, '0x' + 'dd' * 20, 10 ** 6),
+        ]
+        out, scan, get_logs = self._follow(
+            110, [ALICE, BOB], {BOB: {}}, logs=logs)
+
+        self.assertEqual(out, {'seeded': 1, 'blocks': 10, 'transfers': 3, 'as_of_block': 110})
+        self.assertEqual(get_logs.call_args.args[:2], (101, 110))
+        self.assertEqual(self._balance(ALICE, TSLA), Decimal(3 * 10 ** 18))
+        self.assertEqual(self._balance(BOB, TSLA), Decimal(2 * 10 ** 18))
+        self.assertEqual(self._balance(BOB, AAPL), Decimal(3 * 10 ** 6))
+        self.assertEqual(BscLogCursor.objects.get(name=gm_ledger.CURSOR_NAME).last_block, 110)
+
+        with mock.patch.object(gm_ledger, 'participant_addresses', return_value=[ALICE, BOB]):
+            totals = gm_ledger.totals()
+        self.assertEqual(totals['holders'], 2)
+        self.assertEqual(totals['holder_wallets'], 2)
+        self.assertEqual(totals['positions'], 3)
+        self.assertEqual(totals['assets']['TSLAon'], {'units': Decimal(5), 'holders': 2})
+        self.assertEqual(totals['assets']['AAPLon'], {'units': Decimal(3), 'holders': 1})
+        self.assertEqual(gm_ledger.positions(BOB), {'TSLAon': 2.0, 'AAPLon': 3.0})
+        self.assertIsNone(gm_ledger.positions(STRANGER))
+
+    def test_totals_refuse_a_ledger_still_seeding(self):
+        self._follow(100, [ALICE], {ALICE: {}})
+
+        with mock.patch.object(gm_ledger, 'participant_addresses', return_value=[ALICE, BOB]):
+            with self.assertRaisesRegex(RuntimeError, 'seeding 1'):
+                gm_ledger.totals()
+
+    def test_audit_repairs_drift_from_a_balance_scan(self):
+        self._follow(100, [ALICE], {ALICE: {'TSLAon': 5}})
+        GmHolding.objects.filter(address=ALICE).update(raw_balance=Decimal(7))
+
+        with mock.patch('cusd_plus.gm_holdings._raw_balances',
+                        return_value={'TSLAon': 5, 'AAPLon': 9}) as scan:
+            out = gm_ledger.audit()
+
+        self.assertEqual(out, {'holders': 1, 'repaired': 1, 'skipped': 0, 'failed': 0})
+        self.assertEqual(scan.call_args.kwargs['block_tag'], hex(100))
+        self.assertEqual(self._balance(ALICE, TSLA), Decimal(5))
+        self.assertEqual(self._balance(ALICE, AAPL), Decimal(9))
+        self.assertIsNotNone(GmHolder.objects.get(address=ALICE).audited_at)
+
+    def test_audit_never_stores_a_scan_the_cursor_has_moved_past(self):
+        self._follow(100, [ALICE], {ALICE: {'TSLAon': 5}})
+        seen = []
+
+        def scan(address, registry, block_tag, require_complete):
+            seen.append(block_tag)
+            # follow() runs beside the audit and moves the cursor on.
+            self.assertIsNotNone(cache.get(gm_ledger.AUDIT_LOCK_KEY))
+            self._follow(100 + 10 * len(seen), [ALICE], logs=[_transfer(TSLA, STRANGER, ALICE, 1)])
+            return {'TSLAon': 0}
+
+        with mock.patch('cusd_plus.gm_holdings._raw_balances', side_effect=scan):
+            out = gm_ledger.audit()
+
+        self.assertEqual(out, {'holders': 1, 'repaired': 0, 'skipped': 1, 'failed': 0})
+        self.assertEqual(seen, [hex(100), hex(110), hex(120)])
+        self.assertEqual(self._balance(ALICE, TSLA), Decimal(8))
+        self.assertIsNone(GmHolder.objects.get(address=ALICE).audited_at)
+        self.assertIsNone(cache.get(gm_ledger.AUDIT_LOCK_KEY))
+
+    def test_audit_leaves_a_lock_another_run_took_over(self):
+        self._follow(100, [ALICE], {ALICE: {'TSLAon': 5}})
+
+        def scan(*args, **kwargs):
+            cache.set(gm_ledger.AUDIT_LOCK_KEY, 'other-run')
+            return {'TSLAon': 5}
+
+        with mock.patch('cusd_plus.gm_holdings._raw_balances', side_effect=scan):
+            gm_ledger.audit()
+
+        self.assertEqual(cache.get(gm_ledger.AUDIT_LOCK_KEY), 'other-run')
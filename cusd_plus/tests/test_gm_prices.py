@@ -0,0 +1,101 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from blockchain.models import GmPriceChunk, GmPriceSeries
+from cusd_plus import gm_prices
+
+DAY = 86400
+# Midnight UTC, a multiple of every chunk width but the daily one.
+T0 = 20000 * DAY
+
+
+def _market(price):
+    return [{'primaryMarket': {'symbol': 'TSLAon', 'price': str(price)}}]
+
+
+class GmPriceStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('cusd_plus.gm_prices._market_open', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _ingest(self, price, ts):
+        with mock.patch('cusd_plus.gm_api.refresh_all_market', return_value=_market(price)):
+            gm_prices.ingest(now=ts)
+
+    def test_samples_fold_into_every_resolution(self):
+        self._ingest(10, T0 + 5)
+        self._ingest(12, T0 + 30)
+        self._ingest(9, T0 + 70)
+        self._ingest(11, T0 + 400)
+
+        minutes = gm_prices.candles('TSLAon', '1m')
+        self.assertEqual([c['timestamp'] for c in minutes], [T0 * 1000, (T0 + 60) * 1000, (T0 + 360) * 1000])
+        self.assertEqual((minutes[0]['open'], minutes[0]['high'], minutes[0]['close']), (10, 12, 12))
+        five = gm_prices.candles('TSLAon', '5m')
+        self.assertEqual([(c['open'], c['high'], c['low'], c['close']) for c in five],
+                         [(10, 12, 9, 9), (11, 11, 11, 11)])
+        hour = gm_prices.candles('TSLAon', '1h')
+        self.assertEqual([(c['open'], c['high'], c['low'], c['close']) for c in hour], [(10, 12, 9, 11)])
+        self.assertEqual(GmPriceChunk.objects.filter(resolution='1m').count(), 1)
+
+    def test_seed_fills_gaps_without_overwriting_ingested_candles(self):
+        self._ingest(10, T0)
+        upstream = [
+            {'timestamp': (T0 - DAY) * 1000, 'open': 7, 'high': 8, 'low': 6, 'close': 8},
+            {'timestamp': T0 * 1000, 'open': 1, 'high': 1, 'low': 1, 'close': 1},
+        ]
+        with mock.patch('cusd_plus.gm_api.ohlc', return_value=upstream):
+            gm_prices.seed_pending()
+
+        daily = gm_prices.candles('TSLAon', '1d')
+        self.assertEqual([(c['timestamp'], c['close']) for c in daily],
+                         [((T0 - DAY) * 1000, 8), (T0 * 1000, 10)])
+        self.assertIsNotNone(GmPriceSeries.objects.get(symbol='TSLAon').seeded_at)
+        # Upstream has no 5-minute candles; the 5m series is ingest-only.
+        self.assertEqual([c['timestamp'] for c in gm_prices.candles('TSLAon', '5m')], [T0 * 1000])
+
+    def test_seed_does_not_write_while_ingest_holds_the_lock(self):
+        self._ingest(10, T0)
+        cache.add(gm_prices.LOCK_KEY, 1)
+        upstream = [{'timestamp': (T0 - DAY) * 1000, 'open': 7, 'high': 8, 'low': 6, 'close': 8}]
+        with mock.patch('cusd_plus.gm_api.ohlc', return_value=upstream), \
+                mock.patch.object(gm_prices, 'LOCK_WAIT', 0):
+            self.assertEqual(gm_prices.seed_pending(), {'seeded': 0, 'failed': 1})
+
+        self.assertEqual(len(gm_prices.candles('TSLAon', '1d')), 1)
+        self.assertIsNone(GmPriceSeries.objects.get(symbol='TSLAon').seeded_at)
+
+    def test_unseeded_symbol_is_served_upstream_then_locally(self):
+        now = int(time.time())
+        self._ingest(10, now)
+        with mock.patch('cusd_plus.gm_api.ohlc', return_value=['upstream']) as upstream:
+            self.assertEqual(gm_prices.ohlc('TSLAon', '1M'), ['upstream'])
+        upstream.assert_called_once_with('TSLAon', '1M')
+
+        GmPriceSeries.objects.update(seeded_at=timezone.now())
+        with mock.patch('cusd_plus.gm_api.ohlc') as upstream:
+            local = gm_prices.ohlc('TSLAon', '1M')
+        upstream.assert_not_called()
+        self.assertEqual([c['close'] for c in local], [10])
+
+    def test_day_chart_is_served_upstream_until_ingestion_spans_it(self):
+        now = int(time.time())
+        self._ingest(10, now - DAY // 2)
+        self._ingest(11, now)
+        GmPriceSeries.objects.update(seeded_at=timezone.now())
+        with mock.patch('cusd_plus.gm_api.ohlc', return_value=['upstream']) as upstream:
+            self.assertEqual(gm_prices.ohlc('TSLAon', '1D'), ['upstream'])
+        upstream.assert_called_once_with('TSLAon', '1D')
+
+        cache.clear()
+        self._ingest(9, now - DAY - 600)
+        with mock.patch('cusd_plus.gm_api.ohlc') as upstream:
+            local = gm_prices.ohlc('TSLAon', '1D')
+        upstream.assert_not_called()
+        self.assertEqual([c['close'] for c in local], [10, 11])
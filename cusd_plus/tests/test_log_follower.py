@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from blockchain.models import BscLogCursor
+from cusd_plus import log_follower, tasks
+
+USER = '0x' + 'aa' * 20
+STRANGER = '0x' + 'bb' * 20
+
+
+def _transfer(block, to, tx='0x' + '01' * 32, removed=False):
+    return {
+        'address': tasks.USDT_BSC.lower(),
+        'blockNumber': hex(block),
+        'transactionHash': tx,
+        'logIndex': '0x0',
+        'topics': [tasks.TRANSFER_TOPIC, tasks._address_topic('0x' + 'cc' * 20),
+                   tasks._address_topic(to)],
+        'data': hex(5 * 10 ** 18),
+        'removed': removed,
+    }
+
+
+class FakeChain:
+    """eth_getBlockByNumber / eth_getLogs over a dict of block hashes."""
+
+    def __init__(self, hashes, logs=()):
+        self.hashes = dict(hashes)
+        self.logs = list(logs)
+        self.calls = []
+
+    def __call__(self, method, params, timeout=15):
+        self.calls.append((method, params))
+        if method == 'eth_getBlockByNumber':
+            return {'hash': self.hashes.get(int(params[0], 16))}
+        if method == 'eth_getLogs':
+            lo, hi = int(params[0]['fromBlock'], 16), int(params[0]['toBlock'], 16)
+            return [log for log in self.logs if lo <= int(log['blockNumber'], 16) <= hi]
+        raise AssertionError(method)
+
+
+class LogFollowerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.handled = []
+        self.filter = log_follower.LogFilter(
+            'test', [tasks.USDT_BSC], watched=lambda: {USER}, handle=self.handled.extend)
+        self.follower = log_follower.LogFollower(self.filter, poll_interval=0)
+
+    def test_tip_is_one_unfiltered_get_logs_matched_in_memory(self):
+        BscLogCursor.objects.create(name='test', last_block=100, recent_hashes={'100': 'h100'})
+        chain = FakeChain({100: 'h100', 101: 'h101', 102: 'h102'},
+                          [_transfer(101, USER), _transfer(102, STRANGER),
+                           _transfer(102, USER, tx='0x' + '02' * 32, removed=True)])
+        with mock.patch.object(tasks, '_rpc', chain):
+            self.assertEqual(self.follower.step(102), 1)
+
+        get_logs = [p for m, p in chain.calls if m == 'eth_getLogs']
+        self.assertEqual(len(get_logs), 1)
+        self.assertEqual(get_logs[0][0]['topics'], [tasks.TRANSFER_TOPIC])
+        self.assertEqual([log['blockNumber'] for log in self.handled], [hex(101)])
+        cursor = BscLogCursor.objects.get(name='test')
+        self.assertEqual(cursor.last_block, 102)
+        self.assertEqual(cursor.recent_hashes['102'], 'h102')
+
+        # Nothing new: no block is fetched twice.
+        chain.calls.clear()
+        with mock.patch.object(tasks, '_rpc', chain):
+            self.assertEqual(self.follower.step(102), 0)
+        self.assertNotIn('eth_getLogs', [m for m, _ in chain.calls])
+
+    def test_reorg_rewinds_to_the_newest_block_still_canonical(self):
+        BscLogCursor.objects.create(name='test', last_block=105,
+                                    recent_hashes={'103': 'h103', '105': 'h105-old'})
+        chain = FakeChain({103: 'h103', 104: 'h104', 105: 'h105', 106: 'h106'},
+                          [_transfer(104, USER)])
+        with mock.patch.object(tasks, '_rpc', chain):
+            self.follower.step(106)
+
+        # 104 was replayed from the new fork, from the newest matching tip.
+        self.assertEqual([log['blockNumber'] for log in self.handled], [hex(104)])
+        cursor = BscLogCursor.objects.get(name='test')
+        self.assertEqual(cursor.last_block, 106)
+        self.assertNotIn('105', cursor.recent_hashes)
+
+    def test_a_wide_catch_up_uses_the_recipient_topic_scan(self):
+        BscLogCursor.objects.create(name='test', last_block=1000)
+        with mock.patch.object(tasks, '_rpc', FakeChain({1500: 'h'})), \
+                mock.patch.object(tasks, '_get_logs_chunked',
+                                  return_value=[_transfer(1200, USER)]) as scan:
+            self.follower.step(1500)
+        topics = scan.call_args.args[2]
+        self.assertEqual(topics[2], [tasks._address_topic(USER)])
+        self.assertEqual(len(self.handled), 1)
+
+    def test_beat_scan_stands_down_while_the_follower_heartbeats(self):
+        cache.set(log_follower.HEARTBEAT_KEY, 1, 60)
+        with mock.patch.object(tasks, '_bridge_watch', return_value=({}, {USER: 1}, set())), \
+                mock.patch.object(tasks, '_rpc') as rpc, \
+                mock.patch.object(tasks, '_settle_conversions') as settle:
+            tasks.monitor_bridge_arrivals()
+        rpc.assert_not_called()
+        settle.assert_called_once()
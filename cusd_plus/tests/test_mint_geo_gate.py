@@ -352,7 +352,7 @@ class UsdtBalanceCacheTests(SimpleTestCase):
         with mock.patch.object(vault, 'erc20_balance_raw',
                                return_value=5 * 10 ** 18):
             vault.usdt_balance_usd(self.ADDR)
-        cache.delete(f'cusd_plus_usdt:{self.ADDR.lower()}')
+        vault.invalidate_position(self.ADDR)
         with mock.patch.object(vault, 'erc20_balance_raw',
                                side_effect=RuntimeError('node down')):
             self.assertEqual(vault.usdt_balance_usd(self.ADDR), 5.0)
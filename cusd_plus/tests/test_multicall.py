@@ -0,0 +1,135 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from eth_abi import decode, encode
+
+from cusd_plus import multicall, vault
+
+TOKEN = '0x' + '11' * 20
+OTHER = '0x' + '22' * 20
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, 'big')
+
+
+def _aggregate_result(results) -> str:
+    return '0x' + encode(['(bool,bytes)[]'], [results]).hex()
+
+
+class ReadManyTests(SimpleTestCase):
+    def test_one_eth_call_answers_every_read_with_per_call_isolation(self):
+        rpc = mock.Mock(return_value=_aggregate_result([(True, _word(7)), (False, b'')]))
+        got = multicall.read_many([(TOKEN, '0x70a08231'), (OTHER, b'\x18\x16\x0d\xdd')], rpc=rpc)
+
+        rpc.assert_called_once()
+        method, (tx, block_tag) = rpc.call_args.args
+        self.assertEqual((method, tx['to'], block_tag), ('eth_call', multicall.MULTICALL3, 'latest'))
+        require_success, calls = decode(
+            ['bool', '(address,bytes)[]'], bytes.fromhex(tx['data'][10:]))
+        self.assertFalse(require_success, 'one reverting call must not hide the rest')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([multicall.as_uint(r) for r in got], [7, None])
+
+    def test_large_reads_are_chunked(self):
+        calls = [(TOKEN, '0x70a08231')] * (multicall.CHUNK + 1)
+        rpc = mock.Mock(side_effect=lambda *_: _aggregate_result(
+            [(True, _word(1))] * len(decode(
+                ['bool', '(address,bytes)[]'], bytes.fromhex(_[1][0]['data'][10:]))[1])))
+        self.assertEqual(len(multicall.read_many(calls, rpc=rpc)), multicall.CHUNK + 1)
+        self.assertEqual(rpc.call_count, 2)
+
+    def test_a_failed_aggregate_falls_back_to_a_json_rpc_batch(self):
+        """No Multicall3 answer (empty return) is a round-trip failure, not
+        N zero balances."""
+        rpc = mock.Mock(return_value='0x')
+        response = mock.Mock()
+        response.json.return_value = [
+            {'jsonrpc': '2.0', 'id': 1, 'error': {'message': 'execution reverted'}},
+            {'jsonrpc': '2.0', 'id': 0, 'result': '0x' + _word(5).hex()},
+        ]
+        session = mock.Mock()
+        session.post.return_value = response
+        with mock.patch('cusd_plus.tasks._rpc_session', return_value=session):
+            got = multicall.read_many(
+                [(TOKEN, '0x70a08231'), (OTHER, '0x70a08231')], rpc=rpc, urls=['https://node'])
+
+        payload = session.post.call_args.kwargs['json']
+        self.assertEqual([p['method'] for p in payload], ['eth_call', 'eth_call'])
+        session.post.assert_called_once()
+        self.assertEqual([multicall.as_uint(r) for r in got], [5, None])
+
+    def test_raises_when_neither_path_answers(self):
+        session = mock.Mock()
+        session.post.side_effect = RuntimeError('node down')
+        with mock.patch('cusd_plus.tasks._rpc_session', return_value=session), \
+                self.assertRaises(RuntimeError):
+            multicall.read_many([(TOKEN, '0x70a08231')],
+                                rpc=mock.Mock(side_effect=RuntimeError('node down')),
+                                urls=['https://node'])
+
+
+class VaultBatchedReadTests(SimpleTestCase):
+    def test_redeem_state_is_one_round_trip_and_fails_closed(self):
+        with self.settings(CUSD_PLUS_VAULT_ADDRESS=TOKEN), \
+                mock.patch('cusd_plus.multicall.read_many', return_value=[_word(0), _word(1)]) as rpc:
+            self.assertEqual(vault.redeem_blocked_reason(), 'vault_paused')
+        rpc.assert_called_once()
+        with self.settings(CUSD_PLUS_VAULT_ADDRESS=TOKEN), \
+                mock.patch('cusd_plus.multicall.read_many', return_value=[_word(0), None]):
+            self.assertEqual(vault.redeem_blocked_reason(), 'redeem_state_unreadable')
+
+    def test_withdrawable_reads_balance_shares_and_prices_together(self):
+        wad = 10 ** 18
+        with self.settings(CUSD_PLUS_VAULT_ADDRESS=TOKEN), \
+                mock.patch('cusd_plus.multicall.read_many', return_value=[
+                    _word(2 * wad), _word(10 * wad), _word(wad), _word(wad)]) as rpc:
+            self.assertEqual(vault.withdrawable_usdt_wei(OTHER), 12 * wad)
+        rpc.assert_called_once()
+        with self.settings(CUSD_PLUS_VAULT_ADDRESS=TOKEN), \
+                mock.patch('cusd_plus.multicall.read_many', return_value=[
+                    _word(2 * wad), None, _word(wad), _word(wad)]), \
+                self.assertRaises(RuntimeError):
+            vault.withdrawable_usdt_wei(OTHER)
+
+
+class VaultBulkBalanceTests(SimpleTestCase):
+    A = '0x' + 'aa' * 20
+    B = '0x' + 'bb' * 20
+    C = '0x' + 'cc' * 20
+
+    def setUp(self):
+        cache.clear()
+
+    def test_misses_share_one_round_trip_and_hits_are_served_from_cache(self):
+        wad = 10 ** 18
+        cache.set('cusd_plus_pplus', 2 * wad, 30)
+        with self.settings(CUSD_PLUS_VAULT_ADDRESS=TOKEN), \
+                mock.patch('cusd_plus.multicall.read_many', return_value=[_word(2 * wad), _word(9)]):
+            vault.savings_balances([self.A])
+        with self.settings(CUSD_PLUS_VAULT_ADDRESS=TOKEN), \
+                mock.patch('cusd_plus.multicall.read_many', return_value=[
+                    _word(3 * wad), _word(0),           # shares B, C
+                    _word(5), None,                     # USDT B, C
+                ]) as rpc:
+            got = vault.savings_balances([self.A, self.B.upper().replace('0X', '0x'), self.C])
+
+        rpc.assert_called_once()
+        calls = rpc.call_args.args[0]
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(got['position_usd'], {self.A: 4.0, self.B: 6.0, self.C: 0.0})
+        self.assertEqual(got['usdt_raw'], {self.A: 9, self.B: 5, self.C: 0})
+
+        with self.settings(CUSD_PLUS_VAULT_ADDRESS=TOKEN), \
+                mock.patch('cusd_plus.multicall.read_many') as rpc:
+            self.assertEqual(vault.positions_usd([self.B])[self.B], 6.0)
+            self.assertEqual(vault.position_usd(self.B), 6.0)
+        rpc.assert_not_called()
+
+    def test_failed_round_trip_falls_back_to_last_known(self):
+        with mock.patch('cusd_plus.multicall.read_many', return_value=[_word(7)]):
+            vault.usdt_balances_raw([self.A])
+        vault.invalidate_position(self.A)
+        with mock.patch('cusd_plus.multicall.read_many', side_effect=RuntimeError('node down')):
+            self.assertEqual(vault.usdt_balances_raw([self.A, self.B]), {self.A: 7, self.B: 0})
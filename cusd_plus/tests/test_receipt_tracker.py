@@ -0,0 +1,72 @@
+from unittest import mock
+
+from celery import current_app
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from blockchain.models import SponsoredBatch
+from cusd_plus import receipt_tracker, tasks
+
+
+def _batch(user, n, kind='payroll_payout'):
+    return SponsoredBatch.objects.create(
+        user=user, user_bsc_address='0x' + 'aa' * 20, kind=kind, source_id=100 + n,
+        num_calls=1, calls_json='[]', tx_hash='0x' + f'{n:02x}' * 32,
+        gas_limit=100000, max_fee_wei='1', status='sent')
+
+
+def _receipt(block):
+    return {'status': '0x1', 'blockNumber': hex(block), 'blockHash': f'0xh{block}',
+            'logs': [{'topics': []}]}
+
+
+class ReceiptTrackerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create(username='tracker', firebase_uid='tracker-uid')
+
+    def test_one_batched_pass_settles_final_batches_and_dispatches_their_confirms(self):
+        unmined, final, fresh = (_batch(self.user, n) for n in (1, 2, 3))
+        answers = [[None, _receipt(90), _receipt(105)], [{'hash': '0xh90'}]]
+        with mock.patch('cusd_plus.multicall.batch_rpc', side_effect=answers) as batch_rpc, \
+                mock.patch.object(tasks, '_finalized_block_number', return_value=100), \
+                mock.patch.object(tasks, '_rpc') as rpc, \
+                mock.patch.object(current_app, 'send_task') as send_task:
+            out = receipt_tracker.track_receipts(head=106)
+
+        self.assertEqual(out, {'pending': 3, 'mined': 2, 'settled': 1})
+        rpc.assert_not_called()
+        receipts_call, blocks_call = batch_rpc.call_args_list
+        self.assertEqual([m for m, _ in receipts_call.args[0]], ['eth_getTransactionReceipt'] * 3)
+        # Only the finalized block is hash-checked.
+        self.assertEqual(blocks_call.args[0], [('eth_getBlockByNumber', [hex(90), False])])
+        send_task.assert_called_once_with('payroll.confirm_bsc_payroll_payout',
+                                          args=[final.source_id, final.id])
+        for batch, status in ((unmined, 'sent'), (final, 'confirmed'), (fresh, 'sent')):
+            batch.refresh_from_db()
+            self.assertEqual(batch.status, status)
+        self.assertTrue(receipt_tracker.tracker_alive())
+
+    def test_a_non_canonical_block_still_goes_through_the_reorg_recheck(self):
+        batch = _batch(self.user, 4, kind='payroll_fund')
+        with mock.patch('cusd_plus.multicall.batch_rpc',
+                        side_effect=[[_receipt(90)], [{'hash': '0xother'}]]), \
+                mock.patch.object(tasks, '_finalized_block_number', return_value=100), \
+                mock.patch.object(tasks, '_rpc', return_value=None), \
+                mock.patch.object(current_app, 'send_task') as send_task:
+            receipt_tracker.track_receipts(head=106)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'reorged')
+        send_task.assert_not_called()  # payroll_fund settles on the batch alone
+
+    def test_submit_paths_defer_the_per_batch_task_while_the_tracker_runs(self):
+        with mock.patch.object(tasks, 'check_sponsored_batch_receipt') as task:
+            tasks.schedule_receipt_check(7)
+            cache.set(receipt_tracker.HEARTBEAT_KEY, 1, 30)
+            tasks.schedule_receipt_check(8)
+        self.assertEqual(task.apply_async.call_args_list, [
+            mock.call(args=[7], countdown=3),
+            mock.call(args=[8], countdown=receipt_tracker.FALLBACK_COUNTDOWN),
+        ])
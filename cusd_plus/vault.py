@@ -13,6 +13,8 @@ import requests
 from django.conf import settings
 from django.core.cache import cache
 
+from blockchain.bsc_balance_service import BscBalanceService
+
 logger = logging.getLogger(__name__)
 
 # Selectors computed from signatures once (no hand-copy errors).
@@ -44,13 +46,17 @@ def oracle_address() -> str | None:
     return getattr(settings, 'CUSD_PLUS_ORACLE_ADDRESS', None)
 
 
+def _rpc_url() -> str:
+    return getattr(settings, 'BSC_RPC_URL', 'https://bsc-dataseed.bnbchain.org')
+
+
 def _rpc(method: str, params: list, timeout: int = 12):
     # Same pooled, keep-alive session as tasks._rpc (see the CONNECTION REUSE
     # note there). Deliberately keeps this module's OWN single-URL setting
     # rather than borrowing the rotation pool — only the transport is shared.
     from .tasks import _rpc_session
 
-    url = getattr(settings, 'BSC_RPC_URL', 'https://bsc-dataseed.bnbchain.org')
+    url = _rpc_url()
     resp = _rpc_session(url).post(
         url, json={'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params},
         timeout=timeout,
@@ -67,6 +73,18 @@ def _call(to: str, data: str) -> int:
     return int(res, 16) if res and res != '0x' else 0
 
 
+def _call_many(calls) -> list:
+    """Several `_call`s in one round trip (cusd_plus.multicall), on this
+    module's own endpoint. Uncached and RAISING, including when any single
+    call failed: every caller here needs all of its values or none."""
+    from .multicall import as_uint, read_many
+
+    values = [as_uint(ret) for ret in read_many(calls, rpc=_rpc, urls=[_rpc_url()])]
+    if None in values:
+        raise RuntimeError('cUSD+ vault read failed')
+    return values
+
+
 def p_plus_wad(fresh: bool = False) -> int:
     """Share price in USD, 1e18. Cached briefly — moves only on accrual.
 
@@ -80,6 +98,7 @@ def p_plus_wad(fresh: bool = False) -> int:
     if cached is None:
         cached = _call(addr, SEL_PPLUS) or 10 ** 18
         cache.set('cusd_plus_pplus', cached, 30)
+        cache.set('cusd_plus_pplus_last', cached, PPLUS_LAST_TTL)
     return cached
 
 
@@ -160,9 +179,13 @@ def redeem_blocked_reason() -> str | None:
     if not addr:
         return None
     try:
-        if _call(addr, _sel('oracleGuardTripped()')):
+        tripped, paused = _call_many([
+            (addr, _sel('oracleGuardTripped()')),
+            (addr, _sel('paused()')),
+        ])
+        if tripped:
             return 'oracle_guard_tripped'
-        if _call(addr, _sel('paused()')):
+        if paused:
             return 'vault_paused'
     except Exception:  # noqa: BLE001
         # FAIL CLOSED. This is only consulted when a redeem is actually
@@ -314,14 +337,24 @@ def withdrawable_usdt_wei(user_bsc_address: str) -> int:
     if not user_bsc_address:
         return 0
     addr = vault_address()
-    raw = usdt_balance_raw(user_bsc_address, fresh=True)
     if not addr:
-        return raw
-    shares = erc20_balance_raw(addr, user_bsc_address.lower())
+        return usdt_balance_raw(user_bsc_address, fresh=True)
+    # All four values in one round trip (and, via Multicall3, at one block —
+    # the prices the shares are valued at are the ones that priced them).
+    holder = user_bsc_address.lower().replace('0x', '').rjust(64, '0')
+    raw, shares, pps, oracle_p = _call_many([
+        (usdt_address(), SEL_BALANCE_OF + holder),
+        (addr, SEL_BALANCE_OF + holder),
+        (addr, SEL_PPLUS),
+        (addr, _sel('lastOraclePrice()')),
+    ])
     if shares <= 0:
         return raw
-    return raw + redeem_usdt_out(
-        shares, p_plus_wad(fresh=True), last_oracle_price_wad(fresh=True))
+    pps, oracle_p = pps or 10 ** 18, oracle_p or 10 ** 18
+    # Same cache refresh the fresh=True readers do.
+    cache.set('cusd_plus_pplus', pps, 30)
+    cache.set('cusd_plus_oracle_p', oracle_p, 30)
+    return raw + redeem_usdt_out(shares, pps, oracle_p)
 
 
 def confio_yield_share_bps() -> int:
@@ -436,46 +469,43 @@ def erc20_balance_raw(token_address: str, holder: str) -> int:
     )
 
 
-# Fresh-read window per address; within it, summary queries cost zero RPCs.
-POSITION_TTL = 30
-# How long a last-known value may stand in when the node is unreachable.
-POSITION_LAST_TTL = 7 * 24 * 3600
+# Per-address wallet balances (vault shares, USDT) live in the shared BSC
+# balance cache: fresh for BscBalanceService.FRESH_TTL, last-known behind it.
+# How long the last good share price may stand in for a failed read.
+PPLUS_LAST_TTL = 7 * 24 * 3600
 
 
 def invalidate_position(user_bsc_address: str) -> None:
     """Drop the fresh-read caches so the next summary re-reads the chain
     (called when a conversion leg lands and the balances just changed —
     a mint moves BOTH the vault position and the wallet USDT)."""
-    if user_bsc_address:
-        key = user_bsc_address.lower()
-        cache.delete(f'cusd_plus_pos:{key}')
-        cache.delete(f'cusd_plus_usdt:{key}')
+    BscBalanceService.invalidate(user_bsc_address)
+
+
+def _p_plus_or_last() -> int | None:
+    """p_plus_wad for display: the last good price when the node is down."""
+    try:
+        return p_plus_wad()
+    except Exception:  # noqa: BLE001 — read failure must not break the screen
+        logger.warning('cUSD+ share price read failed', exc_info=True)
+        return cache.get('cusd_plus_pplus_last')
 
 
 def position_usd(user_bsc_address: str) -> float:
     """USD value of an address's cUSD+ position = shares × pPlus.
     Returns 0.0 if the vault isn't wired or the address holds nothing.
 
-    Cached POSITION_TTL per address. On RPC failure falls back to the last
-    successfully read value — a flaky node must degrade to a slightly stale
-    savings balance, never to a false $0."""
+    Shares come from the BSC balance cache and pPlus from its own 30s cache,
+    each with a last-known fallback — a flaky node must degrade to a
+    slightly stale savings balance, never to a false $0."""
     addr = vault_address()
     if not addr or not user_bsc_address:
         return 0.0
-    key = user_bsc_address.lower()
-    cached = cache.get(f'cusd_plus_pos:{key}')
-    if cached is not None:
-        return cached
-    try:
-        shares = erc20_balance_raw(addr, key)
-        value = 0.0 if shares == 0 else (shares * p_plus_wad()) / (10 ** 36)
-    except Exception:  # noqa: BLE001 — read failure must not break the screen
-        logger.warning('cUSD+ position read failed for %s', user_bsc_address, exc_info=True)
-        last = cache.get(f'cusd_plus_pos_last:{key}')
-        return last if last is not None else 0.0
-    cache.set(f'cusd_plus_pos:{key}', value, POSITION_TTL)
-    cache.set(f'cusd_plus_pos_last:{key}', value, POSITION_LAST_TTL)
-    return value
+    shares = BscBalanceService.get_raw(addr, user_bsc_address)
+    if not shares:
+        return 0.0
+    pps = _p_plus_or_last()
+    return 0.0 if pps is None else (shares * pps) / (10 ** 36)
 
 
 # Reserve stat cadence: this is a platform-wide marketing number, not a
@@ -536,28 +566,14 @@ def usdt_address() -> str:
 
 def usdt_balance_raw(user_bsc_address: str, fresh: bool = False) -> int:
     """Wei of raw wallet USDT (pre-mint, or held as "Confío Dollar" by
-    geo-ineligible users). Cached POSITION_TTL like position_usd, with a
-    last-known fallback — a flaky node degrades to slightly stale, never to
-    a false 0 (which would make just-landed money vanish from the screen).
+    geo-ineligible users), through the BSC balance cache with its last-known
+    fallback — a flaky node degrades to slightly stale, never to a false 0
+    (which would make just-landed money vanish from the screen).
     fresh=True bypasses the cache for exactness-sensitive callers (off-ramp
     sufficiency); it raises on RPC failure instead of falling back."""
     if not user_bsc_address:
         return 0
-    key = user_bsc_address.lower()
-    if fresh:
-        return erc20_balance_raw(usdt_address(), key)
-    cached = cache.get(f'cusd_plus_usdt:{key}')
-    if cached is not None:
-        return cached
-    try:
-        raw = erc20_balance_raw(usdt_address(), key)
-    except Exception:  # noqa: BLE001 — read failure must not break the screen
-        logger.warning('USDT balance read failed for %s', user_bsc_address, exc_info=True)
-        last = cache.get(f'cusd_plus_usdt_last:{key}')
-        return last if last is not None else 0
-    cache.set(f'cusd_plus_usdt:{key}', raw, POSITION_TTL)
-    cache.set(f'cusd_plus_usdt_last:{key}', raw, POSITION_LAST_TTL)
-    return raw
+    return BscBalanceService.get_raw(usdt_address(), user_bsc_address, verify_critical=fresh) or 0
 
 
 def usdt_balance_usd(user_bsc_address: str) -> float:
@@ -565,6 +581,70 @@ def usdt_balance_usd(user_bsc_address: str) -> float:
     return usdt_balance_raw(user_bsc_address) / (10 ** 18)
 
 
+# ── Many addresses at once ─────────────────────────────────────────────
+#
+# position_usd / usdt_balance_raw read one address per RPC. Screens and jobs
+# that show many savings positions (a business and its employees, admin
+# listings, metrics) go through savings_balances instead: the BSC balance
+# cache serves the hits from one get_many and refreshes every miss, shares
+# and USDT together, in one Multicall3 round trip — the same entries the
+# single-address reads use.
+
+def _balance_of_data(holder: str) -> str:
+    return SEL_BALANCE_OF + holder.lower().replace('0x', '').rjust(64, '0')
+
+
+def erc20_balances_raw(token_address: str, holders) -> dict:
+    """Uncached balanceOf for many holders in one round trip:
+    {holder (lowercase): raw}, None for a holder whose read failed. Raises
+    when the round trip itself fails, like erc20_balance_raw."""
+    from .multicall import as_uint, read_many
+
+    keys = list(dict.fromkeys(h.lower() for h in holders if h))
+    results = read_many(
+        [(token_address, _balance_of_data(key)) for key in keys],
+        rpc=_rpc, urls=[_rpc_url()],
+    )
+    return {key: as_uint(ret) for key, ret in zip(keys, results)}
+
+
+def savings_balances(addresses, kinds=('position_usd', 'usdt_raw')) -> dict:
+    """{kind: {address (lowercase): value}} for every address — the bulk
+    position_usd ('position_usd') and usdt_balance_raw ('usdt_raw')."""
+    keys = list(dict.fromkeys(a.lower() for a in addresses if a))
+    vault = (vault_address() or '').lower()
+    tokens = {}
+    if 'position_usd' in kinds and vault:
+        tokens['position_usd'] = vault
+    if 'usdt_raw' in kinds:
+        tokens['usdt_raw'] = usdt_address().lower()
+    raws = BscBalanceService.get_balances(
+        (token, key) for token in tokens.values() for key in keys
+    )
+
+    out = {}
+    if 'position_usd' in kinds:
+        shares = {key: raws.get((vault, key)) for key in keys} if vault else {}
+        pps = _p_plus_or_last() if any(shares.values()) else None
+        out['position_usd'] = {
+            key: 0.0 if not shares.get(key) or pps is None else (shares[key] * pps) / (10 ** 36)
+            for key in keys
+        }
+    if 'usdt_raw' in kinds:
+        out['usdt_raw'] = {key: raws.get((tokens['usdt_raw'], key)) or 0 for key in keys}
+    return out
+
+
+def positions_usd(addresses) -> dict:
+    """position_usd for many addresses: {address (lowercase): USD}."""
+    return savings_balances(addresses, kinds=('position_usd',))['position_usd']
+
+
+def usdt_balances_raw(addresses) -> dict:
+    """usdt_balance_raw for many addresses: {address (lowercase): wei}."""
+    return savings_balances(addresses, kinds=('usdt_raw',))['usdt_raw']
+
+
 def health() -> dict:
     """Public vault health for admin / verify surfaces."""
     addr = vault_address()
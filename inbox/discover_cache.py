@@ -0,0 +1,123 @@
+"""
+Shared cache for the discover feed.
+
+discoverFeed ran a DISTINCT query across surfaces with a four-key ordering,
+prefetched every reaction of the page and built each card per viewer —
+although the feed is the same for everyone apart from the viewer's own
+reaction.
+
+The shared parts are now cached under a feed version:
+
+  - the ordered ids of every discover item (discover_feed_page slices it);
+  - each item's base payload, from build_discover_feed_item_base.
+
+Reactions stay live: one grouped query per page returns every item's
+reaction counts together with the viewer's own reaction
+(discover_feed_reactions), so reacting never touches the cache.
+
+Saving or deleting a ContentItem, ContentSurface or Channel replaces the
+version once the transaction commits (see signals), which orphans every
+key of the old version; DISCOVER_FEED_CACHE_TTL bounds how long orphans
+and anything missed by the signals live.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q
+
+from .models import ContentReaction, ContentItem, ContentStatus, ContentSurface, ContentSurfaceType
+
+VERSION_KEY = 'inbox:discover_feed:version'
+DISCOVER_FEED_CACHE_TTL = getattr(settings, 'DISCOVER_FEED_CACHE_TTL', 10 * 60)
+
+
+def feed_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_discover_feed() -> None:
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _key(version: str, suffix) -> str:
+    return f'inbox:discover_feed:{version}:{suffix}'
+
+
+def discover_feed_ids() -> list:
+    """Every published discover item id, in feed order."""
+    key = _key(feed_version(), 'ids')
+    ids = cache.get(key)
+    if ids is None:
+        # A surface row is unique per (item, surface), so ordering the
+        # surfaces needs no DISTINCT.
+        ids = list(
+            ContentSurface.objects.filter(
+                surface=ContentSurfaceType.DISCOVER,
+                content_item__status=ContentStatus.PUBLISHED,
+                content_item__published_at__isnull=False,
+            )
+            .order_by('-is_pinned', 'rank', '-content_item__published_at', '-content_item__created_at')
+            .values_list('content_item_id', flat=True)
+        )
+        cache.set(key, ids, DISCOVER_FEED_CACHE_TTL)
+    return ids
+
+
+def discover_feed_page(offset: int, limit: int):
+    ids = discover_feed_ids()
+    return ids[offset:offset + limit], len(ids) > offset + limit
+
+
+def discover_feed_bases(item_ids) -> dict:
+    """{item id: base payload} for `item_ids`, building only the misses."""
+    from .schema import build_discover_feed_item_base
+
+    version = feed_version()
+    keys = {_key(version, f'item:{item_id}'): item_id for item_id in item_ids}
+    bases = {keys[key]: base for key, base in cache.get_many(list(keys)).items()}
+    missing = [item_id for item_id in item_ids if item_id not in bases]
+    if missing:
+        built = {
+            item.id: build_discover_feed_item_base(item)
+            for item in ContentItem.objects.select_related('channel').filter(id__in=missing)
+        }
+        cache.set_many(
+            {_key(version, f'item:{item_id}'): base for item_id, base in built.items()},
+            DISCOVER_FEED_CACHE_TTL,
+        )
+        bases.update(built)
+    return bases
+
+
+def discover_feed_reactions(item_ids, user, account, business) -> dict:
+    """{item id: (reaction counts by emoji, viewer's emoji or '')}."""
+    if business is not None:
+        viewer = Q(user=user, business=business)
+    elif account is not None:
+        viewer = Q(user=user, account=account)
+    else:
+        viewer = None
+
+    rows = (
+        ContentReaction.objects.filter(content_item_id__in=item_ids)
+        .values('content_item_id', 'reaction_type__emoji')
+        .annotate(
+            count=Count('id'),
+            first_id=Min('id'),
+            **({'viewer_count': Count('id', filter=viewer)} if viewer is not None else {}),
+        )
+        .order_by('first_id')
+    )
+    reactions = {}
+    for row in rows:
+        counts, viewer_reaction = reactions.get(row['content_item_id'], ({}, ''))
+        counts[row['reaction_type__emoji']] = row['count']
+        if row.get('viewer_count'):
+            viewer_reaction = row['reaction_type__emoji']
+        reactions[row['content_item_id']] = (counts, viewer_reaction)
+    return reactions
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inbox', '0011_contentitem_push_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channelmembership',
+            name='unread_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='supportconversationstate',
+            name='unread_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -231,6 +231,9 @@ class ChannelMembership(models.Model):
     joined_at = models.DateTimeField(auto_now_add=True)
     unsubscribed_at = models.DateTimeField(null=True, blank=True)
     last_seen_at = models.DateTimeField(null=True, blank=True)
+    # Materialized unread count (inbox.unread); NULL = not known, recomputed
+    # on the next read.
+    unread_count = models.PositiveIntegerField(null=True, blank=True)
     last_seen_content_item = models.ForeignKey(
         'ContentItem',
         on_delete=models.SET_NULL,
@@ -498,6 +501,8 @@ class SupportConversationState(models.Model):
         related_name='last_seen_in_states',
     )
     last_seen_at = models.DateTimeField(null=True, blank=True)
+    # Materialized unread count (inbox.unread); NULL = not known.
+    unread_count = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
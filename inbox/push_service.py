@@ -1,11 +1,11 @@
 import logging
 from datetime import timedelta
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 
 from django.db.models import Q
 from django.utils import timezone
 
-from notifications.fcm_service import send_batch_notifications
+from notifications.fcm_service import send_batch_notifications, send_templated_notifications
 from notifications.models import FCMDeviceToken, NotificationPreference
 
 from .models import (
@@ -110,6 +110,32 @@ def _collect_unique_tokens_for_users(
     return unique_tokens
 
 
+def _collect_membership_recipients(
+    memberships: List[ChannelMembership],
+    enabled_map: Dict[int, bool],
+    tokens_by_user: Dict[int, List[Tuple[str, int]]],
+    build_payload: Callable[[ChannelMembership], Dict[str, str]],
+) -> List[Tuple[str, int, Dict[str, str]]]:
+    """(token, token_id, payload) for every device of every enabled
+    membership; a device reached through two memberships of the same user
+    gets the first membership's payload only."""
+    recipients: List[Tuple[str, int, Dict[str, str]]] = []
+    seen_tokens = set()
+    for membership in memberships:
+        if not enabled_map.get(membership.user_id, True):
+            continue
+        payload = None
+        for token, token_id in tokens_by_user.get(membership.user_id, []):
+            dedupe_key = (membership.user_id, token_id)
+            if dedupe_key in seen_tokens:
+                continue
+            seen_tokens.add(dedupe_key)
+            if payload is None:
+                payload = build_payload(membership)
+            recipients.append((token, token_id, payload))
+    return recipients
+
+
 def _build_context_payload(*, account_id=None, account_type=None, account_index=None, business_id=None, business_name=None):
     if business_id is not None:
         return {
@@ -317,36 +343,20 @@ def _send_channel_push(item: ContentItem) -> Dict[str, int]:
             channel_id=CHANNEL_ID_MESSAGES,
         )
 
-    total_sent = 0
-    total_failed = 0
-    seen_tokens = set()
-    for membership in memberships:
-        if not push_enabled_map.get(membership.user_id, True):
-            continue
-        tokens = []
-        for token, token_id in tokens_by_user.get(membership.user_id, []):
-            dedupe_key = (membership.user_id, token_id)
-            if dedupe_key in seen_tokens:
-                continue
-            seen_tokens.add(dedupe_key)
-            tokens.append((token, token_id))
-        if not tokens:
-            continue
-
-        body = item.title or item.body or item.channel.title
-        result = send_batch_notifications(
-            tokens=tokens,
-            title=item.channel.title,
-            body=body[:180],
-            data=_build_channel_push_payload(item, membership),
-            badge_count=None,
-            notification=None,
-            channel_id=CHANNEL_ID_MESSAGES,
-        )
-        total_sent += result.get('sent', 0)
-        total_failed += result.get('failed', 0)
-
-    return {'sent': total_sent, 'failed': total_failed}
+    body = item.title or item.body or item.channel.title
+    return send_templated_notifications(
+        recipients=_collect_membership_recipients(
+            memberships,
+            push_enabled_map,
+            tokens_by_user,
+            lambda membership: _build_channel_push_payload(item, membership),
+        ),
+        title=item.channel.title,
+        body=body[:180],
+        badge_count=None,
+        notification=None,
+        channel_id=CHANNEL_ID_MESSAGES,
+    )
 
 
 def _send_discover_push(item: ContentItem) -> Dict[str, int]:
@@ -364,35 +374,19 @@ def _send_discover_push(item: ContentItem) -> Dict[str, int]:
         announcement_enabled_map = _get_user_announcement_enabled_map(user_ids)
         tokens_by_user = _collect_active_tokens_for_users(user_ids)
 
-        total_sent = 0
-        total_failed = 0
-        seen_tokens = set()
-        for membership in memberships:
-            if not announcement_enabled_map.get(membership.user_id, True):
-                continue
-            tokens = []
-            for token, token_id in tokens_by_user.get(membership.user_id, []):
-                dedupe_key = (membership.user_id, token_id)
-                if dedupe_key in seen_tokens:
-                    continue
-                seen_tokens.add(dedupe_key)
-                tokens.append((token, token_id))
-            if not tokens:
-                continue
-
-            result = send_batch_notifications(
-                tokens=tokens,
-                title='Descubrir en Confío',
-                body=(item.title or item.body or 'Nueva publicación en Descubrir')[:180],
-                data=_build_discover_push_payload(item, membership),
-                badge_count=None,
-                notification=None,
-                channel_id=CHANNEL_ID_DISCOVER,
-            )
-            total_sent += result.get('sent', 0)
-            total_failed += result.get('failed', 0)
-
-        return {'sent': total_sent, 'failed': total_failed}
+        return send_templated_notifications(
+            recipients=_collect_membership_recipients(
+                memberships,
+                announcement_enabled_map,
+                tokens_by_user,
+                lambda membership: _build_discover_push_payload(item, membership),
+            ),
+            title='Descubrir en Confío',
+            body=(item.title or item.body or 'Nueva publicación en Descubrir')[:180],
+            badge_count=None,
+            notification=None,
+            channel_id=CHANNEL_ID_DISCOVER,
+        )
 
     user_ids = list(
         FCMDeviceToken.objects.filter(is_active=True, user__is_active=True)
@@ -405,27 +399,23 @@ def _send_discover_push(item: ContentItem) -> Dict[str, int]:
     announcement_enabled_map = _get_user_announcement_enabled_map(user_ids)
     tokens_by_user = _collect_active_tokens_for_users(user_ids)
 
-    total_sent = 0
-    total_failed = 0
-    for user_id in user_ids:
-        if not announcement_enabled_map.get(user_id, True):
-            continue
-        tokens = tokens_by_user.get(user_id, [])
-        if not tokens:
-            continue
-        result = send_batch_notifications(
-            tokens=tokens,
-            title='Descubrir en Confío',
-            body=(item.title or item.body or 'Nueva publicación en Descubrir')[:180],
-            data=_build_discover_push_payload(item),
-            badge_count=None,
-            notification=None,
-            channel_id=CHANNEL_ID_DISCOVER,
-        )
-        total_sent += result.get('sent', 0)
-        total_failed += result.get('failed', 0)
+    eligible_user_ids = [
+        user_id for user_id in user_ids
+        if announcement_enabled_map.get(user_id, True)
+    ]
+    tokens = _collect_unique_tokens_for_users(eligible_user_ids, tokens_by_user)
+    if not tokens:
+        return {'sent': 0, 'failed': 0}
 
-    return {'sent': total_sent, 'failed': total_failed}
+    return send_batch_notifications(
+        tokens=tokens,
+        title='Descubrir en Confío',
+        body=(item.title or item.body or 'Nueva publicación en Descubrir')[:180],
+        data=_build_discover_push_payload(item),
+        badge_count=None,
+        notification=None,
+        channel_id=CHANNEL_ID_DISCOVER,
+    )
 
 
 def send_content_item_push(content_item_id: int) -> Dict[str, int]:
@@ -28,7 +28,9 @@ from .models import (
     SupportMessage,
     VisibilityPolicy,
 )
+from .discover_cache import discover_feed_bases, discover_feed_page, discover_feed_reactions
 from .push_service import send_support_reply_push, send_support_staff_push
+from .unread import message_inbox_unread_count, store_membership_count, store_support_count
 
 logger = logging.getLogger(__name__)
 
@@ -341,7 +343,9 @@ def build_portal_content_payload(item: ContentItem):
     )
 
 
-def build_discover_feed_item_payload(item: ContentItem, user, account, business):
+def build_discover_feed_item_base(item: ContentItem) -> dict:
+    """The viewer-independent part of a discover card, as plain data so the
+    discover feed cache can share it between viewers."""
     metadata = item.metadata or {}
     blocks = metadata.get('blocks') or []
     preview_image = metadata.get('image') or next(
@@ -352,17 +356,6 @@ def build_discover_feed_item_payload(item: ContentItem, user, account, business)
         ),
         {},
     )
-    reaction_counts = {}
-    viewer_reaction = ''
-    for reaction in item.reactions.select_related('reaction_type').all():
-        emoji = reaction.reaction_type.emoji
-        reaction_counts[emoji] = reaction_counts.get(emoji, 0) + 1
-        if business is not None:
-            if reaction.business_id == business.id and reaction.user_id == user.id:
-                viewer_reaction = emoji
-        elif account is not None:
-            if reaction.account_id == account.id and reaction.user_id == user.id:
-                viewer_reaction = emoji
 
     tag_label = item.tag or item.channel.title or ''
     normalized_tag = tag_label.strip().lower()
@@ -381,22 +374,41 @@ def build_discover_feed_item_payload(item: ContentItem, user, account, business)
     elif item.item_type == 'NEWS':
         item_type = 'news'
 
+    return {
+        'id': str(item.id),
+        'type': item_type,
+        'tag': tag_label,
+        'tag_color': tag_color,
+        'title': item.title or '',
+        'body': item.body or '',
+        'timestamp': item.published_at or item.created_at,
+        'thumbnail': item.item_type == 'VIDEO',
+        'platform_links': [
+            (platform, url)
+            for platform, url in (metadata.get('platform_links') or {}).items()
+            if url
+        ],
+        'image_url': preview_image.get('url') or '',
+        'blocks': blocks,
+    }
+
+
+def render_discover_feed_item(base: dict, reaction_counts: dict, viewer_reaction: str) -> DiscoverFeedItemType:
     return DiscoverFeedItemType(
-        id=str(item.id),
-        type=item_type,
-        tag=tag_label,
-        tag_color=tag_color,
-        title=item.title or '',
-        body=item.body or '',
-        time=humanize_relative(item.published_at or item.created_at),
-        thumbnail=item.item_type == 'VIDEO',
+        id=base['id'],
+        type=base['type'],
+        tag=base['tag'],
+        tag_color=base['tag_color'],
+        title=base['title'],
+        body=base['body'],
+        time=humanize_relative(base['timestamp']),
+        thumbnail=base['thumbnail'],
         platform_links=[
             PlatformLinkType(platform=platform, url=url)
-            for platform, url in (metadata.get('platform_links') or {}).items()
-            if url
+            for platform, url in base['platform_links']
         ],
-        image_url=preview_image.get('url') or '',
-        blocks=blocks,
+        image_url=base['image_url'],
+        blocks=base['blocks'],
         reaction_summary=[
             MessageReactionType(emoji=emoji, count=count)
             for emoji, count in sorted(reaction_counts.items(), key=lambda reaction_item: reaction_item[1], reverse=True)
@@ -406,6 +418,22 @@ def build_discover_feed_item_payload(item: ContentItem, user, account, business)
     )
 
 
+def build_discover_feed_item_payload(item: ContentItem, user, account, business):
+    reaction_counts = {}
+    viewer_reaction = ''
+    for reaction in item.reactions.select_related('reaction_type').all():
+        emoji = reaction.reaction_type.emoji
+        reaction_counts[emoji] = reaction_counts.get(emoji, 0) + 1
+        if business is not None:
+            if reaction.business_id == business.id and reaction.user_id == user.id:
+                viewer_reaction = emoji
+        elif account is not None:
+            if reaction.account_id == account.id and reaction.user_id == user.id:
+                viewer_reaction = emoji
+
+    return render_discover_feed_item(build_discover_feed_item_base(item), reaction_counts, viewer_reaction)
+
+
 def get_accessible_content_item(info, content_item_id):
     user, account, business, _ = get_context_models(info)
     item = (
@@ -453,6 +481,8 @@ def build_editorial_channel_payload(membership: ChannelMembership):
         ).count()
     else:
         unread_count = get_visible_content_queryset(membership).count()
+    # The live count also repairs the badge's materialized one (inbox.unread).
+    store_membership_count(membership, unread_count)
 
     messages = []
     for item in visible_items:
@@ -610,6 +640,7 @@ def build_support_channel_payload(user, account, business):
         ).count()
     else:
         unread_count = conversation.messages.exclude(sender_type='USER').count()
+    store_support_count(state, unread_count)
 
     thread_messages = [
         MessageThreadItemType(
@@ -666,6 +697,7 @@ def build_support_channel_thread_page(user, account, business, offset=0, limit=5
         ).count()
     else:
         unread_count = conversation.messages.exclude(sender_type='USER').count()
+    store_support_count(state, unread_count)
 
     thread_messages = [
         MessageThreadItemType(
@@ -767,8 +799,8 @@ class Query(graphene.ObjectType):
 
     @login_required
     def resolve_message_inbox_unread_count(self, info, context_key=None):
-        inbox = build_message_inbox_payload(info)
-        return inbox.total_unread_count
+        user, account, business, _ = get_context_models(info)
+        return message_inbox_unread_count(user, account, business)
 
     @login_required
     def resolve_message_channel_thread(self, info, channel_id, offset=0, limit=20, context_key=None):
@@ -805,24 +837,16 @@ class Query(graphene.ObjectType):
         offset = max(offset or 0, 0)
         limit = min(max(limit or 10, 1), 20)
 
-        queryset = (
-            ContentItem.objects.select_related('channel')
-            .prefetch_related('reactions__reaction_type', 'surfaces')
-            .filter(
-                status=ContentStatus.PUBLISHED,
-                published_at__isnull=False,
-                surfaces__surface=ContentSurfaceType.DISCOVER,
-            )
-            .distinct()
-            .order_by('-surfaces__is_pinned', 'surfaces__rank', '-published_at', '-created_at')
-        )
-        page_items = list(queryset[offset:offset + limit + 1])
-        has_more = len(page_items) > limit
-        if has_more:
-            page_items = page_items[:limit]
+        page_ids, has_more = discover_feed_page(offset, limit)
+        bases = discover_feed_bases(page_ids)
+        reactions = discover_feed_reactions(page_ids, user, account, business)
 
         return DiscoverFeedPageType(
-            items=[build_discover_feed_item_payload(item, user, account, business) for item in page_items],
+            items=[
+                render_discover_feed_item(bases[item_id], *reactions.get(item_id, ({}, '')))
+                for item_id in page_ids
+                if item_id in bases
+            ],
             has_more=has_more,
         )
 
@@ -895,7 +919,8 @@ class MarkMessageChannelSeen(graphene.Mutation):
             state, _ = SupportConversationState.objects.get_or_create(conversation=conversation, user=user)
             state.last_seen_message = latest_message
             state.last_seen_at = latest_message.created_at if latest_message else timezone.now()
-            state.save(update_fields=['last_seen_message', 'last_seen_at', 'updated_at'])
+            state.unread_count = 0
+            state.save(update_fields=['last_seen_message', 'last_seen_at', 'unread_count', 'updated_at'])
         else:
             membership_filter = {'channel__slug': channel_id, 'user': user}
             if business is not None:
@@ -914,10 +939,13 @@ class MarkMessageChannelSeen(graphene.Mutation):
             )
             membership.last_seen_content_item = newest_visible_item
             membership.last_seen_at = newest_visible_item.published_at if newest_visible_item else timezone.now()
-            membership.save(update_fields=['last_seen_content_item', 'last_seen_at', 'updated_at'])
+            membership.unread_count = 0
+            membership.save(update_fields=['last_seen_content_item', 'last_seen_at', 'unread_count', 'updated_at'])
 
-        inbox = build_message_inbox_payload(info)
-        return MarkMessageChannelSeen(success=True, total_unread_count=inbox.total_unread_count)
+        return MarkMessageChannelSeen(
+            success=True,
+            total_unread_count=message_inbox_unread_count(user, account, business),
+        )
 
 
 class ReactToMessageContent(graphene.Mutation):
@@ -1,12 +1,14 @@
 from django.db import transaction
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from users.models import Account
 
 from .models import Channel, ChannelMembership, SubscriptionMode
-from .models import ContentItem, ContentStatus
+from .models import ContentItem, ContentStatus, ContentSurface, SupportMessage
+from .discover_cache import invalidate_discover_feed
 from .tasks import send_content_item_push_task
+from .unread import count_published_item, count_support_reply, invalidate_channel
 
 
 @receiver(post_save, sender=Account)
@@ -43,7 +45,7 @@ def capture_content_item_publish_state(sender, instance: ContentItem, **kwargs):
 
     instance._publish_state_before_save = (
         ContentItem.objects.filter(pk=instance.pk)
-        .values('status', 'send_push', 'published_at', 'push_sent_at')
+        .values('status', 'send_push', 'published_at', 'push_sent_at', 'visibility_policy', 'channel_id')
         .first()
     )
 
@@ -71,3 +73,51 @@ def enqueue_content_item_push_on_publish(sender, instance: ContentItem, created:
         return
 
     transaction.on_commit(lambda: send_content_item_push_task.delay(instance.id))
+
+
+@receiver(post_save, sender=ContentItem)
+def update_unread_counters_on_publish(sender, instance: ContentItem, created: bool, **kwargs):
+    previous_state = getattr(instance, '_publish_state_before_save', None)
+    was_published = bool(
+        previous_state
+        and previous_state.get('status') == ContentStatus.PUBLISHED
+        and previous_state.get('published_at') is not None
+    )
+    is_published = instance.status == ContentStatus.PUBLISHED and instance.published_at is not None
+
+    if is_published and not was_published:
+        count_published_item(instance)
+    elif was_published and (
+        not is_published
+        or previous_state.get('published_at') != instance.published_at
+        or previous_state.get('visibility_policy') != instance.visibility_policy
+        or previous_state.get('channel_id') != instance.channel_id
+    ):
+        # What is visible changed under the counters: recompute on next read.
+        invalidate_channel(previous_state.get('channel_id'))
+        if previous_state.get('channel_id') != instance.channel_id:
+            invalidate_channel(instance.channel_id)
+
+
+@receiver(post_delete, sender=ContentItem)
+def invalidate_unread_counters_on_delete(sender, instance: ContentItem, **kwargs):
+    if instance.status == ContentStatus.PUBLISHED:
+        invalidate_channel(instance.channel_id)
+
+
+@receiver(post_save, sender=ContentItem)
+@receiver(post_delete, sender=ContentItem)
+@receiver(post_save, sender=ContentSurface)
+@receiver(post_delete, sender=ContentSurface)
+@receiver(post_save, sender=Channel)
+def invalidate_discover_feed_cache(sender, **kwargs):
+    # Publish, edit, rank/pin change or a channel rename: the cached order or
+    # a cached card may be stale. After commit, so a reader cannot cache the
+    # old rows under the new version.
+    transaction.on_commit(invalidate_discover_feed)
+
+
+@receiver(post_save, sender=SupportMessage)
+def count_support_reply_unread(sender, instance: SupportMessage, created: bool, **kwargs):
+    if created and instance.sender_type != 'USER':
+        count_support_reply(instance)
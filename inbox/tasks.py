@@ -34,3 +34,11 @@ def send_content_item_push_task(self, content_item_id: int):
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=10, retry_kwargs={'max_retries': 3})
 def rollup_content_platform_clicks_task(self, retention_days: int = 90):
     return rollup_and_cleanup_content_platform_clicks(retention_days=retention_days)
+
+
+@shared_task(name='inbox.reconcile_unread_counters')
+def reconcile_unread_counters_task():
+    # Clears every materialized count; each is recomputed on its next read.
+    from .unread import reconcile_unread_counters
+
+    return reconcile_unread_counters()
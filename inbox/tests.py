@@ -10,17 +10,27 @@ from users.models import Account, User
 from .models import (
     Channel,
     ChannelKind,
+    ChannelMembership,
     ContentItem,
+    ContentReaction,
     ContentStatus,
     ContentSurface,
     ContentSurfaceType,
     SupportConversation,
     SupportConversationStatus,
     SupportMessage,
+    ReactionType,
     SupportSenderType,
 )
+from .discover_cache import (
+    discover_feed_bases,
+    discover_feed_page,
+    discover_feed_reactions,
+    invalidate_discover_feed,
+)
 from .push_service import ContentPushInProgress, send_content_item_push
 from .schema import PortalDeleteContentItem, PortalSaveContentItem, Query
+from .unread import message_inbox_unread_count
 
 
 class MockInfo:
@@ -305,3 +315,116 @@ class DiscoverStructuredDataTests(TestCase):
         self.assertContains(response, '"@type": "Organization"')
         self.assertContains(response, '"name": "Confío News"')
         self.assertNotContains(response, '"jobTitle": "Founder"')
+
+
+class MaterializedUnreadCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='badge-user',
+            email='badge-user@example.com',
+            password='testpass123',
+            firebase_uid='firebase-badge-user',
+        )
+        self.account = Account.objects.create(user=self.user, account_type='personal', account_index=0)
+        self.channel = Channel.objects.create(slug='test-badge-news', kind=ChannelKind.NEWS, title='Badge News')
+        self.membership = ChannelMembership.objects.create(
+            channel=self.channel, user=self.user, account=self.account)
+
+    def _publish(self, title):
+        return ContentItem.objects.create(
+            channel=self.channel,
+            owner_type='SYSTEM',
+            item_type='NEWS',
+            status=ContentStatus.PUBLISHED,
+            published_at=timezone.now() + timedelta(seconds=1),
+            title=title,
+        )
+
+    def test_publish_and_support_reply_bump_the_stored_counts(self):
+        self.assertEqual(message_inbox_unread_count(self.user, self.account, None), 0)
+        self.membership.refresh_from_db()
+        self.assertEqual(self.membership.unread_count, 0)
+
+        self._publish('First')
+        self._publish('Second')
+        self.membership.refresh_from_db()
+        self.assertEqual(self.membership.unread_count, 2)
+
+        conversation = SupportConversation.objects.create(user=self.user, account=self.account)
+        self.assertEqual(message_inbox_unread_count(self.user, self.account, None), 2)
+        SupportMessage.objects.create(conversation=conversation, sender_type=SupportSenderType.AGENT,
+                                      body='Hola')
+        SupportMessage.objects.create(conversation=conversation, sender_type=SupportSenderType.USER,
+                                      body='Gracias')
+        with patch('inbox.unread.editorial_unread') as recount:
+            self.assertEqual(message_inbox_unread_count(self.user, self.account, None), 3)
+        recount.assert_not_called()
+
+    def test_unpublishing_clears_the_channel_counters_for_a_recount(self):
+        message_inbox_unread_count(self.user, self.account, None)
+        item = self._publish('Soon retracted')
+        item.status = ContentStatus.DRAFT
+        item.save()
+
+        self.membership.refresh_from_db()
+        self.assertIsNone(self.membership.unread_count)
+        self.assertEqual(message_inbox_unread_count(self.user, self.account, None), 0)
+
+
+class DiscoverFeedCacheTests(TestCase):
+    def setUp(self):
+        invalidate_discover_feed()
+        self.user = User.objects.create_user(
+            username='discover-viewer',
+            email='discover-viewer@example.com',
+            password='testpass123',
+            firebase_uid='firebase-discover-viewer',
+        )
+        self.account = Account.objects.create(user=self.user, account_type='personal', account_index=0)
+        self.channel = Channel.objects.create(slug='test-discover-cache', kind=ChannelKind.NEWS, title='Novedades')
+        self.older = self._publish('Older', minutes_ago=10)
+        self.newer = self._publish('Newer', minutes_ago=1)
+
+    def _publish(self, title, minutes_ago):
+        item = ContentItem.objects.create(
+            channel=self.channel,
+            owner_type='SYSTEM',
+            item_type='NEWS',
+            status=ContentStatus.PUBLISHED,
+            published_at=timezone.now() - timedelta(minutes=minutes_ago),
+            title=title,
+        )
+        ContentSurface.objects.create(content_item=item, surface=ContentSurfaceType.DISCOVER)
+        return item
+
+    def test_feed_order_is_cached_until_a_surface_changes(self):
+        self.assertEqual(discover_feed_page(0, 10), ([self.newer.id, self.older.id], False))
+        with self.assertNumQueries(0):
+            self.assertEqual(discover_feed_page(0, 1), ([self.newer.id], True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ContentSurface.objects.filter(content_item=self.older).update(is_pinned=True)
+            self.older.surfaces.get().save()
+
+        self.assertEqual(discover_feed_page(0, 10), ([self.older.id, self.newer.id], False))
+
+    def test_reactions_overlay_counts_and_viewer_reaction_on_cached_cards(self):
+        heart, _ = ReactionType.objects.get_or_create(emoji='❤️', defaults={'label': 'Love'})
+        other = User.objects.create_user(
+            username='discover-other', password='testpass123', firebase_uid='firebase-discover-other')
+        other_account = Account.objects.create(user=other, account_type='personal', account_index=0)
+        ContentReaction.objects.create(content_item=self.newer, reaction_type=heart, user=self.user, account=self.account)
+        ContentReaction.objects.create(content_item=self.newer, reaction_type=heart, user=other, account=other_account)
+
+        bases = discover_feed_bases([self.newer.id, self.older.id])
+        self.assertEqual(bases[self.newer.id]['title'], 'Newer')
+        with self.assertNumQueries(0):
+            discover_feed_bases([self.newer.id, self.older.id])
+
+        with self.assertNumQueries(1):
+            reactions = discover_feed_reactions([self.newer.id, self.older.id], self.user, self.account, None)
+        self.assertEqual(reactions, {self.newer.id: ({'❤️': 2}, '❤️')})
+        self.assertEqual(
+            discover_feed_reactions([self.newer.id], other, None, None),
+            {self.newer.id: ({'❤️': 2}, '')},
+        )
@@ -0,0 +1,126 @@
+"""
+Materialized unread counters for the message inbox badge.
+
+messageInboxUnreadCount used to build the whole inbox — the 20 newest items
+of every channel with their reactions, a COUNT per channel, the support
+thread — only to add up the counts, and the app polls it for the badge.
+
+The counts are now kept on the rows that already exist per (user, account
+context): ChannelMembership.unread_count per channel and
+SupportConversationState.unread_count for the support thread.
+
+  - Publishing an item bumps every membership that will see it as unread
+    with one UPDATE (count_published_item); a staff reply bumps the
+    thread's state (count_support_reply).
+  - Marking a channel seen sets it to 0.
+  - An edit that can change what is visible (unpublish, new published_at
+    or visibility, delete) clears the channel's counters to NULL, and a
+    NULL is recomputed with the original query on the next read.
+  - The full inbox payload counts live, as before, and writes back any
+    counter that drifted; reconcile_unread_counters (daily) clears them all
+    so the next read recomputes.
+
+The badge is then one membership query plus the support state.
+"""
+from django.db.models import F, Q
+
+from .models import (
+    ChannelMembership,
+    SupportConversation,
+    SupportConversationState,
+    VisibilityPolicy,
+)
+
+
+def membership_filter(user, account, business) -> dict:
+    membership_filter = {'user': user, 'is_subscribed': True}
+    if business is not None:
+        membership_filter.update({'business': business, 'account__isnull': True})
+    else:
+        membership_filter.update({'account': account, 'business__isnull': True})
+    return membership_filter
+
+
+def editorial_unread(membership: ChannelMembership) -> int:
+    from .schema import get_visible_content_queryset
+
+    visible = get_visible_content_queryset(membership)
+    if membership.last_seen_at:
+        visible = visible.filter(published_at__gt=membership.last_seen_at)
+    return visible.count()
+
+
+def support_unread(conversation: SupportConversation, state: SupportConversationState) -> int:
+    messages = conversation.messages.exclude(sender_type='USER')
+    if state.last_seen_at:
+        messages = messages.filter(created_at__gt=state.last_seen_at)
+    return messages.count()
+
+
+def store_membership_count(membership: ChannelMembership, count: int) -> None:
+    if membership.unread_count != count:
+        ChannelMembership.objects.filter(id=membership.id).update(unread_count=count)
+        membership.unread_count = count
+
+
+def store_support_count(state: SupportConversationState, count: int) -> None:
+    if state.unread_count != count:
+        SupportConversationState.objects.filter(id=state.id).update(unread_count=count)
+        state.unread_count = count
+
+
+def message_inbox_unread_count(user, account, business) -> int:
+    total = 0
+    for membership in ChannelMembership.objects.select_related('channel').filter(
+        **membership_filter(user, account, business)
+    ):
+        if membership.unread_count is None:
+            store_membership_count(membership, editorial_unread(membership))
+        total += membership.unread_count
+
+    # Read-only: the badge must not open a support conversation the way
+    # building the inbox does. No open conversation means nothing unread.
+    conversation_filter = {'user': user, 'status': 'OPEN'}
+    if business is not None:
+        conversation_filter.update({'business': business, 'account__isnull': True})
+    else:
+        conversation_filter.update({'account': account, 'business__isnull': True})
+    conversation = SupportConversation.objects.filter(**conversation_filter).first()
+    if conversation is not None:
+        state, _ = SupportConversationState.objects.get_or_create(conversation=conversation, user=user)
+        if state.unread_count is None:
+            store_support_count(state, support_unread(conversation, state))
+        total += state.unread_count
+    return total
+
+
+def count_published_item(item) -> int:
+    """+1 for every known counter that will show `item`, just published, as
+    unread: the memberships that can see it and have not seen past it."""
+    memberships = ChannelMembership.objects.filter(
+        channel_id=item.channel_id,
+        unread_count__isnull=False,
+    ).filter(Q(last_seen_at__isnull=True) | Q(last_seen_at__lt=item.published_at))
+    if item.visibility_policy not in (VisibilityPolicy.BACKLOG, VisibilityPolicy.PINNED):
+        memberships = memberships.filter(joined_at__lte=item.published_at)
+    return memberships.update(unread_count=F('unread_count') + 1)
+
+
+def invalidate_channel(channel_id) -> int:
+    return ChannelMembership.objects.filter(
+        channel_id=channel_id, unread_count__isnull=False,
+    ).update(unread_count=None)
+
+
+def count_support_reply(message) -> int:
+    return SupportConversationState.objects.filter(
+        conversation_id=message.conversation_id, unread_count__isnull=False,
+    ).update(unread_count=F('unread_count') + 1)
+
+
+def reconcile_unread_counters() -> dict:
+    return {
+        'memberships': ChannelMembership.objects.filter(unread_count__isnull=False).update(unread_count=None),
+        'support_states': SupportConversationState.objects.filter(
+            unread_count__isnull=False).update(unread_count=None),
+    }
@@ -4,6 +4,8 @@ Firebase Cloud Messaging service for push notifications
 import os
 import json
 import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from django.conf import settings
 from django.utils import timezone
@@ -11,13 +13,16 @@ from datetime import datetime
 
 import firebase_admin
 from firebase_admin import credentials, messaging
-from firebase_admin.exceptions import FirebaseError
 
 from .models import FCMDeviceToken, NotificationPreference
 from django.db import models, transaction
 
 logger = logging.getLogger(__name__)
 
+# FCM accepts at most 500 messages per send_each call
+FCM_BATCH_SIZE = 500
+FCM_SEND_WORKERS = getattr(settings, 'FCM_SEND_WORKERS', 8)
+
 # Check Firebase initialization
 def check_firebase_initialized():
     """Check if Firebase Admin SDK is already initialized"""
@@ -264,8 +269,8 @@ def send_batch_notifications(
     channel_id: str = 'default'
 ) -> Dict[str, Any]:
     """
-    Send notifications using FCM batch send (multicast)
-    
+    Send the same notification to many devices
+
     Args:
         tokens: List of (token, token_id) tuples
         title: Notification title
@@ -274,7 +279,44 @@ def send_batch_notifications(
         badge_count: Badge count for iOS/Android
         notification: Notification model instance (optional)
         channel_id: Android notification channel
-    
+
+    Returns:
+        Dict with send results
+    """
+    return send_templated_notifications(
+        recipients=[(token, token_id, data) for token, token_id in tokens],
+        title=title,
+        body=body,
+        badge_count=badge_count,
+        notification=notification,
+        channel_id=channel_id,
+    )
+
+
+def send_templated_notifications(
+    recipients: List[tuple],
+    title: str,
+    body: str,
+    badge_count: Optional[int] = None,
+    notification = None,
+    channel_id: str = 'default'
+) -> Dict[str, Any]:
+    """
+    Send one notification template to many devices, each message carrying
+    its own data payload (e.g. the account context the app must switch to).
+
+    The messages go out in send_each batches of FCM_BATCH_SIZE, up to
+    FCM_SEND_WORKERS batches in flight at once. Only the FCM calls run on
+    the worker threads; token bookkeeping happens here afterwards.
+
+    Args:
+        recipients: List of (token, token_id, data) tuples
+        title: Notification title
+        body: Notification body
+        badge_count: Badge count for iOS/Android
+        notification: Notification model instance (optional)
+        channel_id: Android notification channel
+
     Returns:
         Dict with send results
     """
@@ -285,139 +327,145 @@ def send_batch_notifications(
         'errors': [],
         'invalid_tokens': []
     }
-    
-    # Split tokens into batches of 500 (FCM limit)
-    for i in range(0, len(tokens), 500):
-        batch_tokens = tokens[i:i+500]
-        tokens_only = [t[0] for t in batch_tokens]
-        
-        # Build Android config
-        android_notification = messaging.AndroidNotification(
-            title=title,
-            body=body,
-            sound='default',
-            channel_id=channel_id,
-            # Add tag to prevent duplicate notifications
-            tag=f"notification_{notification.id if notification else 'broadcast'}"
-        )
-        
-        if badge_count is not None:
-            android_notification.notification_count = badge_count
-        
-        android_config = messaging.AndroidConfig(
-            priority='high',
-            notification=android_notification,
-            data=data,
-            # Collapse key to replace old notifications with same key
-            collapse_key=f"notification_{notification.id if notification else 'broadcast'}"
-        )
-        
-        # Build iOS config
-        aps = messaging.Aps(
-            alert=messaging.ApsAlert(
-                title=title,
-                body=body
-            ),
-            sound='default',
-            content_available=True
-        )
-        
-        if badge_count is not None:
-            aps.badge = badge_count
-        
-        apns_config = messaging.APNSConfig(
-            payload=messaging.APNSPayload(aps=aps),
-            headers={
-                'apns-priority': '10',
-                'apns-push-type': 'alert',
-                'apns-topic': 'com.Confio.Confio',  # Your iOS bundle ID
-                'apns-expiration': '0'  # Deliver immediately
-            }
-        )
-        
-        # Create individual messages for send_each
+    if not recipients:
+        return results
+
+    tag = f"notification_{notification.id if notification else 'broadcast'}"
+    apns_config = _build_apns_config(title, body, badge_count)
+    # One id per send so the app can drop duplicates delivered to a device
+    message_id = str(uuid.uuid4())
+
+    batches = []
+    for i in range(0, len(recipients), FCM_BATCH_SIZE):
+        batch = recipients[i:i + FCM_BATCH_SIZE]
         messages = []
-        logger.info(f"Creating messages for {len(batch_tokens)} tokens in batch")
-        
-        # Generate a unique message ID for this notification
-        import uuid
-        message_id = str(uuid.uuid4())
-        
-        for idx, (token_str, token_id) in enumerate(batch_tokens):
-            logger.info(f"Creating message {idx+1} for token ID {token_id}")
-            
-            # Add message ID to data to help with deduplication
-            message_data = data.copy()
+        for token_str, token_id, data in batch:
+            message_data = dict(data)
             message_data['message_id'] = message_id
-            
-            # Log the exact message being sent
-            logger.info(f"Message data for token {token_id}: {message_data}")
-            
-            message = messaging.Message(
+            messages.append(messaging.Message(
                 notification=messaging.Notification(
                     title=title,
                     body=body
                 ),
                 data=message_data,
                 token=token_str,
-                android=android_config,
+                # AndroidConfig.data replaces the message data on Android,
+                # so it has to be built per recipient.
+                android=_build_android_config(title, body, badge_count, channel_id, tag, data),
                 apns=apns_config
-            )
-            messages.append(message)
-        
-        logger.info(f"Total messages to send: {len(messages)}")
-        
-        try:
-            # Use send_each instead of send_multicast
-            batch_response = messaging.send_each(messages)
-            results['sent'] += batch_response.success_count
-            results['failed'] += batch_response.failure_count
-            results['success'] = results['sent'] > 0
-
-            successful_token_ids = [
-                batch_tokens[idx][1]
-                for idx, response in enumerate(batch_response.responses)
-                if response.success
-            ]
-
-            if successful_token_ids:
-                success_time = timezone.now()
-                # Successful delivery means the token is still reachable.
-                FCMDeviceToken.objects.filter(id__in=successful_token_ids).update(
-                    last_used=success_time,
-                    failure_count=0,
-                    last_failure=None,
-                    last_failure_reason='',
-                    is_active=True,
-                )
-            
-            # Handle individual response errors
-            for idx, response in enumerate(batch_response.responses):
-                if not response.success:
-                    token_id = batch_tokens[idx][1]
-                    handle_fcm_error(response, token_id, results)
-            
-            logger.info(f"Batch send completed: {batch_response.success_count} sent, {batch_response.failure_count} failed")
-            
-        except FirebaseError as e:
-            logger.error(f"Firebase error in batch send: {e}")
-            results['errors'].append(str(e))
-            results['failed'] += len(batch_tokens)
-        
-        except Exception as e:
-            logger.error(f"Unexpected error in batch send: {e}")
-            results['errors'].append(str(e))
-            results['failed'] += len(batch_tokens)
-    
+            ))
+        batches.append(([token_id for _, token_id, _ in batch], messages))
+
+    logger.info(f"Sending {len(recipients)} messages in {len(batches)} batch(es)")
+
+    if len(batches) == 1:
+        outcomes = [_send_each(batches[0][1])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(FCM_SEND_WORKERS, len(batches))) as executor:
+            outcomes = list(executor.map(_send_each, [messages for _, messages in batches]))
+
+    for (token_ids, _), (batch_response, error) in zip(batches, outcomes):
+        if error is not None:
+            logger.error(f"Error in batch send: {error}")
+            results['errors'].append(str(error))
+            results['failed'] += len(token_ids)
+            continue
+        _record_batch_response(token_ids, batch_response, results)
+
+    results['success'] = results['sent'] > 0
+
     # Mark notification as sent if any succeeded
     if notification and results['sent'] > 0:
         notification.push_sent = True
         notification.push_sent_at = timezone.now()
         notification.save(update_fields=['push_sent', 'push_sent_at'])
-    
+
     return results
 
 
+def _build_android_config(title, body, badge_count, channel_id, tag, data):
+    android_notification = messaging.AndroidNotification(
+        title=title,
+        body=body,
+        sound='default',
+        channel_id=channel_id,
+        # Add tag to prevent duplicate notifications
+        tag=tag
+    )
+
+    if badge_count is not None:
+        android_notification.notification_count = badge_count
+
+    return messaging.AndroidConfig(
+        priority='high',
+        notification=android_notification,
+        data=data,
+        # Collapse key to replace old notifications with same key
+        collapse_key=tag
+    )
+
+
+def _build_apns_config(title, body, badge_count):
+    aps = messaging.Aps(
+        alert=messaging.ApsAlert(
+            title=title,
+            body=body
+        ),
+        sound='default',
+        content_available=True
+    )
+
+    if badge_count is not None:
+        aps.badge = badge_count
+
+    return messaging.APNSConfig(
+        payload=messaging.APNSPayload(aps=aps),
+        headers={
+            'apns-priority': '10',
+            'apns-push-type': 'alert',
+            'apns-topic': 'com.Confio.Confio',  # Your iOS bundle ID
+            'apns-expiration': '0'  # Deliver immediately
+        }
+    )
+
+
+def _send_each(messages):
+    """Runs on a worker thread: FCM only, no database access."""
+    try:
+        return messaging.send_each(messages), None
+    except Exception as e:  # noqa: BLE001 — counted as a failed batch by the caller
+        return None, e
+
+
+def _record_batch_response(token_ids: List[int], batch_response, results: Dict[str, Any]):
+    results['sent'] += batch_response.success_count
+    results['failed'] += batch_response.failure_count
+
+    successful_token_ids = [
+        token_ids[idx]
+        for idx, response in enumerate(batch_response.responses)
+        if response.success
+    ]
+
+    if successful_token_ids:
+        success_time = timezone.now()
+        # Successful delivery means the token is still reachable.
+        FCMDeviceToken.objects.filter(id__in=successful_token_ids).update(
+            last_used=success_time,
+            failure_count=0,
+            last_failure=None,
+            last_failure_reason='',
+            is_active=True,
+        )
+
+    # Handle individual response errors
+    for idx, response in enumerate(batch_response.responses):
+        if not response.success:
+            handle_fcm_error(response, token_ids[idx], results)
+
+    logger.info(f"Batch send completed: {batch_response.success_count} sent, {batch_response.failure_count} failed")
+
+
 def handle_fcm_error(response, token_id: int, results: Dict[str, Any]):
     """
     Handle FCM send response errors and update token status
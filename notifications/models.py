@@ -134,6 +134,26 @@ class Notification(models.Model):
         return f"{self.notification_type} - {self.title} - {self.user.email if self.user else 'No user'}"
 
 
+class NotificationUnreadCounter(models.Model):
+    """Materialized unread notification count for one user in one account
+    context — 'a<account_id>' or 'b<business_id>' (notifications.unread)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_unread_counters')
+    context = models.CharField(max_length=32)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'context'], name='notif_unread_counter_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['context'], name='notif_unread_counter_ctx_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.context} = {self.count}"
+
+
 class NotificationRead(models.Model):
     """Track which users have read notifications in specific account contexts"""
     notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='reads')
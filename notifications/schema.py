@@ -11,6 +11,7 @@ from users.models import User, Account
 from graphql_jwt.decorators import login_required
 from users.jwt_context import get_jwt_business_context_with_validation
 from .fcm_service import register_device_token, unregister_device_token, send_test_push
+from . import unread
 
 
 class NotificationTypeEnum(graphene.Enum):
@@ -499,67 +500,8 @@ class Query(graphene.ObjectType):
             # No valid JWT context, return 0
             return 0
         
-        account_type = jwt_context['account_type']
-        account_index = jwt_context['account_index']
-        business_id = jwt_context.get('business_id')
-        
-        # Build query based on account context
-        personal_query = Q(user=user, is_broadcast=False)
-        
-        # Filter by account context from JWT
-        if account_type == 'business' and business_id:
-            # Count business-specific notifications
-            # Relaxed constraint: count ALL notifications for this business
-            personal_query = Q(business_id=business_id)
-        else:
-            # Count personal account notifications
-            # For personal accounts, include both account-specific and user-level notifications
-            try:
-                account = Account.objects.get(
-                    user=user,
-                    account_type=account_type,
-                    account_index=account_index
-                )
-                # Include notifications for this specific account OR general user notifications
-                personal_query &= (Q(account=account) | Q(account__isnull=True, business__isnull=True))
-            except Account.DoesNotExist:
-                # If account not found, count general notifications
-                personal_query &= Q(account__isnull=True, business__isnull=True)
-        
-        # Get read notification IDs for this user in this account context
-        if business_id:
-            # Business account context
-            read_notification_ids = NotificationRead.objects.filter(
-                user=user,
-                business_id=business_id,
-                account__isnull=True
-            ).values_list('notification_id', flat=True)
-        else:
-            # Personal account context
-            account_id = jwt_context.get('account_id')
-            read_notification_ids = NotificationRead.objects.filter(
-                user=user,
-                account_id=account_id,
-                business__isnull=True
-            ).values_list('notification_id', flat=True)
-        
-        # Count unread personal notifications (only from when user joined)
-        personal_unread = Notification.objects.filter(
-            personal_query,
-            created_at__gte=user.date_joined
-        ).exclude(
-            id__in=read_notification_ids
-        ).count()
-        
-        # Count unread broadcast notifications (only from when user joined)
-        broadcast_unread = Notification.objects.filter(
-            is_broadcast=True,
-            created_at__gte=user.date_joined
-        ).exclude(
-            id__in=read_notification_ids
-        ).count()
-        
-        return personal_unread + broadcast_unread
+        # Materialized per context (notifications.unread)
+        return unread.unread_count(user, jwt_context)
     
     @login_required
     def resolve_fcm_device_tokens(self, info):
@@ -593,7 +535,7 @@ class MarkNotificationRead(graphene.Mutation):
             
             if business_id:
                 # Business account context
-                NotificationRead.objects.get_or_create(
+                _read, created = NotificationRead.objects.get_or_create(
                     notification=notification,
                     user=user,
                     business_id=business_id,
@@ -602,12 +544,14 @@ class MarkNotificationRead(graphene.Mutation):
             else:
                 # Personal account context
                 account_id = jwt_context.get('account_id')
-                NotificationRead.objects.get_or_create(
+                _read, created = NotificationRead.objects.get_or_create(
                     notification=notification,
                     user=user,
                     account_id=account_id,
                     defaults={'business': None}
                 )
+            if created:
+                unread.count_read(user, jwt_context)
             
             # Set is_read for response
             notification.is_read = True
@@ -710,6 +654,7 @@ class MarkAllNotificationsRead(graphene.Mutation):
                 )
             marked_count += 1
         
+        unread.refresh(user, jwt_context)
         return MarkAllNotificationsRead(success=True, marked_count=marked_count)
 
 
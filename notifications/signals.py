@@ -1,7 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import NotificationPreference
+from .models import Notification, NotificationPreference
 import logging
 
 User = get_user_model()
@@ -40,4 +40,15 @@ def create_notification_preference(sender, instance, created, **kwargs):
                 logger.info(f"Notification preferences already exist for user {instance.id}")
                 
         except Exception as e:
-            logger.error(f"Error creating notification preferences for user {instance.id}: {e}", exc_info=True)
\ No newline at end of file
+            logger.error(f"Error creating notification preferences for user {instance.id}: {e}", exc_info=True)
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, **kwargs):
+    """Bump the materialized unread counters the new notification joins."""
+    if created:
+        try:
+            from .unread import count_new_notification
+            count_new_notification(instance)
+        except Exception as e:
+            # The daily reconcile recomputes a counter this misses
+            logger.warning(f"Failed to count notification {instance.id} as unread: {e}")
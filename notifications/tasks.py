@@ -0,0 +1,9 @@
+from celery import shared_task
+
+
+@shared_task(name='notifications.reconcile_unread_counters')
+def reconcile_unread_counters_task():
+    # Drops every materialized count; each is recomputed on its next read.
+    from .unread import reconcile_unread_counters
+
+    return reconcile_unread_counters()
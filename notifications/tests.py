@@ -1,4 +1,6 @@
 from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
@@ -6,8 +8,9 @@ from django.utils import timezone
 
 from config.admin_dashboard import get_fcm_reachability_metrics
 
-from .fcm_service import register_device_token
-from .models import FCMDeviceToken
+from .fcm_service import register_device_token, send_templated_notifications
+from .models import FCMDeviceToken, Notification, NotificationType, NotificationUnreadCounter
+from .unread import count_read, unread_count
 
 
 User = get_user_model()
@@ -106,3 +109,91 @@ class FCMDeviceRegistrationTests(TestCase):
             'recent_users': 1,
             'active_tokens': 3,
         })
+
+
+class TemplatedPushTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='templated-push-user',
+            email='templated-push-user@example.com',
+            password='testpass123',
+            firebase_uid='firebase-templated-push-user',
+        )
+        self.token = FCMDeviceToken.objects.create(
+            user=self.user, token='token', device_type='android', device_id='device-1', failure_count=2,
+        )
+
+    @patch('notifications.fcm_service.messaging.send_each')
+    def test_per_recipient_payloads_go_out_in_full_batches(self, send_each):
+        def respond(messages):
+            return SimpleNamespace(
+                success_count=len(messages),
+                failure_count=0,
+                responses=[SimpleNamespace(success=True, exception=None) for _ in messages],
+            )
+        send_each.side_effect = respond
+
+        recipients = [
+            ('token', self.token.id, {'account_id': str(index)})
+            for index in range(501)
+        ]
+        result = send_templated_notifications(recipients, title='Canal', body='Nuevo')
+
+        self.assertEqual(result['sent'], 501)
+        self.assertEqual(result['failed'], 0)
+        batch_sizes = sorted(len(call.args[0]) for call in send_each.call_args_list)
+        self.assertEqual(batch_sizes, [1, 500])
+        sent = [message for call in send_each.call_args_list for message in call.args[0]]
+        self.assertEqual(
+            sorted(message.data['account_id'] for message in sent),
+            sorted(str(index) for index in range(501)),
+        )
+        self.assertTrue(all(message.android.data == {'account_id': message.data['account_id']} for message in sent))
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.failure_count, 0)
+
+    @patch('notifications.fcm_service.messaging.send_each', side_effect=RuntimeError('fcm down'))
+    def test_failed_batch_counts_every_recipient_as_failed(self, send_each):
+        result = send_templated_notifications(
+            [('token', self.token.id, {'a': '1'}), ('token', self.token.id, {'a': '2'})],
+            title='Canal',
+            body='Nuevo',
+        )
+
+        self.assertEqual(result['sent'], 0)
+        self.assertEqual(result['failed'], 2)
+        self.assertEqual(result['errors'], ['fcm down'])
+
+
+class UnreadNotificationCounterTests(TestCase):
+    def setUp(self):
+        from users.models import Account
+
+        self.user = User.objects.create_user(
+            username='badge-user',
+            email='badge-user@example.com',
+            password='testpass123',
+            firebase_uid='firebase-badge-user',
+        )
+        self.user.date_joined = timezone.now() - timedelta(days=1)
+        self.user.save(update_fields=['date_joined'])
+        self.account = Account.objects.create(user=self.user, account_type='personal', account_index=0)
+        self.ctx = {'account_type': 'personal', 'account_index': 0,
+                    'account_id': self.account.id, 'business_id': None}
+
+    def _notify(self, **kwargs):
+        return Notification.objects.create(
+            notification_type=NotificationType.SYSTEM, title='t', message='m', **kwargs)
+
+    def test_counter_is_computed_once_then_maintained_on_notify_and_read(self):
+        self._notify(user=self.user)
+        self.assertEqual(unread_count(self.user, self.ctx), 1)
+
+        self._notify(user=self.user, account=self.account)
+        self._notify(is_broadcast=True, broadcast_target='all')
+        with patch('notifications.unread.count_unread') as recount:
+            self.assertEqual(unread_count(self.user, self.ctx), 3)
+        recount.assert_not_called()
+
+        count_read(self.user, self.ctx)
+        self.assertEqual(NotificationUnreadCounter.objects.get(user=self.user).count, 2)
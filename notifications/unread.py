@@ -0,0 +1,147 @@
+"""
+Materialized unread notification counters.
+
+unreadNotificationCount ran a personal COUNT and a broadcast COUNT, each
+excluding the context's NotificationRead ids, on every badge poll. The
+result now lives in NotificationUnreadCounter, one row per (user, account
+context), and the poll reads that row:
+
+  - a new notification bumps exactly the counters whose count it joins,
+    with one UPDATE (count_new_notification) — a broadcast every counter,
+    a business notification every counter of that business context, a
+    personal one the owner's matching account context(s);
+  - marking one notification read takes one off; marking all read
+    recomputes the context, since mark-all and the count do not select
+    quite the same notifications;
+  - a missing row is computed with the original query and stored.
+
+reconcile_unread_counters (daily) drops every row, so any drift — a
+notification deleted from the admin, a race between a compute and an
+increment — lasts at most a day.
+"""
+import logging
+
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from users.models import Account
+
+from .models import Notification, NotificationRead, NotificationUnreadCounter
+
+logger = logging.getLogger(__name__)
+
+
+def context_key(jwt_context) -> str:
+    business_id = jwt_context.get('business_id')
+    if business_id:
+        return f'b{business_id}'
+    return f"a{jwt_context.get('account_id') or 0}"
+
+
+def count_unread(user, jwt_context) -> int:
+    """The unread count for the JWT context, straight from the tables."""
+    account_type = jwt_context['account_type']
+    account_index = jwt_context['account_index']
+    business_id = jwt_context.get('business_id')
+
+    # Build query based on account context
+    personal_query = Q(user=user, is_broadcast=False)
+
+    # Filter by account context from JWT
+    if account_type == 'business' and business_id:
+        # Count business-specific notifications
+        # Relaxed constraint: count ALL notifications for this business
+        personal_query = Q(business_id=business_id)
+    else:
+        # Count personal account notifications
+        # For personal accounts, include both account-specific and user-level notifications
+        try:
+            account = Account.objects.get(
+                user=user,
+                account_type=account_type,
+                account_index=account_index
+            )
+            # Include notifications for this specific account OR general user notifications
+            personal_query &= (Q(account=account) | Q(account__isnull=True, business__isnull=True))
+        except Account.DoesNotExist:
+            # If account not found, count general notifications
+            personal_query &= Q(account__isnull=True, business__isnull=True)
+
+    # Get read notification IDs for this user in this account context
+    if business_id:
+        # Business account context
+        read_notification_ids = NotificationRead.objects.filter(
+            user=user,
+            business_id=business_id,
+            account__isnull=True
+        ).values_list('notification_id', flat=True)
+    else:
+        # Personal account context
+        account_id = jwt_context.get('account_id')
+        read_notification_ids = NotificationRead.objects.filter(
+            user=user,
+            account_id=account_id,
+            business__isnull=True
+        ).values_list('notification_id', flat=True)
+
+    # Count unread personal notifications (only from when user joined)
+    personal_unread = Notification.objects.filter(
+        personal_query,
+        created_at__gte=user.date_joined
+    ).exclude(
+        id__in=read_notification_ids
+    ).count()
+
+    # Count unread broadcast notifications (only from when user joined)
+    broadcast_unread = Notification.objects.filter(
+        is_broadcast=True,
+        created_at__gte=user.date_joined
+    ).exclude(
+        id__in=read_notification_ids
+    ).count()
+
+    return personal_unread + broadcast_unread
+
+
+def unread_count(user, jwt_context) -> int:
+    """The badge count: the context's counter row, created on first read."""
+    key = context_key(jwt_context)
+    count = (NotificationUnreadCounter.objects.filter(user=user, context=key)
+             .values_list('count', flat=True).first())
+    if count is None:
+        count = refresh(user, jwt_context)
+    return count
+
+
+def refresh(user, jwt_context) -> int:
+    count = count_unread(user, jwt_context)
+    NotificationUnreadCounter.objects.update_or_create(
+        user=user, context=context_key(jwt_context), defaults={'count': count},
+    )
+    return count
+
+
+def count_new_notification(notification) -> int:
+    """+1 on every stored counter whose count `notification` joins."""
+    counters = NotificationUnreadCounter.objects.all()
+    if notification.is_broadcast:
+        pass
+    elif notification.business_id:
+        counters = counters.filter(context=f'b{notification.business_id}')
+    elif notification.user_id is None:
+        return 0
+    elif notification.account_id:
+        counters = counters.filter(user_id=notification.user_id, context=f'a{notification.account_id}')
+    else:
+        counters = counters.filter(user_id=notification.user_id, context__startswith='a')
+    return counters.update(count=F('count') + 1)
+
+
+def count_read(user, jwt_context) -> None:
+    NotificationUnreadCounter.objects.filter(user=user, context=context_key(jwt_context)).update(
+        count=Greatest(F('count') - 1, 0))
+
+
+def reconcile_unread_counters() -> int:
+    deleted, _ = NotificationUnreadCounter.objects.all().delete()
+    return deleted
@@ -4,6 +4,7 @@ from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.db import models
 from .models import P2PTrade, P2PMessage
+from .subscriptions import apublish_trade_event
 
 User = get_user_model()
 
@@ -106,8 +107,8 @@ class TradeChatConsumer(AsyncWebsocketConsumer):
                 }
             
             # Send message to room group
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await apublish_trade_event(
+                self.trade_id,
                 {
                     'type': 'chat_message',
                     'message': {
@@ -118,7 +119,8 @@ class TradeChatConsumer(AsyncWebsocketConsumer):
                         'createdAt': message.created_at.isoformat(),
                         'isRead': message.is_read,
                     }
-                }
+                },
+                self.channel_layer,
             )
 
     async def handle_typing_indicator(self, data):
@@ -126,14 +128,15 @@ class TradeChatConsumer(AsyncWebsocketConsumer):
         is_typing = data.get('isTyping', False)
         
         # Broadcast typing indicator to other users in the room
-        await self.channel_layer.group_send(
-            self.room_group_name,
+        await apublish_trade_event(
+            self.trade_id,
             {
                 'type': 'typing_indicator',
                 'user_id': str(self.scope['user'].id),
                 'username': self.scope['user'].username,
                 'is_typing': is_typing,
-            }
+            },
+            self.channel_layer,
         )
 
     async def handle_trade_status_update(self, data):
@@ -147,15 +150,16 @@ class TradeChatConsumer(AsyncWebsocketConsumer):
         
         if trade_updated:
             # Broadcast status update to room
-            await self.channel_layer.group_send(
-                self.room_group_name,
+            await apublish_trade_event(
+                self.trade_id,
                 {
                     'type': 'trade_status_update',
                     'status': new_status,
                     'updated_by': str(self.scope['user'].id),
                     'payment_reference': payment_reference,
                     'payment_notes': payment_notes,
-                }
+                },
+                self.channel_layer,
             )
 
     # WebSocket message handlers
@@ -7,6 +7,7 @@ from usdc_transactions.ws_consumers import WithdrawSessionConsumer
 from .ws_consumers import P2PSessionConsumer
 from presale.ws_consumers import PresaleSessionConsumer
 from humanitarian.ws_consumers import HumanitarianSessionConsumer
+from payroll.ws_consumers import PayrollSessionConsumer
 
 websocket_urlpatterns = [
     # GraphQL Subscriptions endpoint
@@ -29,4 +30,6 @@ websocket_urlpatterns = [
     re_path(r'ws/presale_session$', PresaleSessionConsumer.as_asgi()),
     # Humanitarian aid donation session (prepare + submit, sponsored app call)
     re_path(r'ws/humanitarian_session$', HumanitarianSessionConsumer.as_asgi()),
+    # BSC payroll run session (prepare + submit a whole run, progress stream)
+    re_path(r'ws/payroll_session$', PayrollSessionConsumer.as_asgi()),
 ]
@@ -1843,12 +1843,8 @@ class UpdateP2PTradeStatus(graphene.Mutation):
                     )
             
             # Broadcast the status update via WebSocket
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            
-            channel_layer = get_channel_layer()
-            room_group_name = f'trade_chat_{trade.id}'
-            
+            from .subscriptions import publish_trade_event
+
             # Send trade status update to all connected clients
             broadcast_data = {
                 'type': 'trade_status_update',
@@ -1864,10 +1860,7 @@ class UpdateP2PTradeStatus(graphene.Mutation):
             except Exception:
                 pass
             
-            async_to_sync(channel_layer.group_send)(
-                room_group_name,
-                broadcast_data
-            )
+            publish_trade_event(trade.id, broadcast_data)
 
             return UpdateP2PTradeStatus(
                 trade=trade,
@@ -1973,61 +1966,11 @@ class SendP2PMessage(graphene.Mutation):
             message = P2PMessage.objects.create(**message_kwargs)
 
             # Broadcast message via channel layer for GraphQL subscriptions
-            from asgiref.sync import async_to_sync
-            channel_layer = get_channel_layer()
-            
-            if channel_layer:
-                # Format sender info similar to subscription consumer
-                sender_info = {}
-                if message.sender_user:
-                    sender_info = {
-                        'id': str(message.sender_user.id),
-                        'username': message.sender_user.username,
-                        'firstName': message.sender_user.first_name,
-                        'lastName': message.sender_user.last_name,
-                        'type': 'user'
-                    }
-                elif message.sender_business:
-                    business_account = message.sender_business.accounts.first()
-                    if business_account:
-                        sender_info = {
-                            'id': str(business_account.user.id),
-                            'username': business_account.user.username,
-                            'firstName': business_account.user.first_name,
-                            'lastName': business_account.user.last_name,
-                            'type': 'business',
-                            'businessName': message.sender_business.name,
-                            'businessId': str(message.sender_business.id)
-                        }
-                else:
-                    # Fallback
-                    sender_info = {
-                        'id': str(message.sender.id),
-                        'username': message.sender.username,
-                        'firstName': message.sender.first_name,
-                        'lastName': message.sender.last_name,
-                        'type': 'user'
-                    }
-                
-                # Broadcast to GraphQL subscription group
-                group_name = f'trade_chat_{trade.id}'
-                message_data = {
-                    'id': message.id,
-                    'sender': sender_info,
-                    'content': message.content,
-                    'messageType': message.message_type,
-                    'createdAt': message.created_at.isoformat(),
-                    'isRead': message.is_read,
-                }
-                
-                async_to_sync(channel_layer.group_send)(
-                    group_name,
-                    {
-                        'type': 'chat_message',
-                        'trade_id': trade.id,
-                        'message': message_data
-                    }
-                )
+            from .subscriptions import publish_trade_event, chat_message_payload
+            publish_trade_event(trade.id, {
+                'type': 'chat_message',
+                'message': chat_message_payload(message),
+            })
 
             return SendP2PMessage(
                 message=message,
@@ -2801,31 +2744,14 @@ class ConfirmP2PTradeStep(graphene.Mutation):
                         )
                 
                 # Send WebSocket notification
-                channel_layer = get_channel_layer()
-                message = {
-                    'tradeId': str(trade.id),
+                from .subscriptions import publish_trade_event
+                publish_trade_event(trade.id, {
+                    'type': 'trade_status_update',
                     'status': trade.status,
-                    'updatedBy': user.id,
-                    'trade': {
-                        'id': str(trade.id),
-                        'status': trade.status,
-                        'cryptoAmount': str(trade.crypto_amount),
-                        'fiatAmount': str(trade.fiat_amount),
-                        'rateUsed': str(trade.rate_used)
-                    }
-                }
-                
-                from asgiref.sync import async_to_sync
-                async_to_sync(channel_layer.group_send)(
-                    f'trade_chat_{trade.id}',
-                    {
-                        'type': 'trade_status_update',
-                        'status': trade.status,
-                        'updated_by': str(user.id),
-                        'payment_reference': '',
-                        'payment_notes': ''
-                    }
-                )
+                    'updated_by': str(user.id),
+                    'payment_reference': '',
+                    'payment_notes': '',
+                })
             
             return ConfirmP2PTradeStep(
                 confirmation=confirmation,
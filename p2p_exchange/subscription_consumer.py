@@ -1,295 +1,304 @@
 import json
 import asyncio
+from collections import Counter
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
-from graphql_jwt.middleware import JSONWebTokenMiddleware
 from graphql_jwt.shortcuts import get_user_by_token
-from .models import P2PTrade, P2PMessage
-from config.schema import schema
-import graphene
+from .models import P2PTrade
+from .subscriptions import TOPICS, topics_for_event, root_field, HISTORY_PAGE_SIZE
 
 User = get_user_model()
 
+GRAPHQL_WS = 'graphql-ws'  # legacy subscriptions-transport-ws
+GRAPHQL_TRANSPORT_WS = 'graphql-transport-ws'  # graphql-ws library protocol
+
+
 class GraphQLSubscriptionConsumer(AsyncWebsocketConsumer):
-    """GraphQL Subscription WebSocket Consumer"""
-    
+    """GraphQL Subscription WebSocket Consumer
+
+    Speaks both the legacy ``graphql-ws`` protocol (start/stop/data) and
+    ``graphql-transport-ws`` (subscribe/complete/next, ping/pong), picked from
+    the client's requested subprotocol. Subscriptions are resolved against the
+    topic registry in ``p2p_exchange.subscriptions``; the connection joins each
+    channel-layer group once, however many of its subscriptions read from it.
+    """
+
+    CONNECTION_INIT_TIMEOUT_SEC = 10
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.subscriptions = {}  # Track active subscriptions
+        self.subscriptions = {}  # sub_id -> {'field', 'key', 'group_name'}
         self.user = None
-        
+        self.protocol = GRAPHQL_WS
+        self._acknowledged = False
+        self._group_refs = Counter()
+        self._trade_access = {}
+        self._init_timeout_task = None
+
     async def connect(self):
         """Handle WebSocket connection with GraphQL subscription protocol"""
-        await self.accept(subprotocol="graphql-ws")
-        
-        # Send connection_ack after successful connection
-        await self.send(text_data=json.dumps({
-            'type': 'connection_ack'
-        }))
-        
+        requested = self.scope.get('subprotocols') or []
+        self.protocol = GRAPHQL_TRANSPORT_WS if GRAPHQL_TRANSPORT_WS in requested else GRAPHQL_WS
+        await self.accept(subprotocol=self.protocol)
+
+        if self.protocol == GRAPHQL_WS:
+            # Legacy clients expect an ack straight away (re-sent after auth)
+            await self.send(text_data=json.dumps({
+                'type': 'connection_ack'
+            }))
+        else:
+            self._init_timeout_task = asyncio.create_task(self._connection_init_timeout())
+
     async def disconnect(self, close_code):
         """Handle disconnection"""
+        if self._init_timeout_task:
+            self._init_timeout_task.cancel()
         # Clean up subscriptions
         for sub_id in list(self.subscriptions.keys()):
-            await self.unsubscribe(sub_id)
-            
+            await self.unsubscribe(sub_id, notify=False)
+
+    async def _connection_init_timeout(self):
+        await asyncio.sleep(self.CONNECTION_INIT_TIMEOUT_SEC)
+        if not self._acknowledged:
+            await self.close(code=4408)
+
     async def receive(self, text_data):
         """Handle incoming GraphQL subscription messages"""
         try:
             message = json.loads(text_data)
             message_type = message.get('type')
-            
+
             if message_type == 'connection_init':
                 await self.handle_connection_init(message)
-            elif message_type == 'start':
+            elif message_type in ('start', 'subscribe'):
                 await self.handle_start(message)
-            elif message_type == 'stop':
+            elif message_type in ('stop', 'complete'):
                 await self.handle_stop(message)
+            elif message_type == 'ping':
+                await self.send(text_data=json.dumps({'type': 'pong'}))
+            elif message_type == 'pong':
+                pass
             elif message_type == 'connection_terminate':
                 await self.close()
-                
+
         except json.JSONDecodeError:
             await self.send_error('Invalid JSON format')
         except Exception as e:
             await self.send_error(f'Error processing message: {str(e)}')
-            
+
     async def handle_connection_init(self, message):
         """Handle GraphQL connection initialization with authentication"""
-        payload = message.get('payload', {})
-        
+        if self.protocol == GRAPHQL_TRANSPORT_WS and self._acknowledged:
+            await self.close(code=4429)  # Too many initialisation requests
+            return
+
+        payload = message.get('payload') or {}
+
         # Extract JWT token from payload
         token = payload.get('Authorization', '').replace('Bearer ', '')
         if not token:
             # Try alternative token locations
             token = payload.get('authToken') or payload.get('token')
-            
+
         if token:
             # Authenticate user with JWT token
             try:
                 self.user = await self.authenticate_token(token)
                 if not self.user or not self.user.is_authenticated:
-                    await self.send_error('Authentication failed')
-                    await self.close()
+                    await self.reject_connection('Authentication failed')
                     return
             except Exception as e:
-                await self.send_error(f'Authentication error: {str(e)}')
-                await self.close()
+                await self.reject_connection(f'Authentication error: {str(e)}')
                 return
         else:
-            await self.send_error('No authentication token provided')
-            await self.close()
+            await self.reject_connection('No authentication token provided')
             return
-            
+
+        self._acknowledged = True
+        if self._init_timeout_task:
+            self._init_timeout_task.cancel()
+            self._init_timeout_task = None
+
         # Send connection_ack for successful authentication
         await self.send(text_data=json.dumps({
             'type': 'connection_ack'
         }))
-        
+
+    async def reject_connection(self, error_message):
+        if self.protocol == GRAPHQL_TRANSPORT_WS:
+            await self.close(code=4403)  # Forbidden
+            return
+        await self.send_error(error_message)
+        await self.close()
+
     async def handle_start(self, message):
         """Handle GraphQL subscription start"""
         sub_id = message.get('id')
-        payload = message.get('payload', {})
-        
+        payload = message.get('payload') or {}
+
         query = payload.get('query', '')
-        variables = payload.get('variables', {})
-        
+        variables = payload.get('variables') or {}
+
         if not sub_id:
             await self.send_error('Subscription ID required')
             return
-            
-        # Execute GraphQL subscription
+
+        if self.protocol == GRAPHQL_TRANSPORT_WS:
+            if not self._acknowledged or self.user is None:
+                await self.close(code=4401)  # Unauthorized
+                return
+            if sub_id in self.subscriptions:
+                await self.close(code=4409)  # Subscriber for <id> already exists
+                return
+        elif self.user is None:
+            await self.send_error('Authentication required', sub_id)
+            return
+
+        topic = TOPICS.get(root_field(query) or '')
+        if topic is None:
+            # Older clients send hand-written documents; keep the lenient match
+            topic = next((t for field, t in TOPICS.items() if field in query), None)
+        if topic is None:
+            await self.send_error(f'Unknown subscription type for ID {sub_id}', sub_id)
+            return
+
         try:
-            # Create context with authenticated user
-            class Context:
-                def __init__(self, user):
-                    self.user = user
-                    
-            context = Context(self.user)
-            
-            # Parse and validate the subscription
-            if 'tradeChatMessage' in query:
-                await self.start_chat_message_subscription(sub_id, variables, context)
-            elif 'tradeStatusUpdate' in query:
-                await self.start_status_update_subscription(sub_id, variables, context)
-            elif 'typingIndicator' in query:
-                await self.start_typing_subscription(sub_id, variables, context)
-            else:
-                await self.send_error(f'Unknown subscription type for ID {sub_id}')
-                
+            await self.start_subscription(sub_id, topic, variables)
         except Exception as e:
-            await self.send_error(f'Subscription error: {str(e)}')
-            
+            await self.send_error(f'Subscription error: {str(e)}', sub_id)
+
     async def handle_stop(self, message):
         """Handle GraphQL subscription stop"""
         sub_id = message.get('id')
         if sub_id:
-            await self.unsubscribe(sub_id)
-            
-    async def start_chat_message_subscription(self, sub_id, variables, context):
-        """Start chat message subscription"""
-        trade_id = variables.get('tradeId')
-        if not trade_id:
-            await self.send_error('tradeId required for chat message subscription')
-            return
-            
-        # Verify user has access to this trade
-        has_access = await self.check_trade_access(trade_id, context.user)
-        if not has_access:
-            await self.send_error('Access denied to this trade')
-            return
-            
-        # Join the channel group for this trade
-        group_name = f'trade_chat_{trade_id}'
-        await self.channel_layer.group_add(group_name, self.channel_name)
-        
-        # Store subscription info
-        self.subscriptions[sub_id] = {
-            'type': 'chat_message',
-            'trade_id': trade_id,
-            'group_name': group_name
-        }
-        
-        # Send initial chat history
-        await self.send_chat_history(sub_id, trade_id)
-        
-    async def start_status_update_subscription(self, sub_id, variables, context):
-        """Start trade status update subscription"""
-        trade_id = variables.get('tradeId')
-        if not trade_id:
-            await self.send_error('tradeId required for status update subscription')
-            return
-            
-        has_access = await self.check_trade_access(trade_id, context.user)
-        if not has_access:
-            await self.send_error('Access denied to this trade')
-            return
-            
-        group_name = f'trade_status_{trade_id}'
-        await self.channel_layer.group_add(group_name, self.channel_name)
-        
-        self.subscriptions[sub_id] = {
-            'type': 'status_update',
-            'trade_id': trade_id,
-            'group_name': group_name
-        }
-        
-    async def start_typing_subscription(self, sub_id, variables, context):
-        """Start typing indicator subscription"""
-        trade_id = variables.get('tradeId')
-        if not trade_id:
-            await self.send_error('tradeId required for typing subscription')
+            # graphql-transport-ws: a client "complete" is not echoed back
+            await self.unsubscribe(sub_id, notify=self.protocol == GRAPHQL_WS)
+
+    async def start_subscription(self, sub_id, topic, variables):
+        key = variables.get(topic.key_variable)
+        if not key:
+            await self.send_error(f'{topic.key_variable} required for {topic.field} subscription', sub_id)
             return
-            
-        has_access = await self.check_trade_access(trade_id, context.user)
-        if not has_access:
-            await self.send_error('Access denied to this trade')
+        key = str(key)
+
+        # Verify user has access to this trade (once per trade per connection)
+        if key not in self._trade_access:
+            self._trade_access[key] = await self.check_trade_access(key, self.user)
+        if not self._trade_access[key]:
+            await self.send_error('Access denied to this trade', sub_id)
             return
-            
-        group_name = f'trade_typing_{trade_id}'
-        await self.channel_layer.group_add(group_name, self.channel_name)
-        
+
+        group_name = topic.group(key)
+        if self._group_refs[group_name] == 0:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+        self._group_refs[group_name] += 1
+
         self.subscriptions[sub_id] = {
-            'type': 'typing',
-            'trade_id': trade_id,
-            'group_name': group_name
+            'field': topic.field,
+            'key': key,
+            'group_name': group_name,
         }
-        
-    async def unsubscribe(self, sub_id):
+
+        if topic.history:
+            await self.send_history(sub_id, topic, key, variables)
+
+    async def unsubscribe(self, sub_id, notify=True):
         """Remove subscription"""
-        if sub_id in self.subscriptions:
-            subscription = self.subscriptions[sub_id]
-            group_name = subscription['group_name']
-            
-            # Leave the channel group
+        subscription = self.subscriptions.pop(sub_id, None)
+        if subscription is None:
+            return
+
+        # Leave the channel group once no subscription reads from it
+        group_name = subscription['group_name']
+        self._group_refs[group_name] -= 1
+        if self._group_refs[group_name] <= 0:
+            del self._group_refs[group_name]
             await self.channel_layer.group_discard(group_name, self.channel_name)
-            
-            # Remove from subscriptions
-            del self.subscriptions[sub_id]
-            
-            # Send complete message
+
+        if notify:
             await self.send(text_data=json.dumps({
                 'type': 'complete',
                 'id': sub_id
             }))
-            
-    async def send_error(self, error_message):
+
+    async def send_error(self, error_message, sub_id=None):
         """Send GraphQL error message"""
-        await self.send(text_data=json.dumps({
-            'type': 'error',
-            'payload': {'message': error_message}
-        }))
-        
+        if self.protocol == GRAPHQL_TRANSPORT_WS:
+            if sub_id is None:
+                # Protocol-level errors have no frame in graphql-transport-ws
+                await self.close(code=4400)
+                return
+            if sub_id in self.subscriptions:
+                await self.unsubscribe(sub_id, notify=False)
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'id': sub_id,
+                'payload': [{'message': error_message}]
+            }))
+            return
+        frame = {'type': 'error', 'payload': {'message': error_message}}
+        if sub_id is not None:
+            frame['id'] = sub_id
+        await self.send(text_data=json.dumps(frame))
+
+    async def send_encoded(self, sub_id, encoded_payload):
+        """Send a pre-encoded ExecutionResult without re-serializing it."""
+        frame_type = 'next' if self.protocol == GRAPHQL_TRANSPORT_WS else 'data'
+        await self.send(text_data='{"type":"%s","id":%s,"payload":%s}' % (
+            frame_type, json.dumps(sub_id), encoded_payload))
+
     async def send_data(self, sub_id, data):
         """Send GraphQL subscription data"""
-        await self.send(text_data=json.dumps({
-            'type': 'data',
-            'id': sub_id,
-            'payload': data
-        }))
-        
+        await self.send_encoded(sub_id, json.dumps(data, default=str))
+
     # Channel layer message handlers
+    async def dispatch_event(self, event):
+        """Fan one group message out to every matching subscription.
+
+        The payload for each topic is encoded at most once per event: taken
+        pre-encoded from the publisher (``gql``) when present, built here
+        otherwise (publishers that predate the registry).
+        """
+        trade_id = event.get('trade_id')
+        trade_id = str(trade_id) if trade_id is not None else None
+        pre_encoded = event.get('gql') or {}
+
+        for topic in topics_for_event(event.get('type')):
+            if topic.skip and topic.skip(event, self.user):
+                continue
+            sub_ids = [
+                sub_id for sub_id, sub in self.subscriptions.items()
+                if sub['field'] == topic.field and (trade_id is None or sub['key'] == trade_id)
+            ]
+            key = trade_id
+            if key is None:
+                # Untagged event: only deliverable when unambiguous
+                keys = {self.subscriptions[s]['key'] for s in sub_ids}
+                if len(keys) != 1:
+                    continue
+                key = keys.pop()
+            if not sub_ids:
+                continue
+            encoded = pre_encoded.get(topic.field) or topic.encode(topic.build(event, key))
+            for sub_id in sub_ids:
+                await self.send_encoded(sub_id, encoded)
+
     async def chat_message(self, event):
         """Handle incoming chat message from channel layer"""
-        # Find subscription ID for this trade
-        message_data = event['message']
-        trade_id = str(event.get('trade_id'))
-        
-        for sub_id, subscription in self.subscriptions.items():
-            if (subscription['type'] == 'chat_message' and 
-                subscription['trade_id'] == trade_id):
-                
-                # Format GraphQL response
-                await self.send_data(sub_id, {
-                    'data': {
-                        'tradeChatMessage': {
-                            'tradeId': trade_id,
-                            'message': message_data
-                        }
-                    }
-                })
-                
-    async def status_update(self, event):
+        await self.dispatch_event(event)
+
+    async def trade_status_update(self, event):
         """Handle trade status update from channel layer"""
-        trade_id = str(event.get('trade_id'))
-        
-        for sub_id, subscription in self.subscriptions.items():
-            if (subscription['type'] == 'status_update' and 
-                subscription['trade_id'] == trade_id):
-                
-                await self.send_data(sub_id, {
-                    'data': {
-                        'tradeStatusUpdate': {
-                            'tradeId': trade_id,
-                            'status': event.get('status'),
-                            'updatedBy': event.get('updated_by')
-                        }
-                    }
-                })
-                
+        await self.dispatch_event(event)
+
+    async def status_update(self, event):
+        await self.dispatch_event(event)
+
     async def typing_indicator(self, event):
         """Handle typing indicator from channel layer"""
-        trade_id = str(event.get('trade_id'))
-        
-        # Don't send typing indicator back to sender
-        if event.get('user_id') == str(self.user.id):
-            return
-            
-        for sub_id, subscription in self.subscriptions.items():
-            if (subscription['type'] == 'typing' and 
-                subscription['trade_id'] == trade_id):
-                
-                await self.send_data(sub_id, {
-                    'data': {
-                        'typingIndicator': {
-                            'tradeId': trade_id,
-                            'userId': event.get('user_id'),
-                            'username': event.get('username'),
-                            'isTyping': event.get('is_typing')
-                        }
-                    }
-                })
-    
+        await self.dispatch_event(event)
+
     # Database operations
     @database_sync_to_async
     def authenticate_token(self, token):
@@ -299,98 +308,39 @@ class GraphQLSubscriptionConsumer(AsyncWebsocketConsumer):
             return user
         except Exception:
             return None
-            
+
     @database_sync_to_async
     def check_trade_access(self, trade_id, user):
         """Check if user has access to trade"""
         try:
             trade = P2PTrade.objects.get(id=trade_id)
             has_access = (
-                trade.buyer_user == user or 
+                trade.buyer_user == user or
                 trade.seller_user == user or
                 # Check business relationships
                 (trade.buyer_business and trade.buyer_business.accounts.filter(user=user).exists()) or
                 (trade.seller_business and trade.seller_business.accounts.filter(user=user).exists()) or
                 # Fallback to old system
-                trade.buyer == user or 
+                trade.buyer == user or
                 trade.seller == user
             )
             return has_access
-        except P2PTrade.DoesNotExist:
+        except (P2PTrade.DoesNotExist, ValueError):
             return False
-            
-    async def send_chat_history(self, sub_id, trade_id):
-        """Send initial chat history for subscription"""
-        history = await self.get_chat_history(trade_id)
-        
-        for message in history:
-            await self.send_data(sub_id, {
-                'data': {
-                    'tradeChatMessage': {
-                        'tradeId': trade_id,
-                        'message': message
-                    }
-                }
-            })
-            
-    @database_sync_to_async
-    def get_chat_history(self, trade_id):
-        """Get chat history for trade"""
+
+    async def send_history(self, sub_id, topic, key, variables):
+        """Replay history for a new subscription.
+
+        ``lastMessageId`` turns the replay into a delta (a reconnecting client
+        only gets what it missed); ``historyLimit`` sizes the page.
+        """
+        last_id = variables.get('lastMessageId')
         try:
-            trade = P2PTrade.objects.get(id=trade_id)
-            messages = P2PMessage.objects.filter(trade=trade).order_by('created_at')
-            
-            history = []
-            for message in messages:
-                # Format message similar to WebSocket consumer
-                sender_info = {}
-                if message.sender_user:
-                    sender_info = {
-                        'id': str(message.sender_user.id),
-                        'username': message.sender_user.username,
-                        'firstName': message.sender_user.first_name,
-                        'lastName': message.sender_user.last_name,
-                        'type': 'user'
-                    }
-                elif message.sender_business:
-                    business_account = message.sender_business.accounts.first()
-                    if business_account:
-                        sender_info = {
-                            'id': str(business_account.user.id),
-                            'username': business_account.user.username,
-                            'firstName': business_account.user.first_name,
-                            'lastName': business_account.user.last_name,
-                            'type': 'business',
-                            'businessName': message.sender_business.name,
-                            'businessId': str(message.sender_business.id)
-                        }
-                    else:
-                        sender_info = {
-                            'id': str(message.sender_business.id),
-                            'username': message.sender_business.name,
-                            'firstName': message.sender_business.name,
-                            'lastName': '',
-                            'type': 'business'
-                        }
-                else:
-                    # Fallback
-                    sender_info = {
-                        'id': str(message.sender.id),
-                        'username': message.sender.username,
-                        'firstName': message.sender.first_name,
-                        'lastName': message.sender.last_name,
-                        'type': 'user'
-                    }
-                
-                history.append({
-                    'id': message.id,
-                    'sender': sender_info,
-                    'content': message.content,
-                    'messageType': message.message_type,
-                    'createdAt': message.created_at.isoformat(),
-                    'isRead': message.is_read,
-                })
-            
-            return history
-        except P2PTrade.DoesNotExist:
-            return []
\ No newline at end of file
+            last_id = int(last_id) if last_id not in (None, '') else None
+        except (TypeError, ValueError):
+            last_id = None
+        limit = variables.get('historyLimit') or HISTORY_PAGE_SIZE
+
+        history = await database_sync_to_async(topic.history)(key, last_id, limit)
+        for payload in history:
+            await self.send_encoded(sub_id, topic.encode(payload))
@@ -0,0 +1,256 @@
+"""Topic registry and channel-layer fan-out for GraphQL subscriptions.
+
+Every subscription the app exposes is a *topic*: a root field name (the
+resolver, e.g. ``tradeChatMessage``), the channel-layer event types that feed
+it and a builder that turns one event into that field's payload. Topics keyed
+by trade share the ``trade_chat_{id}`` group the trade flows already publish
+into, so a connection joins each trade group once no matter how many fields
+it subscribes to, and the legacy ``ws/trade/<id>/`` consumer keeps receiving
+the very same messages.
+
+Publishers go through ``publish_trade_event``: the GraphQL result for the
+event is encoded ONCE there and travels inside the group message under
+``gql``, so each consumer only splices the pre-encoded bytes into its
+protocol frame instead of rebuilding and re-encoding per subscriber.
+"""
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+# Chat replay on subscription start. Without lastMessageId the newest page is
+# sent; with it only the delta after that id (capped at the same page size).
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+
+
+def trade_group(trade_id):
+    return f'trade_chat_{trade_id}'
+
+
+class SubscriptionTopic:
+    """One subscribable root field.
+
+    ``build(event, key)`` returns the field payload for a channel-layer event.
+    ``skip(event, user)`` lets a topic drop events for a given connection
+    (e.g. echoing a user's own typing indicator). ``history`` is an optional
+    sync loader ``(key, last_id, limit) -> [payload, ...]`` replayed when the
+    subscription starts.
+    """
+
+    def __init__(self, field, event_types, build, group=trade_group,
+                 key_variable='tradeId', skip=None, history=None):
+        self.field = field
+        self.event_types = tuple(event_types)
+        self.build = build
+        self.group = group
+        self.key_variable = key_variable
+        self.skip = skip
+        self.history = history
+
+    def encode(self, payload):
+        """Encode the GraphQL ``ExecutionResult`` for this field once."""
+        return encode_result(self.field, payload)
+
+
+TOPICS = {}
+_TOPICS_BY_EVENT = {}
+
+
+def register_topic(topic):
+    TOPICS[topic.field] = topic
+    for event_type in topic.event_types:
+        _TOPICS_BY_EVENT.setdefault(event_type, []).append(topic)
+    return topic
+
+
+def topics_for_event(event_type):
+    return _TOPICS_BY_EVENT.get(event_type, ())
+
+
+def encode_result(field, payload):
+    return json.dumps({'data': {field: payload}}, separators=(',', ':'), default=str)
+
+
+def root_field(query):
+    """Root field of the subscription operation in ``query``, or None.
+
+    Parses the document rather than substring-matching, so a query that merely
+    mentions another field in a fragment or comment cannot be routed wrong.
+    """
+    try:
+        from graphql import parse
+        from graphql.language.ast import OperationDefinitionNode, FieldNode
+        document = parse(query)
+    except Exception:
+        return None
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode) and definition.operation.value == 'subscription':
+            for selection in definition.selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    return selection.name.value
+    return None
+
+
+# ── Trade topics ────────────────────────────────────────────────────────────
+
+def _chat_payload(event, trade_id):
+    return {'tradeId': str(trade_id), 'message': event.get('message')}
+
+
+def _status_payload(event, trade_id):
+    payload = {
+        'tradeId': str(trade_id),
+        'status': event.get('status'),
+        'updatedBy': event.get('updated_by'),
+    }
+    if event.get('expires_at'):
+        payload['expiresAt'] = event['expires_at']
+    return payload
+
+
+def _typing_payload(event, trade_id):
+    return {
+        'tradeId': str(trade_id),
+        'userId': event.get('user_id'),
+        'username': event.get('username'),
+        'isTyping': event.get('is_typing'),
+    }
+
+
+def _is_own_typing(event, user):
+    return user is not None and event.get('user_id') == str(user.id)
+
+
+def chat_message_payload(message):
+    """Client shape of a ``P2PMessage`` (matches the legacy consumers)."""
+    if message.sender_user_id:
+        sender = message.sender_user
+        sender_info = {
+            'id': str(sender.id),
+            'username': sender.username,
+            'firstName': sender.first_name,
+            'lastName': sender.last_name,
+            'type': 'user',
+        }
+    elif message.sender_business_id:
+        business = message.sender_business
+        # accounts are prefetched by load_chat_history; .first() would re-query
+        accounts = sorted(business.accounts.all(), key=lambda a: a.pk)
+        if accounts:
+            account_user = accounts[0].user
+            sender_info = {
+                'id': str(account_user.id),
+                'username': account_user.username,
+                'firstName': account_user.first_name,
+                'lastName': account_user.last_name,
+                'type': 'business',
+                'businessName': business.name,
+                'businessId': str(business.id),
+            }
+        else:
+            sender_info = {
+                'id': str(business.id),
+                'username': business.name,
+                'firstName': business.name,
+                'lastName': '',
+                'type': 'business',
+            }
+    else:
+        sender = message.sender
+        sender_info = {
+            'id': str(sender.id),
+            'username': sender.username,
+            'firstName': sender.first_name,
+            'lastName': sender.last_name,
+            'type': 'user',
+        }
+    return {
+        'id': message.id,
+        'sender': sender_info,
+        'content': message.content,
+        'messageType': message.message_type,
+        'createdAt': message.created_at.isoformat(),
+        'isRead': message.is_read,
+    }
+
+
+def load_chat_history(trade_id, last_message_id=None, limit=HISTORY_PAGE_SIZE):
+    """Chat replay for a (re)subscribing client, oldest first.
+
+    With ``last_message_id`` only newer messages are returned (a reconnect
+    delta); otherwise the newest ``limit`` messages. Senders are joined in the
+    same query so a page costs a fixed number of queries, not one per message.
+    """
+    from .models import P2PMessage
+
+    limit = max(1, min(int(limit or HISTORY_PAGE_SIZE), HISTORY_MAX_PAGE_SIZE))
+    qs = (
+        P2PMessage.objects.filter(trade_id=trade_id)
+        .select_related('sender_user', 'sender_business', 'sender')
+        .prefetch_related('sender_business__accounts__user')
+    )
+    if last_message_id is not None:
+        messages = list(qs.filter(id__gt=last_message_id).order_by('id')[:limit])
+    else:
+        messages = list(qs.order_by('-id')[:limit])
+        messages.reverse()
+    return [{'tradeId': str(trade_id), 'message': chat_message_payload(m)} for m in messages]
+
+
+register_topic(SubscriptionTopic(
+    field='tradeChatMessage',
+    event_types=('chat_message',),
+    build=_chat_payload,
+    history=load_chat_history,
+))
+register_topic(SubscriptionTopic(
+    field='tradeStatusUpdate',
+    event_types=('trade_status_update', 'status_update'),
+    build=_status_payload,
+))
+register_topic(SubscriptionTopic(
+    field='typingIndicator',
+    event_types=('typing_indicator',),
+    build=_typing_payload,
+    skip=_is_own_typing,
+))
+
+
+# ── Publishing ──────────────────────────────────────────────────────────────
+
+def prepare_trade_event(trade_id, event):
+    """Stamp ``trade_id`` and the pre-encoded GraphQL result(s) on ``event``."""
+    event = dict(event)
+    event['trade_id'] = str(trade_id)
+    encoded = {}
+    for topic in topics_for_event(event.get('type')):
+        encoded[topic.field] = topic.encode(topic.build(event, trade_id))
+    if encoded:
+        event['gql'] = encoded
+    return event
+
+
+async def apublish_trade_event(trade_id, event, channel_layer=None):
+    channel_layer = channel_layer or get_channel_layer()
+    if not channel_layer:
+        return
+    await channel_layer.group_send(trade_group(trade_id), prepare_trade_event(trade_id, event))
+
+
+def publish_trade_event(trade_id, event):
+    """Send one trade event to every chat/subscription consumer of the trade.
+
+    Best-effort like the call sites it replaces: a channel-layer outage must
+    never fail the mutation that triggered the broadcast.
+    """
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(trade_group(trade_id), prepare_trade_event(trade_id, event))
+    except Exception:
+        logger.warning('trade event publish failed trade=%s type=%s', trade_id, event.get('type'), exc_info=True)
@@ -1,3 +1,129 @@
-from django.test import TestCase
+"""GraphQL subscription engine: routing, fan-out and both wire protocols."""
+import json
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, override_settings
+
+from p2p_exchange.subscription_consumer import GraphQLSubscriptionConsumer
+from p2p_exchange.subscriptions import prepare_trade_event, root_field, trade_group
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+CHAT_QUERY = 'subscription OnChat($tradeId: ID!) { tradeChatMessage(tradeId: $tradeId) { tradeId } }'
+STATUS_QUERY = 'subscription { tradeStatusUpdate(tradeId: "7") { status } }'
+
+
+class RootFieldTests(SimpleTestCase):
+    def test_subscription_root_field(self):
+        self.assertEqual(root_field(CHAT_QUERY), 'tradeChatMessage')
+
+    def test_field_named_in_a_fragment_does_not_route(self):
+        query = ('fragment F on X { typingIndicator } '
+                 'subscription { tradeStatusUpdate(tradeId: "1") { ...F } }')
+        self.assertEqual(root_field(query), 'tradeStatusUpdate')
+
+    def test_unparseable_document(self):
+        self.assertIsNone(root_field('subscription {'))
+
+
+class PrepareTradeEventTests(SimpleTestCase):
+    def test_result_is_encoded_once_by_the_publisher(self):
+        event = prepare_trade_event(7, {'type': 'trade_status_update', 'status': 'PAID', 'updated_by': '3'})
+        self.assertEqual(event['trade_id'], '7')
+        self.assertEqual(
+            json.loads(event['gql']['tradeStatusUpdate']),
+            {'data': {'tradeStatusUpdate': {'tradeId': '7', 'status': 'PAID', 'updatedBy': '3'}}},
+        )
+
+    def test_unknown_event_type_carries_no_payload(self):
+        self.assertNotIn('gql', prepare_trade_event(7, {'type': 'something_else'}))
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class SubscriptionConsumerTests(SimpleTestCase):
+    def setUp(self):
+        user = SimpleNamespace(id=3, is_authenticated=True)
+        patches = [
+            mock.patch.object(GraphQLSubscriptionConsumer, 'authenticate_token', mock.AsyncMock(return_value=user)),
+            mock.patch.object(GraphQLSubscriptionConsumer, 'check_trade_access', mock.AsyncMock(return_value=True)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def _connect(self, protocol):
+        communicator = WebsocketCommunicator(
+            GraphQLSubscriptionConsumer.as_asgi(), '/graphql/subscriptions/', subprotocols=[protocol])
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, protocol)
+        return communicator
+
+    async def test_graphql_transport_ws_fan_out(self):
+        communicator = await self._connect('graphql-transport-ws')
+        await communicator.send_json_to({'type': 'connection_init', 'payload': {'token': 't'}})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'connection_ack'})
+
+        for sub_id in ('a', 'b'):
+            await communicator.send_json_to({
+                'type': 'subscribe', 'id': sub_id,
+                'payload': {'query': STATUS_QUERY, 'variables': {'tradeId': '7'}},
+            })
+        await communicator.send_json_to({'type': 'ping'})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'pong'})
+
+        await get_channel_layer().group_send(
+            trade_group(7), prepare_trade_event(7, {'type': 'trade_status_update', 'status': 'PAID', 'updated_by': '9'}))
+        frames = [await communicator.receive_json_from() for _ in range(2)]
+        self.assertEqual({f['id'] for f in frames}, {'a', 'b'})
+        for frame in frames:
+            self.assertEqual(frame['type'], 'next')
+            self.assertEqual(frame['payload']['data']['tradeStatusUpdate']['status'], 'PAID')
+        await communicator.disconnect()
+
+    async def test_transport_ws_subscribe_before_init_is_unauthorized(self):
+        communicator = await self._connect('graphql-transport-ws')
+        await communicator.send_json_to({
+            'type': 'subscribe', 'id': 'a', 'payload': {'query': STATUS_QUERY, 'variables': {'tradeId': '7'}}})
+        closed = await communicator.receive_output()
+        self.assertEqual(closed, {'type': 'websocket.close', 'code': 4401})
+
+    async def test_legacy_graphql_ws_delta_history_and_own_typing_suppressed(self):
+        from p2p_exchange import subscriptions
+        communicator = await self._connect('graphql-ws')
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'connection_ack'})
+        await communicator.send_json_to({'type': 'connection_init', 'payload': {'authToken': 't'}})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'connection_ack'})
+
+        with mock.patch.object(subscriptions.TOPICS['tradeChatMessage'], 'history',
+                               return_value=[{'tradeId': '7', 'message': {'id': 12}}]) as history:
+            await communicator.send_json_to({
+                'type': 'start', 'id': '1',
+                'payload': {'query': CHAT_QUERY, 'variables': {'tradeId': 7, 'lastMessageId': '11'}},
+            })
+            frame = await communicator.receive_json_from()
+        history.assert_called_once_with('7', 11, subscriptions.HISTORY_PAGE_SIZE)
+        self.assertEqual(frame['type'], 'data')
+        self.assertEqual(frame['payload']['data']['tradeChatMessage']['message'], {'id': 12})
+
+        await communicator.send_json_to({
+            'type': 'start', 'id': '2',
+            'payload': {'query': 'subscription { typingIndicator(tradeId: "7") { isTyping } }',
+                        'variables': {'tradeId': '7'}},
+        })
+        layer = get_channel_layer()
+        await layer.group_send(trade_group(7), prepare_trade_event(
+            7, {'type': 'typing_indicator', 'user_id': '3', 'username': 'me', 'is_typing': True}))
+        await layer.group_send(trade_group(7), prepare_trade_event(
+            7, {'type': 'typing_indicator', 'user_id': '4', 'username': 'them', 'is_typing': True}))
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame['id'], '2')
+        self.assertEqual(frame['payload']['data']['typingIndicator']['userId'], '4')
+        self.assertTrue(await communicator.receive_nothing())
+
+        await communicator.send_json_to({'type': 'stop', 'id': '2'})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'complete', 'id': '2'})
+        await communicator.disconnect()
@@ -52,7 +52,10 @@ def confirm_bsc_payment(self, payment_id: int, batch_id: int):
         return
 
     if batch.status in ('signed', 'sent'):
-        raise self.retry(countdown=15)
+        # Slower while the receipt tracker runs: it re-dispatches this task
+        # once the batch settles, the retry only covers a tracker that died.
+        from cusd_plus.receipt_tracker import fallback_countdown
+        raise self.retry(countdown=fallback_countdown(15))
 
     if batch.status != 'confirmed':  # reverted / noop_failed / reorged
         p.status = 'FAILED'
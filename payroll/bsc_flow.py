@@ -191,6 +191,21 @@ def escrow_usdt_raw(business_addr: str) -> int:
     return int(out, 16) if out and out != '0x' else 0
 
 
+def escrow_pools_raw(business_addr: str) -> dict:
+    """Both pools in ONE round trip: {ASSET_CUSD_PLUS: shares, ASSET_USDT:
+    usdt}, a pool whose own read failed mapped to None. Raises only when the
+    round trip itself does — the read-side callers decide what unknown means.
+    The write path keeps escrow_raw: a gate checks one pool, fresh."""
+    from cusd_plus.multicall import as_uint, read_many
+
+    payroll, word = _payroll_address(), _addr_word(business_addr)
+    shares, usdt = read_many([
+        (payroll, '0x' + SEL_ESCROW_SHARES + word),
+        (payroll, '0x' + SEL_ESCROW_USDT + word),
+    ])
+    return {ASSET_CUSD_PLUS: as_uint(shares), ASSET_USDT: as_uint(usdt)}
+
+
 def escrow_raw(business_addr: str, asset: int) -> int:
     """Parked amount in one pool, in that asset's own units."""
     return (escrow_usdt_raw(business_addr) if asset == ASSET_USDT
@@ -212,16 +227,24 @@ def escrow_split_usd(business_addr: str) -> dict:
         return out
     key = business_addr.lower()
     try:
-        from cusd_plus import vault as cp_vault
-        shares = escrow_shares_raw(key)
-        out['CUSD_PLUS'] = (0.0 if shares == 0
-                            else (shares * cp_vault.p_plus_wad()) / (WAD * WAD))
+        pools = escrow_pools_raw(key)
     except Exception:  # noqa: BLE001
+        logger.warning('[PAYROLL][BSC] escrow read failed for %s', key)
+        return out
+    shares = pools[ASSET_CUSD_PLUS]
+    if shares is None:
         logger.warning('[PAYROLL][BSC] cUSD+ escrow read failed for %s', key)
-    try:
-        out['USDT'] = escrow_usdt_raw(key) / WAD
-    except Exception:  # noqa: BLE001
+    else:
+        try:
+            from cusd_plus import vault as cp_vault
+            out['CUSD_PLUS'] = (0.0 if shares == 0
+                                else (shares * cp_vault.p_plus_wad()) / (WAD * WAD))
+        except Exception:  # noqa: BLE001
+            logger.warning('[PAYROLL][BSC] cUSD+ escrow pricing failed for %s', key)
+    if pools[ASSET_USDT] is None:
         logger.warning('[PAYROLL][BSC] USDT escrow read failed for %s', key)
+    else:
+        out['USDT'] = pools[ASSET_USDT] / WAD
     return out
 
 
@@ -232,14 +255,14 @@ def fundable_split_usd(business_addr: str) -> dict:
     if not business_addr:
         return out
     from cusd_plus import vault as cp_vault
+    key = business_addr.lower()
     try:
-        out['CUSD_PLUS'] = cp_vault.position_usd(business_addr)
-    except Exception:  # noqa: BLE001
-        logger.warning('[PAYROLL][BSC] cUSD+ wallet read failed for %s', business_addr)
-    try:
-        out['USDT'] = cp_vault.usdt_balance_raw(business_addr) / WAD
+        # Both pools in one round trip.
+        balances = cp_vault.savings_balances([key])
+        out['CUSD_PLUS'] = balances['position_usd'][key]
+        out['USDT'] = balances['usdt_raw'][key] / WAD
     except Exception:  # noqa: BLE001
-        logger.warning('[PAYROLL][BSC] USDT wallet read failed for %s', business_addr)
+        logger.warning('[PAYROLL][BSC] wallet balance read failed for %s', business_addr)
     return out
 
 
@@ -250,6 +273,25 @@ def is_onchain_delegate(business_addr: str, delegate_addr: str) -> bool:
     return bool(int(out, 16)) if out and out != '0x' else False
 
 
+def delegate_flags(business_addr: str, delegate_addrs) -> dict:
+    """isDelegate for every address in ONE round trip: {addr: bool}, or
+    None for an address whose own call failed. A payroll screen asks about
+    every employee at once; one eth_call each made it cost N sequential
+    RPCs. Raises only when the round trip itself does."""
+    from cusd_plus.multicall import as_uint, read_many
+
+    addrs = list(delegate_addrs)
+    payroll, word = _payroll_address(), _addr_word(business_addr)
+    results = read_many([
+        (payroll, '0x' + SEL_IS_DELEGATE + word + _addr_word(a)) for a in addrs
+    ])
+    flags = {}
+    for a, ret in zip(addrs, results):
+        value = as_uint(ret)
+        flags[a] = None if value is None else bool(value)
+    return flags
+
+
 # ── Read side — what the payroll screens actually display ────────────────
 #
 # The WRITE path moved to ConfioPayrollVault first and the reads stayed on
@@ -259,7 +301,7 @@ def is_onchain_delegate(business_addr: str, delegate_addr: str) -> bool:
 # also what the client derives activation from. These are the BSC answers to
 # the same two questions the Algorand resolvers answer.
 
-ESCROW_TTL = 30              # matches cusd_plus.vault.POSITION_TTL
+ESCROW_TTL = 30              # matches BscBalanceService.FRESH_TTL
 ESCROW_LAST_TTL = 7 * 24 * 3600
 DELEGATES_TTL = 30
 
@@ -316,9 +358,13 @@ def escrow_usd(business_addr: str):
     ver = cache.get(f'payroll_escrow_ver:{key}') or 0
     try:
         from cusd_plus import vault as cp_vault
-        shares = escrow_shares_raw(key)
+        pools = escrow_pools_raw(key)
+        if None in pools.values():
+            # Half a sum is not a balance: treat it like any other failure.
+            raise RuntimeError('escrow pool read failed')
+        shares = pools[ASSET_CUSD_PLUS]
         value = 0.0 if shares == 0 else (shares * cp_vault.p_plus_wad()) / (WAD * WAD)
-        value += escrow_usdt_raw(key) / WAD
+        value += pools[ASSET_USDT] / WAD
     except Exception:  # noqa: BLE001 — a read failure must not break the screen
         logger.warning('[PAYROLL][BSC] escrow read failed for %s', business_addr,
                        exc_info=True)
@@ -382,20 +428,26 @@ def onchain_delegates(business_addr: str, candidate_addrs, with_status: bool = F
 
     degraded = False
     if unknown:
-        # One eth_call PER address, each in its own try. Wrapping the whole
-        # comprehension meant a single dead call discarded every other
-        # candidate's successful answer along with it.
+        # Every unknown pair in ONE round trip, but each answer isolated: a
+        # single dead call must not discard every other candidate's
+        # successful answer along with it (delegate_flags maps it to None).
         stale = cache.get_many([last[a] for a in unknown])
+        try:
+            flags = delegate_flags(key, unknown)
+        except Exception:  # noqa: BLE001
+            logger.warning('[PAYROLL][BSC] delegate read failed for %s',
+                           business_addr, exc_info=True)
+            flags = {}
         fresh = {}
         for a in unknown:
-            try:
-                fresh[a] = is_onchain_delegate(key, a)
-            except Exception:  # noqa: BLE001
+            if flags.get(a) is not None:
+                fresh[a] = flags[a]
+            else:
                 # A node outage is not a revocation: fall back to what the
                 # chain last said about THIS pair. With nothing last-known we
                 # have no answer at all, which is not the same as "no".
                 logger.warning('[PAYROLL][BSC] delegate read failed for %s/%s',
-                               business_addr, a, exc_info=True)
+                               business_addr, a)
                 remembered = stale.get(last[a])
                 if remembered is None:
                     degraded = True
@@ -493,9 +545,10 @@ def funding_token(business_account, actor_user) -> str:
     addr = ((getattr(business_account, 'bsc_address', None) or '') or '').lower()
     if addr:
         try:
-            if escrow_shares_raw(addr) > 0:
+            pools = escrow_pools_raw(addr)
+            if pools[ASSET_CUSD_PLUS]:
                 return 'CUSD_PLUS'
-            if escrow_usdt_raw(addr) > 0:
+            if pools[ASSET_USDT]:
                 return 'USDT'
         except Exception:  # noqa: BLE001 — an RPC hiccup falls through to status
             logger.warning('[PAYROLL][BSC] escrow probe failed for %s', addr,
@@ -832,8 +885,77 @@ def _notify_recipient_needs_app(recipient_user, business) -> None:
         logger.exception('payroll recipient-needs-app notification failed')
 
 
-def prepare_bsc_payroll_payout(user, jwt_ctx, item) -> dict:
-    from cusd_plus import vault as cp_vault
+class _PayoutReads:
+    """What a payout prepare reads beyond the item itself: the business
+    context, the delegate check, the share price, both escrow pools and
+    what the run has already paid against its cap.
+
+    The single-item prepare asks each one as it goes, fresh, exactly as the
+    write path always has. The run executor (payroll.run_executor) builds
+    one with `for_run`: both pools in one Multicall3 pass, everything else
+    once per run — and `reserve` takes each prepared item's spend off the
+    top, so item N is priced against what items 1..N-1 leave behind rather
+    than against the same full pool."""
+
+    def __init__(self, business, business_addr, signer_addr):
+        self.business = business
+        self.business_addr = business_addr
+        self.signer_addr = signer_addr
+        self._delegate = None
+        self._pps = None
+        self._pools = None
+        self._paid_base = None
+        self._reserved = {ASSET_CUSD_PLUS: 0, ASSET_USDT: 0}
+        self._reserved_gross = Decimal('0')
+
+    @classmethod
+    def for_run(cls, business, business_addr, signer_addr, run):
+        from django.db.models import Sum
+
+        reads = cls(business, business_addr, signer_addr)
+        pools = escrow_pools_raw(business_addr)
+        if None in pools.values():
+            raise RuntimeError('escrow pool unreadable')
+        reads._pools = pools
+        if getattr(run, 'cap_amount', None):
+            reads._paid_base = run.items.filter(
+                status__in=('SUBMITTED', 'CONFIRMED'), deleted_at__isnull=True,
+            ).aggregate(t=Sum('gross_amount'))['t'] or Decimal('0')
+        return reads
+
+    def is_delegate(self) -> bool:
+        if self._delegate is None:
+            self._delegate = is_onchain_delegate(self.business_addr, self.signer_addr)
+        return self._delegate
+
+    def pps_wad(self) -> int:
+        if self._pps is None:
+            from cusd_plus import vault as cp_vault
+            self._pps = cp_vault.p_plus_wad()
+        return self._pps
+
+    def escrow(self, asset: int) -> int:
+        if self._pools is None:
+            return escrow_raw(self.business_addr, asset)
+        return self._pools[asset] - self._reserved[asset]
+
+    def paid_against_cap(self, run, item) -> Decimal:
+        if self._paid_base is None:
+            from django.db.models import Sum
+            return run.items.filter(
+                status__in=('SUBMITTED', 'CONFIRMED'), deleted_at__isnull=True,
+            ).exclude(id=item.id).aggregate(t=Sum('gross_amount'))['t'] or Decimal('0')
+        return self._paid_base + self._reserved_gross
+
+    def reserve(self, asset: int, units: int, gross) -> None:
+        self._reserved[asset] += units
+        self._reserved_gross += Decimal(gross or 0)
+
+
+def prepare_bsc_payroll_payout(user, jwt_ctx, item, *, reads: _PayoutReads = None) -> dict:
+    """Price one item and store its Payout struct; `reads` is the run
+    executor's shared view of the chain (see _PayoutReads), None for the
+    single-item mutation."""
     from cusd_plus.eligibility import is_ondo_eligible
 
     # The run pins the rail, not the live flag — and this is checked BEFORE
@@ -851,9 +973,12 @@ def prepare_bsc_payroll_payout(user, jwt_ctx, item) -> dict:
         # has exactly one rail; if that rail is paused, say that.
         return {'success': False, 'error': 'bsc_payroll_paused'}
 
-    business, business_account, business_addr, signer_addr, err = _business_context(user, jwt_ctx)
-    if err:
-        return {'success': False, 'error': err}
+    if reads is None:
+        business, _account, business_addr, signer_addr, err = _business_context(user, jwt_ctx)
+        if err:
+            return {'success': False, 'error': err}
+        reads = _PayoutReads(business, business_addr, signer_addr)
+    business, business_addr, signer_addr = reads.business, reads.business_addr, reads.signer_addr
     if item.run.business_id != business.id:
         return {'success': False, 'error': 'not_your_payroll'}
     if item.status not in ('PENDING', 'PREPARED', 'FAILED'):
@@ -868,7 +993,7 @@ def prepare_bsc_payroll_payout(user, jwt_ctx, item) -> dict:
 
     # The signature only helps if the contract will accept it: allowlist
     # membership is checked here (cheap read) AND enforced on-chain.
-    if signer_addr != business_addr and not is_onchain_delegate(business_addr, signer_addr):
+    if signer_addr != business_addr and not reads.is_delegate():
         return {'success': False, 'error': 'not_onchain_delegate'}
 
     net_wei = int(Decimal(item.net_amount) * WAD)
@@ -882,7 +1007,7 @@ def prepare_bsc_payroll_payout(user, jwt_ctx, item) -> dict:
             # Dollars ARE the units — no share price anywhere in this branch.
             return net_wei, fee_wei
         try:
-            pps_wad = cp_vault.p_plus_wad()
+            pps_wad = reads.pps_wad()
         except Exception as exc:  # noqa: BLE001
             logger.warning('[PAYROLL][BSC] pps read failed: %s', exc)
             return None
@@ -914,7 +1039,7 @@ def prepare_bsc_payroll_payout(user, jwt_ctx, item) -> dict:
         cand_net, cand_fee = pair
         if cand_net <= 0:
             continue
-        if escrow_raw(business_addr, candidate) >= cand_net + cand_fee:
+        if reads.escrow(candidate) >= cand_net + cand_fee:
             chosen = candidate
             net_units, fee_units = cand_net, cand_fee
             break
@@ -943,10 +1068,7 @@ def prepare_bsc_payroll_payout(user, jwt_ctx, item) -> dict:
         return {'success': False, 'error': 'run_not_due'}
     cap_amount = getattr(run, 'cap_amount', None)
     if cap_amount:
-        from django.db.models import Sum
-        paid = run.items.filter(
-            status__in=('SUBMITTED', 'CONFIRMED'), deleted_at__isnull=True,
-        ).exclude(id=item.id).aggregate(t=Sum('gross_amount'))['t'] or Decimal('0')
+        paid = reads.paid_against_cap(run, item)
         if paid + Decimal(item.gross_amount or 0) > Decimal(cap_amount):
             logger.warning('[PAYROLL][BSC] run %s would exceed its cap %s (already %s)',
                            run.id, cap_amount, paid)
@@ -1013,31 +1135,18 @@ def prepare_bsc_payroll_payout(user, jwt_ctx, item) -> dict:
     }
 
 
-def submit_bsc_payroll_payout(user, jwt_ctx, item, signature: str) -> dict:
+def _verified_payout(item, business_addr: str, signature: str):
+    """(payout, calldata, None) for a PREPARED item whose stored Payout the
+    signature really authorizes, else (None, None, error). No chain reads:
+    the run executor checks a whole run with it before spending anything."""
     from cusd_plus import sponsor_7702
-    from cusd_plus.sponsor_7702 import (
-        PolicyError,
-        _rpc,
-        acquire_sponsor_nonce_lock,
-        release_sponsor_nonce_lock,
-    )
-    from blockchain.models import SponsoredBatch
-
-    err = _flags_error()
-    if err:
-        return {'success': False, 'error': err}
 
-    business, business_account, business_addr, _signer, err = _business_context(user, jwt_ctx)
-    if err:
-        return {'success': False, 'error': err}
-    if item.run.business_id != business.id:
-        return {'success': False, 'error': 'not_your_payroll'}
     if item.status != 'PREPARED':
-        return {'success': False, 'error': 'item_not_prepared'}
+        return None, None, 'item_not_prepared'
 
     payout = (item.blockchain_data or {}).get('bsc_payout')
     if not payout or payout.get('business') != business_addr:
-        return {'success': False, 'error': 'payout_not_prepared'}
+        return None, None, 'payout_not_prepared'
     if 'net_amount' not in payout:
         # Prepared against the v1 vault (netShares/feeShares, no asset). Its
         # signature is worthless here whatever we do — different typehash,
@@ -1047,17 +1156,107 @@ def submit_bsc_payroll_payout(user, jwt_ctx, item, signature: str) -> dict:
         # normal retry re-prepares them.
         logger.info('[PAYROLL][BSC] %s was prepared against the v1 vault; '
                     're-prepare required', item.internal_id)
-        return {'success': False, 'error': 'payout_not_prepared'}
+        return None, None, 'payout_not_prepared'
     if int(payout['deadline']) < int(time.time()) + 15:
-        return {'success': False, 'error': 'payout_expired'}
+        return None, None, 'payout_expired'
 
     chain_id = int(payout.get('chain_id') or getattr(settings, 'BSC_CHAIN_ID', 56))
     digest = payout_digest(payout, chain_id)
     signer = sponsor_7702.recover_intent_signer(digest, signature)
     if not signer or signer != payout.get('expected_signer'):
-        return {'success': False, 'error': 'bad_payout_signature'}
+        return None, None, 'bad_payout_signature'
+    return payout, payout_calldata(payout, signature), None
+
+
+def _record_submitted(user, item, batch, payout: dict, tx_hash: str, sent) -> None:
+    """Book a broadcast payout on its item and schedule its settlement."""
+    # RECORD BEFORE SCHEDULING. Anything between the broadcast and this save
+    # can fail — a broker outage on apply_async, the process dying — and the
+    # money has already moved. The item would stay PREPARED with no hash and
+    # no recipient_address, which strands it permanently: the reconciler only
+    # sweeps batches still in 'signed', the confirmer refuses anything not
+    # SUBMITTED, and the scanner then books the wage as an external deposit
+    # because nothing carries the hash that proves payroll owns it.
+    #
+    # The locally computed hash is AUTHORITATIVE: it is derived from the
+    # signed payload, while the node's answer is only a claim. A node
+    # returning something else must not desync item.transaction_hash from
+    # batch.tx_hash, which would strand the confirmer forever.
+    from django.utils import timezone
+    if sent and str(sent).lower() != str(tx_hash).lower():
+        logger.error(
+            '[PAYROLL][BSC] node returned %s for a transaction signed as %s — '
+            'keeping the signed hash', sent, tx_hash)
+    item.transaction_hash = tx_hash
+    item.status = 'SUBMITTED'
+    item.executed_by_user = user
+    item.executed_at = timezone.now()
+    item.recipient_address = (payout.get('recipient') or '').lower()
+    item.save(update_fields=['transaction_hash', 'status', 'executed_by_user',
+                             'executed_at', 'recipient_address', 'updated_at'])
+
+    from cusd_plus.tasks import schedule_receipt_check
+    schedule_receipt_check(batch.id, countdown=6)
+
+    try:
+        from cusd_plus.vault import invalidate_position
+        invalidate_position(payout['recipient'])
+    except Exception:  # noqa: BLE001
+        pass
+
+    from .tasks import confirm_bsc_payroll_payout
+    confirm_bsc_payroll_payout.apply_async(args=[item.id, batch.id], countdown=8)
+
+
+def _payout_fee_per_gas(rpc) -> int | None:
+    """Sponsor fee per gas for a payout, None while gas is over the cap."""
+    gas_price = max(int(rpc('eth_gasPrice', []), 16),
+                    int(getattr(settings, 'CUSD_PLUS_GAS_PRICE_FLOOR_WEI', 50_000_000)))
+    price_cap = int(getattr(settings, 'CUSD_PLUS_7702_MAX_GAS_PRICE_WEI', 5_000_000_000))
+    if gas_price > price_cap:
+        return None
+    return min((gas_price * 12) // 10, price_cap)
 
-    calldata = payout_calldata(payout, signature)
+
+def _payout_tx(chain_id: int, nonce: int, fee_per_gas: int, gas: int, calldata: str) -> dict:
+    from eth_utils import to_checksum_address
+
+    return {
+        'type': 2,
+        'chainId': chain_id,
+        'nonce': nonce,
+        'maxPriorityFeePerGas': fee_per_gas,
+        'maxFeePerGas': fee_per_gas,
+        'gas': gas,
+        'to': to_checksum_address(_payroll_address()),
+        'value': 0,
+        'data': calldata,
+        'accessList': [],
+    }
+
+
+def submit_bsc_payroll_payout(user, jwt_ctx, item, signature: str) -> dict:
+    from cusd_plus.sponsor_7702 import (
+        PolicyError,
+        _rpc,
+        acquire_sponsor_nonce_lock,
+        release_sponsor_nonce_lock,
+    )
+    from blockchain.models import SponsoredBatch
+
+    err = _flags_error()
+    if err:
+        return {'success': False, 'error': err}
+
+    business, business_account, business_addr, _signer, err = _business_context(user, jwt_ctx)
+    if err:
+        return {'success': False, 'error': err}
+    if item.run.business_id != business.id:
+        return {'success': False, 'error': 'not_your_payroll'}
+    payout, calldata, err = _verified_payout(item, business_addr, signature)
+    if err:
+        return {'success': False, 'error': err}
+    chain_id = int(payout.get('chain_id') or getattr(settings, 'BSC_CHAIN_ID', 56))
     payroll_addr = _payroll_address()
 
     from blockchain.evm_kms_signer import get_bsc_sponsor_signer_from_settings
@@ -1074,12 +1273,9 @@ def submit_bsc_payroll_payout(user, jwt_ctx, item, signature: str) -> dict:
         return {'success': False, 'error': 'simulation_reverted'}
 
     gas = GAS_PAYOUT_REDEEM if payout['redeem_to_usdt'] else GAS_PAYOUT_TRANSFER
-    gas_price = max(int(_rpc('eth_gasPrice', []), 16),
-                    int(getattr(settings, 'CUSD_PLUS_GAS_PRICE_FLOOR_WEI', 50_000_000)))
-    price_cap = int(getattr(settings, 'CUSD_PLUS_7702_MAX_GAS_PRICE_WEI', 5_000_000_000))
-    if gas_price > price_cap:
+    fee_per_gas = _payout_fee_per_gas(_rpc)
+    if fee_per_gas is None:
         return {'success': False, 'error': 'gas_price_too_high'}
-    fee_per_gas = min((gas_price * 12) // 10, price_cap)
 
     if not acquire_sponsor_nonce_lock():
         return {'success': False, 'error': 'sponsor_busy'}
@@ -1089,19 +1285,7 @@ def submit_bsc_payroll_payout(user, jwt_ctx, item, signature: str) -> dict:
         if sponsor_balance < (gas * fee_per_gas * 11) // 10:
             logger.error('sponsor BNB too low for payroll payout — refill needed')
             return {'success': False, 'error': 'sponsor_balance_low'}
-        from eth_utils import to_checksum_address
-        tx = {
-            'type': 2,
-            'chainId': chain_id,
-            'nonce': sponsor_nonce,
-            'maxPriorityFeePerGas': fee_per_gas,
-            'maxFeePerGas': fee_per_gas,
-            'gas': gas,
-            'to': to_checksum_address(payroll_addr),
-            'value': 0,
-            'data': calldata,
-            'accessList': [],
-        }
+        tx = _payout_tx(chain_id, sponsor_nonce, fee_per_gas, gas, calldata)
         raw, tx_hash = signer_kms.sign_typed_transaction(tx)
         # Durable BEFORE broadcast (audit 2026-07-31 P1-2). plain-KMS payout,
         # so delegate_nonce=None; the receipt task proves it via the
@@ -1136,40 +1320,5 @@ def submit_bsc_payroll_payout(user, jwt_ctx, item, signature: str) -> dict:
     finally:
         release_sponsor_nonce_lock()
 
-    # RECORD BEFORE SCHEDULING. Anything between the broadcast and this save
-    # can fail — a broker outage on apply_async, the process dying — and the
-    # money has already moved. The item would stay PREPARED with no hash and
-    # no recipient_address, which strands it permanently: the reconciler only
-    # sweeps batches still in 'signed', the confirmer refuses anything not
-    # SUBMITTED, and the scanner then books the wage as an external deposit
-    # because nothing carries the hash that proves payroll owns it.
-    #
-    # The locally computed hash is AUTHORITATIVE: it is derived from the
-    # signed payload, while the node's answer is only a claim. A node
-    # returning something else must not desync item.transaction_hash from
-    # batch.tx_hash, which would strand the confirmer forever.
-    from django.utils import timezone
-    if sent and str(sent).lower() != str(tx_hash).lower():
-        logger.error(
-            '[PAYROLL][BSC] node returned %s for a transaction signed as %s — '
-            'keeping the signed hash', sent, tx_hash)
-    item.transaction_hash = tx_hash
-    item.status = 'SUBMITTED'
-    item.executed_by_user = user
-    item.executed_at = timezone.now()
-    item.recipient_address = (payout.get('recipient') or '').lower()
-    item.save(update_fields=['transaction_hash', 'status', 'executed_by_user',
-                             'executed_at', 'recipient_address', 'updated_at'])
-
-    from cusd_plus.tasks import check_sponsored_batch_receipt
-    check_sponsored_batch_receipt.apply_async(args=[batch.id], countdown=6)
-
-    try:
-        from cusd_plus.vault import invalidate_position
-        invalidate_position(payout['recipient'])
-    except Exception:  # noqa: BLE001
-        pass
-
-    from .tasks import confirm_bsc_payroll_payout
-    confirm_bsc_payroll_payout.apply_async(args=[item.id, batch.id], countdown=8)
+    _record_submitted(user, item, batch, payout, tx_hash, sent)
     return {'success': True, 'transaction_hash': tx_hash}
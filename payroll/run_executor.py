@@ -0,0 +1,313 @@
+"""
+BSC payroll run executor — a whole PayrollRun prepared and paid as one job.
+
+The per-item mutations (PrepareBscPayrollPayout / SubmitBscPayrollPayout)
+pay a run one wage at a time, and every wage repeats the same work: the
+business context, the delegate check, the share price, an escrow read per
+pool, then a simulation, a gas price read, the sponsor nonce lock, a nonce
+read, a balance read and a broadcast. For a business with hundreds of
+employees that is thousands of sequential round trips, and the screen sits
+on them.
+
+prepare_bsc_payroll_run prices every payable item against ONE set of reads
+(bsc_flow._PayoutReads.for_run — both pools in one Multicall3 pass), each
+item reserving its spend so the run is never priced against escrow an
+earlier item already claimed. The delegate signs every returned digest in
+one go.
+
+submit_bsc_payroll_run (run off the request by the execute_bsc_payroll_run
+task) verifies every signature with no chain reads, simulates every payout
+in one JSON-RPC batch, reads the gas price once, then pays in chunks of
+SUBMIT_CHUNK payouts per hold of the sponsor nonce lock: one nonce read, the
+chunk's transactions signed in parallel on consecutive nonces, every row
+made durable ('signed') before anything is broadcast, and the chunk
+broadcast as one batch. Every transaction the node accepted is booked, as
+is one it answered "already known" or "nonce too low" (it may be mined); a
+rejected one stays 'signed' for reconcile_signed_batches to resolve by
+hash — the same recovery as a crash mid-broadcast on the single path — and
+the nonce gap it leaves is filled by the sponsor's next transaction, which
+reads the pending count. A chunk that finds the sponsor busy goes to the
+back of the run instead of refusing it. Settlement is unchanged (receipt check +
+confirm_bsc_payroll_payout per item).
+
+Progress goes to the channel-layer group run_group(run_id) — the payroll
+session socket (payroll.ws_consumers) forwards it — one event per item as
+it is submitted, and again as it confirms or fails.
+"""
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Payouts per hold of the sponsor nonce lock: small enough to sign and
+# broadcast well inside the lock's 15s TTL, large enough that a run of
+# hundreds takes a handful of holds, not hundreds.
+SUBMIT_CHUNK = int(getattr(settings, 'PAYROLL_RUN_SUBMIT_CHUNK', 25))
+SIGN_WORKERS = 8
+# Times a chunk that found the sponsor busy goes back to the end of the run
+# before its items are refused.
+BUSY_REQUEUES = 2
+# eth_sendRawTransaction refusals that do not mean "not sent".
+KNOWN_TX_ANSWERS = ('already known', 'known transaction', 'nonce too low')
+
+
+def run_group(run_id: str) -> str:
+    return f'payroll_run_{run_id}'
+
+
+def publish_progress(run_id: str, payload: dict) -> None:
+    """One progress event to everyone watching the run. Best-effort: a
+    channel-layer outage must never fail the payout that triggered it."""
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(run_group(run_id), {
+            'type': 'payroll.progress',
+            'payload': dict(payload, run_id=run_id),
+        })
+    except Exception:  # noqa: BLE001
+        logger.warning('payroll progress publish failed run=%s', run_id, exc_info=True)
+
+
+def _items(run, statuses):
+    return list(run.items.filter(status__in=statuses, deleted_at__isnull=True)
+                .select_related('run__business', 'recipient_user', 'recipient_account')
+                .order_by('id'))
+
+
+def prepare_bsc_payroll_run(user, jwt_ctx, run) -> dict:
+    """Digest per payable item of `run`, priced against one set of reads.
+    Items that cannot be prepared come back with their own error; the run
+    only fails as a whole when its shared context does."""
+    from . import bsc_flow
+
+    if run.token_type not in ('CUSD_PLUS', 'USDT'):
+        return {'success': False, 'error': 'run_on_legacy_rail'}
+    if bsc_flow._flags_error():
+        return {'success': False, 'error': 'bsc_payroll_paused'}
+    business, _account, business_addr, signer_addr, err = bsc_flow._business_context(user, jwt_ctx)
+    if err:
+        return {'success': False, 'error': err}
+    if run.business_id != business.id:
+        return {'success': False, 'error': 'not_your_payroll'}
+    if not signer_addr:
+        return {'success': False, 'error': 'no_bsc_address'}
+    try:
+        reads = bsc_flow._PayoutReads.for_run(business, business_addr, signer_addr, run)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning('[PAYROLL][BSC] run %s escrow read failed: %s', run.run_id, exc)
+        return {'success': False, 'error': 'balance_unavailable'}
+
+    out = []
+    for item in _items(run, ('PENDING', 'PREPARED', 'FAILED')):
+        try:
+            result = bsc_flow.prepare_bsc_payroll_payout(user, jwt_ctx, item, reads=reads)
+        except Exception:  # noqa: BLE001 — one item must not sink the run
+            logger.exception('[PAYROLL][BSC] run %s: prepare failed for %s',
+                             run.run_id, item.internal_id)
+            result = {'success': False, 'error': 'prepare_failed'}
+        if result.get('success'):
+            payout = item.blockchain_data['bsc_payout']
+            reads.reserve(payout['asset'],
+                          int(payout['net_amount']) + int(payout['fee_amount']),
+                          item.gross_amount)
+            out.append({'item_id': item.internal_id, 'digest': result['digest'],
+                        'deadline': result['deadline'],
+                        'redeem_to_usdt': result['redeem_to_usdt']})
+        else:
+            out.append({'item_id': item.internal_id, 'error': result.get('error')})
+    return {'success': True, 'items': out}
+
+
+def submit_bsc_payroll_run(user, jwt_ctx, run, signatures: dict) -> dict:
+    """Pay every PREPARED item of `run` that `signatures` ({item internal_id:
+    65-byte hex}) signs. Returns {'submitted': n, 'errors': {item_id: error}}."""
+    from blockchain.evm_kms_signer import get_bsc_sponsor_signer_from_settings
+    from cusd_plus.multicall import batch_rpc
+    from cusd_plus.sponsor_7702 import _rpc
+
+    from . import bsc_flow
+
+    err = bsc_flow._flags_error()
+    if err:
+        return {'success': False, 'error': err}
+    business, _account, business_addr, _signer, err = bsc_flow._business_context(user, jwt_ctx)
+    if err:
+        return {'success': False, 'error': err}
+    if run.business_id != business.id:
+        return {'success': False, 'error': 'not_your_payroll'}
+
+    errors = {}
+
+    def fail(item, error):
+        errors[item.internal_id] = error
+        publish_progress(run.run_id, {'item_id': item.internal_id, 'status': 'ERROR', 'error': error})
+
+    verified = []
+    for item in _items(run, ('PREPARED',)):
+        signature = signatures.get(item.internal_id)
+        if not signature:
+            continue
+        payout, calldata, err = bsc_flow._verified_payout(item, business_addr, signature)
+        if err:
+            fail(item, err)
+        else:
+            verified.append((item, payout, calldata))
+    if not verified:
+        return {'success': True, 'submitted': 0, 'errors': errors}
+
+    signer_kms = get_bsc_sponsor_signer_from_settings()
+    sponsor = signer_kms.address
+    payroll_addr = bsc_flow._payroll_address()
+    # Pre-flight every payout in one round trip; each was priced against
+    # escrow the others had not claimed, so they also pass together.
+    try:
+        sims = batch_rpc([
+            ('eth_call', [{'from': sponsor, 'to': payroll_addr, 'data': calldata}, 'latest'])
+            for _item, _payout, calldata in verified
+        ])
+        fee_per_gas = bsc_flow._payout_fee_per_gas(_rpc)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning('[PAYROLL][BSC] run %s pre-flight failed: %s', run.run_id, exc)
+        return {'success': False, 'error': 'simulation_unavailable'}
+    if fee_per_gas is None:
+        return {'success': False, 'error': 'gas_price_too_high'}
+    payable = []
+    for entry, sim in zip(verified, sims):
+        if sim is None:
+            logger.warning('[PAYROLL][BSC] payout simulation reverted for %s', entry[0].internal_id)
+            fail(entry[0], 'simulation_reverted')
+        else:
+            payable.append(entry)
+
+    submitted = 0
+    queue = deque((payable[i:i + SUBMIT_CHUNK], 0) for i in range(0, len(payable), SUBMIT_CHUNK))
+    while queue:
+        chunk, busy = queue.popleft()
+        done, stop = _submit_chunk(user, run, business_addr, chunk, signer_kms, fee_per_gas,
+                                   fail, last_try=busy >= BUSY_REQUEUES)
+        submitted += done
+        if stop == 'sponsor_busy':
+            # Another rail held the sponsor for the whole wait: this chunk
+            # goes to the back of the run and the rest carry on.
+            queue.append((chunk, busy + 1))
+        elif stop:
+            for rest, _busy in queue:
+                for item, _payout, _calldata in rest:
+                    fail(item, stop)
+            break
+    logger.info('[PAYROLL][BSC] run %s: %s payout(s) submitted, %s refused',
+                run.run_id, submitted, len(errors))
+    return {'success': True, 'submitted': submitted, 'errors': errors}
+
+
+def _already_broadcast(refusal) -> bool:
+    """True for the node answers that mean the transaction may already be
+    on the network rather than refused."""
+    refusal = (refusal or '').lower()
+    return any(marker in refusal for marker in KNOWN_TX_ANSWERS)
+
+
+def _submit_chunk(user, run, business_addr, chunk, signer_kms, fee_per_gas, fail,
+                  last_try=True):
+    """Sign, persist and broadcast one chunk under one hold of the sponsor
+    nonce lock. Returns (submitted, stop_error) — a stop_error refuses the
+    rest of the run too (the sponsor cannot pay for more), except
+    'sponsor_busy', which only sends this chunk back to the queue. Its items
+    are failed only on the last_try."""
+    import json
+
+    from django.utils import timezone
+
+    from blockchain.models import SponsoredBatch
+    from cusd_plus.multicall import batch_rpc
+    from cusd_plus.sponsor_7702 import (
+        _rpc,
+        acquire_sponsor_nonce_lock,
+        release_sponsor_nonce_lock,
+    )
+
+    from . import bsc_flow
+
+    chain_id = int(getattr(settings, 'BSC_CHAIN_ID', 56))
+    payroll_addr = bsc_flow._payroll_address()
+    gases = [bsc_flow.GAS_PAYOUT_REDEEM if payout['redeem_to_usdt'] else bsc_flow.GAS_PAYOUT_TRANSFER
+             for _item, payout, _calldata in chunk]
+
+    lock = acquire_sponsor_nonce_lock()
+    if not lock:
+        if last_try:
+            for item, _payout, _calldata in chunk:
+                fail(item, 'sponsor_busy')
+            return 0, None
+        return 0, 'sponsor_busy'
+    booked, error = [], 'broadcast_failed'
+    try:
+        sponsor = signer_kms.address
+        nonce = int(_rpc('eth_getTransactionCount', [sponsor, 'pending']), 16)
+        balance = int(_rpc('eth_getBalance', [sponsor, 'latest']), 16)
+        if balance < (sum(gases) * fee_per_gas * 11) // 10:
+            logger.error('sponsor BNB too low for payroll run %s — refill needed', run.run_id)
+            for item, _payout, _calldata in chunk:
+                fail(item, 'sponsor_balance_low')
+            return 0, 'sponsor_balance_low'
+        txs = [bsc_flow._payout_tx(chain_id, nonce + n, fee_per_gas, gas, calldata)
+               for n, ((_item, _payout, calldata), gas) in enumerate(zip(chunk, gases))]
+        with ThreadPoolExecutor(max_workers=min(SIGN_WORKERS, len(txs))) as pool:
+            signed = list(pool.map(signer_kms.sign_typed_transaction, txs))
+        # Durable BEFORE broadcast, every row of the chunk (audit 2026-07-31
+        # P1-2), exactly as the single-item submit.
+        batches = [
+            SponsoredBatch.objects.create(
+                user=user,
+                user_bsc_address=business_addr,
+                kind='payroll_payout',
+                source_id=item.id,
+                num_calls=1,
+                calls_json=json.dumps([{'to': payroll_addr, 'value': '0', 'data': calldata}]),
+                tx_hash=tx_hash,
+                gas_limit=gas,
+                max_fee_wei=str(fee_per_gas),
+                status='signed',
+            )
+            for (item, _payout, calldata), (_raw, tx_hash), gas in zip(chunk, signed, gases)
+        ]
+        answers = batch_rpc([('eth_sendRawTransaction', [raw]) for raw, _tx_hash in signed],
+                            with_errors=True)
+        booked = []
+        for entry, (_raw, tx_hash), batch, (sent, refusal) in zip(chunk, signed, batches, answers):
+            if sent is None and _already_broadcast(refusal):
+                # An earlier broadcast of this same payload reached the node,
+                # or its nonce is spent — possibly by this very transaction.
+                # Either way it may be mined, so it is booked and left to the
+                # receipt check rather than refused and paid again.
+                logger.info('[PAYROLL][BSC] run %s: %s answered %r, booking as sent',
+                            run.run_id, tx_hash, refusal)
+                sent = tx_hash
+            if sent is not None:
+                booked.append((entry, tx_hash, batch, sent))
+        if booked:
+            SponsoredBatch.objects.filter(id__in=[b.id for _e, _h, b, _s in booked]).update(
+                status='sent', updated_at=timezone.now())
+    except Exception as exc:  # noqa: BLE001
+        logger.exception('[PAYROLL][BSC] run %s: chunk broadcast failed', run.run_id)
+        error = str(exc)[:200]
+    finally:
+        release_sponsor_nonce_lock(lock)
+
+    for (item, payout, _calldata), tx_hash, batch, sent in booked:
+        bsc_flow._record_submitted(user, item, batch, payout, tx_hash, sent)
+        publish_progress(run.run_id, {'item_id': item.internal_id, 'status': 'SUBMITTED',
+                                      'transaction_hash': tx_hash})
+    booked_ids = {entry[0].id for entry, _h, _b, _s in booked}
+    for item, _payout, _calldata in chunk:
+        if item.id not in booked_ids:
+            fail(item, error)
+    return len(booked), None
@@ -2492,6 +2492,72 @@ class SubmitBscPayrollPayout(graphene.Mutation):
         )
 
 
+class PrepareBscPayrollRun(graphene.Mutation):
+    """Every payable item of a run prepared at once (payroll.run_executor):
+    one digest per item for the delegate to sign in one go, and a per-item
+    error for any item that cannot be paid."""
+
+    class Arguments:
+        run_id = graphene.String(required=True)
+
+    success = graphene.Boolean()
+    error = graphene.String()
+    items = graphene.JSONString(description="[{item_id, digest, deadline, redeem_to_usdt} | {item_id, error}]")
+
+    def mutate(self, info, run_id):
+        from .run_executor import prepare_bsc_payroll_run
+
+        jwt_ctx = get_jwt_business_context_with_validation(
+            info, required_permission='send_funds')
+        if not jwt_ctx:
+            return PrepareBscPayrollRun(success=False, error='permission_denied')
+        run = PayrollRun.objects.filter(run_id=run_id, deleted_at__isnull=True).first()
+        if not run:
+            return PrepareBscPayrollRun(success=False, error='run_not_found')
+        result = prepare_bsc_payroll_run(info.context.user, jwt_ctx, run)
+        return PrepareBscPayrollRun(
+            success=result.get('success', False),
+            error=result.get('error'),
+            items=result.get('items'),
+        )
+
+
+class SubmitBscPayrollRun(graphene.Mutation):
+    """Queue a signed run for payment off the request. Per-item progress
+    (SUBMITTED, then CONFIRMED/FAILED) streams over ws/payroll_session."""
+
+    class Arguments:
+        run_id = graphene.String(required=True)
+        signatures = graphene.JSONString(required=True, description="{item_id: 65-byte r‖s‖v hex}")
+
+    success = graphene.Boolean()
+    error = graphene.String()
+    queued = graphene.Int()
+
+    def mutate(self, info, run_id, signatures):
+        from .tasks import execute_bsc_payroll_run
+
+        jwt_ctx = get_jwt_business_context_with_validation(
+            info, required_permission='send_funds')
+        if not jwt_ctx:
+            return SubmitBscPayrollRun(success=False, error='permission_denied')
+        if isinstance(signatures, str):
+            signatures = json.loads(signatures)
+        if not isinstance(signatures, dict) or not signatures:
+            return SubmitBscPayrollRun(success=False, error='signatures_required')
+        run = PayrollRun.objects.filter(run_id=run_id, deleted_at__isnull=True).first()
+        if not run:
+            return SubmitBscPayrollRun(success=False, error='run_not_found')
+        if str(run.business_id) != str(jwt_ctx.get('business_id')):
+            return SubmitBscPayrollRun(success=False, error='not_your_payroll')
+        # Only the keys _business_context reads: the task payload must be JSON.
+        task_ctx = {k: jwt_ctx.get(k) for k in ('account_type', 'business_id', 'account_index')}
+        execute_bsc_payroll_run.delay(
+            run.run_id, info.context.user.id, task_ctx,
+            {str(k): str(v) for k, v in signatures.items()})
+        return SubmitBscPayrollRun(success=True, queued=len(signatures))
+
+
 class Mutation(graphene.ObjectType):
     create_payroll_run = CreatePayrollRun.Field()
     prepare_payroll_item_payout = PreparePayrollItemPayout.Field()
@@ -2510,3 +2576,5 @@ class Mutation(graphene.ObjectType):
     submit_bsc_payroll_admin = SubmitBscPayrollAdmin.Field()
     prepare_bsc_payroll_payout = PrepareBscPayrollPayout.Field()
     submit_bsc_payroll_payout = SubmitBscPayrollPayout.Field()
+    prepare_bsc_payroll_run = PrepareBscPayrollRun.Field()
+    submit_bsc_payroll_run = SubmitBscPayrollRun.Field()
@@ -174,7 +174,10 @@ def confirm_bsc_payroll_payout(self, item_id: int, batch_id: int):
         return
 
     if batch.status in ('signed', 'sent'):
-        raise self.retry(countdown=15)
+        # Slower while the receipt tracker runs: it re-dispatches this task
+        # once the batch settles, the retry only covers a tracker that died.
+        from cusd_plus.receipt_tracker import fallback_countdown
+        raise self.retry(countdown=fallback_countdown(15))
 
     if batch.status == 'confirmed':
         item.status = 'CONFIRMED'
@@ -213,6 +216,30 @@ def confirm_bsc_payroll_payout(self, item_id: int, batch_id: int):
         item.save(update_fields=['status', 'error_message', 'updated_at'])
         logger.warning('[PAYROLL][BSC] %s failed: batch %s %s',
                        item.internal_id, batch.id, batch.status)
+    from .run_executor import publish_progress
+    publish_progress(item.run.run_id, {
+        'item_id': item.internal_id, 'status': item.status,
+        'transaction_hash': item.transaction_hash, 'run_status': item.run.status,
+    })
+
+
+@shared_task(name='payroll.execute_bsc_payroll_run')
+def execute_bsc_payroll_run(run_id: str, user_id: int, jwt_ctx: dict, signatures: dict):
+    """Pay a whole signed run off the request (run_executor); progress is
+    streamed to run_executor.run_group(run_id) as it goes."""
+    from django.contrib.auth import get_user_model
+
+    from .models import PayrollRun
+    from .run_executor import publish_progress, submit_bsc_payroll_run
+
+    try:
+        run = PayrollRun.objects.select_related('business').get(run_id=run_id, deleted_at__isnull=True)
+        user = get_user_model().objects.get(id=user_id)
+    except (PayrollRun.DoesNotExist, get_user_model().DoesNotExist):
+        return {'success': False, 'error': 'run_not_found'}
+    result = submit_bsc_payroll_run(user, jwt_ctx, run, signatures)
+    publish_progress(run_id, {'status': 'RUN_SUBMITTED', **result})
+    return result
 
 
 @shared_task(name='payroll.reconcile_stranded_bsc_payroll')
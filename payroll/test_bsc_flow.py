@@ -185,6 +185,18 @@ class ActivationTests(SimpleTestCase):
         self.assertEqual(result['error'], 'delegate_not_found')
 
 
+def _pools(shares=0, usdt=0):
+    """Both escrow pools as one batched read; None marks a dead pool read."""
+    return mock.patch.object(bsc_flow, 'escrow_pools_raw', return_value={
+        bsc_flow.ASSET_CUSD_PLUS: shares, bsc_flow.ASSET_USDT: usdt})
+
+
+def _flags(answer):
+    """delegate_flags answering `answer(addr)` for every address asked."""
+    return mock.patch.object(bsc_flow, 'delegate_flags',
+                             side_effect=lambda _b, addrs: {a: answer(a) for a in addrs})
+
+
 @override_settings(
     BSC_PAYROLL_VAULT_ADDRESS=PAYROLL_VAULT,
     CUSD_PLUS_VAULT_ADDRESS=VAULT,
@@ -199,22 +211,16 @@ class ReadSideTests(SimpleTestCase):
         from django.core.cache import cache
         cache.clear()
         self.addCleanup(cache.clear)
-        # Most of these assert the SHARES pool; keep the USDT pool empty
-        # unless a test says otherwise, rather than reaching for a node.
-        empty_usdt = mock.patch.object(bsc_flow, 'escrow_usdt_raw', return_value=0)
-        empty_usdt.start()
-        self.addCleanup(empty_usdt.stop)
 
     def test_escrow_usd_is_shares_times_price(self):
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=50 * WAD), \
+        with _pools(shares=50 * WAD), \
                 mock.patch('cusd_plus.vault.p_plus_wad', return_value=11 * WAD // 10):
             self.assertAlmostEqual(bsc_flow.escrow_usd(BUSINESS_ADDR), 55.0, places=6)
 
     def test_escrow_usd_sums_both_pools(self):
         """An employer who funded in USDT after being geo-blocked has float
         every bit as real as a share position; the hub prints one number."""
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=50 * WAD), \
-                mock.patch.object(bsc_flow, 'escrow_usdt_raw', return_value=20 * WAD), \
+        with _pools(shares=50 * WAD, usdt=20 * WAD), \
                 mock.patch('cusd_plus.vault.p_plus_wad', return_value=11 * WAD // 10):
             self.assertAlmostEqual(bsc_flow.escrow_usd(BUSINESS_ADDR), 75.0, places=6)
 
@@ -222,13 +228,13 @@ class ReadSideTests(SimpleTestCase):
         """An employer who funded while eligible must not be told their
         existing float is unusable the day their country changes."""
         biz = SimpleNamespace(bsc_address=BUSINESS_ADDR)
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=5 * WAD), \
+        with _pools(shares=5 * WAD), \
                 mock.patch('cusd_plus.eligibility.is_ondo_eligible', return_value=False):
             self.assertEqual(bsc_flow.funding_token(biz, _user()), 'CUSD_PLUS')
 
     def test_funding_token_follows_eligibility_when_nothing_is_parked(self):
         biz = SimpleNamespace(bsc_address=BUSINESS_ADDR)
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=0):
+        with _pools(shares=0):
             with mock.patch('cusd_plus.eligibility.is_ondo_eligible', return_value=False):
                 # The blocked employer: their dollars stay raw USDT forever,
                 # because the mint gate refuses them.
@@ -240,43 +246,38 @@ class ReadSideTests(SimpleTestCase):
         """[P1 2026-08-02] The pools are not fungible. A summed figure let the
         top-up screen validate a withdrawal against money the chosen pool did
         not have."""
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=50 * WAD), \
-                mock.patch.object(bsc_flow, 'escrow_usdt_raw', return_value=20 * WAD), \
+        with _pools(shares=50 * WAD, usdt=20 * WAD), \
                 mock.patch('cusd_plus.vault.p_plus_wad', return_value=11 * WAD // 10):
             split = bsc_flow.escrow_split_usd(BUSINESS_ADDR)
         self.assertAlmostEqual(split['CUSD_PLUS'], 55.0, places=6)
         self.assertAlmostEqual(split['USDT'], 20.0, places=6)
 
     def test_escrow_split_reports_unknown_not_zero_on_a_dead_read(self):
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw',
-                               side_effect=RuntimeError('node down')), \
-                mock.patch.object(bsc_flow, 'escrow_usdt_raw', return_value=20 * WAD):
+        with _pools(shares=None, usdt=20 * WAD):
             split = bsc_flow.escrow_split_usd(BUSINESS_ADDR)
         self.assertIsNone(split['CUSD_PLUS'], 'unknown must not read as $0.00')
         self.assertAlmostEqual(split['USDT'], 20.0, places=6)
 
     def test_funding_token_reads_the_usdt_pool_before_falling_back(self):
         biz = SimpleNamespace(bsc_address=BUSINESS_ADDR)
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=0), \
-                mock.patch.object(bsc_flow, 'escrow_usdt_raw', return_value=3 * WAD), \
+        with _pools(shares=0, usdt=3 * WAD), \
                 mock.patch('cusd_plus.eligibility.is_ondo_eligible', return_value=True):
             self.assertEqual(bsc_flow.funding_token(biz, _user()), 'USDT')
 
     def test_escrow_read_failure_keeps_the_last_known_value(self):
         """A flaky node must not tell a business its payroll float is gone."""
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=50 * WAD), \
+        with _pools(shares=50 * WAD), \
                 mock.patch('cusd_plus.vault.p_plus_wad', return_value=WAD):
             self.assertEqual(bsc_flow.escrow_usd(BUSINESS_ADDR), 50.0)
         bsc_flow.invalidate_escrow(BUSINESS_ADDR)
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw',
+        with mock.patch.object(bsc_flow, 'escrow_pools_raw',
                                side_effect=RuntimeError('node down')):
             self.assertEqual(bsc_flow.escrow_usd(BUSINESS_ADDR), 50.0)
 
     def test_delegates_are_the_chain_s_answer_not_ours(self):
         """The DB proposes candidates; isDelegate decides."""
         other = '0x' + '55' * 20
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate',
-                               side_effect=lambda _b, d: d == SIGNER_ADDR.lower()):
+        with _flags(lambda d: d == SIGNER_ADDR.lower()):
             got = bsc_flow.onchain_delegates(BUSINESS_ADDR, [SIGNER_ADDR, other])
         self.assertEqual(got, [SIGNER_ADDR.lower()])
 
@@ -285,27 +286,27 @@ class ReadSideTests(SimpleTestCase):
         registered their address seconds ago as "not a delegate" without the
         chain ever being asked about them."""
         newcomer = '0x' + '66' * 20
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate', return_value=True):
+        with _flags(lambda d: True):
             self.assertEqual(bsc_flow.onchain_delegates(BUSINESS_ADDR, [SIGNER_ADDR]),
                              [SIGNER_ADDR.lower()])
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate', return_value=True) as call:
+        with _flags(lambda d: True) as call:
             got = bsc_flow.onchain_delegates(BUSINESS_ADDR, [SIGNER_ADDR, newcomer])
-            call.assert_called_once_with(BUSINESS_ADDR.lower(), newcomer.lower())
+            call.assert_called_once_with(BUSINESS_ADDR.lower(), [newcomer.lower()])
         self.assertEqual(got, [SIGNER_ADDR.lower(), newcomer.lower()])
 
     def test_revoking_is_visible_on_the_next_read(self):
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate', return_value=True):
+        with _flags(lambda d: True):
             bsc_flow.onchain_delegates(BUSINESS_ADDR, [SIGNER_ADDR])
         bsc_flow.invalidate_delegates(BUSINESS_ADDR)
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate', return_value=False):
+        with _flags(lambda d: False):
             self.assertEqual(bsc_flow.onchain_delegates(BUSINESS_ADDR, [SIGNER_ADDR]), [])
 
     def test_delegate_read_failure_is_not_a_revocation(self):
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate', return_value=True):
+        with _flags(lambda d: True):
             self.assertEqual(bsc_flow.onchain_delegates(BUSINESS_ADDR, [SIGNER_ADDR]),
                              [SIGNER_ADDR.lower()])
         bsc_flow.invalidate_delegates(BUSINESS_ADDR)
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate',
+        with mock.patch.object(bsc_flow, 'delegate_flags',
                                side_effect=RuntimeError('node down')):
             self.assertEqual(bsc_flow.onchain_delegates(BUSINESS_ADDR, [SIGNER_ADDR]),
                              [SIGNER_ADDR.lower()])
@@ -328,32 +329,38 @@ class ReadSideTests(SimpleTestCase):
         alternative is an Algorand balance beside a button that drains BSC."""
         biz = SimpleNamespace(bsc_address=BUSINESS_ADDR)
         with override_settings(BSC_PAYROLL_ENABLED=False), \
-                mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=5 * WAD), \
+                _pools(shares=5 * WAD), \
                 mock.patch('cusd_plus.vault.p_plus_wad', return_value=WAD):
             self.assertEqual(bsc_flow.display_rail(biz), 'bsc')
         bsc_flow.invalidate_escrow(BUSINESS_ADDR)
         # Nothing parked there: the legacy vault is the honest answer.
         with override_settings(BSC_PAYROLL_ENABLED=False), \
-                mock.patch.object(bsc_flow, 'escrow_shares_raw', return_value=0), \
+                _pools(shares=0), \
                 mock.patch('cusd_plus.vault.p_plus_wad', return_value=WAD):
             self.assertEqual(bsc_flow.display_rail(biz), 'algorand')
 
     def test_a_first_read_failure_is_unknown_not_zero(self):
         """$0.00 and "we could not reach the node" are different sentences;
         only one of them makes a business think its payroll float is gone."""
-        with mock.patch.object(bsc_flow, 'escrow_shares_raw',
+        with mock.patch.object(bsc_flow, 'escrow_pools_raw',
                                side_effect=RuntimeError('node down')):
             self.assertIsNone(bsc_flow.escrow_usd(BUSINESS_ADDR))
 
+    def test_every_unknown_candidate_is_resolved_in_one_round_trip(self):
+        """A payroll screen with N employees must cost one RPC, not N."""
+        candidates = ['0x' + f'{n:02x}' * 20 for n in range(0x80, 0x90)]
+        with mock.patch('cusd_plus.multicall.read_many',
+                        return_value=[(1).to_bytes(32, 'big')] * len(candidates)) as rpc:
+            got = bsc_flow.onchain_delegates(BUSINESS_ADDR, candidates)
+        rpc.assert_called_once()
+        self.assertEqual(len(rpc.call_args.args[0]), len(candidates))
+        self.assertEqual(got, candidates)
+
     def test_one_dead_call_does_not_discard_the_other_candidates(self):
         other = '0x' + '77' * 20
 
-        def flaky(_b, d):
-            if d == other:
-                raise RuntimeError('node down')
-            return True
-
-        with mock.patch.object(bsc_flow, 'is_onchain_delegate', side_effect=flaky):
+        # The batch answers every pair it could; the dead call comes back None.
+        with _flags(lambda d: None if d == other else True):
             got, degraded = bsc_flow.onchain_delegates(
                 BUSINESS_ADDR, [SIGNER_ADDR, other], with_status=True)
         # The healthy answer survives, and the caller is told the set is partial.
@@ -716,6 +723,146 @@ class SubmitPayoutTests(SimpleTestCase):
         self.assertEqual(result['error'], 'payout_not_prepared')
 
 
+def _run_items(n, **kwargs):
+    items = []
+    for i in range(n):
+        item = _item(**kwargs)
+        item.id, item.internal_id, item.gross_amount = 42 + i, f'item{42 + i}', item.net_amount
+        items.append(item)
+    return items
+
+
+@override_settings(
+    BSC_PAYROLL_VAULT_ADDRESS=PAYROLL_VAULT,
+    CUSD_PLUS_VAULT_ADDRESS=VAULT,
+    BSC_PAYROLL_ENABLED=True,
+)
+class RunExecutorTests(SimpleTestCase):
+    """payroll.run_executor: a run priced against one set of reads, and paid
+    in one lock hold per chunk on consecutive sponsor nonces."""
+
+    RUN = SimpleNamespace(run_id='run1', business_id=77, token_type='USDT', cap_amount=None)
+
+    def _context(self, acct_objs):
+        acct_objs.filter.return_value.select_related.return_value.first.return_value = \
+            SimpleNamespace(bsc_address=BUSINESS_ADDR, business=SimpleNamespace(id=77, name='Bodega'))
+
+    def test_a_run_is_priced_against_one_read_and_each_item_reserves_its_spend(self):
+        from payroll import run_executor
+
+        items = _run_items(3, net='100', fee='0', run_token='USDT')
+        with mock.patch('users.models.Account.objects') as acct_objs, \
+                mock.patch.object(run_executor, '_items', return_value=items), \
+                mock.patch.object(bsc_flow, 'escrow_pools_raw', return_value={
+                    bsc_flow.ASSET_CUSD_PLUS: 0, bsc_flow.ASSET_USDT: 250 * WAD}) as pools, \
+                mock.patch.object(bsc_flow, 'escrow_raw') as single_read, \
+                mock.patch.object(bsc_flow, 'is_onchain_delegate', return_value=True) as delegate, \
+                mock.patch('cusd_plus.vault.p_plus_wad', return_value=WAD), \
+                mock.patch('cusd_plus.eligibility.is_ondo_eligible', return_value=True), \
+                mock.patch('payroll.bsc_flow.transaction.atomic'):
+            self._context(acct_objs)
+            acct_objs.select_for_update.return_value.filter.return_value.first.return_value = \
+                SimpleNamespace(bsc_address=RECIPIENT_ADDR)
+            result = run_executor.prepare_bsc_payroll_run(_user(), _jwt_ctx(), self.RUN)
+
+        pools.assert_called_once()
+        delegate.assert_called_once()
+        single_read.assert_not_called()
+        # 250 USDT parked covers two 100 wages, not a third.
+        self.assertEqual([('digest' in r, r.get('error')) for r in result['items']],
+                         [(True, None), (True, None), (False, 'insufficient_escrow')])
+
+    def _prepared(self, count):
+        items = _run_items(count)
+        for item in items:
+            item.status = 'PREPARED'
+            item.blockchain_data = {'bsc_payout': {
+                'business': BUSINESS_ADDR, 'recipient': RECIPIENT_ADDR,
+                'asset': bsc_flow.ASSET_USDT, 'net_amount': str(90 * WAD), 'fee_amount': '0',
+                'redeem_to_usdt': False, 'min_usdt_out': '0',
+                'item_id': bsc_flow.item_id_bytes32(item.internal_id),
+                'deadline': 4_000_000_000, 'expected_signer': SIGNER_ADDR, 'chain_id': 56,
+            }}
+        return items
+
+    def _submit(self, items, sims, broadcasts, locks=('tok',)):
+        """Run submit_bsc_payroll_run with one simulation answer per item and
+        one (result, refusal) list per broadcast batch."""
+        from payroll import run_executor
+
+        signer = mock.Mock(address='0x' + '44' * 20)
+        signer.sign_typed_transaction.side_effect = lambda tx: (f'raw{tx["nonce"]}', f'0xhash{tx["nonce"]}')
+        nonces = iter(range(7, 100))
+        rpc = {'eth_gasPrice': lambda: hex(10 ** 9), 'eth_getBalance': lambda: hex(10 ** 18),
+               'eth_getTransactionCount': lambda: hex(next(nonces))}
+        broadcasts = list(broadcasts)
+
+        def batch_rpc(requests_, with_errors=False):
+            if with_errors:
+                return broadcasts.pop(0)[:len(requests_)]
+            return sims[:len(requests_)]
+
+        with mock.patch('users.models.Account.objects') as acct_objs, \
+                mock.patch.object(run_executor, '_items', return_value=items), \
+                mock.patch('cusd_plus.sponsor_7702.recover_intent_signer', return_value=SIGNER_ADDR), \
+                mock.patch('blockchain.evm_kms_signer.get_bsc_sponsor_signer_from_settings',
+                           return_value=signer), \
+                mock.patch('cusd_plus.multicall.batch_rpc', side_effect=batch_rpc), \
+                mock.patch('cusd_plus.sponsor_7702._rpc', side_effect=lambda m, p: rpc[m]()), \
+                mock.patch('cusd_plus.sponsor_7702.acquire_sponsor_nonce_lock',
+                           side_effect=list(locks)) as lock, \
+                mock.patch('cusd_plus.sponsor_7702.release_sponsor_nonce_lock') as release, \
+                mock.patch('blockchain.models.SponsoredBatch.objects') as batches, \
+                mock.patch.object(bsc_flow, '_record_submitted') as record:
+            self._context(acct_objs)
+            result = run_executor.submit_bsc_payroll_run(
+                _user(), _jwt_ctx(), self.RUN, {i.internal_id: '0x' + 'ab' * 65 for i in items})
+        return result, signer, lock, release, batches, record
+
+    def test_a_chunk_is_signed_on_consecutive_nonces_under_one_lock(self):
+        items = self._prepared(3)
+        result, signer, lock, release, batches, record = self._submit(
+            items, ['0x', None, '0x'], [[('0xhash7', None), (None, 'insufficient funds')]])
+
+        lock.assert_called_once()
+        release.assert_called_once_with('tok')
+        # The second item failed its simulation; the others took nonces 7, 8.
+        self.assertEqual([c.args[0]['nonce'] for c in signer.sign_typed_transaction.call_args_list], [7, 8])
+        self.assertEqual(batches.create.call_count, 2)
+        self.assertEqual([c.args[1].internal_id for c in record.call_args_list], ['item42'])
+        self.assertEqual(result['submitted'], 1)
+        self.assertEqual(result['errors'], {'item43': 'simulation_reverted',
+                                            'item44': 'broadcast_failed'})
+
+    def test_a_transaction_the_node_already_has_is_booked_not_refused(self):
+        items = self._prepared(2)
+        result, _signer, _lock, _release, _batches, record = self._submit(
+            items, ['0x', '0x'],
+            [[(None, 'already known'), (None, 'nonce too low: next nonce 9, tx nonce 8')]])
+
+        self.assertEqual([(c.args[1].internal_id, c.args[4], c.args[5]) for c in record.call_args_list],
+                         [('item42', '0xhash7', '0xhash7'), ('item43', '0xhash8', '0xhash8')])
+        self.assertEqual(result['submitted'], 2)
+        self.assertEqual(result['errors'], {})
+
+    def test_a_busy_sponsor_requeues_only_that_chunk(self):
+        from payroll import run_executor
+
+        items = self._prepared(3)
+        with mock.patch.object(run_executor, 'SUBMIT_CHUNK', 1):
+            result, _signer, lock, _release, _batches, record = self._submit(
+                items, ['0x'] * 3,
+                [[('0xhash7', None)], [('0xhash8', None)], [('0xhash9', None)]],
+                locks=[None, 'tok', 'tok', 'tok'])
+
+        self.assertEqual(lock.call_count, 4)
+        # The first chunk found the sponsor busy and was paid last.
+        self.assertEqual([c.args[1].internal_id for c in record.call_args_list],
+                         ['item43', 'item44', 'item42'])
+        self.assertEqual(result['submitted'], 3)
+        self.assertEqual(result['errors'], {})
+
+
 @override_settings(BSC_PAYROLL_VAULT_ADDRESS=PAYROLL_VAULT)
 class SettledAmountDecodeTests(SimpleTestCase):
     """PaidOut is decoded by TOPIC + fixed data offsets, and both moved in v2.
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from payments.ws_consumers import _DummyInfo, _DummyRequest
+
+logger = logging.getLogger(__name__)
+
+
+class PayrollSessionConsumer(AsyncJsonWebsocketConsumer):
+    """
+    WebSocket for paying a whole BSC payroll run (payroll.run_executor).
+
+    Client → Server:
+      - {type:"ping"}
+      - {type:"prepare_run", run_id}
+      - {type:"submit_run", run_id, signatures:{item_id: signature}}
+      - {type:"watch_run", run_id}
+
+    Server → Client:
+      - {type:"pong"}
+      - {type:"server_ping"}
+      - {type:"prepare_ready", run_id, items:[{item_id, digest, deadline, redeem_to_usdt} | {item_id, error}]}
+      - {type:"submit_accepted", run_id, queued}
+      - {type:"progress", run_id, item_id, status, transaction_hash?, error?}
+        (status SUBMITTED / CONFIRMED / FAILED / ERROR per item, RUN_SUBMITTED once)
+      - {type:"error", message}
+
+    prepare_run and submit_run also watch the run, so a client that stays
+    connected sees every item through to confirmation.
+    """
+
+    KEEPALIVE_SEC = 25
+    # A large run streams for a while; progress events reset this too.
+    IDLE_TIMEOUT_SEC = 180
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or not getattr(user, "is_authenticated", False):
+            await self.close(code=4401)
+            return
+        params = parse_qs(self.scope.get("query_string", b"").decode())
+        self._raw_token = (params.get("token", [None])[0]) or ""
+        self._groups = set()
+        await self.accept()
+        self._keepalive_task = asyncio.create_task(self._keepalive())
+        self._idle_task = asyncio.create_task(self._idle_close())
+
+    async def disconnect(self, code):
+        for t in (getattr(self, "_keepalive_task", None), getattr(self, "_idle_task", None)):
+            if t:
+                t.cancel()
+        for group in getattr(self, "_groups", ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        await self._reset_idle_timer()
+        msg_type = content.get("type")
+        if msg_type == "ping":
+            await self.send_json({"type": "pong"})
+            return
+
+        run_id = str(content.get("run_id") or "")
+        if msg_type in ("prepare_run", "submit_run", "watch_run") and not run_id:
+            await self.send_json({"type": "error", "message": "run_id_required"})
+            return
+
+        if msg_type == "watch_run":
+            if not await self._can_watch(run_id):
+                await self.send_json({"type": "error", "message": "run_not_found"})
+                return
+            await self._watch(run_id)
+            return
+
+        if msg_type == "prepare_run":
+            try:
+                result = await self._prepare_run(run_id)
+            except Exception:
+                logger.exception("[ws/payroll_session] prepare_run failed run=%s", run_id)
+                await self.send_json({"type": "error", "message": "prepare_exception"})
+                return
+            if not result.get("success"):
+                await self.send_json({"type": "error", "message": result.get("error") or "prepare_failed"})
+                return
+            await self._watch(run_id)
+            await self.send_json({"type": "prepare_ready", "run_id": run_id, "items": result.get("items")})
+            return
+
+        if msg_type == "submit_run":
+            signatures = content.get("signatures")
+            if not isinstance(signatures, dict) or not signatures:
+                await self.send_json({"type": "error", "message": "signatures_required"})
+                return
+            # Watch BEFORE queueing so the first SUBMITTED is never missed.
+            if not await self._can_watch(run_id):
+                await self.send_json({"type": "error", "message": "run_not_found"})
+                return
+            await self._watch(run_id)
+            try:
+                result = await self._submit_run(run_id, signatures)
+            except Exception:
+                logger.exception("[ws/payroll_session] submit_run failed run=%s", run_id)
+                await self.send_json({"type": "error", "message": "submit_exception"})
+                return
+            if not result.get("success"):
+                await self.send_json({"type": "error", "message": result.get("error") or "submit_failed"})
+                return
+            await self.send_json({"type": "submit_accepted", "run_id": run_id, "queued": result.get("queued")})
+            return
+
+        # Unknown message type is ignored silently to keep protocol stable
+
+    async def payroll_progress(self, event):
+        await self._reset_idle_timer()
+        await self.send_json({"type": "progress", **event.get("payload", {})})
+
+    async def _watch(self, run_id):
+        from .run_executor import run_group
+
+        group = run_group(run_id)
+        if group not in self._groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self._groups.add(group)
+
+    async def _keepalive(self):
+        try:
+            while True:
+                await asyncio.sleep(self.KEEPALIVE_SEC)
+                await self.send_json({"type": "server_ping"})
+        except asyncio.CancelledError:
+            return
+
+    async def _idle_close(self):
+        try:
+            await asyncio.sleep(self.IDLE_TIMEOUT_SEC)
+            await self.close(code=1000)
+        except asyncio.CancelledError:
+            return
+
+    async def _reset_idle_timer(self):
+        task = getattr(self, "_idle_task", None)
+        if task:
+            task.cancel()
+        self._idle_task = asyncio.create_task(self._idle_close())
+
+    def _info(self):
+        meta = {}
+        if self._raw_token:
+            meta["HTTP_AUTHORIZATION"] = f"JWT {self._raw_token}"
+        return _DummyInfo(context=_DummyRequest(user=self.scope.get("user"), meta=meta))
+
+    @database_sync_to_async
+    def _can_watch(self, run_id):
+        from users.jwt_context import get_jwt_business_context_with_validation
+        from .models import PayrollRun
+
+        jwt_ctx = get_jwt_business_context_with_validation(self._info(), required_permission='send_funds')
+        if not jwt_ctx:
+            return False
+        return PayrollRun.objects.filter(
+            run_id=run_id, business_id=jwt_ctx.get('business_id'), deleted_at__isnull=True,
+        ).exists()
+
+    @database_sync_to_async
+    def _prepare_run(self, run_id):
+        from .schema import PrepareBscPayrollRun
+
+        result = PrepareBscPayrollRun.mutate(None, self._info(), run_id=run_id)
+        return {
+            "success": getattr(result, "success", False),
+            "error": getattr(result, "error", None),
+            "items": getattr(result, "items", None),
+        }
+
+    @database_sync_to_async
+    def _submit_run(self, run_id, signatures):
+        from .schema import SubmitBscPayrollRun
+
+        result = SubmitBscPayrollRun.mutate(None, self._info(), run_id=run_id, signatures=signatures)
+        return {
+            "success": getattr(result, "success", False),
+            "error": getattr(result, "error", None),
+            "queued": getattr(result, "queued", None),
+        }
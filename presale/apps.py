@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PresaleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'presale'
+
+    def ready(self):
+        from . import signals  # noqa: F401 — live presale stats
@@ -0,0 +1,143 @@
+"""
+Live presale stats — running counters, pushed to connected sessions.
+
+get_presale_curve_stats recomputed Sum(cusd_amount) and a distinct-user
+Count over PresalePurchase every time its 60s cache expired, and
+get_confio_current_price made its own eth_call on its own TTL. Every
+presale screen polls both, so launch traffic became a polling storm on the
+database and the BSC node.
+
+The totals now live as cache counters (whole cents raised, participants):
+
+  - record_completed(purchase_id) runs on commit whenever a purchase turns
+    'completed' (presale.signals). It adds the purchase once — a per-purchase
+    marker makes repeats no-ops — and counts the buyer as a participant when
+    it is their first completed purchase.
+  - rebuild() recomputes both counters from the database. It runs when the
+    counters are missing and from the presale.rebuild_live_stats beat,
+    which also absorbs completions that bypass save() (queryset updates in
+    the admin).
+  - track_presale_price(head) rides the BSC head stream
+    (manage.py follow_bsc_logs): at most every PRICE_REFRESH_SECONDS it
+    re-reads currentPrice(), which keeps the price cache warm for readers.
+
+Every change is sent to the GROUP channel-layer group, which every
+PresaleSessionConsumer joins, as {'type': 'stats', ...changed fields}. A
+client keeps its screen current without polling.
+"""
+import logging
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from . import price_utils
+
+logger = logging.getLogger(__name__)
+
+GROUP = 'presale_stats'
+RAISED_CENTS_KEY = 'presale:live:raised_cents'
+PARTICIPANTS_KEY = 'presale:live:participants'
+PUBLISHED_KEY = 'presale:live:published'
+COUNTED_KEY = 'presale:live:counted:{}'
+COUNTED_TTL = 7 * 24 * 3600
+PRICE_TICK_KEY = 'presale:live:price_tick'
+PRICE_REFRESH_SECONDS = 3
+
+
+def _stats(raised_cents: int, participants: int) -> dict:
+    raised = Decimal(raised_cents) / 100
+    return {
+        'current_price': price_utils.get_confio_current_price(),
+        'start_price': price_utils.CURVE_START_PRICE,
+        'final_price': price_utils.CURVE_FINAL_PRICE,
+        'total_raised_usd': raised,
+        'next_milestone_usd': price_utils.next_milestone_usd(raised),
+        'participants': int(participants),
+    }
+
+
+def rebuild() -> dict:
+    """Counters from the database; returns and publishes the stats."""
+    from .models import PresalePurchase
+
+    agg = PresalePurchase.objects.filter(status='completed').aggregate(
+        raised=Sum('cusd_amount'),
+        participants=Count('user', distinct=True),
+    )
+    raised_cents = int((agg['raised'] or Decimal('0')) * 100)
+    participants = int(agg['participants'] or 0)
+    cache.set_many({RAISED_CENTS_KEY: raised_cents, PARTICIPANTS_KEY: participants}, None)
+    stats = _stats(raised_cents, participants)
+    publish(stats)
+    return stats
+
+
+def snapshot() -> dict:
+    """The get_presale_curve_stats object, from the counters."""
+    counters = cache.get_many([RAISED_CENTS_KEY, PARTICIPANTS_KEY])
+    if RAISED_CENTS_KEY not in counters or PARTICIPANTS_KEY not in counters:
+        return rebuild()
+    return _stats(counters[RAISED_CENTS_KEY], counters[PARTICIPANTS_KEY])
+
+
+def to_message(stats: dict) -> dict:
+    """JSON-safe field names and values as the presale screens read them."""
+    return {
+        'current_price': str(stats['current_price']),
+        'total_raised_usd': str(stats['total_raised_usd']),
+        'next_milestone_usd': str(stats['next_milestone_usd']),
+        'participants': stats['participants'],
+    }
+
+
+def publish(stats: dict) -> None:
+    """Send the fields that changed since the last publish. Best-effort: a
+    channel-layer outage must never fail the purchase that triggered it."""
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    current = to_message(stats)
+    previous = cache.get(PUBLISHED_KEY) or {}
+    delta = {key: value for key, value in current.items() if previous.get(key) != value}
+    if not delta:
+        return
+    cache.set(PUBLISHED_KEY, current, None)
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(GROUP, {'type': 'presale.stats', 'payload': delta})
+    except Exception:  # noqa: BLE001
+        logger.warning('presale stats publish failed', exc_info=True)
+
+
+def record_completed(purchase_id: int) -> None:
+    from .models import PresalePurchase
+
+    purchase = (PresalePurchase.objects.filter(pk=purchase_id, status='completed')
+                .values('user_id', 'cusd_amount').first())
+    if purchase is None or not cache.add(COUNTED_KEY.format(purchase_id), 1, COUNTED_TTL):
+        return
+    first = not PresalePurchase.objects.filter(
+        user_id=purchase['user_id'], status='completed',
+    ).exclude(pk=purchase_id).exists()
+    try:
+        cache.incr(RAISED_CENTS_KEY, int(purchase['cusd_amount'] * 100))
+        if first:
+            cache.incr(PARTICIPANTS_KEY)
+    except ValueError:
+        # Counters evicted: the rebuild already includes this purchase.
+        rebuild()
+        return
+    # The buy just moved the curve.
+    price_utils.read_curve_price()
+    publish(snapshot())
+
+
+def track_presale_price(head: int) -> None:
+    """LogFollower on_head hook: refresh the curve price, publish a change."""
+    if not cache.add(PRICE_TICK_KEY, head, PRICE_REFRESH_SECONDS):
+        return
+    if price_utils.read_curve_price() is not None:
+        publish(snapshot())
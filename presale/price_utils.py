@@ -78,8 +78,12 @@ RAISE_MILESTONES_USD = [
     10_000_000, 25_000_000, 50_000_000, 61_000_000,
 ]
 
-STATS_CACHE_KEY = 'presale:curve_stats'
-STATS_CACHE_TTL_SEC = 60
+
+def next_milestone_usd(raised: Decimal) -> Decimal:
+    return next(
+        (Decimal(m) for m in RAISE_MILESTONES_USD if Decimal(m) > raised),
+        Decimal(RAISE_MILESTONES_USD[-1]),
+    )
 
 
 def get_presale_curve_stats() -> dict:
@@ -89,34 +93,33 @@ def get_presale_curve_stats() -> dict:
     totalRaised/participants come from the DB (every purchase on any chain
     creates a PresalePurchase row — buys are sponsor-gated, so nothing can
     reach the vault without passing through Django), which avoids
-    double-counting against the vault's on-chain totalRaised.
+    double-counting against the vault's on-chain totalRaised. They are kept
+    as running counters by presale.live_stats, which also pushes changes to
+    connected presale sessions, so a read here is served from the cache.
     """
-    cached = _cache_get(STATS_CACHE_KEY)
-    if cached is not None:
-        return cached
+    from presale import live_stats
 
-    from django.db.models import Sum, Count
-    from presale.models import PresalePurchase
+    return live_stats.snapshot()
 
-    agg = PresalePurchase.objects.filter(status='completed').aggregate(
-        raised=Sum('cusd_amount'),
-        participants=Count('user', distinct=True),
-    )
-    raised = agg['raised'] or Decimal('0')
-    next_milestone = next(
-        (Decimal(m) for m in RAISE_MILESTONES_USD if Decimal(m) > raised),
-        Decimal(RAISE_MILESTONES_USD[-1]),
-    )
-    stats = {
-        'current_price': get_confio_current_price(),
-        'start_price': CURVE_START_PRICE,
-        'final_price': CURVE_FINAL_PRICE,
-        'total_raised_usd': raised,
-        'next_milestone_usd': next_milestone,
-        'participants': int(agg['participants'] or 0),
-    }
-    _cache_set(STATS_CACHE_KEY, stats, STATS_CACHE_TTL_SEC)
-    return stats
+
+def read_curve_price() -> Decimal | None:
+    """Live currentPrice() from the vault, refreshing both price caches;
+    None when the vault is not configured or the read failed."""
+    vault = getattr(settings, 'BSC_PRESALE_VAULT_ADDRESS', None)
+    if not vault:
+        return None
+    try:
+        from cusd_plus.tasks import _rpc
+        raw = _rpc('eth_call', [{'to': vault, 'data': _CURRENT_PRICE_SELECTOR}, 'latest'])
+        wei = int(raw, 16) if raw and raw != '0x' else 0
+        if wei > 0:
+            price = (Decimal(wei) / Decimal(10) ** 18).quantize(Decimal('0.000001'))
+            _cache_set(CACHE_KEY, str(price), CACHE_TTL_SEC)
+            _cache_set(LAST_KNOWN_KEY, str(price), LAST_KNOWN_TTL_SEC)
+            return price
+    except Exception as e:
+        logger.warning(f"[PRESALE][PRICE] currentPrice() read failed: {e}")
+    return None
 
 
 def get_confio_current_price() -> Decimal:
@@ -125,19 +128,10 @@ def get_confio_current_price() -> Decimal:
     if cached is not None:
         return Decimal(cached)
 
-    vault = getattr(settings, 'BSC_PRESALE_VAULT_ADDRESS', None)
-    if vault:
-        try:
-            from cusd_plus.tasks import _rpc
-            raw = _rpc('eth_call', [{'to': vault, 'data': _CURRENT_PRICE_SELECTOR}, 'latest'])
-            wei = int(raw, 16) if raw and raw != '0x' else 0
-            if wei > 0:
-                price = (Decimal(wei) / Decimal(10) ** 18).quantize(Decimal('0.000001'))
-                _cache_set(CACHE_KEY, str(price), CACHE_TTL_SEC)
-                _cache_set(LAST_KNOWN_KEY, str(price), LAST_KNOWN_TTL_SEC)
-                return price
-        except Exception as e:
-            logger.warning(f"[PRESALE][PRICE] currentPrice() read failed: {e}")
+    if getattr(settings, 'BSC_PRESALE_VAULT_ADDRESS', None):
+        price = read_curve_price()
+        if price is not None:
+            return price
 
         last_known = _cache_get(LAST_KNOWN_KEY)
         if last_known is not None:
@@ -0,0 +1,29 @@
+# Live presale stats (presale.live_stats): a purchase turning 'completed'
+# bumps the running counters and pushes the change to presale sessions,
+# once the transaction that completed it has committed.
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import PresalePurchase
+
+
+@receiver(pre_save, sender=PresalePurchase)
+def cache_previous_purchase_status(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_status = (
+            sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+    else:
+        instance._previous_status = None
+
+
+@receiver(post_save, sender=PresalePurchase)
+def publish_completed_purchase(sender, instance, created, **kwargs):
+    if instance.status != 'completed' or getattr(instance, '_previous_status', None) == 'completed':
+        return
+    from .live_stats import record_completed
+
+    purchase_id = instance.pk
+    transaction.on_commit(lambda: record_completed(purchase_id))
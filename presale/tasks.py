@@ -398,3 +398,13 @@ def verify_presale_migration_credits() -> dict:
         f"[PRESALE][MIGRATION] verify: credited={verified} awaiting_safe_execution={still_pending}"
     )
     return {'verified': verified, 'still_pending': still_pending}
+
+
+@shared_task(name='presale.rebuild_live_stats')
+def rebuild_live_stats() -> dict:
+    """Reset the live stats counters from the purchases table (absorbs any
+    completion that bypassed save())."""
+    from .live_stats import rebuild
+
+    stats = rebuild()
+    return {'total_raised_usd': str(stats['total_raised_usd']), 'participants': stats['participants']}
@@ -406,3 +406,87 @@ class BscRedeemFundingTest(TestCase):
         with mock.patch.object(cplus, 'usdt_balance_raw', return_value=150 * self.WAD):
             self.assertEqual(cplus.reserved_usdt_wei(self.user, BSC_ADDR), 100 * self.WAD)
             self.assertEqual(cplus.sweepable_usdt_wei(self.user, BSC_ADDR), 50 * self.WAD)
+
+
+@override_settings(BSC_PRESALE_VAULT_ADDRESS=None)
+class PresaleLiveStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.phase = PresalePhase.objects.create(
+            phase_number=1,
+            name='Fase 1',
+            description='x',
+            price_per_token=Decimal('0.2'),
+            goal_amount=Decimal('1000000'),
+        )
+
+    def setUp(self):
+        from django.core.cache import cache
+        from presale import price_utils
+        cache.clear()
+        cache.set(price_utils.CACHE_KEY, '0.25', None)
+        self.layer = mock.Mock()
+        patcher = mock.patch('channels.layers.get_channel_layer', return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sent = []
+        patcher = mock.patch('asgiref.sync.async_to_sync',
+                             side_effect=lambda fn: lambda group, event: self.sent.append((group, event)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _purchase(self, user, amount, status='processing'):
+        return PresalePurchase.objects.create(
+            user=user,
+            phase=self.phase,
+            cusd_amount=Decimal(amount),
+            confio_amount=Decimal(amount) * 5,
+            price_per_token=Decimal('0.2'),
+            status=status,
+        )
+
+    def _complete(self, purchase):
+        with self.captureOnCommitCallbacks(execute=True):
+            purchase.complete_purchase('0xabc')
+
+    def test_completions_update_counters_and_push_deltas(self):
+        from presale import live_stats
+        from presale.price_utils import get_presale_curve_stats
+
+        alice, bob = _mk_user('alice'), _mk_user('bob')
+        self._complete(self._purchase(alice, '10.50'))
+        stats = get_presale_curve_stats()
+        self.assertEqual(stats['total_raised_usd'], Decimal('10.5'))
+        self.assertEqual(stats['participants'], 1)
+
+        self.sent.clear()
+        with self.assertNumQueries(0):
+            get_presale_curve_stats()
+        second = self._purchase(alice, '4')
+        self._complete(second)
+        self._complete(self._purchase(bob, '5.50'))
+        # A repeat for an already-counted purchase changes nothing.
+        live_stats.record_completed(second.pk)
+
+        stats = get_presale_curve_stats()
+        self.assertEqual(stats['total_raised_usd'], Decimal('20'))
+        self.assertEqual(stats['participants'], 2)
+        self.assertEqual(
+            [event['payload'] for _, event in self.sent],
+            [{'total_raised_usd': '14.5'}, {'total_raised_usd': '20', 'participants': 2}],
+        )
+        self.assertTrue(all(group == live_stats.GROUP for group, _ in self.sent))
+
+    def test_rebuild_absorbs_completions_that_skip_save(self):
+        from presale import live_stats
+
+        alice = _mk_user('alice')
+        live_stats.rebuild()
+        purchase = self._purchase(alice, '7')
+        PresalePurchase.objects.filter(pk=purchase.pk).update(status='completed')
+        self.assertEqual(live_stats.snapshot()['total_raised_usd'], Decimal('0'))
+
+        stats = live_stats.rebuild()
+
+        self.assertEqual(stats['total_raised_usd'], Decimal('7'))
+        self.assertEqual(self.sent[-1][1]['payload'], {'total_raised_usd': '7', 'participants': 1})
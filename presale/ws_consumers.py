@@ -58,6 +58,8 @@ class PresaleSessionConsumer(AsyncJsonWebsocketConsumer):
       - {type:"prepare_ready", pack:{internal_id, transactions, sponsor_transactions, user_signing_indexes, group_id}}
       - {type:"error", message}
       - {type:"submit_ok", transaction_id}
+      - {type:"stats", current_price?, total_raised_usd?, next_milestone_usd?, participants?}
+        (the full set on connect, then only the fields that changed — presale.live_stats)
     """
 
     KEEPALIVE_SEC = 25
@@ -73,11 +75,32 @@ class PresaleSessionConsumer(AsyncJsonWebsocketConsumer):
         await self.accept()
         self._keepalive_task = asyncio.create_task(self._keepalive())
         self._idle_task = asyncio.create_task(self._idle_close())
+        await self._join_stats()
 
     async def disconnect(self, code):
         for t in (getattr(self, "_keepalive_task", None), getattr(self, "_idle_task", None)):
             if t:
                 t.cancel()
+        if getattr(self, "_stats_joined", False):
+            from .live_stats import GROUP
+            await self.channel_layer.group_discard(GROUP, self.channel_name)
+
+    async def _join_stats(self):
+        """Live stats instead of polling presaleCurveStats: the current set
+        now, changes as they happen."""
+        from .live_stats import GROUP, snapshot, to_message
+
+        try:
+            if self.channel_layer is not None:
+                await self.channel_layer.group_add(GROUP, self.channel_name)
+                self._stats_joined = True
+            stats = await database_sync_to_async(snapshot)()
+            await self.send_json({"type": "stats", **to_message(stats)})
+        except Exception:
+            logging.getLogger(__name__).warning("[PRESALE][WS] live stats unavailable", exc_info=True)
+
+    async def presale_stats(self, event):
+        await self.send_json({"type": "stats", **event.get("payload", {})})
 
     def _get_client_ip(self):
         try:
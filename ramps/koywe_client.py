@@ -1,6 +1,7 @@
 import logging
 import re
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from decimal import Decimal, ROUND_DOWN, ROUND_UP
 from typing import Any
@@ -22,6 +23,13 @@ _TOKEN_CURRENCIES_CACHE_TTL = 60 * 15
 # TTL is only the survival window if beat or Koywe is down.
 _RAMP_LIMITS_CACHE_TTL = 60 * 60 * 12
 _ACCOUNT_PROFILE_SYNC_CACHE_TTL = 60 * 60 * 24
+# Quotes move with the market, so identical quotes are only reused briefly:
+# long enough for the limits estimator's repeated probes and for a user
+# re-opening the quote screen, short enough to stay a live price.
+_QUOTE_CACHE_TTL = int(getattr(settings, 'KOYWE_QUOTE_CACHE_TTL_SECONDS', 60))
+_QUOTE_AMOUNT_STEP = Decimal('0.01')
+# The 1000-unit quote both off-ramp estimates start from.
+_ESTIMATE_SAMPLE_AMOUNT = Decimal('1000')
 
 # The separator before <actual> is lazy so a leading minus sign lands in the
 # capture: quote outputs go NEGATIVE when the flat fee exceeds the amount
@@ -43,6 +51,21 @@ _MAXIMUM_AMOUNT_PATTERN = re.compile(
 )
 
 
+def _quote_amount(amount: Decimal) -> Decimal:
+    return Decimal(str(amount)).quantize(_QUOTE_AMOUNT_STEP)
+
+
+def _quote_cache_key(kind: str, symbol_in: str, symbol_out: str, amount: Decimal, payment_method_id: str | None = None, email: str | None = None) -> str:
+    """Preview and executable quotes never share a key, and executable
+    quotes requested for a user's email are scoped to that email."""
+    key = f'koywe:quote:{kind}:{symbol_in}:{symbol_out}:{_quote_amount(amount)}'
+    if payment_method_id:
+        key = f'{key}:{payment_method_id}'
+    if email:
+        key = f'{key}:{email}'
+    return key.replace(' ', '_')
+
+
 def _parse_amount(value: str | None) -> Decimal | None:
     if value is None:
         return None
@@ -291,18 +314,32 @@ class KoyweClient:
 
         fiat_min = Decimal(str(pair_limits['min']))
         fiat_max = Decimal(str(pair_limits['max']))
-        off_ramp_min = self._estimate_crypto_amount_for_fiat_output(
-            crypto_symbol=normalized_crypto,
-            fiat_symbol=normalized_fiat,
-            target_amount=fiat_min,
-            bias='at_least',
-        )
-        off_ramp_max = self._estimate_crypto_amount_for_fiat_output(
-            crypto_symbol=normalized_crypto,
-            fiat_symbol=normalized_fiat,
-            target_amount=fiat_max,
-            bias='at_most',
+        # Both searches start from the same sample quote, then probe
+        # independently, so they run side by side.
+        sample_quote = self.create_preview_quote(
+            symbol_in=normalized_crypto,
+            symbol_out=normalized_fiat,
+            amount=_ESTIMATE_SAMPLE_AMOUNT,
         )
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            min_job = pool.submit(
+                self._estimate_crypto_amount_for_fiat_output,
+                crypto_symbol=normalized_crypto,
+                fiat_symbol=normalized_fiat,
+                target_amount=fiat_min,
+                bias='at_least',
+                sample_quote=sample_quote,
+            )
+            max_job = pool.submit(
+                self._estimate_crypto_amount_for_fiat_output,
+                crypto_symbol=normalized_crypto,
+                fiat_symbol=normalized_fiat,
+                target_amount=fiat_max,
+                bias='at_most',
+                sample_quote=sample_quote,
+            )
+            off_ramp_min = min_job.result()
+            off_ramp_max = max_job.result()
         result = {
             'on_ramp_min_amount': fiat_min,
             'on_ramp_max_amount': fiat_max,
@@ -466,13 +503,22 @@ class KoyweClient:
         return data.get('items') or data.get('paymentProviders') or data.get('results') or []
 
     def create_preview_quote(self, *, symbol_in: str, symbol_out: str, amount: Decimal) -> dict[str, Any]:
+        """Non-executable quote, reused for _QUOTE_CACHE_TTL per (symbol_in,
+        symbol_out, amount to the cent). Rejections are not cached."""
+        amount = _quote_amount(amount)
+        cache_key = _quote_cache_key('preview', symbol_in, symbol_out, amount)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         payload = {
             'symbolIn': symbol_in,
             'symbolOut': symbol_out,
             'amountIn': float(amount),
             'executable': False,
         }
-        return self._request('POST', '/rest/quotes', auth=False, json_payload=payload)
+        quote = self._request('POST', '/rest/quotes', auth=False, json_payload=payload)
+        cache.set(cache_key, quote, timeout=_QUOTE_CACHE_TTL)
+        return quote
 
     def resolve_payment_provider(self, *, fiat_symbol: str, payment_method_code: str, email: str | None = None) -> tuple[str, str, dict[str, Any] | None]:
         providers = self.list_payment_providers(fiat_symbol=fiat_symbol, email=email)
@@ -515,13 +561,22 @@ class KoyweClient:
                 payment_method_code=payment_method_code,
                 email=email,
             )
-        quote = self.create_quote(
-            direction=normalized_direction,
-            amount=amount,
-            fiat_symbol=fiat_symbol,
-            payment_method_id=payment_method_id,
-            email=email,
-        )
+        # Only the figures of the quote are shown, so a recent identical
+        # executable quote for the same user serves as well as a new one.
+        if normalized_direction == 'ON_RAMP':
+            cache_key = _quote_cache_key('executable', fiat_symbol, self.crypto_symbol, amount, payment_method_id, email)
+        else:
+            cache_key = _quote_cache_key('executable', self.crypto_symbol, fiat_symbol, amount, email=email)
+        quote = cache.get(cache_key)
+        if quote is None:
+            quote = self.create_quote(
+                direction=normalized_direction,
+                amount=amount,
+                fiat_symbol=fiat_symbol,
+                payment_method_id=payment_method_id,
+                email=email,
+            )
+            cache.set(cache_key, quote, timeout=_QUOTE_CACHE_TTL)
         amount_in = Decimal(str(quote.get('amountIn') or amount))
         amount_out = Decimal(str(quote.get('amountOut') or 0))
         exchange_rate = Decimal(str(quote.get('exchangeRate') or 0))
@@ -715,6 +770,8 @@ class KoyweClient:
             payment_method_code=payment_method_code,
             email=email,
         )
+        # The order executes this quote, so it is always a fresh one
+        # created for this user.
         quote = self.create_quote(
             direction=normalized_direction,
             amount=amount,
@@ -1236,7 +1293,7 @@ class KoyweClient:
             candidates.append('USDT')
         return candidates
 
-    def _estimate_crypto_amount_for_fiat_output(self, *, crypto_symbol: str, fiat_symbol: str, target_amount: Decimal, bias: str = 'at_least') -> Decimal:
+    def _estimate_crypto_amount_for_fiat_output(self, *, crypto_symbol: str, fiat_symbol: str, target_amount: Decimal, bias: str = 'at_least', sample_quote: dict[str, Any] | None = None) -> Decimal:
         """Crypto amount whose quote lands on target_amount of fiat output.
 
         bias='at_least' returns an amount whose output covers the target
@@ -1255,11 +1312,12 @@ class KoyweClient:
         if target_amount <= 0:
             return Decimal('0')
 
-        sample_quote = self.create_preview_quote(
-            symbol_in=crypto_symbol,
-            symbol_out=fiat_symbol,
-            amount=Decimal('1000'),
-        )
+        if sample_quote is None:
+            sample_quote = self.create_preview_quote(
+                symbol_in=crypto_symbol,
+                symbol_out=fiat_symbol,
+                amount=_ESTIMATE_SAMPLE_AMOUNT,
+            )
         sample_amount_in = Decimal(str(sample_quote.get('amountIn') or '0'))
         sample_amount_out = Decimal(str(sample_quote.get('amountOut') or '0'))
         if sample_amount_in <= 0 or sample_amount_out <= 0:
@@ -1267,10 +1325,17 @@ class KoyweClient:
 
         points: list[tuple[Decimal, Decimal]] = [(sample_amount_in, sample_amount_out)]
         margin = Decimal('1.001') if bias == 'at_least' else Decimal('0.999')
+        # With the quote's own rate the single sample already pins the flat
+        # fee (fee = rate * in - out), so the first probe lands on the
+        # boundary instead of spending a quote to learn the fee.
+        sample_rate = _parse_amount(str(sample_quote.get('exchangeRate') or '')) or Decimal('0')
+        sample_fee = sample_rate * sample_amount_in - sample_amount_out if sample_rate > 0 else Decimal('-1')
 
         def next_amount(target_out: Decimal) -> Decimal:
             slope = sample_amount_out / sample_amount_in
             fee = Decimal('0')
+            if sample_fee >= 0:
+                slope, fee = sample_rate, sample_fee
             if len(points) >= 2:
                 (x1, y1), (x2, y2) = points[-2], points[-1]
                 if x2 != x1:
@@ -625,6 +625,8 @@ def sync_koywe_ramp_transaction_from_order(
     incoming_rank = _STATUS_ORDER.get(ramp_status, 0)
     current_rank = _STATUS_ORDER.get(ramp_tx.status, 0)
     if incoming_rank >= current_rank:
+        if ramp_status != ramp_tx.status:
+            ramp_tx.status_changed_at = timezone.now()
         ramp_tx.status = ramp_status
         ramp_tx.status_detail = normalized_detail if not status_details else f'{normalized_detail}: {status_details}'
         if ramp_status == 'COMPLETED':
@@ -650,6 +652,7 @@ def sync_koywe_ramp_transaction_from_order(
             'final_amount',
             'status',
             'status_detail',
+            'status_changed_at',
             'metadata',
             'completed_at',
             'updated_at',
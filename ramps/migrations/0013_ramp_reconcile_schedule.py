@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ramps', '0012_alter_ramptransaction_provider'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ramptransaction',
+            name='next_reconcile_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ramptransaction',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ramptransaction',
+            index=models.Index(fields=['provider', 'next_reconcile_at'], name='ramps_rampt_provide_889c7d_idx'),
+        ),
+    ]
@@ -212,11 +212,16 @@ class RampTransaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    status_changed_at = models.DateTimeField(null=True, blank=True)
+    # When the reconciliation poller next asks the provider about this order
+    # (ramps.reconciliation); NULL means as soon as possible.
+    next_reconcile_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['provider', 'direction', '-created_at']),
+            models.Index(fields=['provider', 'next_reconcile_at']),
             models.Index(fields=['actor_user', '-created_at']),
             models.Index(fields=['actor_business', '-created_at']),
             models.Index(fields=['status', '-created_at']),
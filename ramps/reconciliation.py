@@ -0,0 +1,190 @@
+"""
+Koywe order reconciliation — each open order polled on its own schedule.
+
+poll_koywe_ramp_transactions asked Koywe about every open order of the last
+seven days on every run, one after another: a token mint for the order's
+email when the cached one had expired, the status request, the sync, a
+refresh_from_db. A run cost the size of the backlog, however little of it
+was moving.
+
+Every open order now carries next_reconcile_at. Orders are checked often
+while something is likely to happen and less as they sit still: the
+interval comes from how long the order has been quiet — since its last
+status change, or since it was created — through RECONCILE_SCHEDULE. A new
+order (next_reconcile_at NULL) is due at once.
+
+reconcile_due_orders() takes up to BATCH due orders, groups them by the
+email their token is scoped to, and fetches each group on a pool of
+KOYWE_RECONCILE_WORKERS threads, one group per job: a group mints its token
+at most once and no two threads race to mint the same one. The responses
+are synced and rescheduled on the calling thread, so the pool never touches
+the database. A failed fetch is rescheduled like a quiet order, not retried
+in a loop.
+
+A webhook already carries the order's news, so defer_after_webhook pushes
+the next check out by WEBHOOK_GRACE.
+
+Each run publishes reconcile_lag() — open orders overdue, the oldest
+overdue age, and the run's counts — under LAG_KEY, and logs a warning when
+orders wait longer than LAG_WARN_SECONDS past their due time.
+"""
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from ramps.koywe_client import KoyweClient, KoyweError
+from ramps.koywe_sync import sync_koywe_ramp_transaction_from_order
+from ramps.models import RampTransaction
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ['PENDING', 'PROCESSING', 'AML_REVIEW']
+LOOKBACK = timedelta(days=7)
+# (quiet for less than, check every)
+RECONCILE_SCHEDULE = (
+    (timedelta(minutes=15), timedelta(minutes=1)),
+    (timedelta(hours=2), timedelta(minutes=5)),
+    (timedelta(hours=24), timedelta(minutes=30)),
+)
+RECONCILE_FLOOR_INTERVAL = timedelta(hours=3)
+WEBHOOK_GRACE = timedelta(seconds=int(getattr(settings, 'KOYWE_RECONCILE_WEBHOOK_GRACE_SECONDS', 15 * 60)))
+BATCH = int(getattr(settings, 'KOYWE_RECONCILE_BATCH', 200))
+WORKERS = int(getattr(settings, 'KOYWE_RECONCILE_WORKERS', 8))
+LOCK_KEY = 'koywe_reconcile_lock'
+LOCK_TTL = 10 * 60
+LAG_KEY = 'koywe_reconcile_lag'
+LAG_WARN_SECONDS = 300
+
+
+def open_orders():
+    """Koywe orders the poller still follows."""
+    return RampTransaction.objects.filter(
+        provider='koywe',
+        created_at__gte=timezone.now() - LOOKBACK,
+        status__in=OPEN_STATUSES,
+    ).exclude(provider_order_id='')
+
+
+def reconcile_interval(ramp_tx, now) -> timedelta:
+    quiet = now - (ramp_tx.status_changed_at or ramp_tx.created_at or now)
+    for limit, interval in RECONCILE_SCHEDULE:
+        if quiet < limit:
+            return interval
+    return RECONCILE_FLOOR_INTERVAL
+
+
+def _schedule(ramp_tx, when) -> None:
+    # A queryset update: rescheduling is not a change to the order, so it
+    # leaves updated_at alone.
+    RampTransaction.objects.filter(pk=ramp_tx.pk).update(next_reconcile_at=when)
+    ramp_tx.next_reconcile_at = when
+
+
+def defer_after_webhook(ramp_tx) -> None:
+    """The webhook just told us the order's state; poll again later."""
+    now = timezone.now()
+    _schedule(ramp_tx, now + max(WEBHOOK_GRACE, reconcile_interval(ramp_tx, now)))
+
+
+def _auth_email(ramp_tx):
+    return str((ramp_tx.metadata or {}).get('auth_email') or '').strip() or None
+
+
+def _fetch_group(email, order_ids) -> dict:
+    """{order id: KoyweOrderStatusResult or the KoyweError} for one email's
+    orders, on one client so the group shares its token."""
+    client = KoyweClient()
+    results = {}
+    for order_id in order_ids:
+        try:
+            results[order_id] = client.get_ramp_order_status(order_id=order_id, email=email)
+        except KoyweError as exc:
+            results[order_id] = exc
+        except Exception as exc:  # noqa: BLE001 — one order must not sink its group
+            logger.exception('Unexpected Koywe poll failure for %s', order_id)
+            results[order_id] = exc
+    return results
+
+
+def reconcile_due_orders(limit: int = BATCH) -> dict:
+    """Poll the orders that are due; returns counts for the log."""
+    out = {'polled': 0, 'updated': 0, 'failed': 0}
+    if not cache.add(LOCK_KEY, 1, LOCK_TTL):
+        logger.info('Koywe reconcile skipped: another run holds the lock')
+        return out
+    try:
+        now = timezone.now()
+        due = list(
+            open_orders()
+            .filter(Q(next_reconcile_at__isnull=True) | Q(next_reconcile_at__lte=now))
+            .order_by(F('next_reconcile_at').asc(nulls_first=True), '-created_at')[:limit]
+        )
+        groups = defaultdict(list)
+        for ramp_tx in due:
+            groups[_auth_email(ramp_tx)].append(ramp_tx)
+
+        results = {}
+        if groups:
+            with ThreadPoolExecutor(max_workers=min(WORKERS, len(groups))) as pool:
+                jobs = [
+                    pool.submit(_fetch_group, email, [ramp_tx.provider_order_id for ramp_tx in orders])
+                    for email, orders in groups.items()
+                ]
+                for job in jobs:
+                    results.update(job.result())
+
+        for ramp_tx in due:
+            out['polled'] += 1
+            result = results.get(ramp_tx.provider_order_id)
+            previous = (ramp_tx.status, ramp_tx.status_detail)
+            try:
+                if isinstance(result, Exception) or result is None:
+                    raise result or KoyweError('no response')
+                sync_koywe_ramp_transaction_from_order(
+                    ramp_tx=ramp_tx,
+                    order_payload=result.raw_response,
+                    next_action_url=result.next_action_url,
+                )
+                if (ramp_tx.status, ramp_tx.status_detail) != previous:
+                    out['updated'] += 1
+            except KoyweError as exc:
+                out['failed'] += 1
+                logger.warning('Koywe poll failed for %s: %s', ramp_tx.provider_order_id, exc)
+            except Exception:  # noqa: BLE001 — the order is rescheduled below either way
+                out['failed'] += 1
+                logger.exception('Unexpected Koywe poll failure for %s', ramp_tx.provider_order_id)
+            checked_at = timezone.now()
+            _schedule(ramp_tx, checked_at + reconcile_interval(ramp_tx, checked_at))
+    finally:
+        cache.delete(LOCK_KEY)
+
+    lag = reconcile_lag()
+    lag.update(out)
+    cache.set(LAG_KEY, lag, LOCK_TTL)
+    if lag['oldest_overdue_seconds'] > LAG_WARN_SECONDS:
+        logger.warning('Koywe reconcile lagging: %(overdue)s overdue, oldest %(oldest_overdue_seconds)ss', lag)
+    return out
+
+
+def reconcile_lag() -> dict:
+    """{'open', 'overdue', 'oldest_overdue_seconds'} for the open orders."""
+    now = timezone.now()
+    agg = open_orders().aggregate(
+        open=Count('id'),
+        overdue=Count('id', filter=Q(next_reconcile_at__lt=now) | Q(next_reconcile_at__isnull=True)),
+        oldest=Min('next_reconcile_at'),
+        oldest_new=Min('created_at', filter=Q(next_reconcile_at__isnull=True)),
+    )
+    due_since = [at for at in (agg['oldest'], agg['oldest_new']) if at is not None]
+    oldest = min(due_since) if due_since else None
+    return {
+        'open': agg['open'],
+        'overdue': agg['overdue'],
+        'oldest_overdue_seconds': max(0, int((now - oldest).total_seconds())) if oldest else 0,
+    }
@@ -1,12 +1,11 @@
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 from celery import shared_task
-from django.utils import timezone
+from django.conf import settings
 
 from ramps.koywe import COUNTRY_METHODS
 from ramps.koywe_client import KoyweClient, KoyweError
-from ramps.koywe_sync import sync_koywe_ramp_transaction_from_order
-from ramps.models import KoyweBankInfo, RampTransaction
+from ramps.models import KoyweBankInfo
 
 import logging
 
@@ -23,21 +22,30 @@ def refresh_koywe_ramp_limits():
     The off-ramp limits need several preview quotes to estimate, so computing
     them inline made rampAvailability (Recargar/Retiro screens) slow on cache
     misses. This runs hourly via celery beat; the cache TTL is 12h so limits
-    survive Koywe outages but requests always hit a warm cache.
+    survive Koywe outages but requests always hit a warm cache. Countries are
+    refreshed side by side (KOYWE_LIMITS_REFRESH_WORKERS), each on its own
+    client.
     """
-    client = KoyweClient()
-    refreshed = []
-    for country_code, config in COUNTRY_METHODS.items():
-        if not config['methods']:
-            continue
-        fiat = config['fiat_currency']
+    fiats = {
+        config['fiat_currency']: country_code
+        for country_code, config in COUNTRY_METHODS.items()
+        if config['methods']
+    }
+
+    def refresh(fiat):
+        country_code = fiats[fiat]
         try:
-            client.get_dynamic_ramp_limits(fiat_symbol=fiat, force_refresh=True)
-            refreshed.append(fiat)
+            KoyweClient().get_dynamic_ramp_limits(fiat_symbol=fiat, force_refresh=True)
+            return fiat
         except KoyweError as exc:
             logger.warning('Koywe ramp limits refresh failed for %s (%s): %s', country_code, fiat, exc)
         except Exception:
             logger.exception('Unexpected error refreshing Koywe ramp limits for %s (%s)', country_code, fiat)
+        return None
+
+    workers = int(getattr(settings, 'KOYWE_LIMITS_REFRESH_WORKERS', 4))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(fiats) or 1))) as pool:
+        refreshed = [fiat for fiat in pool.map(refresh, fiats) if fiat]
     return f'Refreshed Koywe ramp limits for {", ".join(refreshed) or "no currencies"}'
 
 
@@ -85,48 +93,19 @@ def sync_koywe_bank_info():
 @shared_task
 def poll_koywe_ramp_transactions():
     """
-    Poll Koywe for recent non-terminal ramp orders.
-    Webhooks are the primary source of truth; this is a reconciliation fallback.
+    Poll Koywe for the open ramp orders that are due a check.
+    Webhooks are the primary source of truth; this is a reconciliation fallback
+    whose per-order schedule lives in ramps.reconciliation.
     """
+    from ramps.reconciliation import open_orders, reconcile_due_orders
+
     client = KoyweClient()
     if not client.is_configured:
         logger.warning('Skipping Koywe ramp poll: client not configured')
         return 'Koywe not configured'
 
-    threshold = timezone.now() - timedelta(days=7)
-    pending_ramps = RampTransaction.objects.filter(
-        provider='koywe',
-        created_at__gte=threshold,
-        status__in=['PENDING', 'PROCESSING', 'AML_REVIEW'],
-    ).exclude(provider_order_id='').order_by('-created_at')
-
-    if not pending_ramps.exists():
+    if not open_orders().exists():
         return 'No pending Koywe ramps'
 
-    updated_count = 0
-    checked_count = 0
-
-    for ramp_tx in pending_ramps.iterator():
-        checked_count += 1
-        auth_email = str((ramp_tx.metadata or {}).get('auth_email') or '').strip() or None
-        try:
-            previous_status = ramp_tx.status
-            previous_detail = ramp_tx.status_detail
-            result = client.get_ramp_order_status(
-                order_id=ramp_tx.provider_order_id,
-                email=auth_email,
-            )
-            sync_koywe_ramp_transaction_from_order(
-                ramp_tx=ramp_tx,
-                order_payload=result.raw_response,
-                next_action_url=result.next_action_url,
-            )
-            ramp_tx.refresh_from_db(fields=['status', 'status_detail'])
-            if ramp_tx.status != previous_status or ramp_tx.status_detail != previous_detail:
-                updated_count += 1
-        except KoyweError as exc:
-            logger.warning('Koywe poll failed for %s: %s', ramp_tx.provider_order_id, exc)
-        except Exception:
-            logger.exception('Unexpected Koywe poll failure for %s', ramp_tx.provider_order_id)
-
-    return f'Polled {checked_count} Koywe ramps, updated {updated_count}'
+    out = reconcile_due_orders()
+    return f"Polled {out['polled']} Koywe ramps, updated {out['updated']}"
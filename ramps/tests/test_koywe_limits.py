@@ -170,3 +170,49 @@ class DynamicRampLimitsTests(SimpleTestCase):
         self.assertEqual(ctx.exception.currency, 'USD-PE')
         self.assertEqual(ctx.exception.actual, '8001')
         self.assertEqual(ctx.exception.maximum, '8000')
+
+    def test_quoted_rate_seeds_the_first_probe(self):
+        """A sample quote that carries its exchange rate pins the flat fee,
+        so the minimum is found with the first probe."""
+        def fake(*, symbol_in, symbol_out, amount):
+            quote = _fake_preview_quote(symbol_in=symbol_in, symbol_out=symbol_out, amount=amount)
+            return {**quote, 'exchangeRate': str(RATE)}
+
+        quote_mock = mock.Mock(side_effect=fake)
+        with mock.patch.object(KoyweClient, 'create_preview_quote', quote_mock):
+            estimate = self.client._estimate_crypto_amount_for_fiat_output(
+                crypto_symbol='USDC Algorand',
+                fiat_symbol='ARS',
+                target_amount=FIAT_MIN,
+            )
+
+        self.assertEqual(quote_mock.call_count, 2)
+        self.assertGreaterEqual(estimate * RATE - FLAT_FEE, FIAT_MIN)
+
+
+class KoyweQuoteCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = KoyweClient()
+
+    def test_identical_preview_quotes_share_one_request(self):
+        with mock.patch.object(KoyweClient, '_request', return_value={'amountOut': '10'}) as request_mock:
+            first = self.client.create_preview_quote(symbol_in='USDC Algorand', symbol_out='ARS', amount=Decimal('12.341'))
+            second = self.client.create_preview_quote(symbol_in='USDC Algorand', symbol_out='ARS', amount=Decimal('12.338'))
+
+        self.assertEqual(first, second)
+        request_mock.assert_called_once()
+        self.assertEqual(request_mock.call_args.kwargs['json_payload']['amountIn'], 12.34)
+
+    def test_ramp_quote_never_reuses_a_preview_or_another_users_quote(self):
+        quote = {'quoteId': 'q1', 'amountIn': '50', 'amountOut': '72000', 'exchangeRate': '1500'}
+        with mock.patch.object(KoyweClient, '_request', return_value=quote) as request_mock:
+            self.client.create_preview_quote(symbol_in=self.client.crypto_symbol, symbol_out='ARS', amount=Decimal('50'))
+            with mock.patch.object(KoyweClient, 'create_quote', return_value=quote) as create_quote:
+                self.client.get_ramp_quote(direction='off_ramp', amount=Decimal('50'), fiat_symbol='ARS', email='a@example.com')
+                self.client.get_ramp_quote(direction='off_ramp', amount=Decimal('50'), fiat_symbol='ARS', email='a@example.com')
+                result = self.client.get_ramp_quote(direction='off_ramp', amount=Decimal('50'), fiat_symbol='ARS', email='b@example.com')
+
+        request_mock.assert_called_once()
+        self.assertEqual([c.kwargs['email'] for c in create_quote.call_args_list], ['a@example.com', 'b@example.com'])
+        self.assertEqual(result['amount_out'], Decimal('72000'))
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from ramps import reconciliation
+from ramps.koywe_client import KoyweError, KoyweOrderStatusResult
+from ramps.models import RampTransaction
+
+
+class ReconcileIntervalTests(SimpleTestCase):
+    def _ramp(self, quiet):
+        now = timezone.now()
+        return mock.Mock(status_changed_at=now - quiet, created_at=now - timedelta(days=3)), now
+
+    def test_interval_backs_off_as_the_order_stays_quiet(self):
+        for quiet, expected in (
+            (timedelta(minutes=2), timedelta(minutes=1)),
+            (timedelta(hours=1), timedelta(minutes=5)),
+            (timedelta(hours=5), timedelta(minutes=30)),
+            (timedelta(days=2), reconciliation.RECONCILE_FLOOR_INTERVAL),
+        ):
+            ramp, now = self._ramp(quiet)
+            self.assertEqual(reconciliation.reconcile_interval(ramp, now), expected)
+
+    def test_unchanged_order_counts_from_creation(self):
+        now = timezone.now()
+        ramp = mock.Mock(status_changed_at=None, created_at=now - timedelta(hours=1))
+        self.assertEqual(reconciliation.reconcile_interval(ramp, now), timedelta(minutes=5))
+
+
+@mock.patch('ramps.signals._notify_ramp_status')
+class ReconcileDueOrdersTests(TestCase):
+    def setUp(self):
+        cache.delete(reconciliation.LOCK_KEY)
+
+    def _ramp(self, order_id, email, next_reconcile_at=None):
+        return RampTransaction.objects.create(
+            provider='koywe',
+            direction='off_ramp',
+            status='PENDING',
+            status_detail='waiting',
+            provider_order_id=order_id,
+            external_id=f'confio-{order_id}',
+            actor_type='user',
+            actor_address='0x' + ('1' * 40),
+            metadata={'auth_email': email},
+            next_reconcile_at=next_reconcile_at,
+        )
+
+    def _status(self, order_id, email=None):
+        status = 'EXECUTING' if order_id == 'order-a1' else 'WAITING'
+        return KoyweOrderStatusResult(order_id=order_id, status=status, raw_response={'status': status})
+
+    def test_polls_only_due_orders_one_client_per_email(self, _notify):
+        now = timezone.now()
+        a1 = self._ramp('order-a1', 'a@example.com')
+        a2 = self._ramp('order-a2', 'a@example.com', now - timedelta(minutes=1))
+        b1 = self._ramp('order-b1', 'b@example.com')
+        later = self._ramp('order-c1', 'c@example.com', now + timedelta(hours=1))
+
+        with mock.patch('ramps.reconciliation.KoyweClient') as client_cls:
+            client_cls.return_value.get_ramp_order_status.side_effect = self._status
+            out = reconciliation.reconcile_due_orders()
+
+        self.assertEqual(out, {'polled': 3, 'updated': 1, 'failed': 0})
+        self.assertEqual(client_cls.call_count, 2)
+        polled = {call.kwargs['order_id'] for call in client_cls.return_value.get_ramp_order_status.call_args_list}
+        self.assertEqual(polled, {'order-a1', 'order-a2', 'order-b1'})
+
+        a1.refresh_from_db()
+        self.assertEqual(a1.status, 'PROCESSING')
+        self.assertIsNotNone(a1.status_changed_at)
+        self.assertLessEqual(a1.next_reconcile_at, timezone.now() + timedelta(minutes=1))
+        for ramp in (a1, a2, b1):
+            ramp.refresh_from_db()
+            self.assertGreater(ramp.next_reconcile_at, now)
+        later.refresh_from_db()
+        self.assertEqual(later.next_reconcile_at, now + timedelta(hours=1))
+
+        lag = cache.get(reconciliation.LAG_KEY)
+        self.assertEqual((lag['open'], lag['overdue'], lag['polled']), (4, 0, 3))
+
+    def test_failed_fetch_is_rescheduled(self, _notify):
+        ramp = self._ramp('order-x', 'x@example.com')
+
+        with mock.patch('ramps.reconciliation.KoyweClient') as client_cls:
+            client_cls.return_value.get_ramp_order_status.side_effect = KoyweError('down')
+            out = reconciliation.reconcile_due_orders()
+
+        self.assertEqual(out['failed'], 1)
+        ramp.refresh_from_db()
+        self.assertEqual(ramp.status, 'PENDING')
+        self.assertGreater(ramp.next_reconcile_at, timezone.now())
+
+    def test_webhook_pushes_next_check_out(self, _notify):
+        ramp = self._ramp('order-w', 'w@example.com')
+
+        reconciliation.defer_after_webhook(ramp)
+
+        ramp.refresh_from_db()
+        self.assertGreaterEqual(
+            ramp.next_reconcile_at, timezone.now() + reconciliation.WEBHOOK_GRACE - timedelta(seconds=5))
@@ -442,7 +442,7 @@ class KoyweAddressReservationTests(TestCase):
 
 class KoyweReservationPollingTests(SimpleTestCase):
     @mock.patch('ramps.tasks.KoyweClient')
-    @mock.patch('ramps.tasks.RampTransaction.objects.filter')
+    @mock.patch('ramps.models.RampTransaction.objects.filter')
     def test_poller_excludes_reservations_without_provider_order(self, filter_mock, client_mock):
         queryset = mock.Mock()
         queryset.exclude.return_value = queryset
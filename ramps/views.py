@@ -14,6 +14,7 @@ from ramps.koywe_sync import (
     verify_koywe_webhook_signature,
 )
 from ramps.models import RampTransaction, RampWebhookEvent
+from ramps.reconciliation import defer_after_webhook
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +81,7 @@ def koywe_webhook(request):
             order_payload=result.raw_response,
             next_action_url=result.next_action_url,
         )
+        defer_after_webhook(ramp_tx)
     except KoyweError as exc:
         logger.warning('Koywe webhook reconcile failed for %s: %s', order_id, exc)
         return JsonResponse({'ok': False, 'error': str(exc)}, status=400)
@@ -71,8 +71,10 @@ def normalize_country(code) -> str | None:
 
 def get_country_for_ip(client_ip: str | None, header_country: str | None = None) -> str | None:
     """Resolve the ISO country for a request. Cheap paths first: the
-    Cloudflare edge header, then the cached security.IPAddress row, then a
-    live ipapi.co lookup which is written back as the cache."""
+    Cloudflare edge header, then the cached security.IPAddress row, then the
+    local range database (security.ip_country). Only when no database is
+    installed does it fall back to a live ipapi.co lookup, which is written
+    back as the cache."""
     country = normalize_country(header_country)
     if country:
         return country
@@ -88,6 +90,11 @@ def get_country_for_ip(client_ip: str | None, header_country: str | None = None)
     except Exception:  # noqa: BLE001
         pass
 
+    from security.ip_country import get_db
+    db = get_db()
+    if db is not None:
+        return normalize_country(db.lookup(client_ip))
+
     try:
         import requests
         response = requests.get(
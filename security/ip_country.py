@@ -0,0 +1,232 @@
+"""Local IP range -> country database.
+
+get_country_for_ip fell back to a live ipapi.co request (4s timeout) on the
+request path of GeoPolicy.evaluate, presale eligibility and
+country_for_request whenever Cloudflare's header was missing and no
+IPAddress row had a country. This module answers the same question from a
+file on disk.
+
+The file is a flat binary built by `manage.py refresh_ip_country_db` from a
+standard export — an IP range CSV (start,end,country as addresses or as
+integers, the DB-IP / IP2Location LITE layout), a CIDR CSV (network,country)
+or a MaxMind .mmdb (needs the optional maxminddb package):
+
+    header   MAGIC, IPv4 range count, IPv6 range count
+    IPv4     (start u32, end u32, country 2 bytes), big-endian, by start
+    IPv6     (start 16 bytes, end 16 bytes, country 2 bytes), by start
+
+Ranges are merged and non-overlapping, so a lookup is a binary search for
+the last range starting at or before the address — about twenty fixed-size
+reads straight out of the mmap'd file, a few microseconds, with nothing
+parsed at startup. A rewritten file is picked up by every process within
+RECHECK_SECONDS.
+"""
+from __future__ import annotations
+
+import csv
+import ipaddress
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Iterable, Iterator
+
+from django.conf import settings
+
+try:
+    import maxminddb
+except ImportError:  # optional: only needed to import .mmdb exports
+    maxminddb = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CFIPDB1\x00'
+HEADER = struct.Struct('>8sII')
+V4_RECORD = struct.Struct('>II2s')
+V6_RECORD = struct.Struct('>16s16s2s')
+RECHECK_SECONDS = 60
+
+_V4_MAPPED = ipaddress.ip_network('::ffff:0:0/96')
+
+
+def db_path() -> str:
+    default = os.path.join(getattr(settings, 'BASE_DIR', tempfile.gettempdir()), 'var', 'ip_country.bin')
+    return str(getattr(settings, 'IP_COUNTRY_DB_PATH', default))
+
+
+class IPCountryDB:
+    def __init__(self, path: str):
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.v4_count, self.v6_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f'{path} is not an IP country database')
+        self._v4_offset = HEADER.size
+        self._v6_offset = self._v4_offset + self.v4_count * V4_RECORD.size
+
+    def close(self) -> None:
+        self._map.close()
+
+    def _search(self, offset: int, count: int, record: struct.Struct, key) -> str | None:
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, _, _ = record.unpack_from(self._map, offset + mid * record.size)
+            if start <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        _, end, country = record.unpack_from(self._map, offset + (lo - 1) * record.size)
+        return country.decode('ascii') if key <= end else None
+
+    def lookup(self, ip: str) -> str | None:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if address.version == 4:
+            return self._search(self._v4_offset, self.v4_count, V4_RECORD, int(address))
+        return self._search(self._v6_offset, self.v6_count, V6_RECORD, address.packed)
+
+
+_DB = {'path': None, 'mtime': None, 'checked_at': 0.0, 'db': None}
+_DB_LOCK = threading.Lock()
+
+
+def get_db() -> IPCountryDB | None:
+    """The installed database, or None when there is none."""
+    now = time.monotonic()
+    path = db_path()
+    if _DB['path'] == path and now - _DB['checked_at'] < RECHECK_SECONDS:
+        return _DB['db']
+    with _DB_LOCK:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if _DB['path'] != path or _DB['mtime'] != mtime:
+            db = None
+            if mtime is not None:
+                try:
+                    db = IPCountryDB(path)
+                except Exception:  # noqa: BLE001 — an unreadable file is no database
+                    logger.warning('Ignoring unreadable IP country database at %s', path, exc_info=True)
+            # The previous map is left to the garbage collector: a lookup on
+            # another thread may still be reading it.
+            _DB.update({'path': path, 'mtime': mtime, 'db': db})
+        _DB['checked_at'] = now
+    return _DB['db']
+
+
+# ── Building ───────────────────────────────────────────────────────────
+
+def _parse_address(value: str):
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return ipaddress.IPv4Address(number) if number <= 0xFFFFFFFF else ipaddress.IPv6Address(number)
+    return ipaddress.ip_address(value)
+
+
+def _unmap(start, end):
+    """IPv4-mapped IPv6 ranges (IP2Location's IPv6 files carry IPv4 that
+    way) are stored as the IPv4 range they are."""
+    if start.version == 6 and start in _V4_MAPPED and end in _V4_MAPPED:
+        return start.ipv4_mapped, end.ipv4_mapped
+    return start, end
+
+
+def ranges_from_csv(path: str) -> Iterator[tuple]:
+    """(start, end, country) from a range CSV or (network, country) CIDR CSV.
+    Rows that do not parse — a header, a comment — are skipped."""
+    with open(path, newline='', encoding='utf-8') as fh:
+        for row in csv.reader(fh):
+            cells = [cell.strip() for cell in row]
+            try:
+                if len(cells) >= 3 and '/' not in cells[0]:
+                    start, end = _unmap(_parse_address(cells[0]), _parse_address(cells[1]))
+                    country = cells[2]
+                elif len(cells) >= 2:
+                    network = ipaddress.ip_network(cells[0], strict=False)
+                    start, end = _unmap(network[0], network[-1])
+                    country = cells[1]
+                else:
+                    continue
+            except ValueError:
+                continue
+            yield start, end, country
+
+
+def ranges_from_mmdb(path: str) -> Iterator[tuple]:
+    if maxminddb is None:
+        raise RuntimeError('Importing an .mmdb export needs the maxminddb package')
+    with maxminddb.open_database(path) as reader:
+        for network, record in reader:
+            record = record or {}
+            country = (record.get('country') or record.get('registered_country') or {}).get('iso_code')
+            if country:
+                start, end = _unmap(network[0], network[-1])
+                yield start, end, country
+
+
+def _normalized(ranges: Iterable[tuple]) -> tuple[list, list]:
+    """Sorted, non-overlapping, adjacent same-country ranges merged."""
+    from security.geo import normalize_country
+
+    by_version = {4: [], 6: []}
+    for start, end, country in ranges:
+        country = normalize_country(country)
+        if country is None or start.version != end.version or int(end) < int(start):
+            continue
+        by_version[start.version].append((int(start), int(end), country))
+
+    merged = {}
+    for version, rows in by_version.items():
+        rows.sort()
+        out = []
+        for start, end, country in rows:
+            if out and start <= out[-1][1]:
+                # Overlap: the earlier range keeps what it already covers.
+                start = out[-1][1] + 1
+                if start > end:
+                    continue
+            if out and out[-1][2] == country and out[-1][1] + 1 == start:
+                out[-1] = (out[-1][0], end, country)
+            else:
+                out.append((start, end, country))
+        merged[version] = out
+    return merged[4], merged[6]
+
+
+def write_db(ranges: Iterable[tuple], path: str | None = None) -> dict:
+    """Build the database file from (start, end, country) ranges, replacing
+    any previous one atomically. Returns the range counts."""
+    path = path or db_path()
+    v4, v6 = _normalized(ranges)
+    if not v4 and not v6:
+        # An empty database would silently answer "unknown" for everyone.
+        raise ValueError('no usable IP ranges')
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(HEADER.pack(MAGIC, len(v4), len(v6)))
+            for start, end, country in v4:
+                fh.write(V4_RECORD.pack(start, end, country.encode('ascii')))
+            for start, end, country in v6:
+                fh.write(V6_RECORD.pack(start.to_bytes(16, 'big'), end.to_bytes(16, 'big'),
+                                        country.encode('ascii')))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return {'ipv4_ranges': len(v4), 'ipv6_ranges': len(v6)}
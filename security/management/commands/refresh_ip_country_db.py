@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from security.ip_country import db_path, ranges_from_csv, ranges_from_mmdb, write_db
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the local IP -> country database (security.ip_country) from an '
+        'IP range CSV, a CIDR CSV or a MaxMind .mmdb export, given as a path or URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Export file path or http(s) URL; .gz is decompressed.')
+        parser.add_argument(
+            '--format',
+            choices=['auto', 'csv', 'mmdb'],
+            default='auto',
+            help='Export format; auto picks by file extension.',
+        )
+        parser.add_argument('--output', help='Database path (default: IP_COUNTRY_DB_PATH).')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        workdir = tempfile.mkdtemp(prefix='ip_country_')
+        try:
+            local = self._fetch(source, workdir)
+            name = source.lower()
+            if name.endswith('.gz'):
+                name = name[:-3]
+                unpacked = os.path.join(workdir, 'export')
+                with gzip.open(local, 'rb') as src, open(unpacked, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                local = unpacked
+
+            fmt = options['format']
+            if fmt == 'auto':
+                fmt = 'mmdb' if name.endswith('.mmdb') else 'csv'
+            try:
+                ranges = ranges_from_mmdb(local) if fmt == 'mmdb' else ranges_from_csv(local)
+                output = options.get('output') or db_path()
+                counts = write_db(ranges, output)
+            except (OSError, RuntimeError, ValueError) as exc:
+                raise CommandError(f'Could not build the IP country database: {exc}') from exc
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {counts['ipv4_ranges']} IPv4 and {counts['ipv6_ranges']} IPv6 ranges to {output}"
+        ))
+
+    def _fetch(self, source: str, workdir: str) -> str:
+        if not source.startswith(('http://', 'https://')):
+            if not os.path.exists(source):
+                raise CommandError(f'{source} does not exist')
+            return source
+        import requests
+
+        target = os.path.join(workdir, 'download')
+        try:
+            with requests.get(source, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                with open(target, 'wb') as fh:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        fh.write(chunk)
+        except requests.RequestException as exc:
+            raise CommandError(f'Could not download {source}: {exc}') from exc
+        return target
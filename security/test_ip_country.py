@@ -0,0 +1,96 @@
+"""The local IP -> country database: lookups, the export formats the
+refresh command reads, and get_country_for_ip answering from it without
+the live API."""
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from security import ip_country
+from security.geo import get_country_for_ip
+
+RANGES_CSV = '''ip_start,ip_end,country
+1.0.0.0,1.0.0.255,AU
+1.0.1.0,1.0.3.255,CN
+1.0.4.0,1.0.7.255,CN
+16777216,16777471,AU
+8.8.8.0,8.8.8.255,US
+2001:db8::,2001:db8:ffff:ffff:ffff:ffff:ffff:ffff,NL
+::ffff:9.9.9.0,::ffff:9.9.9.255,CH
+'''
+
+
+class IPCountryDBTests(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'ip_country.bin')
+        self.csv_path = os.path.join(self.tmpdir, 'export.csv')
+        with open(self.csv_path, 'w') as fh:
+            fh.write(RANGES_CSV)
+        self.settings_override = override_settings(IP_COUNTRY_DB_PATH=self.path)
+        self.settings_override.enable()
+        ip_country._DB.update({'path': None, 'mtime': None, 'checked_at': 0.0, 'db': None})
+
+    def tearDown(self):
+        self.settings_override.disable()
+        ip_country._DB.update({'path': None, 'mtime': None, 'checked_at': 0.0, 'db': None})
+        shutil.rmtree(self.tmpdir)
+
+    def _build(self):
+        return ip_country.write_db(ip_country.ranges_from_csv(self.csv_path), self.path)
+
+    def test_lookups_cover_ipv4_ipv6_and_mapped_addresses(self):
+        counts = self._build()
+        # 1.0.1.0-1.0.7.255 merges; the duplicate integer AU row overlaps.
+        self.assertEqual(counts, {'ipv4_ranges': 4, 'ipv6_ranges': 1})
+
+        db = ip_country.get_db()
+        self.assertEqual(db.lookup('1.0.0.7'), 'AU')
+        self.assertEqual(db.lookup('1.0.5.1'), 'CN')
+        self.assertEqual(db.lookup('8.8.8.8'), 'US')
+        self.assertEqual(db.lookup('9.9.9.9'), 'CH')
+        self.assertEqual(db.lookup('::ffff:8.8.8.8'), 'US')
+        self.assertEqual(db.lookup('2001:db8::1'), 'NL')
+        self.assertIsNone(db.lookup('8.8.9.1'))
+        self.assertIsNone(db.lookup('0.0.0.1'))
+        self.assertIsNone(db.lookup('2001:db9::1'))
+        self.assertIsNone(db.lookup('not-an-ip'))
+
+    def test_cidr_export_and_refresh_command(self):
+        with open(self.csv_path, 'w') as fh:
+            fh.write('network,country\n8.8.4.0/24,US\n2a00:1450::/32,IE\n')
+        out = StringIO()
+
+        call_command('refresh_ip_country_db', self.csv_path, stdout=out)
+
+        self.assertIn('1 IPv4 and 1 IPv6', out.getvalue())
+        db = ip_country.get_db()
+        self.assertEqual(db.lookup('8.8.4.4'), 'US')
+        self.assertEqual(db.lookup('2a00:1450:4001::1'), 'IE')
+
+    def test_empty_export_keeps_the_installed_database(self):
+        self._build()
+        with open(self.csv_path, 'w') as fh:
+            fh.write('nothing,useful\n')
+        with self.assertRaises(Exception):
+            call_command('refresh_ip_country_db', self.csv_path, stdout=StringIO())
+        self.assertEqual(ip_country.get_db().lookup('8.8.8.8'), 'US')
+
+    @mock.patch('security.models.IPAddress.objects.filter', side_effect=Exception('no db'))
+    def test_geo_resolution_uses_the_local_database_not_the_api(self, _filter):
+        self._build()
+        with mock.patch('requests.get') as live:
+            self.assertEqual(get_country_for_ip('8.8.8.8'), 'US')
+            self.assertIsNone(get_country_for_ip('8.8.9.1'))
+        live.assert_not_called()
+
+    @mock.patch('security.models.IPAddress.objects.filter', side_effect=Exception('no db'))
+    def test_live_lookup_remains_without_a_database(self, _filter):
+        with mock.patch('requests.get') as live:
+            live.return_value.status_code = 500
+            self.assertIsNone(get_country_for_ip('8.8.8.8'))
+        live.assert_called_once()
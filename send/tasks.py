@@ -155,8 +155,11 @@ def confirm_bsc_send(self, send_id: int, batch_id: int):
         # finality lands ~1s after mining, so the first checks should be
         # seconds apart. A flat 15s here is what kept the user staring at
         # 'Confirmando…' long after the chain had already committed.
+        # Slower while the receipt tracker runs: it re-dispatches this task
+        # once the batch settles, the retry only covers a tracker that died.
+        from cusd_plus.receipt_tracker import fallback_countdown
         from cusd_plus.tasks import _retry_countdown
-        raise self.retry(countdown=_retry_countdown(self.request.retries))
+        raise self.retry(countdown=fallback_countdown(_retry_countdown(self.request.retries)))
 
     if batch.status == 'confirmed':
         s.status = 'CONFIRMED'
@@ -172,3 +175,33 @@ def confirm_bsc_send(self, send_id: int, batch_id: int):
         s.save(update_fields=['status', 'error_message', 'updated_at'])
         logger.warning('[SEND][BSC] %s failed: batch %s %s',
                        s.internal_id, batch.id, batch.status)
+
+
+SEND_KINDS = ('send_cusd_plus', 'send_redeem', 'send_usdt')
+
+
+@shared_task(name='send.reconcile_stranded_bsc_sends')
+def reconcile_stranded_bsc_sends():
+    """Re-queue confirm_bsc_send for sends still SUBMITTED behind a batch
+    that has already resolved: the confirmer exhausted its retries, or the
+    receipt tracker settled the batch but could not dispatch it."""
+    from django.db.models import Q
+
+    from blockchain.models import SponsoredBatch
+    from .models import SendTransaction
+
+    TERMINAL = ('confirmed', 'reverted', 'dropped', 'reorged', 'noop_failed')
+
+    requeued = 0
+    batches = (SponsoredBatch.objects
+               .filter(kind__in=SEND_KINDS, status__in=TERMINAL)
+               .exclude(source_id=None).order_by('-id')[:300])
+    for batch in batches:
+        if SendTransaction.objects.filter(
+                Q(transaction_hash=batch.tx_hash) | Q(transaction_hash=''),
+                id=batch.source_id, status='SUBMITTED').exists():
+            confirm_bsc_send.apply_async(args=[batch.source_id, batch.id])
+            requeued += 1
+    if requeued:
+        logger.info('[SEND][BSC] reconcile: %s re-queued', requeued)
+    return {'requeued': requeued}
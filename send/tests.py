@@ -23,6 +23,7 @@ from unittest import mock
 
 from django.test import SimpleTestCase, TestCase, override_settings
 
+from cusd_plus.receipt_tracker import FALLBACK_COUNTDOWN
 from cusd_plus.sponsor_7702 import (
     PolicyError,
     SEL_REDEEM_TO_USDT,
@@ -598,3 +599,30 @@ class ConfirmTaskTests(SimpleTestCase):
         s, notify = self._run('reverted')
         self.assertEqual(s.status, 'FAILED')
         notify.assert_not_called()
+
+    def test_pending_batch_keeps_retrying_while_the_receipt_tracker_runs(self):
+        from celery.exceptions import Retry
+        from send import tasks as send_tasks
+        with mock.patch('cusd_plus.receipt_tracker.tracker_alive', return_value=True), \
+             mock.patch.object(send_tasks.confirm_bsc_send, 'retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                self._run('sent')
+        retry.assert_called_once_with(countdown=FALLBACK_COUNTDOWN)
+
+
+class StrandedSendSweepTests(SimpleTestCase):
+    def test_requeues_submitted_sends_behind_resolved_batches(self):
+        from send import tasks as send_tasks
+        batches = [SimpleNamespace(id=9, source_id=7, tx_hash='0x' + 'aa' * 32),
+                   SimpleNamespace(id=10, source_id=8, tx_hash='0x' + 'bb' * 32)]
+        with mock.patch('blockchain.models.SponsoredBatch.objects') as bobjs, \
+             mock.patch('send.models.SendTransaction.objects') as sobjs, \
+             mock.patch.object(send_tasks.confirm_bsc_send, 'apply_async') as confirm:
+            bobjs.filter.return_value.exclude.return_value.order_by.return_value = batches
+            sobjs.filter.return_value.exists.side_effect = [True, False]
+            out = send_tasks.reconcile_stranded_bsc_sends()
+
+        self.assertEqual(out, {'requeued': 1})
+        confirm.assert_called_once_with(args=[7, 9])
+        self.assertNotIn('signed', bobjs.filter.call_args.kwargs['status__in'])
+        self.assertNotIn('sent', bobjs.filter.call_args.kwargs['status__in'])
@@ -6,10 +6,9 @@ from django.utils import timezone
 from .models import USDCDeposit, USDCWithdrawal
 from conversion.models import Conversion
 from .models_unified import UnifiedUSDCTransactionTable
-from achievements.services.referral_rewards import (
-    EventContext,
-    sync_referral_reward_for_event,
-)
+from users import unified_projector
+from achievements.services.referral_pipeline import submit_referral_event
+from achievements.services.referral_rewards import EventContext
 
 logger = logging.getLogger(__name__)
 
@@ -226,7 +225,7 @@ def handle_usdc_deposit_save(sender, instance, created, **kwargs):
             instance.deposit_id,
             instance.amount,
         )
-        sync_referral_reward_for_event(
+        submit_referral_event(
             instance.actor_user,
             EventContext(
                 event="top_up",
@@ -365,7 +364,13 @@ def handle_conversion_save_for_usdc(sender, instance, created, **kwargs):
     """Create/update unified USDC transaction when Conversion is saved"""
     # Only process if not deleted and is USDC-related
     if not instance.is_deleted:
-        create_unified_usdc_transaction_from_conversion(instance)
+        # While the unified projector runs it writes this row alongside the
+        # conversion's unified row (users.unified_projector); the record is
+        # enqueued here too so neither receiver depends on the other's mode.
+        if unified_projector.deferred():
+            unified_projector.enqueue('conversion', instance.id)
+        else:
+            create_unified_usdc_transaction_from_conversion(instance)
 
 
 # Handle conversion soft deletes
@@ -373,6 +378,9 @@ def handle_conversion_save_for_usdc(sender, instance, created, **kwargs):
 def handle_conversion_soft_delete_for_usdc(sender, instance, **kwargs):
     """Handle soft delete of Conversion for USDC transactions"""
     if instance.is_deleted:
+        if unified_projector.deferred():
+            unified_projector.enqueue('conversion', instance.id)
+            return
         # Delete the unified USDC transaction if it exists
         UnifiedUSDCTransactionTable.objects.filter(conversion=instance).delete()
 
@@ -1,8 +1,9 @@
 """
-GraphQL middleware to automatically track user activity on mutations
+GraphQL hooks to automatically track user activity on mutations
 
-This middleware automatically calls touch_last_activity() for all authenticated mutations,
+ActivityTrackingHook calls touch_last_activity() once per authenticated mutation,
 ensuring comprehensive activity tracking without manual calls in every mutation.
+It runs as an operation hook of the GraphQL view (config.graphql_pipeline).
 """
 
 from graphql import GraphQLResolveInfo
@@ -12,9 +13,30 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class ActivityTrackingHook:
+    """
+    Operation hook that tracks user activity on GraphQL mutations: one
+    touch_last_activity() per mutation request, whatever its field count.
+    """
+
+    def after(self, request, operation, result):
+        if operation.type != 'mutation' or result is None:
+            return
+        user = getattr(request, 'user', None)
+        if user and user.is_authenticated:
+            try:
+                touch_last_activity(user)
+            except Exception as e:
+                # Log error but don't fail the mutation
+                logger.error(f"Failed to track activity for user {user.id}: {e}")
+
+
 class ActivityTrackingMiddleware:
     """
-    Middleware that tracks user activity on GraphQL mutations.
+    Field middleware that tracks user activity on GraphQL mutations.
+
+    Superseded by ActivityTrackingHook: the GraphQL view drops this class
+    from its field middleware, which would otherwise run it per field.
 
     This automatically updates last_activity_at for all authenticated mutations,
     providing comprehensive DAU/MAU tracking without requiring manual calls
@@ -4,12 +4,7 @@ from send.models import SendTransaction
 from payments.models import PaymentTransaction
 from p2p_exchange.models import P2PTrade
 from conversion.models import Conversion
-from users.signals import (
-    create_unified_transaction_from_send,
-    create_unified_transaction_from_payment,
-    create_unified_transaction_from_p2p_trade,
-    create_unified_transaction_from_conversion
-)
+from users.unified_projector import project_sources
 
 
 class Command(BaseCommand):
@@ -35,116 +30,46 @@ class Command(BaseCommand):
         transaction_type = options['type']
 
         if transaction_type in ['send', 'all']:
-            self.migrate_send_transactions(batch_size)
-        
+            self.migrate('SendTransaction', 'send',
+                         SendTransaction.objects.filter(deleted_at__isnull=True), batch_size)
+
         if transaction_type in ['payment', 'all']:
-            self.migrate_payment_transactions(batch_size)
-        
+            self.migrate('PaymentTransaction', 'payment',
+                         PaymentTransaction.objects.filter(deleted_at__isnull=True), batch_size)
+
         if transaction_type in ['p2p', 'all']:
-            self.migrate_p2p_trades(batch_size)
-        
+            # Only migrate completed/released trades
+            self.migrate('P2PTrade', 'p2p_trade',
+                         P2PTrade.objects.filter(deleted_at__isnull=True,
+                                                 status__in=['CRYPTO_RELEASED', 'COMPLETED']),
+                         batch_size)
+
         if transaction_type in ['conversion', 'all']:
-            self.migrate_conversions(batch_size)
+            self.migrate('Conversion', 'conversion',
+                         Conversion.objects.filter(is_deleted=False), batch_size)
 
-    def migrate_send_transactions(self, batch_size):
-        """Migrate SendTransaction records"""
-        self.stdout.write('Migrating SendTransaction records...')
-        
-        total = SendTransaction.objects.filter(deleted_at__isnull=True).count()
-        processed = 0
-        
-        while processed < total:
-            with transaction.atomic():
-                transactions = SendTransaction.objects.filter(
-                    deleted_at__isnull=True
-                ).order_by('id')[processed:processed + batch_size]
-                
-                for tx in transactions:
-                    try:
-                        create_unified_transaction_from_send(tx)
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(f'Error migrating SendTransaction {tx.id}: {e}')
-                        )
-                
-                processed += len(transactions)
-                self.stdout.write(f'Processed {processed}/{total} SendTransactions')
+    def migrate(self, label, source_type, queryset, batch_size):
+        """Project `queryset` in id order through the unified projector's
+        bulk path — one query per batch for the rows and their relations,
+        one commit per batch."""
+        self.stdout.write(f'Migrating {label} records...')
 
-    def migrate_payment_transactions(self, batch_size):
-        """Migrate PaymentTransaction records"""
-        self.stdout.write('Migrating PaymentTransaction records...')
-        
-        total = PaymentTransaction.objects.filter(deleted_at__isnull=True).count()
+        total = queryset.count()
         processed = 0
-        
-        while processed < total:
-            with transaction.atomic():
-                transactions = PaymentTransaction.objects.filter(
-                    deleted_at__isnull=True
-                ).order_by('id')[processed:processed + batch_size]
-                
-                for tx in transactions:
-                    try:
-                        create_unified_transaction_from_payment(tx)
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(f'Error migrating PaymentTransaction {tx.id}: {e}')
-                        )
-                
-                processed += len(transactions)
-                self.stdout.write(f'Processed {processed}/{total} PaymentTransactions')
+        last_id = 0
 
-    def migrate_p2p_trades(self, batch_size):
-        """Migrate P2PTrade records"""
-        self.stdout.write('Migrating P2PTrade records...')
-        
-        # Only migrate completed/released trades
-        total = P2PTrade.objects.filter(
-            deleted_at__isnull=True,
-            status__in=['CRYPTO_RELEASED', 'COMPLETED']
-        ).count()
-        processed = 0
-        
-        while processed < total:
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).order_by('id')
+                       .values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
             with transaction.atomic():
-                trades = P2PTrade.objects.filter(
-                    deleted_at__isnull=True,
-                    status__in=['CRYPTO_RELEASED', 'COMPLETED']
-                ).order_by('id')[processed:processed + batch_size]
-                
-                for trade in trades:
-                    try:
-                        create_unified_transaction_from_p2p_trade(trade)
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(f'Error migrating P2PTrade {trade.id}: {e}')
-                        )
-                
-                processed += len(trades)
-                self.stdout.write(f'Processed {processed}/{total} P2PTrades')
+                result = project_sources(source_type, ids)
+            for source_id, error in result['failed'].items():
+                self.stdout.write(
+                    self.style.ERROR(f'Error migrating {label} {source_id}: {error}')
+                )
 
-    def migrate_conversions(self, batch_size):
-        """Migrate Conversion records"""
-        self.stdout.write('Migrating Conversion records...')
-        
-        total = Conversion.objects.filter(is_deleted=False).count()
-        processed = 0
-        
-        while processed < total:
-            with transaction.atomic():
-                conversions = Conversion.objects.filter(
-                    is_deleted=False
-                ).order_by('id')[processed:processed + batch_size]
-                
-                for conv in conversions:
-                    try:
-                        create_unified_transaction_from_conversion(conv)
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(f'Error migrating Conversion {conv.id}: {e}')
-                        )
-                
-                processed += len(conversions)
-                self.stdout.write(f'Processed {processed}/{total} Conversions')
-        
-        self.stdout.write(self.style.SUCCESS('Migration completed!'))
\ No newline at end of file
+            last_id = ids[-1]
+            processed += len(ids)
+            self.stdout.write(f'Processed {processed}/{total} {label}s')
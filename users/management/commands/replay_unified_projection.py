@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from users.models_unified import UnifiedProjectionOutbox
+from users.unified_projector import (
+    MAX_ATTEMPTS,
+    _sources,
+    project_sources,
+    projection_lag,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-project source rows into the unified transaction tables, report the '
+        'projection outbox lag, or release records that exhausted their retries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            type=str,
+            choices=[t for t, _ in UnifiedProjectionOutbox.SOURCE_TYPES] + ['all'],
+            default='all',
+            help='Source type to replay'
+        )
+        parser.add_argument('--since', type=str, help='Only rows updated at or after this ISO date/time')
+        parser.add_argument('--ids', type=str, help='Comma-separated source ids (requires a single --type)')
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='Project here instead of queueing for the projector'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help=f'Reset attempts on records that failed {MAX_ATTEMPTS} times so the projector retries them'
+        )
+        parser.add_argument('--lag', action='store_true', help='Print the outbox lag and exit')
+
+    def handle(self, *args, **options):
+        if options['lag']:
+            lag = projection_lag()
+            self.stdout.write(
+                f"pending={lag['pending']} oldest_age_seconds={lag['oldest_age_seconds']} "
+                f"failing={lag['failing']}"
+            )
+            return
+
+        if options['retry_failed']:
+            released = UnifiedProjectionOutbox.objects.filter(attempts__gte=MAX_ATTEMPTS).update(attempts=0)
+            self.stdout.write(self.style.SUCCESS(f'Released {released} failed record(s)'))
+            return
+
+        types = [t for t, _ in UnifiedProjectionOutbox.SOURCE_TYPES] if options['type'] == 'all' else [options['type']]
+        if options['ids'] and len(types) != 1:
+            raise CommandError('--ids needs a single --type')
+        since = None
+        if options['since']:
+            try:
+                since = datetime.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f"Invalid --since: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        sources = _sources()
+        for source_type in types:
+            model = sources[source_type][0]
+            queryset = getattr(model, 'all_objects', model.objects).all()
+            if options['ids']:
+                queryset = queryset.filter(id__in=[int(i) for i in options['ids'].split(',') if i.strip()])
+            if since:
+                queryset = queryset.filter(updated_at__gte=since)
+            self.replay(source_type, queryset, options['batch_size'], options['inline'])
+
+    def replay(self, source_type, queryset, batch_size, inline):
+        total = projected = failed = 0
+        last_id = 0
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).order_by('id')
+                       .values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            total += len(ids)
+            if inline:
+                with transaction.atomic():
+                    result = project_sources(source_type, ids)
+                projected += result['projected']
+                failed += len(result['failed'])
+            else:
+                UnifiedProjectionOutbox.objects.bulk_create([
+                    UnifiedProjectionOutbox(source_type=source_type, source_id=source_id)
+                    for source_id in ids
+                ])
+        if inline:
+            self.stdout.write(f'{source_type}: {projected}/{total} projected, {failed} failed')
+        else:
+            self.stdout.write(f'{source_type}: {total} queued for the projector')
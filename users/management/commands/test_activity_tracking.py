@@ -161,17 +161,19 @@ class Command(BaseCommand):
             # SQLite or other DB might not support this query
             self.stdout.write(self.style.WARNING(f'  ⊘ SKIP: Could not check index ({e})'))
 
-        # Test 7: Middleware configuration
-        self.stdout.write('\nTest 7: GraphQL middleware configuration...')
+        # Test 7: Operation hook configuration (the view drops the old
+        # ActivityTrackingMiddleware; config.graphql_pipeline tracks activity)
+        self.stdout.write('\nTest 7: GraphQL activity hook configuration...')
         try:
             from django.conf import settings
+            from config.graphql_pipeline import DEFAULT_OPERATION_HOOKS
 
-            middleware = settings.GRAPHENE.get('MIDDLEWARE', [])
-            if 'users.graphql_middleware.ActivityTrackingMiddleware' in middleware:
-                self.stdout.write(self.style.SUCCESS('  ✓ PASS: Middleware configured correctly'))
+            hooks = getattr(settings, 'GRAPHQL_OPERATION_HOOKS', DEFAULT_OPERATION_HOOKS)
+            if 'users.graphql_middleware.ActivityTrackingHook' in hooks:
+                self.stdout.write(self.style.SUCCESS('  ✓ PASS: Activity hook configured correctly'))
                 tests_passed += 1
             else:
-                self.stdout.write(self.style.ERROR('  ✗ FAIL: Middleware not configured'))
+                self.stdout.write(self.style.ERROR('  ✗ FAIL: Activity hook not configured'))
                 tests_failed += 1
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'  ✗ FAIL: {e}'))
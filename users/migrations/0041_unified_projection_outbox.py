@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0040_account_wallet_reenrollment_assessment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnifiedProjectionOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('send', 'SendTransaction'), ('payment', 'PaymentTransaction'), ('p2p_trade', 'P2PTrade'), ('conversion', 'Conversion'), ('payroll_item', 'PayrollItem'), ('humanitarian_donation', 'HumanitarianDonation'), ('humanitarian_release', 'HumanitarianRelease')], max_length=32)),
+                ('source_id', models.BigIntegerField()),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'unified_projection_outbox',
+                'indexes': [models.Index(fields=['source_type', 'source_id'], name='unified_pro_source__7655a1_idx')],
+            },
+        ),
+    ]
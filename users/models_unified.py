@@ -473,3 +473,34 @@ class UnifiedTransactionTable(models.Model):
 
     def __str__(self):
         return f"{self.transaction_type.upper()}-{self.transaction_hash or 'pending'}: {self.token_type} {self.amount}"
+
+
+class UnifiedProjectionOutbox(models.Model):
+    """
+    One pending change to a source row the unified tables project
+    (users.unified_projector). Written inside the source save's transaction,
+    so a committed change always has its record; deleted once projected.
+    """
+    SOURCE_TYPES = [
+        ('send', 'SendTransaction'),
+        ('payment', 'PaymentTransaction'),
+        ('p2p_trade', 'P2PTrade'),
+        ('conversion', 'Conversion'),
+        ('payroll_item', 'PayrollItem'),
+        ('humanitarian_donation', 'HumanitarianDonation'),
+        ('humanitarian_release', 'HumanitarianRelease'),
+    ]
+
+    source_type = models.CharField(max_length=32, choices=SOURCE_TYPES)
+    source_id = models.BigIntegerField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'unified_projection_outbox'
+        indexes = [
+            models.Index(fields=['source_type', 'source_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_type}:{self.source_id}"
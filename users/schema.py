@@ -1383,6 +1383,7 @@ class Query(EmployeeQueries, graphene.ObjectType):
 	achievement_types = graphene.List(AchievementTypeType, category=graphene.String())
 	user_achievements = graphene.List(UserAchievementType, status=graphene.String())
 	achievement_leaderboard = graphene.List(UserAchievementType, achievement_slug=graphene.String())
+	my_achievement_rank = graphene.Int(achievement_slug=graphene.String(required=True))
 	influencer_stats = graphene.Field(InfluencerStatsType, referrer_identifier=graphene.String(required=True))
 	my_influencer_stats = graphene.Field(InfluencerStatsType)
 	user_influencer_referrals = graphene.List(InfluencerReferralType)
@@ -1390,6 +1391,7 @@ class Query(EmployeeQueries, graphene.ObjectType):
 	# Ambassador system queries
 	my_ambassador_profile = graphene.Field(InfluencerAmbassadorType)
 	ambassador_leaderboard = graphene.List(InfluencerAmbassadorType, tier=graphene.String())
+	my_ambassador_rank = graphene.Int(tier=graphene.String())
 	my_ambassador_activities = graphene.List(AmbassadorActivityType, limit=graphene.Int())
 	
 	# CONFIO balance queries
@@ -2450,22 +2452,16 @@ class Query(EmployeeQueries, graphene.ObjectType):
 	
 	def resolve_achievement_leaderboard(self, info, achievement_slug=None):
 		"""Get leaderboard for a specific achievement or all achievements"""
-		if achievement_slug:
-			try:
-				achievement_type = AchievementType.objects.get(slug=achievement_slug, is_active=True)
-				queryset = UserAchievement.objects.filter(
-					achievement_type=achievement_type,
-					status='earned'
-				).select_related('user', 'achievement_type')
-			except AchievementType.DoesNotExist:
-				return []
-		else:
-			# Return all earned achievements
-			queryset = UserAchievement.objects.filter(
-				status='earned'
-			).select_related('user', 'achievement_type')
-		
-		return queryset.order_by('-earned_at')[:50]  # Top 50
+		from achievements.services.leaderboards import achievement_leaderboard
+		return achievement_leaderboard(achievement_slug)  # Top 50
+	
+	def resolve_my_achievement_rank(self, info, achievement_slug):
+		"""Current user's position on an achievement's leaderboard"""
+		user = getattr(info.context, 'user', None)
+		if not (user and getattr(user, 'is_authenticated', False)):
+			return None
+		from achievements.services.leaderboards import achievement_rank
+		return achievement_rank(user, achievement_slug)
 	
 	def resolve_influencer_stats(self, info, referrer_identifier):
 		"""Get stats for a specific TikTok influencer"""
@@ -2567,14 +2563,16 @@ class Query(EmployeeQueries, graphene.ObjectType):
 	
 	def resolve_ambassador_leaderboard(self, info, tier=None):
 		"""Get ambassador leaderboard, optionally filtered by tier"""
-		queryset = InfluencerAmbassador.objects.filter(
-			status='active'
-		).order_by('-total_viral_views')[:100]
-		
-		if tier:
-			queryset = queryset.filter(tier=tier)
-		
-		return queryset
+		from achievements.services.leaderboards import ambassador_leaderboard
+		return ambassador_leaderboard(tier)  # Top 100
+	
+	def resolve_my_ambassador_rank(self, info, tier=None):
+		"""Current user's position on the ambassador leaderboard"""
+		user = getattr(info.context, 'user', None)
+		if not (user and getattr(user, 'is_authenticated', False)):
+			return None
+		from achievements.services.leaderboards import ambassador_rank
+		return ambassador_rank(user, tier)
 	
 	def resolve_my_ambassador_activities(self, info, limit=None):
 		"""Get current user's ambassador activities"""
@@ -9,15 +9,14 @@ from payments.models import PaymentTransaction
 from p2p_exchange.models import P2PTrade
 from conversion.models import Conversion
 from .models_unified import UnifiedTransactionTable
+from . import unified_projector
 from payroll.models import PayrollRecipient, PayrollItem, PayrollRun
 from humanitarian.models import HumanitarianDonation, HumanitarianRelease
 from users.models_employee import BusinessEmployee
 from users.models import Account
 from achievements.signals import _award_referral_pair
-from achievements.services.referral_rewards import (
-    EventContext,
-    sync_referral_reward_for_event,
-)
+from achievements.services.referral_pipeline import submit_referral_event
+from achievements.services.referral_rewards import EventContext
 from django.db import transaction
 
 logger = logging.getLogger(__name__)
@@ -569,7 +568,10 @@ def create_unified_transaction_from_humanitarian_release(release):
 def handle_send_transaction_save(sender, instance, created, **kwargs):
     """Create/update unified transaction when SendTransaction is saved"""
     if instance.deleted_at is None:  # Only process non-deleted transactions
-        create_unified_transaction_from_send(instance)
+        if unified_projector.deferred():
+            unified_projector.enqueue('send', instance.id)
+        else:
+            create_unified_transaction_from_send(instance)
         # Award referral on first successful send by referred user
         try:
             # Consider only successful/confimed sends
@@ -599,7 +601,10 @@ def handle_send_transaction_save(sender, instance, created, **kwargs):
 def handle_payment_transaction_save(sender, instance, created, **kwargs):
     """Create/update unified transaction when PaymentTransaction is saved"""
     if instance.deleted_at is None:  # Only process non-deleted transactions
-        create_unified_transaction_from_payment(instance)
+        if unified_projector.deferred():
+            unified_projector.enqueue('payment', instance.id)
+        else:
+            create_unified_transaction_from_payment(instance)
         # Award referral on first successful merchant payment by referred user
         try:
             # Treat PAID/CONFIRMED as success
@@ -627,7 +632,10 @@ def handle_payment_transaction_save(sender, instance, created, **kwargs):
 def handle_p2p_trade_save(sender, instance, created, **kwargs):
     """Create/update unified transaction when P2PTrade is saved"""
     if instance.deleted_at is None:  # Only process non-deleted transactions
-        create_unified_transaction_from_p2p_trade(instance)
+        if unified_projector.deferred():
+            unified_projector.enqueue('p2p_trade', instance.id)
+        else:
+            create_unified_transaction_from_p2p_trade(instance)
         try:
             status = str(instance.status).upper()
             if status in ['CRYPTO_RELEASED', 'COMPLETED']:
@@ -666,14 +674,17 @@ def handle_conversion_save(sender, instance, created, **kwargs):
     """Create/update unified transaction when Conversion is saved"""
     # Conversions don't have deleted_at, check is_deleted instead
     if not instance.is_deleted:
-        create_unified_transaction_from_conversion(instance)
+        if unified_projector.deferred():
+            unified_projector.enqueue('conversion', instance.id)
+        else:
+            create_unified_transaction_from_conversion(instance)
         try:
             if (
                 instance.conversion_type == 'usdc_to_cusd'
                 and instance.status == 'COMPLETED'
                 and instance.actor_user_id
             ):
-                sync_referral_reward_for_event(
+                submit_referral_event(
                     instance.actor_user,
                     EventContext(
                         event="conversion_usdc_to_cusd",
@@ -693,7 +704,10 @@ def handle_payroll_item_save(sender, instance, created, **kwargs):
     if instance.deleted_at is None:  # Only process non-deleted transactions
         # Create unified transaction for CONFIRMED or SUBMITTED status
         if instance.status in ['CONFIRMED', 'SUBMITTED']:
-            create_unified_transaction_from_payroll(instance)
+            if unified_projector.deferred():
+                unified_projector.enqueue('payroll_item', instance.id)
+            else:
+                create_unified_transaction_from_payroll(instance)
             
             # Send notification to recipient when confirmed
             if instance.status == 'CONFIRMED':
@@ -795,45 +809,60 @@ def handle_payroll_item_save(sender, instance, created, **kwargs):
 def handle_send_transaction_soft_delete(sender, instance, **kwargs):
     """Handle soft delete of SendTransaction"""
     if instance.deleted_at is not None:
-        UnifiedTransactionTable.objects.filter(send_transaction=instance).update(
-            deleted_at=instance.deleted_at
-        )
+        if unified_projector.deferred():
+            unified_projector.enqueue('send', instance.id)
+        else:
+            UnifiedTransactionTable.objects.filter(send_transaction=instance).update(
+                deleted_at=instance.deleted_at
+            )
 
 
 @receiver(post_save, sender=PaymentTransaction)
 def handle_payment_transaction_soft_delete(sender, instance, **kwargs):
     """Handle soft delete of PaymentTransaction"""
     if instance.deleted_at is not None:
-        UnifiedTransactionTable.objects.filter(payment_transaction=instance).update(
-            deleted_at=instance.deleted_at
-        )
+        if unified_projector.deferred():
+            unified_projector.enqueue('payment', instance.id)
+        else:
+            UnifiedTransactionTable.objects.filter(payment_transaction=instance).update(
+                deleted_at=instance.deleted_at
+            )
 
 
 @receiver(post_save, sender=P2PTrade)
 def handle_p2p_trade_soft_delete(sender, instance, **kwargs):
     """Handle soft delete of P2PTrade"""
     if instance.deleted_at is not None:
-        UnifiedTransactionTable.objects.filter(p2p_trade=instance).update(
-            deleted_at=instance.deleted_at
-        )
+        if unified_projector.deferred():
+            unified_projector.enqueue('p2p_trade', instance.id)
+        else:
+            UnifiedTransactionTable.objects.filter(p2p_trade=instance).update(
+                deleted_at=instance.deleted_at
+            )
 
 
 @receiver(post_save, sender=Conversion)
 def handle_conversion_soft_delete(sender, instance, **kwargs):
     """Handle soft delete of Conversion"""
     if instance.is_deleted:
-        UnifiedTransactionTable.objects.filter(conversion=instance).update(
-            deleted_at=timezone.now()
-        )
+        if unified_projector.deferred():
+            unified_projector.enqueue('conversion', instance.id)
+        else:
+            UnifiedTransactionTable.objects.filter(conversion=instance).update(
+                deleted_at=timezone.now()
+            )
 
 
 @receiver(post_save, sender=PayrollItem)
 def handle_payroll_item_soft_delete(sender, instance, **kwargs):
     """Handle soft delete of PayrollItem"""
     if instance.deleted_at is not None:
-        UnifiedTransactionTable.objects.filter(payroll_item=instance).update(
-            deleted_at=instance.deleted_at
-        )
+        if unified_projector.deferred():
+            unified_projector.enqueue('payroll_item', instance.id)
+        else:
+            UnifiedTransactionTable.objects.filter(payroll_item=instance).update(
+                deleted_at=instance.deleted_at
+            )
     try:
         sync_payroll_run_status(instance.run_id)
     except Exception as e:
@@ -843,13 +872,19 @@ def handle_payroll_item_soft_delete(sender, instance, **kwargs):
 @receiver(post_save, sender=HumanitarianDonation)
 def handle_humanitarian_donation_save(sender, instance, created, **kwargs):
     """Create/update unified transaction when a humanitarian donation is confirmed."""
-    create_unified_transaction_from_humanitarian_donation(instance)
+    if unified_projector.deferred():
+        unified_projector.enqueue('humanitarian_donation', instance.id)
+    else:
+        create_unified_transaction_from_humanitarian_donation(instance)
 
 
 @receiver(post_save, sender=HumanitarianRelease)
 def handle_humanitarian_release_save(sender, instance, created, **kwargs):
     """Create/update unified transaction when a humanitarian release is visible to users."""
-    create_unified_transaction_from_humanitarian_release(instance)
+    if unified_projector.deferred():
+        unified_projector.enqueue('humanitarian_release', instance.id)
+    else:
+        create_unified_transaction_from_humanitarian_release(instance)
 
 
 def sync_payroll_run_status(run_id: int):
@@ -529,3 +529,25 @@ def rollup_funnel_events(target_date_str=None):
     except Exception as e:
         logger.error("Error rolling up funnel events: %s", str(e), exc_info=True)
         raise
+
+
+@shared_task(name='users.project_unified_transactions')
+@ensure_db_connection_closed
+def project_unified_transactions(max_batches=10):
+    """Drain the unified projection outbox (users.unified_projector).
+
+    A full batch means more is queued, so keep going — up to max_batches, the
+    rest is left to the next beat rather than letting one run overlap many.
+    """
+    from users.unified_projector import BATCH, project_pending
+
+    totals = {'claimed': 0, 'projected': 0, 'failed': 0}
+    for _ in range(max_batches):
+        out = project_pending()
+        for key in totals:
+            totals[key] += out[key]
+        if out['claimed'] < BATCH:
+            break
+    if totals['claimed']:
+        logger.info("unified projection: %(projected)s projected, %(failed)s failed of %(claimed)s", totals)
+    return totals
@@ -1622,3 +1622,71 @@ class PhoneLookupTestCase(TestCase):
         self.assertEqual(collider.phone_number, '573132587634')
         self.assertEqual(find_user_by_phone('57:3132587634'), self.user)
         self.assertEqual(find_user_by_phone('+573132587634'), self.user)
+
+
+class UnifiedProjectionTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from users.unified_projector import HEARTBEAT_KEY
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self._cache, self._heartbeat = cache, HEARTBEAT_KEY
+        User = get_user_model()
+        self.sender = User.objects.create(username='proj-sender', firebase_uid='proj-sender-uid')
+        self.recipient = User.objects.create(username='proj-recipient', firebase_uid='proj-recipient-uid')
+
+    def _send(self):
+        from decimal import Decimal
+        from send.models import SendTransaction
+
+        return SendTransaction.objects.create(
+            sender_user=self.sender,
+            recipient_user=self.recipient,
+            sender_address='A' * 58,
+            recipient_address='B' * 58,
+            amount=Decimal('5'),
+            token_type='CUSD',
+            status='PENDING',
+        )
+
+    def test_saves_project_inline_while_no_projector_runs(self):
+        from users.models_unified import UnifiedProjectionOutbox, UnifiedTransactionTable
+
+        send = self._send()
+        self.assertTrue(UnifiedTransactionTable.objects.filter(send_transaction=send).exists())
+        self.assertFalse(UnifiedProjectionOutbox.objects.exists())
+
+    def test_outbox_records_are_collapsed_and_projected_in_one_pass(self):
+        from users.models_unified import UnifiedProjectionOutbox, UnifiedTransactionTable
+        from users.unified_projector import project_pending, projection_lag
+
+        self._cache.set(self._heartbeat, 1, 60)
+        send = self._send()
+        send.status = 'CONFIRMED'
+        send.save()
+        self.assertFalse(UnifiedTransactionTable.objects.filter(send_transaction=send).exists())
+        self.assertEqual(projection_lag()['pending'], 2)
+
+        out = project_pending()
+
+        self.assertEqual(out, {'claimed': 2, 'projected': 1, 'failed': 0})
+        self.assertEqual(UnifiedTransactionTable.objects.get(send_transaction=send).status, 'CONFIRMED')
+        self.assertFalse(UnifiedProjectionOutbox.objects.exists())
+
+        send.soft_delete()
+        project_pending()
+        self.assertIsNotNone(UnifiedTransactionTable.objects.get(send_transaction=send).deleted_at)
+
+    def test_a_failing_projection_stays_queued(self):
+        from users.models_unified import UnifiedProjectionOutbox
+        from users.unified_projector import project_pending
+
+        self._cache.set(self._heartbeat, 1, 60)
+        send = self._send()
+        with patch('users.unified_projector._project_one', side_effect=RuntimeError('boom')):
+            out = project_pending()
+
+        self.assertEqual(out['failed'], 1)
+        record = UnifiedProjectionOutbox.objects.get(source_type='send', source_id=send.id)
+        self.assertEqual(record.attempts, 1)
@@ -0,0 +1,208 @@
+"""
+Unified transaction projection — source changes recorded, projected in batches.
+
+users.signals projected every save of a send, payment, P2P trade,
+conversion, payroll item or humanitarian donation/release straight into
+UnifiedTransactionTable inside the writer's own request or task: an
+update_or_create (a select and a write), the foreign keys it loads one by
+one, the follow-up .update() calls, and on a soft delete a second
+receiver's .update(). Send confirmation and payroll settle paid all of it
+on their hot path for a read model nobody in that request is waiting on.
+
+While the projector runs, a source save instead appends ONE
+UnifiedProjectionOutbox row (source type + id) inside the save's own
+transaction — a committed change always has its record, a rolled-back one
+never does — and project_pending(), run every few seconds by the
+users.project_unified_transactions beat task, applies them:
+
+  - claims up to BATCH records with SKIP LOCKED, so overlapping runs split
+    the queue instead of projecting the same rows twice;
+  - collapses repeats: a row saved five times is projected once, from its
+    state at projection time. The create_unified_transaction_from_* writers
+    are update_or_create upserts, so projecting again is always harmless;
+  - loads each source type's rows in one query with their relations joined
+    and hands them to those same writers — a deleted source gets its
+    unified row's deleted_at, a conversion also feeds
+    UnifiedUSDCTransactionTable, exactly as the receivers did;
+  - commits the batch once, each row under its own savepoint.
+
+A record whose projection raises stays queued with attempts + 1 and is
+retried on the next pass, up to MAX_ATTEMPTS; projection_lag() (pending,
+oldest age, failing) is cached under LAG_KEY each pass and logged when it
+grows. If the projector stops heartbeating, the signals project inline
+again, and whatever was already queued is applied when it comes back.
+
+Backfills (migrate_unified_transactions) and replays
+(replay_unified_projection) go through project_sources() — the same bulk
+path, fed ids instead of outbox records.
+"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_KEY = 'unified_projector_alive'
+# Comfortably above the beat interval, so one slow pass does not flip the
+# signals back to inline projection.
+HEARTBEAT_TTL = 60
+LAG_KEY = 'unified_projection_lag'
+BATCH = int(getattr(settings, 'UNIFIED_PROJECTION_BATCH', 500))
+# A record that has failed this often is left for an operator
+# (replay_unified_projection --retry-failed) instead of retried every pass.
+MAX_ATTEMPTS = 10
+LAG_WARN_SECONDS = 120
+
+
+def projector_alive() -> bool:
+    return bool(cache.get(HEARTBEAT_KEY))
+
+
+def deferred() -> bool:
+    """True when a source save should only be recorded in the outbox."""
+    return bool(getattr(settings, 'UNIFIED_PROJECTION_ASYNC', True)) and projector_alive()
+
+
+def enqueue(source_type: str, source_id: int) -> None:
+    from .models_unified import UnifiedProjectionOutbox
+
+    UnifiedProjectionOutbox.objects.create(source_type=source_type, source_id=source_id)
+
+
+def _sources() -> dict:
+    """source_type -> (model, relations to join, UnifiedTransactionTable FK, writer)."""
+    from conversion.models import Conversion
+    from humanitarian.models import HumanitarianDonation, HumanitarianRelease
+    from p2p_exchange.models import P2PTrade
+    from payments.models import PaymentTransaction
+    from payroll.models import PayrollItem
+    from send.models import SendTransaction
+
+    from . import signals
+
+    return {
+        'send': (SendTransaction,
+                 ('sender_user', 'recipient_user', 'sender_business', 'recipient_business'),
+                 'send_transaction', signals.create_unified_transaction_from_send),
+        'payment': (PaymentTransaction,
+                    ('payer_user', 'payer_business', 'payer_account', 'merchant_account_user',
+                     'merchant_business', 'merchant_account', 'invoice'),
+                    'payment_transaction', signals.create_unified_transaction_from_payment),
+        'p2p_trade': (P2PTrade,
+                      ('buyer_user', 'buyer_business', 'seller_user', 'seller_business',
+                       'offer', 'payment_method'),
+                      'p2p_trade', signals.create_unified_transaction_from_p2p_trade),
+        'conversion': (Conversion, ('actor_user', 'actor_business'),
+                       'conversion', signals.create_unified_transaction_from_conversion),
+        'payroll_item': (PayrollItem, ('run__business', 'recipient_user', 'recipient_account'),
+                         'payroll_item', signals.create_unified_transaction_from_payroll),
+        'humanitarian_donation': (HumanitarianDonation, ('campaign', 'donor_user'),
+                                  'humanitarian_donation',
+                                  signals.create_unified_transaction_from_humanitarian_donation),
+        'humanitarian_release': (HumanitarianRelease,
+                                 ('campaign', 'donation__donor_user', 'volunteer_application__user'),
+                                 'humanitarian_release',
+                                 signals.create_unified_transaction_from_humanitarian_release),
+    }
+
+
+def _project_one(source_type, obj, fk, writer) -> None:
+    from usdc_transactions.models_unified import UnifiedUSDCTransactionTable
+    from usdc_transactions.signals import create_unified_usdc_transaction_from_conversion
+
+    from .models_unified import UnifiedTransactionTable
+
+    if getattr(obj, 'is_deleted', False):
+        UnifiedTransactionTable.objects.filter(**{fk: obj}).update(
+            deleted_at=obj.deleted_at or timezone.now())
+        if source_type == 'conversion':
+            UnifiedUSDCTransactionTable.objects.filter(conversion=obj).delete()
+        return
+    writer(obj)
+    if source_type == 'conversion':
+        create_unified_usdc_transaction_from_conversion(obj)
+
+
+def project_sources(source_type: str, ids) -> dict:
+    """Project the `source_type` rows with these ids; returns
+    {'projected': n, 'failed': {id: error}, 'missing': n}. Ids whose row no
+    longer exists are counted as missing — a hard-deleted source took its
+    unified row with it (CASCADE)."""
+    model, related, fk, writer = _sources()[source_type]
+    manager = getattr(model, 'all_objects', model.objects)
+    ids = set(ids)
+    rows = manager.select_related(*related).filter(id__in=ids)
+    out = {'projected': 0, 'failed': {}, 'missing': 0}
+    seen = set()
+    for obj in rows:
+        seen.add(obj.id)
+        try:
+            with transaction.atomic():
+                _project_one(source_type, obj, fk, writer)
+        except Exception as exc:  # noqa: BLE001 — one bad row must not stall the batch
+            logger.exception('unified projection failed for %s %s', source_type, obj.id)
+            out['failed'][obj.id] = str(exc)[:200]
+            continue
+        out['projected'] += 1
+    out['missing'] = len(ids - seen)
+    return out
+
+
+def project_pending(limit: int = BATCH) -> dict:
+    """One pass over the outbox; returns counts for the log."""
+    from .models_unified import UnifiedProjectionOutbox
+
+    out = {'claimed': 0, 'projected': 0, 'failed': 0}
+    with transaction.atomic():
+        claimed = list(
+            UnifiedProjectionOutbox.objects.select_for_update(skip_locked=True)
+            .filter(attempts__lt=MAX_ATTEMPTS)
+            .order_by('id')[:limit]
+        )
+        out['claimed'] = len(claimed)
+        by_type = defaultdict(set)
+        for record in claimed:
+            by_type[record.source_type].add(record.source_id)
+
+        failed = set()
+        for source_type, ids in by_type.items():
+            result = project_sources(source_type, ids)
+            out['projected'] += result['projected']
+            failed.update((source_type, source_id) for source_id in result['failed'])
+
+        done = [r.id for r in claimed if (r.source_type, r.source_id) not in failed]
+        retry = [r.id for r in claimed if (r.source_type, r.source_id) in failed]
+        UnifiedProjectionOutbox.objects.filter(id__in=done).delete()
+        if retry:
+            UnifiedProjectionOutbox.objects.filter(id__in=retry).update(attempts=F('attempts') + 1)
+        out['failed'] = len(failed)
+
+    cache.set(HEARTBEAT_KEY, 1, HEARTBEAT_TTL)
+    lag = projection_lag()
+    cache.set(LAG_KEY, lag, HEARTBEAT_TTL)
+    if lag['oldest_age_seconds'] > LAG_WARN_SECONDS or lag['failing']:
+        logger.warning('unified projection lagging: %(pending)s pending, oldest %(oldest_age_seconds)ss, '
+                       '%(failing)s failing', lag)
+    return out
+
+
+def projection_lag() -> dict:
+    """{'pending', 'oldest_age_seconds', 'failing'} for the outbox as it stands."""
+    from .models_unified import UnifiedProjectionOutbox
+
+    agg = UnifiedProjectionOutbox.objects.aggregate(
+        pending=Count('id'),
+        oldest=Min('created_at'),
+        failing=Count('id', filter=Q(attempts__gt=0)),
+    )
+    oldest = agg['oldest']
+    return {
+        'pending': agg['pending'],
+        'oldest_age_seconds': int((timezone.now() - oldest).total_seconds()) if oldest else 0,
+        'failing': agg['failing'],
+    }